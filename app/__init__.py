@@ -1,5 +1,6 @@
 from flask import Flask
-from app.extensions import db, jwt
+from app.extensions import db, jwt, migrate
+from app.utils.motores import configurar_motores, registrar_replica
 import config
 
 def create_app():
@@ -14,10 +15,32 @@ def create_app():
     app.config['JWT_COOKIE_SECURE'] = config.JWT_COOKIE_SECURE
     app.config['JWT_COOKIE_CSRF_PROTECT'] = config.JWT_COOKIE_CSRF_PROTECT
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = config.JWT_ACCESS_TOKEN_EXPIRES
+    app.config['TOKEN_VERSION_TTL'] = config.TOKEN_VERSION_TTL
+    app.config['PASSWORD_HASH_METODO'] = config.PASSWORD_HASH_METODO
+    app.config['HASH_HILOS'] = config.HASH_HILOS
+    app.config['HASH_COLA_MAXIMA'] = config.HASH_COLA_MAXIMA
+    app.config['HASH_ESPERA_SEGUNDOS'] = config.HASH_ESPERA_SEGUNDOS
+    app.config['ESTRATEGIA_ASIGNACION'] = config.ESTRATEGIA_ASIGNACION
+    app.config['INDICE_ESPACIOS_TTL'] = config.INDICE_ESPACIOS_TTL
+    app.config['TIPOS_TTL'] = config.TIPOS_TTL
+    app.config['TARIFA_TTL'] = config.TARIFA_TTL
+    app.config['REPORTES_UTC_OFFSET_MINUTOS'] = config.REPORTES_UTC_OFFSET_MINUTOS
+    app.config['EVENTOS_INTERVALO_SEGUNDOS'] = config.EVENTOS_INTERVALO_SEGUNDOS
+    app.config['EVENTOS_DURACION_MAXIMA'] = config.EVENTOS_DURACION_MAXIMA
+    app.config['EVENTOS_MAX_FLUJOS'] = config.EVENTOS_MAX_FLUJOS
+    app.config['REPORTES_CACHE_TTL'] = config.REPORTES_CACHE_TTL
+    app.config['REPORTES_CACHE_STALE'] = config.REPORTES_CACHE_STALE
+    app.config['REPORTES_CACHE_MAX_ENTRADAS'] = config.REPORTES_CACHE_MAX_ENTRADAS
+    app.config['REPORTES_CACHE_MAX_BYTES'] = config.REPORTES_CACHE_MAX_BYTES
+    
+    # Motores: perfil de pool/timeouts y réplica de solo lectura (si hay)
+    configurar_motores(app)
     
     # Inicializar extensiones
     db.init_app(app)
+    registrar_replica(app)
     jwt.init_app(app)
+    migrate.init_app(app, db)
     
     # Registrar blueprints
     from app.routes.auth_routes import login_bp
@@ -28,6 +51,7 @@ def create_app():
     from app.routes.transacciones_routes import transacciones_bp
     from app.routes.reportes_routes import reportes_bp
     from app.routes.usuarios_routes import usuarios_bp
+    from app.routes.tarifas_routes import tarifas_bp
     
     app.register_blueprint(login_bp, url_prefix='/auth')
     app.register_blueprint(dashboard_bp)
@@ -37,25 +61,15 @@ def create_app():
     app.register_blueprint(transacciones_bp)
     app.register_blueprint(reportes_bp)
     app.register_blueprint(usuarios_bp)
+    app.register_blueprint(tarifas_bp)
     
-    # Crear tablas
-    with app.app_context():
-        db.create_all()
-        
-        # Crear usuario admin si no existe
-        from app.models.usuario import Usuario
-        from werkzeug.security import generate_password_hash
-        
-        admin = Usuario.query.filter_by(nombre_usuario='admin').first()
-        if not admin:
-            admin = Usuario(
-                nombre_usuario='admin',
-                contraseña=generate_password_hash('admin'),
-                rol='admin'
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("✅ Usuario admin creado")
+    # Comandos de consola (flask base ..., flask cubo ..., flask ocupacion ...)
+    # El esquema y el usuario admin los crea `flask base inicializar` (fase
+    # de release), no cada worker al arrancar: construir la app no toca la BD
+    from app.cli import base_cli, cubo_cli, ocupacion_cli
+    app.cli.add_command(base_cli)
+    app.cli.add_command(cubo_cli)
+    app.cli.add_command(ocupacion_cli)
     
     return app
 
@@ -0,0 +1,106 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+
+
+base_cli = click.Group('base', help='Esquema y datos iniciales de la base')
+
+
+def crear_admin(password, nombre_usuario='admin'):
+    """
+    Crea el usuario admin si no existe (con commit). True si lo creó; si
+    otro proceso lo creó al mismo tiempo, la restricción única lo frena y
+    devuelve False.
+    """
+    from app.models.usuario import Usuario
+    from app.utils.contrasenas import generar_hash
+
+    if Usuario.query.filter_by(nombre_usuario=nombre_usuario).first():
+        return False
+
+    db.session.add(Usuario(nombre_usuario=nombre_usuario, contraseña=generar_hash(password), rol='admin'))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+@base_cli.command('inicializar')
+@click.option('--admin-password', envvar='ADMIN_PASSWORD', default='admin', show_default=True,
+              help='Contraseña del usuario admin si hay que crearlo (o ADMIN_PASSWORD)')
+@with_appcontext
+def inicializar_base(admin_password):
+    """Aplica las migraciones pendientes y crea el usuario admin si no existe"""
+    import flask_migrate
+
+    tablas = set(db.inspect(db.engine).get_table_names())
+    if 'usuarios' in tablas and 'alembic_version' not in tablas:
+        raise click.ClickException(
+            "❌ La base se creó con db.create_all(): marcarla con "
+            "`flask db stamp 0001_esquema_base` y volver a inicializar"
+        )
+
+    try:
+        flask_migrate.upgrade()
+        creado = crear_admin(admin_password)
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException(f"❌ Error al inicializar la base: {e}")
+
+    click.echo("✅ Usuario admin creado" if creado else "✅ Usuario admin ya existía")
+    click.echo("✅ Base inicializada")
+
+
+cubo_cli = click.Group('cubo', help='Cubo de ingresos de los reportes')
+
+
+@cubo_cli.command('reconstruir')
+@click.option('--desde', default=None, help='Fecha local inicial AAAA-MM-DD (por defecto, todo el historial)')
+@click.option('--hasta', default=None, help='Fecha local final AAAA-MM-DD, inclusive')
+@with_appcontext
+def reconstruir_cubo(desde, hasta):
+    """Recalcula el cubo de ingresos desde los tickets finalizados"""
+    from app.utils import cubo
+
+    try:
+        desde = cubo.leer_fecha(desde, 'desde') if desde else None
+        hasta = cubo.leer_fecha(hasta, 'hasta') if hasta else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    try:
+        procesados = cubo.reconstruir(desde, hasta)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException(f"❌ Error al reconstruir el cubo: {e}")
+
+    click.echo(f"✅ Cubo reconstruido: {procesados} tickets")
+
+
+ocupacion_cli = click.Group('ocupacion', help='Contadores de ocupación de espacios')
+
+
+@ocupacion_cli.command('reconciliar')
+@with_appcontext
+def reconciliar_ocupacion():
+    """
+    Recalcula los contadores de ocupación desde los espacios. Pensado
+    como tarea programada fuera de hora pico: en PostgreSQL las
+    escrituras de espacios esperan mientras cuenta.
+    """
+    from app.utils import ocupacion
+
+    try:
+        desvios = ocupacion.reconciliar()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise click.ClickException(f"❌ Error al reconciliar la ocupación: {e}")
+
+    for (seccion, tipo, estado), (contador, real) in sorted(desvios.items()):
+        click.echo(f"  {seccion or '-'}/{tipo}/{estado}: {contador} -> {real}")
+    click.echo(f"✅ Ocupación reconciliada: {len(desvios)} contadores corregidos")
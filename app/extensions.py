@@ -1,5 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+from app.utils.motores import SesionRuteada
 
-db = SQLAlchemy()
-jwt = JWTManager()
\ No newline at end of file
+# Sesión que envía las lecturas de los endpoints de reportes a la réplica (app/utils/motores.py)
+db = SQLAlchemy(session_options={'class_': SesionRuteada})
+jwt = JWTManager()
+migrate = Migrate()
\ No newline at end of file
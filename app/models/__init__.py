@@ -6,6 +6,11 @@ from .transaccion import Transaccion
 from .historial import Historial
 from .reporte import Reporte
 from .usuario import Usuario
+from .tarifa import Tarifa
+from .cubo_ingresos import CuboIngresos
+from .contador_ocupacion import ContadorOcupacion
+from .version_datos import CambioVersion, VersionDatos
+from .tipo_espacio import TipoEspacio
 
 #Lista para importar en create_app()
 models = [
@@ -17,4 +22,10 @@ models = [
     Historial,
     Reporte,
     Usuario,
+    Tarifa,
+    CuboIngresos,
+    ContadorOcupacion,
+    VersionDatos,
+    CambioVersion,
+    TipoEspacio,
 ]
\ No newline at end of file
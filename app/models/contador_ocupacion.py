@@ -0,0 +1,161 @@
+from sqlalchemy import DDL, event
+from app.extensions import db
+
+class ContadorOcupacion(db.Model):
+    """
+    Cantidad de espacios activos por (sección, tipo, estado). La mantienen
+    triggers sobre `espacios` en la misma transacción de cada cambio
+    (ORM o SQL directo) y se corrige con `flask ocupacion reconciliar`
+    (app/utils/ocupacion.py).
+    """
+    __tablename__ = 'contadores_ocupacion'
+
+    seccion = db.Column(db.String(5), primary_key=True, default='')  # '' si el espacio no tiene sección
+    tipo = db.Column(db.String(20), primary_key=True)
+    estado = db.Column(db.String(20), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContadorOcupacion {self.seccion}/{self.tipo}/{self.estado}: {self.cantidad}>'
+
+
+# ===== TRIGGERS =====
+# Solo cuentan los espacios activos. Un cambio de estado resta en la celda
+# anterior y suma en la nueva; insertar o borrar un espacio ajusta una sola.
+
+TRIGGERS_SQLITE = (
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_espacios_ocupacion_insert
+    AFTER INSERT ON espacios WHEN NEW.activo
+    BEGIN
+        INSERT OR IGNORE INTO contadores_ocupacion (seccion, tipo, estado, cantidad)
+        VALUES (COALESCE(NEW.seccion, ''), NEW.tipo, NEW.estado, 0);
+        UPDATE contadores_ocupacion SET cantidad = cantidad + 1
+        WHERE seccion = COALESCE(NEW.seccion, '') AND tipo = NEW.tipo AND estado = NEW.estado;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_espacios_ocupacion_delete
+    AFTER DELETE ON espacios WHEN OLD.activo
+    BEGIN
+        UPDATE contadores_ocupacion SET cantidad = cantidad - 1
+        WHERE seccion = COALESCE(OLD.seccion, '') AND tipo = OLD.tipo AND estado = OLD.estado;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tr_espacios_ocupacion_update
+    AFTER UPDATE OF seccion, tipo, estado, activo ON espacios
+    WHEN (OLD.activo OR NEW.activo) AND (
+        OLD.seccion IS NOT NEW.seccion OR OLD.tipo IS NOT NEW.tipo
+        OR OLD.estado IS NOT NEW.estado OR OLD.activo IS NOT NEW.activo
+    )
+    BEGIN
+        UPDATE contadores_ocupacion SET cantidad = cantidad - 1
+        WHERE OLD.activo
+          AND seccion = COALESCE(OLD.seccion, '') AND tipo = OLD.tipo AND estado = OLD.estado;
+        INSERT OR IGNORE INTO contadores_ocupacion (seccion, tipo, estado, cantidad)
+        SELECT COALESCE(NEW.seccion, ''), NEW.tipo, NEW.estado, 0 WHERE NEW.activo;
+        UPDATE contadores_ocupacion SET cantidad = cantidad + 1
+        WHERE NEW.activo
+          AND seccion = COALESCE(NEW.seccion, '') AND tipo = NEW.tipo AND estado = NEW.estado;
+    END
+    """,
+)
+
+# En PostgreSQL las dos celdas de un cambio se bloquean siempre en el mismo
+# orden (la menor primero): un ingreso (disponible -> ocupado) y una salida
+# (ocupado -> disponible) concurrentes no se bloquean mutuamente.
+TRIGGERS_POSTGRESQL = (
+    """
+    CREATE OR REPLACE FUNCTION fn_ajustar_ocupacion(p_seccion varchar, p_tipo varchar, p_estado varchar, p_delta integer)
+    RETURNS void AS $$
+    BEGIN
+        INSERT INTO contadores_ocupacion (seccion, tipo, estado, cantidad)
+        VALUES (COALESCE(p_seccion, ''), p_tipo, p_estado, p_delta)
+        ON CONFLICT (seccion, tipo, estado)
+        DO UPDATE SET cantidad = contadores_ocupacion.cantidad + EXCLUDED.cantidad;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION fn_espacios_ocupacion() RETURNS trigger AS $$
+    DECLARE
+        resta boolean := false;
+        suma boolean := false;
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            resta := COALESCE(OLD.activo, false);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            suma := COALESCE(NEW.activo, false);
+        END IF;
+
+        IF TG_OP = 'UPDATE' AND resta AND suma
+           AND (COALESCE(OLD.seccion, ''), OLD.tipo, OLD.estado)
+               = (COALESCE(NEW.seccion, ''), NEW.tipo, NEW.estado) THEN
+            RETURN NULL;
+        END IF;
+
+        IF resta AND suma
+           AND (COALESCE(NEW.seccion, ''), NEW.tipo, NEW.estado)
+               < (COALESCE(OLD.seccion, ''), OLD.tipo, OLD.estado) THEN
+            PERFORM fn_ajustar_ocupacion(NEW.seccion, NEW.tipo, NEW.estado, 1);
+            PERFORM fn_ajustar_ocupacion(OLD.seccion, OLD.tipo, OLD.estado, -1);
+            RETURN NULL;
+        END IF;
+
+        IF resta THEN
+            PERFORM fn_ajustar_ocupacion(OLD.seccion, OLD.tipo, OLD.estado, -1);
+        END IF;
+        IF suma THEN
+            PERFORM fn_ajustar_ocupacion(NEW.seccion, NEW.tipo, NEW.estado, 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tr_espacios_ocupacion ON espacios",
+    """
+    CREATE TRIGGER tr_espacios_ocupacion
+    AFTER INSERT OR DELETE OR UPDATE OF seccion, tipo, estado, activo ON espacios
+    FOR EACH ROW EXECUTE FUNCTION fn_espacios_ocupacion()
+    """,
+)
+
+ELIMINAR_TRIGGERS = {
+    'sqlite': (
+        "DROP TRIGGER IF EXISTS tr_espacios_ocupacion_insert",
+        "DROP TRIGGER IF EXISTS tr_espacios_ocupacion_delete",
+        "DROP TRIGGER IF EXISTS tr_espacios_ocupacion_update",
+    ),
+    'postgresql': (
+        "DROP TRIGGER IF EXISTS tr_espacios_ocupacion ON espacios",
+        "DROP FUNCTION IF EXISTS fn_espacios_ocupacion()",
+        "DROP FUNCTION IF EXISTS fn_ajustar_ocupacion(varchar, varchar, varchar, integer)",
+    ),
+}
+
+
+# Conteo inicial desde los espacios existentes (tabla de contadores vacía)
+SEMBRAR = """
+    INSERT INTO contadores_ocupacion (seccion, tipo, estado, cantidad)
+    SELECT COALESCE(seccion, ''), tipo, estado, COUNT(*)
+    FROM espacios WHERE activo
+    GROUP BY COALESCE(seccion, ''), tipo, estado
+"""
+
+
+def instalar_triggers(conexion):
+    """Crea (o reemplaza) los triggers de ocupación en el dialecto de la conexión"""
+    sentencias = {'sqlite': TRIGGERS_SQLITE, 'postgresql': TRIGGERS_POSTGRESQL}.get(conexion.dialect.name, ())
+    for sentencia in sentencias:
+        conexion.execute(DDL(sentencia))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _crear_triggers(metadata, conexion, tables=(), **kw):
+    # Solo cuando create_all crea la tabla de contadores (con migraciones,
+    # los instala 0004_contadores_ocupacion)
+    if any(tabla.name == ContadorOcupacion.__tablename__ for tabla in tables):
+        instalar_triggers(conexion)
+        conexion.execute(DDL(SEMBRAR))
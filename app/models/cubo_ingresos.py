@@ -0,0 +1,35 @@
+from app.extensions import db
+
+class CuboIngresos(db.Model):
+    """
+    Hechos pre-agregados de tickets finalizados, por hora local de salida.
+    Se actualiza en la misma transacción que finaliza el ticket
+    (app/utils/cubo.py) y se reconstruye con `flask cubo reconstruir`.
+    """
+    __tablename__ = 'cubo_ingresos'
+
+    # Una fila por celda: el upsert de cada salida suma sobre ella. El
+    # índice único (fecha primero) sirve también a los rangos de fechas.
+    __table_args__ = (
+        db.UniqueConstraint(
+            'fecha', 'hora', 'tipo_vehiculo', 'metodo_pago', 'seccion',
+            name='uq_cubo_ingresos_celda'
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Dimensiones ('' cuando el ticket no tiene el dato)
+    fecha = db.Column(db.Date, nullable=False)  # fecha local de salida
+    hora = db.Column(db.Integer, nullable=False)  # 0-23, hora local
+    tipo_vehiculo = db.Column(db.String(20), nullable=False, default='')
+    metodo_pago = db.Column(db.String(20), nullable=False, default='')
+    seccion = db.Column(db.String(5), nullable=False, default='')  # lote / sección del espacio
+    
+    # Medidas
+    transacciones = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)
+    segundos_estancia = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<CuboIngresos {self.fecha} {self.hora:02d}h {self.tipo_vehiculo}/{self.metodo_pago}/{self.seccion}>'
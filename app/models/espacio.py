@@ -5,6 +5,16 @@ from datetime import datetime, timezone
 class Espacio(db.Model):
     __tablename__ = 'espacios'
     
+    # Filtros de asignación y conteos por tipo/estado
+    __table_args__ = (
+        db.Index('ix_espacios_asignacion', 'tipo', 'estado', 'activo', 'seccion', 'numero'),
+        # Solo PostgreSQL: índice parcial con los espacios libres en orden de asignación
+        db.Index(
+            'ix_espacios_disponibles', 'tipo', 'seccion', 'numero',
+            postgresql_where=db.text("estado = 'disponible' AND activo")
+        ).ddl_if(dialect='postgresql'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     numero = db.Column(db.String(10), unique=True, nullable=False)
     tipo = db.Column(db.String(20), nullable=False, default='regular')
@@ -0,0 +1,30 @@
+from app.extensions import db
+from datetime import datetime, timezone
+
+class Tarifa(db.Model):
+    __tablename__ = 'tarifas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, unique=True, nullable=False)
+    descripcion = db.Column(db.String(255), nullable=True)
+    
+    # Esquema de cobro (bandas horarias, topes, gracia, recargos...)
+    # Ver app/utils/tarifas.py para el formato
+    definicion = db.Column(db.JSON, nullable=False)
+    
+    # Solo una versión vigente a la vez
+    activa = db.Column(db.Boolean, default=False, nullable=False)
+    fecha_creacion = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f'<Tarifa v{self.version}{" (activa)" if self.activa else ""}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'version': self.version,
+            'descripcion': self.descripcion,
+            'definicion': self.definicion,
+            'activa': self.activa,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None
+        }
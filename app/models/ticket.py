@@ -3,7 +3,35 @@ from datetime import datetime, timezone
 
 class Ticket(db.Model):
     __tablename__ = 'tickets'
-    
+
+    # Un vehículo y un espacio solo pueden tener UN ticket activo a la vez.
+    # Índices únicos parciales: la base de datos rechaza la doble asignación
+    # aunque dos garitas ingresen en el mismo instante.
+    __table_args__ = (
+        db.Index(
+            'uq_tickets_vehiculo_activo', 'vehiculo_id',
+            unique=True,
+            sqlite_where=db.text("estado = 'activo'"),
+            postgresql_where=db.text("estado = 'activo'")
+        ),
+        db.Index(
+            'uq_tickets_espacio_activo', 'espacio_id',
+            unique=True,
+            sqlite_where=db.text("estado = 'activo'"),
+            postgresql_where=db.text("estado = 'activo'")
+        ),
+        # Consultas frecuentes: finalizados por fecha de salida (transacciones,
+        # reportes), tickets de un vehículo y listados por fecha de entrada
+        db.Index('ix_tickets_estado_fecha_salida', 'estado', 'fecha_salida'),
+        db.Index('ix_tickets_vehiculo_estado', 'vehiculo_id', 'estado'),
+        db.Index('ix_tickets_fecha_entrada', 'fecha_entrada'),
+        # Solo PostgreSQL: índice parcial pequeño con los tickets activos
+        db.Index(
+            'ix_tickets_activos_fecha_entrada', 'fecha_entrada',
+            postgresql_where=db.text("estado = 'activo'")
+        ).ddl_if(dialect='postgresql'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     
     # Relaciones
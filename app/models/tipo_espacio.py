@@ -0,0 +1,66 @@
+from sqlalchemy import event
+from app.extensions import db
+
+class TipoEspacio(db.Model):
+    """
+    Catálogo de tipos de espacio / vehículo (regular, moto, discapacitado,
+    carga eléctrica...). Las estadísticas por tipo, la asignación y la
+    tarifa por defecto lo leen de aquí (caché por proceso en
+    app/utils/tipos.py); `espacios.tipo` y `tickets.tipo_vehiculo` guardan
+    el código.
+    """
+    __tablename__ = 'tipos_espacio'
+
+    codigo = db.Column(db.String(20), primary_key=True)
+    nombre = db.Column(db.String(50), nullable=False)
+    orden = db.Column(db.Integer, nullable=False, default=0)  # orden en listados y reportes
+
+    # Tipo que se asigna a vehículos de un tipo desconocido (uno solo)
+    por_defecto = db.Column(db.Boolean, nullable=False, default=False)
+    # Asignación por sección y número (si no, solo por número)
+    orden_por_seccion = db.Column(db.Boolean, nullable=False, default=False)
+    # Tarifa por hora cuando no hay ninguna tarifa publicada
+    tarifa_hora = db.Column(db.Float, nullable=True)
+
+    activo = db.Column(db.Boolean, nullable=False, default=True)
+
+    def __repr__(self):
+        return f'<TipoEspacio {self.codigo}>'
+
+    def to_dict(self):
+        return {
+            'codigo': self.codigo,
+            'nombre': self.nombre,
+            'orden': self.orden,
+            'por_defecto': self.por_defecto,
+            'orden_por_seccion': self.orden_por_seccion,
+            'tarifa_hora': self.tarifa_hora,
+            'activo': self.activo
+        }
+
+
+# Tipos con los que nace el catálogo (los que antes estaban fijos en el código)
+TIPOS_INICIALES = (
+    {'codigo': 'regular', 'nombre': 'Regular', 'orden': 1, 'por_defecto': True,
+     'orden_por_seccion': True, 'tarifa_hora': 50.0, 'activo': True},
+    {'codigo': 'moto', 'nombre': 'Moto', 'orden': 2, 'por_defecto': False,
+     'orden_por_seccion': False, 'tarifa_hora': 25.0, 'activo': True},
+    {'codigo': 'discapacitado', 'nombre': 'Discapacitado', 'orden': 3, 'por_defecto': False,
+     'orden_por_seccion': False, 'tarifa_hora': 80.0, 'activo': True},
+)
+
+
+def sembrar_tipos(conexion):
+    """Inserta los tipos iniciales que falten"""
+    existentes = set(conexion.execute(db.select(TipoEspacio.codigo)).scalars())
+    nuevos = [tipo for tipo in TIPOS_INICIALES if tipo['codigo'] not in existentes]
+    if nuevos:
+        conexion.execute(db.insert(TipoEspacio), nuevos)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _sembrar(metadata, conexion, tables=(), **kw):
+    # Solo cuando create_all crea el catálogo (con migraciones, lo siembra
+    # 0007_tipos_espacio)
+    if any(tabla.name == TipoEspacio.__tablename__ for tabla in tables):
+        sembrar_tipos(conexion)
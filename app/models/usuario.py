@@ -7,6 +7,8 @@ class Usuario(db.Model):
     nombre_usuario = db.Column(db.String(80), unique=True, nullable=False)
     contraseña = db.Column(db.String(200), nullable=False)  # ⭐ Este es el campo
     rol = db.Column(db.String(20), nullable=False, default='usuario')
+    # Sube al cambiar rol o contraseña: invalida los tokens emitidos antes (app/utils/autorizacion.py)
+    token_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     def __repr__(self):
         return f'<Usuario {self.nombre_usuario}>'
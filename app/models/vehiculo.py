@@ -4,6 +4,11 @@ from datetime import datetime, timezone
 class Vehiculo(db.Model):
     __tablename__ = 'vehiculos'
     
+    # Listado de vehículos activos ordenado por fecha de registro
+    __table_args__ = (
+        db.Index('ix_vehiculos_activo_fecha_registro', 'activo', 'fecha_registro'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     placa = db.Column(db.String(20), unique=True, nullable=False)
     
@@ -0,0 +1,152 @@
+from sqlalchemy import DDL, event
+from app.extensions import db
+
+class VersionDatos(db.Model):
+    """
+    Versión de cada familia de datos (tickets, espacios, vehículos,
+    ingresos). La suben triggers en la misma transacción de cada
+    escritura; las rutas la usan como ETag (app/utils/versiones.py) y
+    para invalidar la caché de reportes (app/utils/cache_reportes.py).
+
+    La versión vigente es `version` más los cambios pendientes de la
+    familia en versiones_datos_cambios (ver CambioVersion).
+    """
+    __tablename__ = 'versiones_datos'
+
+    familia = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+
+    def __repr__(self):
+        return f'<VersionDatos {self.familia}: {self.version}>'
+
+
+class CambioVersion(db.Model):
+    """
+    Un cambio pendiente de sumar a la versión de su familia. En PostgreSQL
+    los triggers insertan aquí en vez de actualizar versiones_datos: las
+    escrituras concurrentes no comparten ninguna fila (ni su bloqueo). De
+    vez en cuando una escritura los compacta en versiones_datos.
+    """
+    __tablename__ = 'versiones_datos_cambios'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    familia = db.Column(db.String(20), nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<CambioVersion {self.familia}>'
+
+
+# Familia -> tabla cuyas escrituras la cambian
+FAMILIAS = {
+    'tickets': 'tickets',
+    'espacios': 'espacios',
+    'vehiculos': 'vehiculos',
+    # Cambia solo con salidas (y reconstrucciones del cubo)
+    'ingresos': 'cubo_ingresos',
+}
+
+# ===== TRIGGERS =====
+# SQLite solo tiene triggers por fila: un UPDATE masivo sube la versión
+# una vez por fila, lo que da igual para un ETag. Como SQLite tiene un solo
+# escritor a la vez, actualizan versiones_datos directamente.
+#
+# PostgreSQL registra un cambio por sentencia en versiones_datos_cambios:
+# un UPDATE de la fila de la familia la bloquearía hasta el commit y
+# serializaría todas las garitas (y dos transacciones que tocan espacios
+# y tickets en distinto orden podrían trabarse). Una de cada
+# COMPACTAR_CADA sentencias, si nadie más lo está haciendo (advisory lock
+# sin espera), suma los cambios confirmados a versiones_datos y los borra.
+
+COMPACTAR_CADA = 200
+
+
+def _triggers_sqlite():
+    return tuple(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tr_version_{tabla}_{operacion.lower()}
+        AFTER {operacion} ON {tabla}
+        BEGIN
+            UPDATE versiones_datos SET version = version + 1 WHERE familia = '{familia}';
+        END
+        """
+        for familia, tabla in FAMILIAS.items()
+        for operacion in ('INSERT', 'UPDATE', 'DELETE')
+    )
+
+
+def _triggers_postgresql():
+    sentencias = ["""
+        CREATE OR REPLACE FUNCTION fn_compactar_versiones(p_familia text) RETURNS void AS $$
+        DECLARE
+            compactados bigint;
+        BEGIN
+            -- Un solo compactador por familia; los demás siguen de largo
+            IF NOT pg_try_advisory_xact_lock(hashtext('versiones_datos:' || p_familia)) THEN
+                RETURN;
+            END IF;
+            WITH borrados AS (
+                DELETE FROM versiones_datos_cambios WHERE familia = p_familia RETURNING 1
+            )
+            SELECT count(*) INTO compactados FROM borrados;
+            IF compactados > 0 THEN
+                UPDATE versiones_datos SET version = version + compactados WHERE familia = p_familia;
+            END IF;
+        END
+        $$ LANGUAGE plpgsql
+    """, """
+        CREATE OR REPLACE FUNCTION fn_version_datos() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO versiones_datos_cambios (familia) VALUES (TG_ARGV[0]);
+            IF random() < 1.0 / %(compactar_cada)s THEN
+                PERFORM fn_compactar_versiones(TG_ARGV[0]);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """ % {'compactar_cada': COMPACTAR_CADA}]
+    for familia, tabla in FAMILIAS.items():
+        sentencias += [
+            f"DROP TRIGGER IF EXISTS tr_version_{tabla} ON {tabla}",
+            f"""
+            CREATE TRIGGER tr_version_{tabla}
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabla}
+            FOR EACH STATEMENT EXECUTE FUNCTION fn_version_datos('{familia}')
+            """,
+        ]
+    return tuple(sentencias)
+
+
+def eliminar_triggers(dialecto):
+    """Sentencias para quitar los triggers de versión"""
+    if dialecto == 'sqlite':
+        return tuple(
+            f"DROP TRIGGER IF EXISTS tr_version_{tabla}_{operacion}"
+            for tabla in FAMILIAS.values() for operacion in ('insert', 'update', 'delete')
+        )
+    if dialecto == 'postgresql':
+        return tuple(
+            f"DROP TRIGGER IF EXISTS tr_version_{tabla} ON {tabla}" for tabla in FAMILIAS.values()
+        ) + ("DROP FUNCTION IF EXISTS fn_version_datos()", "DROP FUNCTION IF EXISTS fn_compactar_versiones(text)")
+    return ()
+
+
+def instalar_triggers(conexion):
+    """Crea (o reemplaza) los triggers de versión y las filas de cada familia"""
+    sentencias = {
+        'sqlite': _triggers_sqlite, 'postgresql': _triggers_postgresql
+    }.get(conexion.dialect.name, tuple)()
+    for sentencia in sentencias:
+        conexion.execute(DDL(sentencia))
+
+    existentes = set(conexion.execute(db.select(VersionDatos.familia)).scalars())
+    nuevas = [{'familia': familia, 'version': 1} for familia in FAMILIAS if familia not in existentes]
+    if nuevas:
+        conexion.execute(db.insert(VersionDatos), nuevas)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _crear_triggers(metadata, conexion, tables=(), **kw):
+    # Solo cuando create_all crea la tabla de versiones (con migraciones,
+    # los instala 0005_versiones_datos)
+    if any(tabla.name == VersionDatos.__tablename__ for tabla in tables):
+        instalar_triggers(conexion)
@@ -6,6 +6,7 @@ from .tickets_routes import tickets_bp
 from .transacciones_routes import transacciones_bp
 from .reportes_routes import reportes_bp
 from app.routes.usuarios_routes import usuarios_bp
+from .tarifas_routes import tarifas_bp
 
 blueprints = [
     login_bp,
@@ -15,6 +16,7 @@ blueprints = [
     tickets_bp,
     transacciones_bp,
     reportes_bp,
-    usuarios_bp
+    usuarios_bp,
+    tarifas_bp
 ]
 
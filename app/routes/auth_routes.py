@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, render_template
-from flask_jwt_extended import create_access_token, jwt_required, set_access_cookies, unset_jwt_cookies
-from werkzeug.security import check_password_hash
+from flask_jwt_extended import jwt_required, set_access_cookies, unset_jwt_cookies
 from app.models.usuario import Usuario
 from app.extensions import db
+from app.utils.autorizacion import anotar_version, crear_token
+from app.utils.contrasenas import (
+    HashSaturado, generar_hash, necesita_rehash, respuesta_saturado, verificar_password
+)
 
 login_bp = Blueprint('/auth', __name__)
 
@@ -24,11 +27,23 @@ def login():
     if not usuario:
         return jsonify({"error": "Usuario no encontrado"}), 401
     
-    if not check_password_hash(usuario.contraseña, password):
-        return jsonify({"error": "Contraseña incorrecta"}), 401
+    # El hash corre en el pool de hash, no en el hilo de la request
+    try:
+        if not verificar_password(usuario.contraseña, password):
+            return jsonify({"error": "Contraseña incorrecta"}), 401
+
+        # Hash con un método o costo anterior: se guarda con el configurado
+        if necesita_rehash(usuario.contraseña):
+            usuario.contraseña = generar_hash(password)
+            db.session.commit()
+    except HashSaturado:
+        db.session.rollback()
+        return respuesta_saturado()
 
-    # IMPORTANTE: Convertir el ID a string
-    access_token = create_access_token(identity=str(usuario.id))
+    # Identidad (ID como string), nombre, rol y versión de token en los claims:
+    # las rutas protegidas no vuelven a consultar el usuario
+    access_token = crear_token(usuario)
+    anotar_version(usuario.id, usuario.token_version)
     
     response = jsonify({
         "mensaje": "Login exitoso",
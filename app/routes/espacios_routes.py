@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.usuario import Usuario
+from flask_jwt_extended import jwt_required
+from app.utils.autorizacion import rol_requerido, usuario_actual
 from app.models.espacio import Espacio
 from app.extensions import db
+from app.utils.ocupacion import leer_ocupacion
+from app.utils.paginacion import leer_parametros, paginar, encabezados_paginacion
+from app.utils.versiones import condicional
 
 espacios_bp = Blueprint('espacios', __name__)
 
@@ -11,11 +14,8 @@ espacios_bp = Blueprint('espacios', __name__)
 def index():
     """Página principal de espacios"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return redirect(url_for('auth.index'))
+        # Nombre y rol desde el token (sin consultar usuarios)
+        usuario = usuario_actual()
         
         return render_template('espacios.html', usuario=usuario, active_page='espacios')
     except Exception as e:
@@ -25,8 +25,12 @@ def index():
 
 @espacios_bp.route('/api/espacios', methods=['GET'])
 @jwt_required()
+@condicional('espacios')
 def listar_espacios():
-    """Listar todos los espacios (API)"""
+    """
+    Listar espacios (API). Todos por defecto; con limit/cursor se pagina
+    por número de espacio.
+    """
     try:
         estado = request.args.get('estado')
         tipo = request.args.get('tipo')
@@ -41,9 +45,13 @@ def listar_espacios():
         if seccion:
             query = query.filter_by(seccion=seccion)
         
-        espacios = query.order_by(Espacio.numero).all()
+        try:
+            limite, cursor = leer_parametros()
+            espacios, siguiente = paginar(query, [(Espacio.numero, False)], limite, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        return jsonify([espacio.to_dict() for espacio in espacios]), 200
+        return jsonify([espacio.to_dict() for espacio in espacios]), 200, encabezados_paginacion(siguiente)
     except Exception as e:
         print(f"❌ Error al listar espacios: {e}")
         return jsonify({"error": str(e)}), 500
@@ -51,20 +59,10 @@ def listar_espacios():
 
 @espacios_bp.route('/api/espacios', methods=['POST'])
 @jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para crear espacios")
 def crear_espacio():
     """Crear un nuevo espacio (solo admin)"""
     try:
-        usuario_id = int(get_jwt_identity())
-        
-        # ✅ USAR SOLO ESTA SINTAXIS (funciona en TODAS las versiones)
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return jsonify({"error": "Usuario no encontrado"}), 404
-        
-        if usuario.rol != 'admin':
-            return jsonify({"error": "No tienes permisos para crear espacios"}), 403
-        
         data = request.get_json()
         
         if not data or not data.get('numero'):
@@ -115,15 +113,10 @@ def obtener_espacio(espacio_id):
 
 @espacios_bp.route('/api/espacios/<int:espacio_id>', methods=['PUT'])
 @jwt_required()
+@rol_requerido('admin')
 def actualizar_espacio(espacio_id):
     """Actualizar un espacio (solo admin)"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario or usuario.rol != 'admin':
-            return jsonify({"error": "No tienes permisos"}), 403
-        
         espacio = Espacio.query.filter_by(id=espacio_id).first()
         
         if not espacio:
@@ -178,16 +171,10 @@ def cambiar_estado_espacio(espacio_id):
     
 @espacios_bp.route('/api/espacios/<int:espacio_id>', methods=['DELETE'])
 @jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para eliminar espacios")
 def eliminar_espacio(espacio_id):
     """Eliminar un espacio (solo admin)"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        # Verificar que sea admin
-        if not usuario or usuario.rol != 'admin':
-            return jsonify({"error": "No tienes permisos para eliminar espacios"}), 403
-        
         # Buscar el espacio
         espacio = Espacio.query.filter_by(id=espacio_id).first()
         
@@ -216,19 +203,19 @@ def eliminar_espacio(espacio_id):
 
 @espacios_bp.route('/api/espacios/estadisticas', methods=['GET'])
 @jwt_required()
+@condicional('espacios')
 def estadisticas_espacios():
     """Obtener estadísticas de espacios"""
     try:
-        total = Espacio.query.filter_by(activo=True).count()
-        disponibles = Espacio.query.filter_by(estado='disponible', activo=True).count()
-        ocupados = Espacio.query.filter_by(estado='ocupado', activo=True).count()
-        mantenimiento = Espacio.query.filter_by(estado='mantenimiento', activo=True).count()
+        resumen = leer_ocupacion().resumen()
+        total = resumen['total']
+        ocupados = resumen['ocupados']
         
         return jsonify({
             "total": total,
-            "disponibles": disponibles,
+            "disponibles": resumen['disponibles'],
             "ocupados": ocupados,
-            "mantenimiento": mantenimiento,
+            "mantenimiento": resumen['mantenimiento'],
             "porcentaje_ocupacion": round((ocupados / total * 100) if total > 0 else 0, 2)
         }), 200
     except Exception as e:
@@ -1,12 +1,16 @@
-from flask import Blueprint, redirect, render_template, jsonify, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.usuario import Usuario
+from flask import Blueprint, redirect, render_template, jsonify, url_for, request
+from flask_jwt_extended import jwt_required
+from app.utils.autorizacion import rol_requerido, usuario_actual
 from app.models.vehiculo import Vehiculo
 from app.models.ticket import Ticket
-from app.models.espacio import Espacio
-from datetime import datetime, timezone, timedelta
 from sqlalchemy import func, desc
 from app.extensions import db
+from app.utils import cubo
+from app.utils.cache_reportes import cache_reporte, obtener_cache
+from app.utils.motores import lectura_replica
+from app.utils.ocupacion import leer_ocupacion
+from app.utils.tipos import catalogo_tipos
+from datetime import timedelta
 
 reportes_bp = Blueprint('reportes', __name__)
 
@@ -16,11 +20,8 @@ reportes_bp = Blueprint('reportes', __name__)
 def index():
     """Página principal de reportes"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return redirect(url_for('auth.index'))
+        # Nombre y rol desde el token (sin consultar usuarios)
+        usuario = usuario_actual()
         
         return render_template('reportes.html', usuario=usuario, active_page='reportes')
     except Exception as e:
@@ -32,41 +33,22 @@ def index():
 
 @reportes_bp.route('/api/reportes/ingresos-periodo', methods=['GET'])
 @jwt_required()
+@lectura_replica
+@cache_reporte('ingresos', extra=lambda: cubo.ahora_local().date())
 def reporte_ingresos_periodo():
     """Generar reporte de ingresos por período"""
     try:
-        # Ingresos de hoy
-        hoy_inicio = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        tickets_hoy = Ticket.query.filter(
-            Ticket.estado == 'finalizado',
-            Ticket.fecha_salida >= hoy_inicio
-        ).all()
-        
-        ingresos_hoy = sum(t.monto for t in tickets_hoy if t.monto)
-        transacciones_hoy = len(tickets_hoy)
-        
-        # Ingresos de esta semana
-        semana_inicio = hoy_inicio - timedelta(days=hoy_inicio.weekday())
+        # Hoy, semana y mes (fechas locales) desde el cubo, en una consulta
+        periodos = cubo.ingresos_por_periodo()
         
-        tickets_semana = Ticket.query.filter(
-            Ticket.estado == 'finalizado',
-            Ticket.fecha_salida >= semana_inicio
-        ).all()
+        ingresos_hoy = periodos['hoy']['ingresos']
+        transacciones_hoy = periodos['hoy']['transacciones']
         
-        ingresos_semana = sum(t.monto for t in tickets_semana if t.monto)
-        transacciones_semana = len(tickets_semana)
+        ingresos_semana = periodos['semana']['ingresos']
+        transacciones_semana = periodos['semana']['transacciones']
         
-        # Ingresos del mes
-        mes_inicio = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        tickets_mes = Ticket.query.filter(
-            Ticket.estado == 'finalizado',
-            Ticket.fecha_salida >= mes_inicio
-        ).all()
-        
-        ingresos_mes = sum(t.monto for t in tickets_mes if t.monto)
-        transacciones_mes = len(tickets_mes)
+        ingresos_mes = periodos['mes']['ingresos']
+        transacciones_mes = periodos['mes']['transacciones']
         
         # Promedio por transacción
         promedio_hoy = (ingresos_hoy / transacciones_hoy) if transacciones_hoy > 0 else 0
@@ -106,60 +88,33 @@ def reporte_ingresos_periodo():
 
 @reportes_bp.route('/api/reportes/ocupacion-espacios', methods=['GET'])
 @jwt_required()
+@lectura_replica
+@cache_reporte('ingresos', 'espacios')
 def reporte_ocupacion_espacios():
     """Generar reporte de ocupación de espacios"""
     try:
-        # Total de tickets finalizados
-        total_tickets = Ticket.query.filter_by(estado='finalizado').count()
-        
-        # Tickets por tipo de vehículo
-        tickets_regular = Ticket.query.filter_by(estado='finalizado', tipo_vehiculo='regular').count()
-        tickets_moto = Ticket.query.filter_by(estado='finalizado', tipo_vehiculo='moto').count()
-        tickets_discapacitado = Ticket.query.filter_by(estado='finalizado', tipo_vehiculo='discapacitado').count()
-        
-        # Porcentajes
-        porcentaje_regular = (tickets_regular / total_tickets * 100) if total_tickets > 0 else 0
-        porcentaje_moto = (tickets_moto / total_tickets * 100) if total_tickets > 0 else 0
-        porcentaje_discapacitado = (tickets_discapacitado / total_tickets * 100) if total_tickets > 0 else 0
+        # Usos por tipo (un GROUP BY sobre el cubo) y estancia promedio
+        uso = catalogo_tipos().por_tipo({
+            tipo: medidas['transacciones'] for tipo, medidas in cubo.desglose('tipo_vehiculo').items()
+        })
+        total = cubo.totales()
+        total_tickets = total['transacciones']
         
         # Espacios disponibles vs ocupados (actual)
-        espacios_total = Espacio.query.filter_by(activo=True).count()
-        espacios_ocupados = Espacio.query.filter_by(estado='ocupado', activo=True).count()
+        ocupacion = leer_ocupacion()
+        espacios_total = ocupacion.contar()
+        espacios_ocupados = ocupacion.contar(estado='ocupado')
         espacios_disponibles = espacios_total - espacios_ocupados
         
-        # Tiempo promedio de estancia
-        tickets_finalizados = Ticket.query.filter_by(estado='finalizado').all()
-        tiempos = []
-        
-        for ticket in tickets_finalizados:
-            if ticket.fecha_entrada and ticket.fecha_salida:
-                fecha_entrada = ticket.fecha_entrada
-                fecha_salida = ticket.fecha_salida
-                
-                if fecha_entrada.tzinfo is None:
-                    fecha_entrada = fecha_entrada.replace(tzinfo=timezone.utc)
-                if fecha_salida.tzinfo is None:
-                    fecha_salida = fecha_salida.replace(tzinfo=timezone.utc)
-                
-                tiempo = fecha_salida - fecha_entrada
-                tiempos.append(tiempo.total_seconds() / 3600)  # en horas
-        
-        tiempo_promedio = sum(tiempos) / len(tiempos) if tiempos else 0
+        tiempo_promedio = total['horas_promedio']
         
         return jsonify({
             'uso_por_tipo': {
-                'regular': {
-                    'cantidad': tickets_regular,
-                    'porcentaje': round(porcentaje_regular, 1)
-                },
-                'moto': {
-                    'cantidad': tickets_moto,
-                    'porcentaje': round(porcentaje_moto, 1)
-                },
-                'discapacitado': {
-                    'cantidad': tickets_discapacitado,
-                    'porcentaje': round(porcentaje_discapacitado, 1)
+                tipo: {
+                    'cantidad': cantidad,
+                    'porcentaje': round((cantidad / total_tickets * 100) if total_tickets > 0 else 0, 1)
                 }
+                for tipo, cantidad in uso.items()
             },
             'ocupacion_actual': {
                 'total': espacios_total,
@@ -180,6 +135,8 @@ def reporte_ocupacion_espacios():
 
 @reportes_bp.route('/api/reportes/vehiculos-frecuentes', methods=['GET'])
 @jwt_required()
+@lectura_replica
+@cache_reporte('ingresos', 'vehiculos')
 def reporte_vehiculos_frecuentes():
     """Generar reporte de vehículos frecuentes"""
     try:
@@ -224,16 +181,20 @@ def reporte_vehiculos_frecuentes():
 
 @reportes_bp.route('/api/reportes/metodos-pago', methods=['GET'])
 @jwt_required()
+@lectura_replica
+@cache_reporte('ingresos')
 def reporte_metodos_pago():
     """Generar reporte de métodos de pago"""
     try:
-        tickets_finalizados = Ticket.query.filter_by(estado='finalizado').all()
+        totales = cubo.desglose('metodo_pago')
+        efectivo = totales.get('efectivo', {'ingresos': 0, 'transacciones': 0})
+        tarjeta = totales.get('tarjeta', {'ingresos': 0, 'transacciones': 0})
         
-        total_efectivo = sum(t.monto for t in tickets_finalizados if t.metodo_pago == 'efectivo' and t.monto)
-        total_tarjeta = sum(t.monto for t in tickets_finalizados if t.metodo_pago == 'tarjeta' and t.monto)
+        total_efectivo = efectivo['ingresos']
+        total_tarjeta = tarjeta['ingresos']
         
-        transacciones_efectivo = sum(1 for t in tickets_finalizados if t.metodo_pago == 'efectivo')
-        transacciones_tarjeta = sum(1 for t in tickets_finalizados if t.metodo_pago == 'tarjeta')
+        transacciones_efectivo = efectivo['transacciones']
+        transacciones_tarjeta = tarjeta['transacciones']
         
         total_transacciones = transacciones_efectivo + transacciones_tarjeta
         
@@ -261,3 +222,66 @@ def reporte_metodos_pago():
         print(f"❌ Error al generar reporte de métodos de pago: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+@reportes_bp.route('/api/reportes/ingresos', methods=['GET'])
+@jwt_required()
+@lectura_replica
+@cache_reporte('ingresos', extra=lambda: cubo.ahora_local().date())
+def reporte_ingresos():
+    """
+    Serie de ingresos desde el cubo, por fechas locales.
+    
+    Query params: desde, hasta (AAAA-MM-DD, inclusive; por defecto los
+    últimos 30 días), granularidad (hora | dia | semana | mes; por defecto
+    dia), tipo, metodo_pago, seccion.
+    """
+    try:
+        try:
+            hoy = cubo.ahora_local().date()
+            hasta = cubo.leer_fecha(request.args['hasta'], 'hasta') if request.args.get('hasta') else hoy
+            desde = cubo.leer_fecha(request.args['desde'], 'desde') if request.args.get('desde') \
+                else hasta - timedelta(days=29)
+            granularidad = request.args.get('granularidad', 'dia')
+            filtros = {
+                'tipo_vehiculo': request.args.get('tipo'),
+                'metodo_pago': request.args.get('metodo_pago'),
+                'seccion': request.args.get('seccion')
+            }
+            serie = cubo.serie(granularidad, desde, hasta, **filtros)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        for punto in serie:
+            punto['ingresos_formateado'] = f"RD${punto['ingresos']:,.2f}"
+            punto['horas_promedio'] = round(punto['horas_promedio'], 2)
+        
+        total = cubo.totales(desde=desde, hasta=hasta, **filtros)
+        
+        return jsonify({
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat(),
+            'granularidad': granularidad,
+            'serie': serie,
+            'total': {
+                'transacciones': total['transacciones'],
+                'ingresos': total['ingresos'],
+                'ingresos_formateado': f"RD${total['ingresos']:,.2f}",
+                'horas_promedio': round(total['horas_promedio'], 2)
+            }
+        }), 200
+        
+    except Exception as e:
+        print(f"❌ Error al generar serie de ingresos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@reportes_bp.route('/api/reportes/cache', methods=['GET'])
+@jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para ver la caché")
+def estado_cache_reportes():
+    """Aciertos, fallos, desalojos y tamaño de la caché de reportes de este proceso (solo admin)"""
+    try:
+        return jsonify(obtener_cache().estado()), 200
+    except Exception as e:
+        print(f"❌ Error al obtener estado de la caché: {e}")
+        return jsonify({"error": str(e)}), 500
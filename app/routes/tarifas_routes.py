@@ -0,0 +1,122 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from app.models.tarifa import Tarifa
+from app.extensions import db
+from app.utils import tarifas
+from app.utils.autorizacion import rol_requerido
+from datetime import datetime
+
+tarifas_bp = Blueprint('tarifas', __name__)
+
+# Máximo de estancias por request de cálculo por lote
+LOTE_MAXIMO_ESTANCIAS = 10000
+
+
+def _leer_fecha(valor):
+    """ISO 8601 -> datetime (naive = UTC, como en la BD)"""
+    if isinstance(valor, str) and valor.endswith('Z'):
+        valor = valor[:-1] + '+00:00'
+    return datetime.fromisoformat(valor)
+
+
+# ===== API ENDPOINTS =====
+
+@tarifas_bp.route('/api/tarifas', methods=['GET'])
+@jwt_required()
+def listar_tarifas():
+    """Listar todas las versiones de la tarifa (la más reciente primero)"""
+    try:
+        versiones = Tarifa.query.order_by(Tarifa.version.desc()).all()
+        return jsonify([tarifa.to_dict() for tarifa in versiones]), 200
+    except Exception as e:
+        print(f"❌ Error al listar tarifas: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@tarifas_bp.route('/api/tarifas/vigente', methods=['GET'])
+@jwt_required()
+def tarifa_vigente():
+    """Tarifa con la que se está cobrando (versión 0 = tarifa por defecto)"""
+    try:
+        tarifa = tarifas.tarifa_vigente()
+        return jsonify({
+            "version": tarifa.version,
+            "definicion": tarifa.definicion
+        }), 200
+    except Exception as e:
+        print(f"❌ Error al obtener tarifa vigente: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@tarifas_bp.route('/api/tarifas', methods=['POST'])
+@jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para modificar tarifas")
+def publicar_tarifa():
+    """
+    Publica una nueva versión de la tarifa y la activa (solo admin).
+    
+    Body: {"definicion": {...}, "descripcion": "Tarifa nocturna"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        definicion = data.get('definicion')
+        
+        if not definicion:
+            return jsonify({"error": "La definición de la tarifa es requerida"}), 400
+        
+        try:
+            tarifa = tarifas.publicar_tarifa(definicion, data.get('descripcion'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": f"Tarifa inválida: {e}"}), 400
+        
+        db.session.commit()
+        tarifas.invalidar_tarifa()
+        
+        return jsonify({
+            "mensaje": f"Tarifa v{tarifa.version} publicada",
+            "tarifa": tarifa.to_dict()
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error al publicar tarifa: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@tarifas_bp.route('/api/tarifas/calcular-lote', methods=['POST'])
+@jwt_required()
+def calcular_lote():
+    """
+    Calcula montos de muchas estancias con la tarifa vigente (reportes, cajeros).
+    
+    Body: {"estancias": [{"fecha_entrada": "...", "fecha_salida": "...", "tipo_vehiculo": "regular"}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        estancias = data.get('estancias')
+        
+        if not isinstance(estancias, list) or not estancias:
+            return jsonify({"error": "Se requiere una lista de estancias"}), 400
+        
+        if len(estancias) > LOTE_MAXIMO_ESTANCIAS:
+            return jsonify({"error": f"Máximo {LOTE_MAXIMO_ESTANCIAS} estancias por lote"}), 400
+        
+        try:
+            tuplas = [
+                (_leer_fecha(e['fecha_entrada']), _leer_fecha(e['fecha_salida']),
+                 e.get('tipo_vehiculo', 'regular'))
+                for e in estancias
+            ]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "Cada estancia requiere fecha_entrada y fecha_salida en ISO 8601"}), 400
+        
+        montos = tarifas.calcular_montos(tuplas)
+        
+        return jsonify({
+            "version": tarifas.tarifa_vigente().version,
+            "montos": montos,
+            "total": round(sum(montos), 2)
+        }), 200
+    except Exception as e:
+        print(f"❌ Error al calcular lote: {e}")
+        return jsonify({"error": str(e)}), 500
@@ -1,25 +1,40 @@
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.usuario import Usuario
+from flask_jwt_extended import jwt_required
+from app.utils.autorizacion import rol_requerido, usuario_actual
 from app.models.vehiculo import Vehiculo
 from app.models.espacio import Espacio
 from app.models.ticket import Ticket
 from app.extensions import db
-from datetime import datetime, timezone
-import math
+from app.utils.asignacion import (
+    EspacioLibre, reclamar_espacios,
+    normalizar_tipo, registrar_cambio_espacio
+)
+from app.utils.garita import ingreso_rapido, salida_rapida
+from sqlalchemy import select, insert, update, case
+from sqlalchemy.exc import IntegrityError
+from app.utils import tarifas
+from app.utils.paginacion import leer_parametros, paginar, encabezados_paginacion
+from app.utils.versiones import condicional
+from app.utils.serializacion import con_espacio, serializar_ticket
+from app.utils.cotizaciones import cotizaciones_activas, cotizacion_ticket, invalidar_cotizaciones
+from app.utils.cubo import Salida, registrar_salidas
+from datetime import datetime, timedelta, timezone
 
 tickets_bp = Blueprint('tickets', __name__)
 
+# Máximo de vehículos por request de ingreso por lote
+LOTE_MAXIMO = 500
+
+# Tickets por sentencia UPDATE del cierre masivo
+LOTE_CIERRE = 500
+
 @tickets_bp.route('/tickets')
 @jwt_required()
 def index():
     """Página principal de tickets (vehículos en el estacionamiento)"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return redirect(url_for('auth.index'))
+        # Nombre y rol desde el token (sin consultar usuarios)
+        usuario = usuario_actual()
         
         return render_template('tickets.html', usuario=usuario, active_page='tickets')
     except Exception as e:
@@ -31,44 +46,29 @@ def index():
 
 @tickets_bp.route('/api/tickets/activos', methods=['GET'])
 @jwt_required()
+@condicional('tickets', 'espacios')
 def listar_tickets_activos():
-    """Listar todos los tickets activos (vehículos actualmente en el estacionamiento)"""
+    """
+    Listar tickets activos (vehículos actualmente en el estacionamiento).
+    Todos por defecto; con limit/cursor se pagina por fecha de entrada.
+    Sin tiempo transcurrido (lo calcula el cliente desde fecha_entrada)
+    para que la respuesta valga mientras no cambien los datos (ETag).
+    """
     try:
-        tickets = Ticket.query.filter_by(estado='activo').order_by(Ticket.fecha_entrada.desc()).all()
+        try:
+            limite, cursor = leer_parametros()
+            # Tickets y espacios en una sola consulta (sin cargas perezosas)
+            tickets, siguiente = paginar(
+                con_espacio(Ticket.query.filter_by(estado='activo')),
+                [(Ticket.fecha_entrada, True), (Ticket.id, True)],
+                limite, cursor
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        resultado = []
-        for ticket in tickets:
-            ticket_dict = ticket.to_dict()
-            
-            # Calcular tiempo transcurrido en el backend
-            if ticket.fecha_entrada:
-                fecha_entrada = ticket.fecha_entrada
-                if fecha_entrada.tzinfo is None:
-                    fecha_entrada = fecha_entrada.replace(tzinfo=timezone.utc)
-                
-                ahora = datetime.now(timezone.utc)
-                tiempo_transcurrido = ahora - fecha_entrada
-                
-                total_minutos = int(tiempo_transcurrido.total_seconds() / 60)
-                horas = total_minutos // 60
-                minutos = total_minutos % 60
-                
-                ticket_dict['tiempo_transcurrido'] = {
-                    'horas': horas,
-                    'minutos': minutos,
-                    'texto': f"{horas}h {minutos}m"
-                }
-            
-            # Agregar información del espacio
-            if ticket.espacio:
-                ticket_dict['espacio'] = {
-                    'numero': ticket.espacio.numero,
-                    'tipo': ticket.espacio.tipo,
-                    'seccion': ticket.espacio.seccion
-                }
-            resultado.append(ticket_dict)
-        
-        return jsonify(resultado), 200
+        resultado = [serializar_ticket(ticket) for ticket in tickets]
+        
+        return jsonify(resultado), 200, encabezados_paginacion(siguiente)
     except Exception as e:
         print(f"❌ Error al listar tickets: {e}")
         import traceback
@@ -76,6 +76,60 @@ def listar_tickets_activos():
         return jsonify({"error": str(e)}), 500
 
 
+def _cache_control(calculado_en):
+    """Los clientes pueden reutilizar la cotización hasta que cambie el minuto"""
+    return {"Cache-Control": f"private, max-age={max(60 - calculado_en.second, 1)}"}
+
+
+@tickets_bp.route('/api/tickets/cotizaciones', methods=['GET'])
+@jwt_required()
+def cotizar_activos():
+    """
+    Monto acumulado a este minuto de todos los tickets activos (cajeros y
+    kioscos de pago). No finaliza nada; se recalcula una vez por minuto.
+    """
+    try:
+        calculado_en, cotizaciones = cotizaciones_activas()
+        monto_total = round(sum(c['monto'] for c in cotizaciones), 2)
+        
+        return jsonify({
+            "calculado_en": calculado_en.replace(tzinfo=None).isoformat(),
+            "total": len(cotizaciones),
+            "monto_total": monto_total,
+            "monto_total_formateado": f"RD${monto_total:,.2f}",
+            "tickets": cotizaciones
+        }), 200, _cache_control(calculado_en)
+    except Exception as e:
+        print(f"❌ Error al cotizar tickets activos: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@tickets_bp.route('/api/tickets/<int:ticket_id>/cotizacion', methods=['GET'])
+@jwt_required()
+def cotizar_ticket(ticket_id):
+    """Cuánto debe un ticket activo si saliera ahora (kiosco de pago)"""
+    try:
+        calculado_en, cotizacion, error = cotizacion_ticket(ticket_id)
+        
+        if error == 'no_encontrado':
+            return jsonify({"error": "Ticket no encontrado"}), 404
+        
+        if error == 'finalizado':
+            return jsonify({"error": "El ticket ya fue finalizado"}), 400
+        
+        return jsonify({
+            "calculado_en": calculado_en.replace(tzinfo=None).isoformat(),
+            "ticket": cotizacion
+        }), 200, _cache_control(calculado_en)
+    except Exception as e:
+        print(f"❌ Error al cotizar ticket: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
 @tickets_bp.route('/api/tickets/ingresar', methods=['POST'])
 @jwt_required()
 def ingresar_vehiculo():
@@ -90,50 +144,40 @@ def ingresar_vehiculo():
         placa = data['placa'].strip().upper()
         tipo_vehiculo = data.get('tipo_vehiculo', 'regular')
         
-        # Buscar o crear vehículo
-        vehiculo = Vehiculo.query.filter_by(placa=placa).first()
-        if not vehiculo:
-            vehiculo = Vehiculo(placa=placa)
-            db.session.add(vehiculo)
+        # Ruta rápida: upsert del vehículo, reclamo atómico del espacio e
+        # inserción del ticket en una sola transacción
+        try:
+            ticket, espacio = ingreso_rapido(placa, tipo_vehiculo)
+            
+            if not ticket:
+                db.session.rollback()
+                return jsonify({
+                    "error": f"No hay espacios disponibles para {tipo_vehiculo}"
+                }), 404
+            
             db.session.commit()
-        
-        # Verificar si el vehículo ya está en el estacionamiento
-        ticket_existente = Ticket.query.filter_by(
-            vehiculo_id=vehiculo.id,
-            estado='activo'
-        ).first()
-        
-        if ticket_existente:
+            invalidar_cotizaciones()
+        except IntegrityError as e:
+            db.session.rollback()
+            
+            # El índice único parcial rechaza un segundo ticket activo del vehículo
+            if 'vehiculo_id' not in str(e.orig) and 'uq_tickets_vehiculo_activo' not in str(e.orig):
+                raise
+            
+            numero = db.session.execute(
+                select(Espacio.numero)
+                .join(Ticket, Ticket.espacio_id == Espacio.id)
+                .join(Vehiculo, Vehiculo.id == Ticket.vehiculo_id)
+                .where(Vehiculo.placa == placa, Ticket.estado == 'activo')
+            ).scalar() or '?'
+            
             return jsonify({
-                "error": f"El vehículo {placa} ya está en el estacionamiento (Espacio {ticket_existente.espacio.numero})"
+                "error": f"El vehículo {placa} ya está en el estacionamiento (Espacio {numero})"
             }), 400
         
-        # Buscar espacio disponible según tipo
-        espacio = buscar_espacio_disponible(tipo_vehiculo)
-        
-        if not espacio:
-            return jsonify({
-                "error": f"No hay espacios disponibles para {tipo_vehiculo}"
-            }), 404
-        
-        # Crear ticket
-        nuevo_ticket = Ticket(
-            vehiculo_id=vehiculo.id,
-            espacio_id=espacio.id,
-            placa=placa,
-            tipo_vehiculo=tipo_vehiculo,
-            estado='activo'
-        )
-        
-        # Marcar espacio como ocupado
-        espacio.estado = 'ocupado'
-        
-        db.session.add(nuevo_ticket)
-        db.session.commit()
-        
         return jsonify({
             "mensaje": f"Vehículo {placa} ingresado exitosamente",
-            "ticket": nuevo_ticket.to_dict(),
+            "ticket": ticket,
             "espacio": {
                 "numero": espacio.numero,
                 "tipo": espacio.tipo,
@@ -149,21 +193,64 @@ def ingresar_vehiculo():
         return jsonify({"error": str(e)}), 500
 
 
-@tickets_bp.route('/api/tickets/<int:ticket_id>/salida', methods=['POST'])
+@tickets_bp.route('/api/tickets/ingresar-lote', methods=['POST'])
 @jwt_required()
-def registrar_salida(ticket_id):
-    """Registrar salida de un vehículo (finalizar ticket)"""
+def ingresar_lote():
+    """
+    Ingresar un lote de vehículos (ráfagas en garita, días de evento).
+    
+    Body: {"vehiculos": [{"placa": "...", "tipo_vehiculo": "..."}, ...]}
+    
+    Usa un número constante de consultas por lote: upsert de vehículos,
+    asignación de espacios por tipo e inserción masiva de tickets.
+    Responde un resultado por vehículo, en el mismo orden del request.
+    """
     try:
-        ticket = Ticket.query.filter_by(id=ticket_id).first()
+        data = request.get_json() or {}
+        items = data.get('vehiculos')
         
-        if not ticket:
-            return jsonify({"error": "Ticket no encontrado"}), 404
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Se requiere una lista de vehículos"}), 400
         
-        if ticket.estado != 'activo':
-            return jsonify({"error": "El ticket ya fue finalizado"}), 400
+        if len(items) > LOTE_MAXIMO:
+            return jsonify({"error": f"El lote no puede tener más de {LOTE_MAXIMO} vehículos"}), 400
+        
+        for intento in range(2):
+            try:
+                resultados = _procesar_lote(items)
+                db.session.commit()
+                invalidar_cotizaciones()
+                break
+            except IntegrityError:
+                # Otra garita ingresó uno de los vehículos al mismo tiempo: repetir con datos frescos
+                db.session.rollback()
+                if intento == 1:
+                    return jsonify({"error": "Conflicto con otro ingreso simultáneo, intente de nuevo"}), 409
+        
+        ingresados = sum(1 for r in resultados if r['status'] == 201)
+        
+        return jsonify({
+            "mensaje": f"{ingresados} de {len(resultados)} vehículos ingresados",
+            "ingresados": ingresados,
+            "fallidos": len(resultados) - ingresados,
+            "resultados": resultados
+        }), 200
         
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error al ingresar lote: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@tickets_bp.route('/api/tickets/<int:ticket_id>/salida', methods=['POST'])
+@jwt_required()
+def registrar_salida(ticket_id):
+    """Registrar salida de un vehículo (finalizar ticket)"""
+    try:
         # Obtener datos del request
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         metodo_pago = data.get('metodo_pago', 'efectivo')
         
         # Validar método de pago (solo efectivo o tarjeta)
@@ -171,35 +258,24 @@ def registrar_salida(ticket_id):
         if metodo_pago not in metodos_validos:
             metodo_pago = 'efectivo'
         
-        # Calcular tiempo de estancia
-        fecha_salida = datetime.now(timezone.utc)
-        
-        # Asegurar que fecha_entrada tenga timezone
-        fecha_entrada = ticket.fecha_entrada
-        if fecha_entrada.tzinfo is None:
-            fecha_entrada = fecha_entrada.replace(tzinfo=timezone.utc)
-        
-        tiempo_estancia = fecha_salida - fecha_entrada
-        horas = tiempo_estancia.total_seconds() / 3600
+        # Ruta rápida: lectura del ticket con su espacio y UPDATE condicional
+        ticket, horas, error = salida_rapida(ticket_id, metodo_pago)
         
-        # Calcular monto
-        monto = calcular_monto(horas, ticket.tipo_vehiculo)
-        
-        # Actualizar ticket
-        ticket.fecha_salida = fecha_salida
-        ticket.estado = 'finalizado'
-        ticket.monto = monto
-        ticket.metodo_pago = metodo_pago
+        if error == 'no_encontrado':
+            return jsonify({"error": "Ticket no encontrado"}), 404
         
-        # Liberar espacio
-        if ticket.espacio:
-            ticket.espacio.estado = 'disponible'
+        if error == 'finalizado':
+            db.session.rollback()
+            return jsonify({"error": "El ticket ya fue finalizado"}), 400
         
         db.session.commit()
+        invalidar_cotizaciones()
+        
+        monto = ticket['monto']
         
         return jsonify({
             "mensaje": "Salida registrada exitosamente",
-            "ticket": ticket.to_dict(),
+            "ticket": ticket,
             "tiempo_estancia_horas": round(horas, 2),
             "monto": monto,
             "monto_formateado": f"RD${monto:,.2f}",
@@ -216,61 +292,263 @@ def registrar_salida(ticket_id):
 
 
 
+@tickets_bp.route('/api/tickets/cierre', methods=['POST'])
+@jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para cerrar tickets")
+def cierre_masivo():
+    """
+    Cierre de fin de día: finaliza todos los tickets activos (o los de una
+    sección / tipo de espacio) en una sola transacción (solo admin).
+    
+    Body opcional: {"seccion": "A", "tipo": "regular", "metodo_pago": "efectivo"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        metodo_pago = data.get('metodo_pago', 'efectivo')
+        if metodo_pago not in ['efectivo', 'tarjeta']:
+            metodo_pago = 'efectivo'
+        
+        # 1. Leer los tickets a cerrar junto con su espacio (una consulta)
+        consulta = select(
+            Ticket.id, Ticket.placa, Ticket.fecha_entrada, Ticket.tipo_vehiculo,
+            Espacio.id, Espacio.numero, Espacio.tipo, Espacio.piso, Espacio.seccion, Espacio.activo
+        ).join(
+            Espacio, Espacio.id == Ticket.espacio_id
+        ).where(
+            Ticket.estado == 'activo'
+        )
+        
+        if data.get('seccion'):
+            consulta = consulta.where(Espacio.seccion == data['seccion'])
+        if data.get('tipo'):
+            consulta = consulta.where(Espacio.tipo == data['tipo'])
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            consulta = consulta.with_for_update(of=Ticket)
+        
+        filas = db.session.execute(consulta).all()
+        
+        if not filas:
+            return jsonify({
+                "mensaje": "No hay tickets activos para cerrar",
+                "cerrados": 0,
+                "monto_total": 0.0,
+                "monto_total_formateado": "RD$0.00",
+                "por_tipo": {},
+                "tickets": []
+            }), 200
+        
+        # 2. Calcular montos en una pasada (tarifa compilada, por lote)
+        fecha_salida = datetime.now(timezone.utc)
+        montos = tarifas.calcular_montos(
+            (fila[2], fecha_salida, fila[3]) for fila in filas
+        )
+        
+        # 3. Finalizar tickets: solo los que siguen activos. En SQLite no hay
+        #    bloqueo entre la lectura y el UPDATE, así que una salida
+        #    concurrente puede haber finalizado alguno (y su espacio puede
+        #    estar ocupado por otro ticket): RETURNING dice cuáles cerró este
+        #    cierre y solo esos liberan espacio y suman al cubo.
+        finalizados = set()
+        montos_por_id = {fila[0]: monto for fila, monto in zip(filas, montos)}
+        ids = list(montos_por_id)
+        for inicio in range(0, len(ids), LOTE_CIERRE):
+            lote = ids[inicio:inicio + LOTE_CIERRE]
+            finalizados.update(db.session.execute(
+                update(Ticket)
+                .where(Ticket.id.in_(lote), Ticket.estado == 'activo')
+                .values(
+                    estado='finalizado',
+                    fecha_salida=fecha_salida,
+                    metodo_pago=metodo_pago,
+                    monto=case({ticket_id: montos_por_id[ticket_id] for ticket_id in lote}, value=Ticket.id)
+                )
+                .returning(Ticket.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+        
+        cerrados = []
+        salidas = []
+        por_tipo = {}
+        
+        for (ticket_id, placa, fecha_entrada, tipo_vehiculo,
+             espacio_id, numero, tipo_espacio, piso, seccion, activo), monto in zip(filas, montos):
+            if ticket_id not in finalizados:
+                continue
+            cerrados.append({
+                "id": ticket_id,
+                "placa": placa,
+                "espacio_numero": numero,
+                "tipo_vehiculo": tipo_vehiculo,
+                "monto": monto
+            })
+            salidas.append(Salida(fecha_entrada, fecha_salida, tipo_vehiculo, metodo_pago, seccion, monto))
+            
+            resumen = por_tipo.setdefault(tipo_vehiculo, {"cantidad": 0, "monto": 0.0})
+            resumen["cantidad"] += 1
+            resumen["monto"] += monto
+            
+            registrar_cambio_espacio(EspacioLibre(
+                id=espacio_id, numero=numero, tipo=tipo_espacio, piso=piso,
+                seccion=seccion, estado='disponible', activo=activo
+            ))
+        
+        # 4. Liberar los espacios de los tickets cerrados (un UPDATE)
+        if cerrados:
+            db.session.execute(
+                update(Espacio)
+                .where(Espacio.id.in_([fila[4] for fila in filas if fila[0] in finalizados]))
+                .values(estado='disponible')
+                .execution_options(synchronize_session=False)
+            )
+        
+        # 5. Cubo de ingresos: un upsert por celda en la misma transacción
+        if salidas:
+            registrar_salidas(salidas)
+        
+        db.session.commit()
+        invalidar_cotizaciones()
+        
+        monto_total = sum(ticket["monto"] for ticket in cerrados)
+        
+        return jsonify({
+            "mensaje": f"{len(cerrados)} tickets cerrados",
+            "cerrados": len(cerrados),
+            "monto_total": monto_total,
+            "monto_total_formateado": f"RD${monto_total:,.2f}",
+            "metodo_pago": metodo_pago,
+            "por_tipo": por_tipo,
+            "tickets": cerrados
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error en cierre masivo: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
 # ===== FUNCIONES AUXILIARES =====
 
-def buscar_espacio_disponible(tipo_vehiculo):
+def _procesar_lote(items):
     """
-    Busca el espacio disponible más cercano según el tipo de vehículo
+    Ejecuta el ingreso por lote dentro de la transacción actual (sin commit).
+    Retorna la lista de resultados por vehículo.
     """
-    if tipo_vehiculo == 'moto':
-        espacio = Espacio.query.filter_by(
-            tipo='moto',
-            estado='disponible',
-            activo=True
-        ).order_by(Espacio.numero).first()
-        
-    elif tipo_vehiculo == 'discapacitado':
-        espacio = Espacio.query.filter_by(
-            tipo='discapacitado',
-            estado='disponible',
-            activo=True
-        ).order_by(Espacio.numero).first()
+    resultados = []
+    pendientes = []
+    placas_vistas = set()
+    
+    # Validar y normalizar
+    for item in items:
+        placa = (item.get('placa') or '').strip().upper() if isinstance(item, dict) else ''
+        tipo_vehiculo = item.get('tipo_vehiculo', 'regular') if isinstance(item, dict) else 'regular'
+        resultado = {"placa": placa, "tipo_vehiculo": tipo_vehiculo}
+        resultados.append(resultado)
         
+        if not placa:
+            resultado.update(status=400, error="La placa es requerida")
+        elif placa in placas_vistas:
+            resultado.update(status=400, error=f"La placa {placa} está repetida en el lote")
+        else:
+            placas_vistas.add(placa)
+            pendientes.append(resultado)
+    
+    if not pendientes:
+        return resultados
+    
+    # 1. Upsert de todos los vehículos en una sola sentencia
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialecto
     else:
-        espacio = Espacio.query.filter_by(
-            tipo='regular',
-            estado='disponible',
-            activo=True
-        ).order_by(Espacio.seccion, Espacio.numero).first()
+        from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+    
+    ahora = datetime.now(timezone.utc)
+    db.session.execute(
+        insert_dialecto(Vehiculo).on_conflict_do_nothing(index_elements=['placa']),
+        [{"placa": r['placa'], "fecha_registro": ahora, "activo": True} for r in pendientes]
+    )
+    
+    vehiculos = dict(db.session.execute(
+        select(Vehiculo.placa, Vehiculo.id).where(Vehiculo.placa.in_(placas_vistas))
+    ).all())
     
-    return espacio
+    # 2. Vehículos que ya están en el estacionamiento
+    ya_adentro = dict(db.session.execute(
+        select(Ticket.vehiculo_id, Espacio.numero)
+        .join(Espacio, Espacio.id == Ticket.espacio_id)
+        .where(Ticket.estado == 'activo', Ticket.vehiculo_id.in_(vehiculos.values()))
+    ).all())
+    
+    por_tipo = {}
+    for resultado in pendientes:
+        vehiculo_id = vehiculos[resultado['placa']]
+        if vehiculo_id in ya_adentro:
+            resultado.update(
+                status=400,
+                error=f"El vehículo {resultado['placa']} ya está en el estacionamiento (Espacio {ya_adentro[vehiculo_id]})"
+            )
+        else:
+            resultado['vehiculo_id'] = vehiculo_id
+            por_tipo.setdefault(normalizar_tipo(resultado['tipo_vehiculo']), []).append(resultado)
+    
+    # 3. Asignar espacios a todo el lote, una pasada por tipo
+    filas_tickets = []
+    for tipo, grupo in por_tipo.items():
+        espacios = reclamar_espacios(tipo, len(grupo))
+        
+        for resultado, espacio in zip(grupo, espacios):
+            resultado['espacio'] = {
+                "numero": espacio.numero,
+                "tipo": espacio.tipo,
+                "seccion": espacio.seccion
+            }
+            filas_tickets.append({
+                "vehiculo_id": resultado['vehiculo_id'],
+                "espacio_id": espacio.id,
+                "placa": resultado['placa'],
+                "tipo_vehiculo": resultado['tipo_vehiculo'],
+                "estado": 'activo',
+                "fecha_entrada": ahora,
+                "monto": 0.0
+            })
+        
+        for resultado in grupo[len(espacios):]:
+            resultado.update(status=404, error=f"No hay espacios disponibles para {resultado['tipo_vehiculo']}")
+    
+    # 4. Insertar todos los tickets en una sola sentencia
+    if filas_tickets:
+        tickets_ids = {
+            vehiculo_id: ticket_id for ticket_id, vehiculo_id in db.session.execute(
+                insert(Ticket).returning(Ticket.id, Ticket.vehiculo_id),
+                filas_tickets
+            )
+        }
+        
+        for grupo in por_tipo.values():
+            for resultado in grupo:
+                if 'espacio' in resultado:
+                    resultado.update(status=201, ticket_id=tickets_ids[resultado['vehiculo_id']])
+    
+    for resultado in resultados:
+        resultado.pop('vehiculo_id', None)
+    
+    return resultados
 
 
 def calcular_monto(horas, tipo_vehiculo):
     """
-    Calcula el monto a cobrar según horas y tipo de vehículo
+    Calcula el monto de una estancia de `horas` que termina ahora,
+    con la tarifa vigente (ver app/utils/tarifas.py).
     
-    Tarifas en Pesos Dominicanos (RD$):
+    Tarifa por defecto en Pesos Dominicanos (RD$), mínimo 1 hora,
+    horas redondeadas hacia arriba:
     - Moto: RD$25.00 por hora
     - Regular: RD$50.00 por hora
     - Discapacitado: RD$80.00 por hora
     """
-    # Tarifas por hora (en RD$)
-    tarifas = {
-        'moto': 25.0,
-        'regular': 50.0,
-        'discapacitado': 80.0
-    }
-    
-    tarifa_por_hora = tarifas.get(tipo_vehiculo, 50.0)
-    
-    # Mínimo 1 hora
-    if horas < 1:
-        horas = 1
-    
-    # Redondear hacia arriba
-    horas_cobrar = math.ceil(horas)
-    
-    return horas_cobrar * tarifa_por_hora
-
-
+    fecha_salida = datetime.now(timezone.utc)
+    fecha_entrada = fecha_salida - timedelta(hours=max(horas, 0))
+    return tarifas.calcular_monto(fecha_entrada, fecha_salida, tipo_vehiculo)
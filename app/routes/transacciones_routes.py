@@ -1,22 +1,34 @@
-from flask import Blueprint, render_template, jsonify, redirect, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.usuario import Usuario
+from flask import Blueprint, render_template, jsonify, redirect, url_for, request
+from flask_jwt_extended import jwt_required
+from app.utils.autorizacion import usuario_actual
 from app.models.ticket import Ticket
+from app.models.espacio import Espacio
+from app.utils.paginacion import leer_parametros, ordenar, paginar, encabezados_paginacion
+from app.utils.serializacion import con_espacio, serializar_ticket, tiempo_texto
+from app.utils.streaming import solicita_flujo, respuesta_en_flujo
+from app.utils.estadisticas import totales_finalizados
+from app.utils.cache_reportes import cache_reporte
+from app.utils.exportacion import leer_formato, leer_rango_fechas, respuesta_exportacion
+from app.utils.motores import lectura_replica
+from sqlalchemy import select
 from datetime import datetime, timezone
 
 transacciones_bp = Blueprint('transacciones', __name__)
 
+# Tamaño de página por defecto (el historial crece sin límite)
+POR_PAGINA = 100
+
+# Orden del historial: más recientes primero, el id desempata
+ORDEN_TRANSACCIONES = [(Ticket.fecha_salida, True), (Ticket.id, True)]
+
 
 @transacciones_bp.route('/transacciones')
 @jwt_required()
 def index():
     """Página principal de transacciones"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return redirect(url_for('auth.index'))
+        # Nombre y rol desde el token (sin consultar usuarios)
+        usuario = usuario_actual()
         
         return render_template('transacciones.html', usuario=usuario, active_page='transacciones')
     except Exception as e:
@@ -26,55 +38,48 @@ def index():
 
 # ===== API ENDPOINTS =====
 
+def _serializar_transaccion(ticket):
+    """Ticket finalizado con tiempo de estancia y monto formateado"""
+    # Espacio ya cargado en el JOIN: sin consultas por fila
+    ticket_dict = serializar_ticket(ticket)
+    
+    # Calcular tiempo de estancia
+    if ticket.fecha_entrada and ticket.fecha_salida:
+        ticket_dict['tiempo_estancia'] = tiempo_texto(ticket.fecha_entrada, ticket.fecha_salida)
+    
+    # Formatear monto
+    if ticket.monto:
+        ticket_dict['monto_formateado'] = f"RD${ticket.monto:,.2f}"
+    
+    return ticket_dict
+
+
 @transacciones_bp.route('/api/transacciones', methods=['GET'])
 @jwt_required()
 def listar_transacciones():
-    """Listar todas las transacciones (tickets finalizados)"""
+    """
+    Listar transacciones (tickets finalizados), paginadas por cursor.
+    
+    Query params: limit (por defecto 100), cursor (encabezado X-Next-Cursor
+    de la página anterior), stream=1 (historial completo en flujo, desde
+    el cursor si se indica; ignora limit).
+    """
     try:
         # Obtener solo tickets finalizados, ordenados por fecha de salida descendente
-        tickets = Ticket.query.filter_by(estado='finalizado').order_by(Ticket.fecha_salida.desc()).all()
+        consulta = con_espacio(Ticket.query.filter_by(estado='finalizado'))
+        try:
+            limite, cursor = leer_parametros(limite_por_defecto=POR_PAGINA)
+            if solicita_flujo():
+                return respuesta_en_flujo(
+                    ordenar(consulta, ORDEN_TRANSACCIONES, cursor), _serializar_transaccion
+                )
+            tickets, siguiente = paginar(consulta, ORDEN_TRANSACCIONES, limite, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        resultado = []
-        for ticket in tickets:
-            ticket_dict = ticket.to_dict()
-            
-            # Calcular tiempo de estancia
-            if ticket.fecha_entrada and ticket.fecha_salida:
-                fecha_entrada = ticket.fecha_entrada
-                fecha_salida = ticket.fecha_salida
-                
-                # Asegurar timezone
-                if fecha_entrada.tzinfo is None:
-                    fecha_entrada = fecha_entrada.replace(tzinfo=timezone.utc)
-                if fecha_salida.tzinfo is None:
-                    fecha_salida = fecha_salida.replace(tzinfo=timezone.utc)
-                
-                tiempo_estancia = fecha_salida - fecha_entrada
-                total_minutos = int(tiempo_estancia.total_seconds() / 60)
-                horas = total_minutos // 60
-                minutos = total_minutos % 60
-                
-                ticket_dict['tiempo_estancia'] = {
-                    'horas': horas,
-                    'minutos': minutos,
-                    'texto': f"{horas}h {minutos}m"
-                }
-            
-            # Formatear monto
-            if ticket.monto:
-                ticket_dict['monto_formateado'] = f"RD${ticket.monto:,.2f}"
-            
-            # Información del espacio
-            if ticket.espacio:
-                ticket_dict['espacio'] = {
-                    'numero': ticket.espacio.numero,
-                    'tipo': ticket.espacio.tipo,
-                    'seccion': ticket.espacio.seccion
-                }
-            
-            resultado.append(ticket_dict)
+        resultado = [_serializar_transaccion(ticket) for ticket in tickets]
         
-        return jsonify(resultado), 200
+        return jsonify(resultado), 200, encabezados_paginacion(siguiente)
         
     except Exception as e:
         print(f"❌ Error al listar transacciones: {e}")
@@ -83,38 +88,71 @@ def listar_transacciones():
         return jsonify({"error": str(e)}), 500
 
 
-@transacciones_bp.route('/api/transacciones/estadisticas', methods=['GET'])
+@transacciones_bp.route('/api/transacciones/exportar', methods=['GET'])
 @jwt_required()
-def estadisticas_transacciones():
-    """Obtener estadísticas de transacciones"""
+def exportar_transacciones():
+    """
+    Exportar tickets finalizados en CSV o NDJSON (en flujo), por fecha de
+    salida ascendente.
+    
+    Query params: formato (csv | ndjson), desde, hasta (AAAA-MM-DD o ISO
+    8601, sobre la fecha de salida), tipo, metodo_pago.
+    """
     try:
-        tickets_finalizados = Ticket.query.filter_by(estado='finalizado').all()
+        try:
+            formato = leer_formato()
+            desde, hasta = leer_rango_fechas()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        consulta = select(
+            Ticket.id,
+            Ticket.placa,
+            Espacio.numero.label('espacio_numero'),
+            Ticket.tipo_vehiculo,
+            Ticket.fecha_entrada,
+            Ticket.fecha_salida,
+            Ticket.monto,
+            Ticket.metodo_pago
+        ).outerjoin(
+            Espacio, Espacio.id == Ticket.espacio_id
+        ).where(
+            Ticket.estado == 'finalizado'
+        ).order_by(Ticket.fecha_salida, Ticket.id)
         
-        # Calcular total recaudado
-        total_recaudado = sum(ticket.monto for ticket in tickets_finalizados if ticket.monto)
+        if desde:
+            consulta = consulta.where(Ticket.fecha_salida >= desde)
+        if hasta:
+            consulta = consulta.where(Ticket.fecha_salida < hasta)
+        if request.args.get('tipo'):
+            consulta = consulta.where(Ticket.tipo_vehiculo == request.args['tipo'])
+        if request.args.get('metodo_pago'):
+            consulta = consulta.where(Ticket.metodo_pago == request.args['metodo_pago'])
         
-        # Contar por método de pago
-        efectivo = sum(1 for ticket in tickets_finalizados if ticket.metodo_pago == 'efectivo')
-        tarjeta = sum(1 for ticket in tickets_finalizados if ticket.metodo_pago == 'tarjeta')
+        return respuesta_exportacion(consulta, formato, 'transacciones')
         
-        # Contar por tipo de vehículo
-        motos = sum(1 for ticket in tickets_finalizados if ticket.tipo_vehiculo == 'moto')
-        regulares = sum(1 for ticket in tickets_finalizados if ticket.tipo_vehiculo == 'regular')
-        discapacitados = sum(1 for ticket in tickets_finalizados if ticket.tipo_vehiculo == 'discapacitado')
+    except Exception as e:
+        print(f"❌ Error al exportar transacciones: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@transacciones_bp.route('/api/transacciones/estadisticas', methods=['GET'])
+@jwt_required()
+@lectura_replica
+@cache_reporte('ingresos')
+def estadisticas_transacciones():
+    """Obtener estadísticas de transacciones"""
+    try:
+        # Total, recaudado y desgloses en una sola consulta agregada
+        totales = totales_finalizados()
+        total_recaudado = totales['recaudado']
         
         return jsonify({
-            'total_transacciones': len(tickets_finalizados),
+            'total_transacciones': totales['transacciones'],
             'total_recaudado': total_recaudado,
             'total_recaudado_formateado': f"RD${total_recaudado:,.2f}",
-            'metodos_pago': {
-                'efectivo': efectivo,
-                'tarjeta': tarjeta
-            },
-            'tipos_vehiculo': {
-                'moto': motos,
-                'regular': regulares,
-                'discapacitado': discapacitados
-            }
+            'metodos_pago': totales['metodos_pago'],
+            'tipos_vehiculo': totales['tipos_vehiculo']
         }), 200
         
     except Exception as e:
@@ -1,34 +1,28 @@
 from flask import Blueprint, render_template, jsonify, request, redirect, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash
+from flask_jwt_extended import jwt_required, get_jwt_identity, set_access_cookies
 from app.models.usuario import Usuario
 from app.extensions import db
+from app.utils.autorizacion import (
+    anotar_version, crear_token, revocar_tokens, rol_requerido, tiene_rol, usuario_actual
+)
+from app.utils.contrasenas import HashSaturado, generar_hash, respuesta_saturado
+from app.utils.paginacion import leer_parametros, paginar, encabezados_paginacion
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
 
 def es_admin():
-    """Verifica si el usuario actual es administrador"""
-    try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        return usuario and usuario.rol == 'admin'
-    except:
-        return False
+    """Verifica si el usuario actual es administrador (rol del token)"""
+    return tiene_rol('admin')
 
 
 @usuarios_bp.route('/usuarios')
 @jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para acceder a esta página", pagina=True)
 def index():
     """Página principal de usuarios (solo admin)"""
-    if not es_admin():
-        return render_template('error.html', 
-                             mensaje="No tienes permisos para acceder a esta página",
-                             codigo=403), 403
-    
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
+        usuario = usuario_actual()
         
         return render_template('usuarios.html', usuario=usuario, active_page='usuarios')
     except Exception as e:
@@ -40,13 +34,15 @@ def index():
 
 @usuarios_bp.route('/api/usuarios', methods=['GET'])
 @jwt_required()
+@rol_requerido('admin')
 def listar_usuarios():
-    """Listar todos los usuarios (solo admin)"""
-    if not es_admin():
-        return jsonify({"error": "No tienes permisos"}), 403
-    
+    """Listar usuarios (solo admin). Todos por defecto; con limit/cursor se pagina por id"""
     try:
-        usuarios = Usuario.query.all()
+        try:
+            limite, cursor = leer_parametros()
+            usuarios, siguiente = paginar(Usuario.query, [(Usuario.id, False)], limite, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         resultado = []
         for usuario in usuarios:
@@ -56,7 +52,7 @@ def listar_usuarios():
                 'rol': usuario.rol
             })
         
-        return jsonify(resultado), 200
+        return jsonify(resultado), 200, encabezados_paginacion(siguiente)
         
     except Exception as e:
         print(f"❌ Error al listar usuarios: {e}")
@@ -65,11 +61,9 @@ def listar_usuarios():
 
 @usuarios_bp.route('/api/usuarios', methods=['POST'])
 @jwt_required()
+@rol_requerido('admin')
 def crear_usuario():
     """Crear un nuevo usuario (solo admin)"""
-    if not es_admin():
-        return jsonify({"error": "No tienes permisos"}), 403
-    
     try:
         data = request.get_json()
         
@@ -92,7 +86,7 @@ def crear_usuario():
         # Crear usuario
         nuevo_usuario = Usuario(
             nombre_usuario=nombre_usuario,
-            contraseña=generate_password_hash(password),
+            contraseña=generar_hash(password),
             rol=rol
         )
         
@@ -108,6 +102,9 @@ def crear_usuario():
             }
         }), 201
         
+    except HashSaturado:
+        db.session.rollback()
+        return respuesta_saturado()
     except Exception as e:
         db.session.rollback()
         print(f"❌ Error al crear usuario: {e}")
@@ -116,11 +113,9 @@ def crear_usuario():
 
 @usuarios_bp.route('/api/usuarios/<int:usuario_id>', methods=['DELETE'])
 @jwt_required()
+@rol_requerido('admin')
 def eliminar_usuario(usuario_id):
     """Eliminar un usuario (solo admin)"""
-    if not es_admin():
-        return jsonify({"error": "No tienes permisos"}), 403
-    
     try:
         # No permitir eliminar al usuario actual
         usuario_actual_id = int(get_jwt_identity())
@@ -141,6 +136,9 @@ def eliminar_usuario(usuario_id):
         db.session.delete(usuario)
         db.session.commit()
         
+        # Sus tokens dejan de valer en este proceso ya (en los demás, al releer)
+        anotar_version(usuario_id, None)
+        
         return jsonify({"mensaje": "Usuario eliminado exitosamente"}), 200
         
     except Exception as e:
@@ -174,11 +172,23 @@ def cambiar_password(usuario_id):
         if not usuario:
             return jsonify({"error": "Usuario no encontrado"}), 404
         
-        usuario.contraseña = generate_password_hash(nueva_password)
+        # Cierra las demás sesiones del usuario
+        usuario.contraseña = generar_hash(nueva_password)
+        revocar_tokens(usuario)
         db.session.commit()
+        anotar_version(usuario.id, usuario.token_version)
+        
+        response = jsonify({"mensaje": "Contraseña cambiada exitosamente"})
         
-        return jsonify({"mensaje": "Contraseña cambiada exitosamente"}), 200
+        # Quien cambió su propia contraseña sigue con un token nuevo
+        if usuario_actual_id == usuario_id:
+            set_access_cookies(response, crear_token(usuario))
         
+        return response, 200
+        
+    except HashSaturado:
+        db.session.rollback()
+        return respuesta_saturado()
     except Exception as e:
         db.session.rollback()
         print(f"❌ Error al cambiar contraseña: {e}")
@@ -187,11 +197,9 @@ def cambiar_password(usuario_id):
 
 @usuarios_bp.route('/api/usuarios/<int:usuario_id>/cambiar-rol', methods=['PUT'])
 @jwt_required()
+@rol_requerido('admin')
 def cambiar_rol(usuario_id):
     """Cambiar rol de un usuario (solo admin)"""
-    if not es_admin():
-        return jsonify({"error": "No tienes permisos"}), 403
-    
     try:
         # No permitir cambiar rol del usuario actual
         usuario_actual_id = int(get_jwt_identity())
@@ -215,8 +223,11 @@ def cambiar_rol(usuario_id):
             if total_admins <= 1:
                 return jsonify({"error": "No puedes cambiar el rol del último administrador"}), 400
         
+        # El rol viaja en el token: los emitidos con el rol anterior dejan de valer
         usuario.rol = nuevo_rol
+        revocar_tokens(usuario)
         db.session.commit()
+        anotar_version(usuario.id, usuario.token_version)
         
         return jsonify({
             "mensaje": "Rol cambiado exitosamente",
@@ -1,22 +1,32 @@
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.models.espacio import Espacio
-from app.models.usuario import Usuario
+from app.utils.autorizacion import rol_requerido, usuario_actual
 from app.models.vehiculo import Vehiculo
+from app.models.ticket import Ticket
 from app.extensions import db
+from app.utils.ocupacion import leer_ocupacion
+from app.utils.tipos import catalogo_tipos
+from app.utils.paginacion import leer_parametros, ordenar, paginar, encabezados_paginacion
+from app.utils.streaming import solicita_flujo, respuesta_en_flujo
+from app.utils.exportacion import leer_formato, leer_rango_fechas, respuesta_exportacion
+from sqlalchemy import select
 
 vehiculos_bp = Blueprint('vehiculos', __name__)
 
+# Tamaño de página por defecto (el registro de vehículos crece sin límite)
+POR_PAGINA = 100
+
+# Orden del listado: registrados más recientemente primero, el id desempata
+ORDEN_VEHICULOS = [(Vehiculo.fecha_registro, True), (Vehiculo.id, True)]
+
 @vehiculos_bp.route('/vehiculos')
 @jwt_required()
 def index():
     """Página principal de vehículos"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        if not usuario:
-            return redirect(url_for('auth.index'))
+        # Nombre y rol desde el token (sin consultar usuarios)
+        usuario = usuario_actual()
         
         return render_template('vehiculos.html', usuario=usuario, active_page='vehiculos')
     except Exception as e:
@@ -29,7 +39,12 @@ def index():
 @vehiculos_bp.route('/api/vehiculos', methods=['GET'])
 @jwt_required()
 def listar_vehiculos():
-    """Listar todos los vehículos (API)"""
+    """
+    Listar vehículos (API), paginados por cursor.
+    
+    Query params: tipo, buscar, limit (por defecto 100), cursor,
+    stream=1 (todos los resultados en flujo, desde el cursor; ignora limit).
+    """
     try:
         # Filtros opcionales
         tipo = request.args.get('tipo')
@@ -51,9 +66,17 @@ def listar_vehiculos():
                 )
             )
         
-        vehiculos = query.order_by(Vehiculo.fecha_registro.desc()).all()
+        try:
+            limite, cursor = leer_parametros(limite_por_defecto=POR_PAGINA)
+            if solicita_flujo():
+                return respuesta_en_flujo(
+                    ordenar(query, ORDEN_VEHICULOS, cursor), Vehiculo.to_dict
+                )
+            vehiculos, siguiente = paginar(query, ORDEN_VEHICULOS, limite, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        return jsonify([vehiculo.to_dict() for vehiculo in vehiculos]), 200
+        return jsonify([vehiculo.to_dict() for vehiculo in vehiculos]), 200, encabezados_paginacion(siguiente)
     except Exception as e:
         print(f"❌ Error al listar vehículos: {e}")
         return jsonify({"error": str(e)}), 500
@@ -158,16 +181,10 @@ def actualizar_vehiculo(vehiculo_id):
 
 @vehiculos_bp.route('/api/vehiculos/<int:vehiculo_id>', methods=['DELETE'])
 @jwt_required()
+@rol_requerido('admin', mensaje="No tienes permisos para eliminar vehículos")
 def eliminar_vehiculo(vehiculo_id):
     """Eliminar un vehículo (solo admin)"""
     try:
-        usuario_id = int(get_jwt_identity())
-        usuario = Usuario.query.filter_by(id=usuario_id).first()
-        
-        # Verificar que sea admin
-        if not usuario or usuario.rol != 'admin':
-            return jsonify({"error": "No tienes permisos para eliminar vehículos"}), 403
-        
         vehiculo = Vehiculo.query.filter_by(id=vehiculo_id).first()
         
         if not vehiculo:
@@ -190,6 +207,56 @@ def eliminar_vehiculo(vehiculo_id):
         return jsonify({"error": str(e)}), 500
 
 
+@vehiculos_bp.route('/api/vehiculos/exportar', methods=['GET'])
+@jwt_required()
+def exportar_vehiculos():
+    """
+    Exportar vehículos activos en CSV o NDJSON (en flujo), por fecha de
+    registro ascendente.
+    
+    Query params: formato (csv | ndjson), desde, hasta (sobre la fecha de
+    registro), tipo (vehículos con algún ticket de ese tipo).
+    """
+    try:
+        try:
+            formato = leer_formato()
+            desde, hasta = leer_rango_fechas()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        consulta = select(
+            Vehiculo.id,
+            Vehiculo.placa,
+            Vehiculo.marca,
+            Vehiculo.modelo,
+            Vehiculo.color,
+            Vehiculo.propietario,
+            Vehiculo.telefono,
+            Vehiculo.fecha_registro
+        ).where(
+            Vehiculo.activo == True
+        ).order_by(Vehiculo.fecha_registro, Vehiculo.id)
+        
+        if desde:
+            consulta = consulta.where(Vehiculo.fecha_registro >= desde)
+        if hasta:
+            consulta = consulta.where(Vehiculo.fecha_registro < hasta)
+        if request.args.get('tipo'):
+            # El tipo se registra en cada ticket, no en el vehículo
+            consulta = consulta.where(
+                select(Ticket.id).where(
+                    Ticket.vehiculo_id == Vehiculo.id,
+                    Ticket.tipo_vehiculo == request.args['tipo']
+                ).exists()
+            )
+        
+        return respuesta_exportacion(consulta, formato, 'vehiculos')
+        
+    except Exception as e:
+        print(f"❌ Error al exportar vehículos: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @vehiculos_bp.route('/api/vehiculos/estadisticas', methods=['GET'])
 @jwt_required()
 def estadisticas_vehiculos():
@@ -218,16 +285,17 @@ def estadisticas_vehiculos():
 def espacios_disponibles_por_tipo():
     """Obtener espacios disponibles por tipo de vehículo"""
     try:
-        # Contar espacios disponibles por tipo
-        regulares = Espacio.query.filter_by(tipo='regular', estado='disponible', activo=True).count()
-        motos = Espacio.query.filter_by(tipo='moto', estado='disponible', activo=True).count()
-        discapacitados = Espacio.query.filter_by(tipo='discapacitado', estado='disponible', activo=True).count()
+        # Contadores de ocupación (los mismos del dashboard): un worker ve
+        # enseguida los espacios que ocupan o liberan los demás
+        ocupacion = leer_ocupacion()
+        disponibles = {
+            tipo: ocupacion.resumen(tipo)['disponibles']
+            for tipo in catalogo_tipos().con_extras(ocupacion.tipos())
+        }
         
         return jsonify({
-            'regular': regulares,
-            'moto': motos,
-            'discapacitado': discapacitados,
-            'total': regulares + motos + discapacitados
+            **disponibles,
+            'total': sum(disponibles.values())
         }), 200
         
     except Exception as e:
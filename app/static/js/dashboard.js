@@ -3,30 +3,58 @@
 document.addEventListener('DOMContentLoaded', () => {
     // Solo cargar estadísticas si estamos en el dashboard
     if (window.location.pathname === '/dashboard') {
-        cargarEstadisticas();
-        cargarActividadReciente();
-        cargarOcupacionPorTipo();
+        cargarDashboard();
         
-        // Auto-refrescar cada 30 segundos
-        setInterval(() => {
-            cargarEstadisticas();
-            cargarActividadReciente();
-            cargarOcupacionPorTipo();
-        }, 30000);
+        // En vivo: la ocupación llega en el evento; entradas y salidas
+        // refrescan las tarjetas y la actividad
+        EventosParqueo.on('ocupacion', (ocupacion) => mostrarOcupacionPorTipo(conPorcentajes(ocupacion)));
+        EventosParqueo.on('ticket', refrescarDashboard);
+        EventosParqueo.on('salida', refrescarDashboard);
+        
+        // Sin flujo de eventos: auto-refrescar cada 30 segundos
+        EventosParqueo.respaldo(cargarDashboard, 30000);
     }
 });
 
-// ========== CARGAR ESTADÍSTICAS ==========
-async function cargarEstadisticas() {
+// Agrupa ráfagas de eventos (cierre masivo, lotes) en un solo refresco
+let refrescoPendiente = null;
+function refrescarDashboard() {
+    if (refrescoPendiente) return;
+    refrescoPendiente = setTimeout(() => {
+        refrescoPendiente = null;
+        cargarDashboard();
+    }, 1000);
+}
+
+// Evento 'ocupacion' -> mismo formato que /api/dashboard/ocupacion-por-tipo
+function conPorcentajes(ocupacion) {
+    const resultado = {};
+    Object.keys(ocupacion).filter(tipo => tipo !== 'total' && tipo !== 'cambios').forEach(tipo => {
+        const { total, ocupados } = ocupacion[tipo];
+        resultado[tipo] = {
+            total,
+            ocupados,
+            disponibles: total - ocupados,
+            porcentaje: total > 0 ? Math.round(ocupados / total * 1000) / 10 : 0
+        };
+    });
+    return resultado;
+}
+
+// ========== CARGAR DASHBOARD ==========
+// Una sola request: tarjetas, actividad y ocupación del mismo instante
+async function cargarDashboard() {
     try {
-        const response = await fetch('/api/dashboard/estadisticas');
+        const response = await fetch('/api/dashboard/foto');
         
         if (!response.ok) {
-            throw new Error('Error al cargar estadísticas');
+            throw new Error('Error al cargar el dashboard');
         }
         
-        const stats = await response.json();
-        mostrarEstadisticas(stats);
+        const foto = await response.json();
+        mostrarEstadisticas(foto.estadisticas);
+        mostrarActividadReciente(foto.actividad);
+        mostrarOcupacionPorTipo(foto.ocupacion_por_tipo);
         
     } catch (error) {
         console.error('Error:', error);
@@ -58,23 +86,6 @@ function mostrarEstadisticas(stats) {
     }
 }
 
-// ========== CARGAR ACTIVIDAD RECIENTE ==========
-async function cargarActividadReciente() {
-    try {
-        const response = await fetch('/api/dashboard/actividad-reciente');
-        
-        if (!response.ok) {
-            throw new Error('Error al cargar actividad');
-        }
-        
-        const actividades = await response.json();
-        mostrarActividadReciente(actividades);
-        
-    } catch (error) {
-        console.error('Error:', error);
-    }
-}
-
 // ========== MOSTRAR ACTIVIDAD RECIENTE ==========
 function mostrarActividadReciente(actividades) {
     const tbody = document.querySelector('.recent-activity tbody');
@@ -94,6 +105,14 @@ function mostrarActividadReciente(actividades) {
     });
 }
 
+// Tiempo desde la entrada (UTC), calculado aquí: la respuesta se cachea con ETag
+function tiempoDesdeEntrada(fechaEntrada) {
+    if (!fechaEntrada) return null;
+    const entrada = new Date(/[zZ]|[+-]\d\d:\d\d$/.test(fechaEntrada) ? fechaEntrada : `${fechaEntrada}Z`);
+    const totalMinutos = Math.max(Math.floor((Date.now() - entrada.getTime()) / 60000), 0);
+    return `${Math.floor(totalMinutos / 60)}h ${totalMinutos % 60}m`;
+}
+
 // ========== CREAR FILA DE ACTIVIDAD ==========
 function crearFilaActividad(actividad) {
     const tr = document.createElement('tr');
@@ -109,7 +128,7 @@ function crearFilaActividad(actividad) {
     let accion, estadoBadge;
     
     if (actividad.estado === 'activo') {
-        accion = `Ingresó (${actividad.tiempo_transcurrido || 'Ahora'})`;
+        accion = `Ingresó (${tiempoDesdeEntrada(actividad.fecha_entrada) || 'Ahora'})`;
         estadoBadge = '<span class="badge badge-success">Activo</span>';
     } else {
         accion = `Salió - ${actividad.monto_formateado || 'N/A'}`;
@@ -138,56 +157,30 @@ function crearFilaActividad(actividad) {
     return tr;
 }
 
-// ========== CARGAR OCUPACIÓN POR TIPO ==========
-async function cargarOcupacionPorTipo() {
-    try {
-        const response = await fetch('/api/dashboard/ocupacion-por-tipo');
-        
-        if (!response.ok) {
-            throw new Error('Error al cargar ocupación');
-        }
-        
-        const ocupacion = await response.json();
-        mostrarOcupacionPorTipo(ocupacion);
-        
-    } catch (error) {
-        console.error('Error:', error);
-    }
-}
-
 // ========== MOSTRAR OCUPACIÓN POR TIPO ==========
+// Tipos conocidos con su título y color; los demás del catálogo usan uno genérico
+const ESTILOS_TIPO = {
+    'regular': { titulo: '🚗 Regulares', color: '#2486DB' },
+    'moto': { titulo: '🏍️ Motos', color: '#28a745' },
+    'discapacitado': { titulo: '♿ Discapacitados', color: '#ffc107' }
+};
+
 function mostrarOcupacionPorTipo(ocupacion) {
     const container = document.getElementById('ocupacion-por-tipo');
     
     if (!container) return;
     
-    container.innerHTML = `
-        <div class="ocupacion-card">
-            <h4>🚗 Regulares</h4>
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: ${ocupacion.regular.porcentaje}%; background: #2486DB;"></div>
-            </div>
-            <p>${ocupacion.regular.ocupados} / ${ocupacion.regular.total} ocupados (${ocupacion.regular.porcentaje}%)</p>
-        </div>
-        
-        <div class="ocupacion-card">
-            <h4>🏍️ Motos</h4>
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: ${ocupacion.moto.porcentaje}%; background: #28a745;"></div>
-            </div>
-            <p>${ocupacion.moto.ocupados} / ${ocupacion.moto.total} ocupados (${ocupacion.moto.porcentaje}%)</p>
-        </div>
-        
+    container.innerHTML = Object.entries(ocupacion)
+        .map(([tipo, datos]) => {
+            const estilo = ESTILOS_TIPO[tipo] || { titulo: `🅿️ ${tipo}`, color: '#6c757d' };
+            return `
         <div class="ocupacion-card">
-            <h4>♿ Discapacitados</h4>
+            <h4>${estilo.titulo}</h4>
             <div class="progress-bar">
-                <div class="progress-fill" style="width: ${ocupacion.discapacitado.porcentaje}%; background: #ffc107;"></div>
+                <div class="progress-fill" style="width: ${datos.porcentaje}%; background: ${estilo.color};"></div>
             </div>
-            <p>${ocupacion.discapacitado.ocupados} / ${ocupacion.discapacitado.total} ocupados (${ocupacion.discapacitado.porcentaje}%)</p>
-        </div>
-    `;
+            <p>${datos.ocupados} / ${datos.total} ocupados (${datos.porcentaje}%)</p>
+        </div>`;
+        })
+        .join('');
 }
-
-
-
-
@@ -0,0 +1,114 @@
+// eventos.js - Eventos en vivo (SSE) con respaldo por polling
+
+// Una sola conexión EventSource por página. Cada pantalla se suscribe a
+// los eventos que le interesan ('ocupacion', 'ticket', 'salida', 'sesion')
+// y registra su función de respaldo: el polling solo corre mientras el
+// flujo está caído.
+const EventosParqueo = (() => {
+    const URL_EVENTOS = '/api/eventos';
+    const ESPERA_RESPALDO = 10000;   // ms sin flujo antes de empezar a consultar
+    const REINTENTO_CERRADO = 30000; // ms para reabrir un flujo cerrado
+
+    const oyentes = {};
+    const respaldos = [];
+    let intervalos = [];
+    let fuente = null;
+    let temporizadorRespaldo = null;
+    let detenido = false;
+
+    function iniciarRespaldo() {
+        if (detenido || intervalos.length) return;
+        respaldos.forEach(({ funcion, milisegundos }) => {
+            funcion();
+            intervalos.push(setInterval(funcion, milisegundos));
+        });
+    }
+
+    function detenerRespaldo() {
+        clearTimeout(temporizadorRespaldo);
+        temporizadorRespaldo = null;
+        intervalos.forEach(clearInterval);
+        intervalos = [];
+    }
+
+    function escuchar(nombre) {
+        fuente.addEventListener(nombre, (evento) => {
+            const datos = JSON.parse(evento.data);
+            (oyentes[nombre] || []).forEach(funcion => funcion(datos));
+        });
+    }
+
+    function conectar() {
+        if (detenido) return;
+        if (!window.EventSource) {
+            iniciarRespaldo();
+            return;
+        }
+
+        fuente = new EventSource(URL_EVENTOS);
+        Object.keys(oyentes).forEach(escuchar);
+
+        fuente.onopen = () => detenerRespaldo();
+
+        fuente.onerror = () => {
+            // EventSource reconecta solo; si no vuelve pronto, se consulta
+            if (!temporizadorRespaldo && !intervalos.length) {
+                temporizadorRespaldo = setTimeout(() => {
+                    temporizadorRespaldo = null;
+                    if (!fuente || fuente.readyState !== EventSource.OPEN) {
+                        iniciarRespaldo();
+                    }
+                }, ESPERA_RESPALDO);
+            }
+
+            // Cerrado por el servidor (401, 503 por tope de flujos, error):
+            // se consulta ya y se reabre más tarde
+            if (fuente.readyState === EventSource.CLOSED) {
+                fuente = null;
+                clearTimeout(temporizadorRespaldo);
+                temporizadorRespaldo = null;
+                iniciarRespaldo();
+                setTimeout(conectar, REINTENTO_CERRADO);
+            }
+        };
+    }
+
+    return {
+        // Llama a funcion(datos) con cada evento `nombre`
+        on(nombre, funcion) {
+            if (!oyentes[nombre]) {
+                oyentes[nombre] = [];
+                if (fuente) escuchar(nombre);
+            }
+            oyentes[nombre].push(funcion);
+        },
+
+        // Polling de respaldo mientras el flujo no está disponible
+        respaldo(funcion, milisegundos = 30000) {
+            respaldos.push({ funcion, milisegundos });
+            if (intervalos.length) {
+                intervalos.push(setInterval(funcion, milisegundos));
+            }
+        },
+
+        conectar() {
+            if (!fuente) conectar();
+        },
+
+        // Cierra el flujo y el polling (sesión expirada)
+        detener() {
+            detenido = true;
+            detenerRespaldo();
+            if (fuente) {
+                fuente.close();
+                fuente = null;
+            }
+        }
+    };
+})();
+
+document.addEventListener('DOMContentLoaded', () => {
+    // Las pantallas registran sus oyentes en su propio DOMContentLoaded;
+    // se conecta después de que todas lo hayan hecho
+    setTimeout(() => EventosParqueo.conectar(), 0);
+});
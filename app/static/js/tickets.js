@@ -7,10 +7,23 @@ let filtroActual = 'todos';
 document.addEventListener('DOMContentLoaded', () => {
     cargarTickets();
     
-    // Auto-refresh cada 30 segundos
-    setInterval(() => {
-        cargarTickets();
-    }, 30000);
+    // En vivo: recargar al entrar o salir un vehículo (una vez por ráfaga)
+    let recargaPendiente = null;
+    const recargar = () => {
+        if (recargaPendiente) return;
+        recargaPendiente = setTimeout(() => {
+            recargaPendiente = null;
+            cargarTickets();
+        }, 1000);
+    };
+    EventosParqueo.on('ticket', recargar);
+    EventosParqueo.on('salida', recargar);
+    
+    // Sin flujo de eventos: auto-refresh cada 30 segundos
+    EventosParqueo.respaldo(cargarTickets, 30000);
+    
+    // Tiempos transcurridos: se recalculan en el cliente cada minuto
+    setInterval(mostrarTickets, 60000);
 });
 
 // ========== CARGAR TICKETS ==========
@@ -26,11 +39,7 @@ async function cargarTickets() {
         ticketsOriginales = tickets;
         todosLosTickets = tickets;
         
-        // Actualizar estadísticas
-        actualizarEstadisticas(tickets);
-        
-        // Aplicar filtros actuales
-        aplicarFiltros();
+        mostrarTickets();
         
     } catch (error) {
         console.error('Error:', error);
@@ -41,6 +50,32 @@ async function cargarTickets() {
     }
 }
 
+// ========== TIEMPO TRANSCURRIDO ==========
+// El servidor no lo envía (la respuesta se cachea con ETag): se calcula
+// aquí desde fecha_entrada (UTC) y se refresca cada minuto
+function tiempoTranscurrido(fechaEntrada) {
+    const entrada = new Date(/[zZ]|[+-]\d\d:\d\d$/.test(fechaEntrada) ? fechaEntrada : `${fechaEntrada}Z`);
+    const totalMinutos = Math.max(Math.floor((Date.now() - entrada.getTime()) / 60000), 0);
+    const horas = Math.floor(totalMinutos / 60);
+    const minutos = totalMinutos % 60;
+    return { horas, minutos, texto: `${horas}h ${minutos}m` };
+}
+
+function mostrarTickets() {
+    ticketsOriginales.forEach(ticket => {
+        if (ticket.fecha_entrada) {
+            ticket.tiempo_transcurrido = tiempoTranscurrido(ticket.fecha_entrada);
+        }
+    });
+    
+    // Actualizar estadísticas
+    actualizarEstadisticas(ticketsOriginales);
+    
+    // Aplicar filtros actuales
+    const busqueda = document.getElementById('search-placa');
+    aplicarFiltros(busqueda ? busqueda.value : '');
+}
+
 // ========== ACTUALIZAR ESTADÍSTICAS ==========
 function actualizarEstadisticas(tickets) {
     // Total de tickets
@@ -1,21 +1,37 @@
 // transacciones.js - Gestión del historial de transacciones
 
+// Paginación por cursor: el servidor indica la siguiente página en X-Next-Cursor
+const TRANSACCIONES_POR_PAGINA = 50;
+let cursorTransacciones = null;
+let cargandoTransacciones = false;
+
 document.addEventListener('DOMContentLoaded', () => {
     cargarTransacciones();
     cargarEstadisticas();
 });
 
-// ========== CARGAR TRANSACCIONES ==========
-async function cargarTransacciones() {
+// ========== CARGAR TRANSACCIONES (por páginas) ==========
+async function cargarTransacciones(siguientePagina = false) {
+    if (cargandoTransacciones) return;
+    cargandoTransacciones = true;
+    
     try {
-        const response = await fetch('/api/transacciones');
+        const params = new URLSearchParams({ limit: TRANSACCIONES_POR_PAGINA });
+        if (siguientePagina && cursorTransacciones) {
+            params.set('cursor', cursorTransacciones);
+        }
+        
+        const response = await fetch(`/api/transacciones?${params}`);
         
         if (!response.ok) {
             throw new Error('Error al cargar transacciones');
         }
         
         const transacciones = await response.json();
-        mostrarTransacciones(transacciones);
+        cursorTransacciones = response.headers.get('X-Next-Cursor');
+        
+        mostrarTransacciones(transacciones, siguientePagina);
+        actualizarCargarMas();
         
     } catch (error) {
         console.error('Error:', error);
@@ -24,19 +40,57 @@ async function cargarTransacciones() {
             title: 'Error',
             text: 'No se pudieron cargar las transacciones'
         });
+    } finally {
+        cargandoTransacciones = false;
     }
 }
 
+// ========== BOTÓN "CARGAR MÁS" (y carga automática al hacer scroll) ==========
+function actualizarCargarMas() {
+    let contenedor = document.getElementById('cargar-mas-transacciones');
+    
+    if (!contenedor) {
+        const tabla = document.querySelector('.table-container');
+        if (!tabla) return;
+        
+        contenedor = document.createElement('div');
+        contenedor.id = 'cargar-mas-transacciones';
+        contenedor.style.textAlign = 'center';
+        contenedor.style.marginTop = '1rem';
+        contenedor.innerHTML = `
+            <button class="btn-secondary">
+                <i class="fas fa-chevron-down"></i> Cargar más
+            </button>
+        `;
+        contenedor.querySelector('button').addEventListener('click', () => cargarTransacciones(true));
+        tabla.after(contenedor);
+        
+        // Cargar la siguiente página cuando el botón entra en pantalla
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(entradas => {
+                if (entradas[0].isIntersecting && cursorTransacciones) {
+                    cargarTransacciones(true);
+                }
+            }).observe(contenedor);
+        }
+    }
+    
+    contenedor.style.display = cursorTransacciones ? 'block' : 'none';
+}
+
 // ========== MOSTRAR TRANSACCIONES EN LA TABLA ==========
-function mostrarTransacciones(transacciones) {
+function mostrarTransacciones(transacciones, agregar = false) {
     const tbody = document.querySelector('tbody');
     
-    if (transacciones.length === 0) {
+    if (!agregar && transacciones.length === 0) {
         tbody.innerHTML = '<tr><td colspan="6" class="no-data">No hay transacciones registradas</td></tr>';
         return;
     }
     
-    tbody.innerHTML = '';
+    // Primera página: reemplazar; siguientes: agregar al final
+    if (!agregar) {
+        tbody.innerHTML = '';
+    }
     
     transacciones.forEach(transaccion => {
         const row = crearFilaTransaccion(transaccion);
@@ -3,6 +3,11 @@
 // Variable global para almacenar espacios por tipo
 let espaciosPorTipo = {};
 
+// Paginación por cursor: el servidor indica la siguiente página en X-Next-Cursor
+const VEHICULOS_POR_PAGINA = 50;
+let cursorVehiculos = null;
+let cargandoVehiculos = false;
+
 document.addEventListener('DOMContentLoaded', () => {
     cargarVehiculos();
     cargarDisponibilidad();
@@ -134,17 +139,28 @@ function actualizarDisponibilidad() {
     }
 }
 
-// ========== CARGAR VEHÍCULOS ==========
-async function cargarVehiculos() {
+// ========== CARGAR VEHÍCULOS (por páginas) ==========
+async function cargarVehiculos(siguientePagina = false) {
+    if (cargandoVehiculos) return;
+    cargandoVehiculos = true;
+    
     try {
-        const response = await fetch('/api/vehiculos');
+        const params = new URLSearchParams({ limit: VEHICULOS_POR_PAGINA });
+        if (siguientePagina && cursorVehiculos) {
+            params.set('cursor', cursorVehiculos);
+        }
+        
+        const response = await fetch(`/api/vehiculos?${params}`);
         
         if (!response.ok) {
             throw new Error('Error al cargar vehículos');
         }
         
         const vehiculos = await response.json();
-        mostrarVehiculos(vehiculos);
+        cursorVehiculos = response.headers.get('X-Next-Cursor');
+        
+        mostrarVehiculos(vehiculos, siguientePagina);
+        actualizarCargarMasVehiculos();
         
     } catch (error) {
         console.error('Error:', error);
@@ -153,21 +169,59 @@ async function cargarVehiculos() {
             title: 'Error',
             text: 'No se pudieron cargar los vehículos'
         });
+    } finally {
+        cargandoVehiculos = false;
+    }
+}
+
+// ========== BOTÓN "CARGAR MÁS" (y carga automática al hacer scroll) ==========
+function actualizarCargarMasVehiculos() {
+    const tbody = document.getElementById('tbody-vehiculos');
+    if (!tbody) return;
+    
+    let contenedor = document.getElementById('cargar-mas-vehiculos');
+    
+    if (!contenedor) {
+        contenedor = document.createElement('div');
+        contenedor.id = 'cargar-mas-vehiculos';
+        contenedor.style.textAlign = 'center';
+        contenedor.style.marginTop = '1rem';
+        contenedor.innerHTML = `
+            <button class="btn-secondary">
+                <i class="fas fa-chevron-down"></i> Cargar más
+            </button>
+        `;
+        contenedor.querySelector('button').addEventListener('click', () => cargarVehiculos(true));
+        (tbody.closest('.table-container') || tbody.closest('table')).after(contenedor);
+        
+        // Cargar la siguiente página cuando el botón entra en pantalla
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(entradas => {
+                if (entradas[0].isIntersecting && cursorVehiculos) {
+                    cargarVehiculos(true);
+                }
+            }).observe(contenedor);
+        }
     }
+    
+    contenedor.style.display = cursorVehiculos ? 'block' : 'none';
 }
 
 // ========== MOSTRAR VEHÍCULOS EN LA TABLA ==========
-function mostrarVehiculos(vehiculos) {
+function mostrarVehiculos(vehiculos, agregar = false) {
     const tbody = document.getElementById('tbody-vehiculos');
     
     if (!tbody) return;
     
-    if (vehiculos.length === 0) {
+    if (!agregar && vehiculos.length === 0) {
         tbody.innerHTML = '<tr><td colspan="4" class="no-data">No hay vehículos registrados</td></tr>';
         return;
     }
     
-    tbody.innerHTML = '';
+    // Primera página: reemplazar; siguientes: agregar al final
+    if (!agregar) {
+        tbody.innerHTML = '';
+    }
     
     vehiculos.forEach(vehiculo => {
         const row = crearFilaVehiculo(vehiculo);
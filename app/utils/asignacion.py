@@ -0,0 +1,511 @@
+import heapq
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.tipo_espacio import TIPOS_INICIALES
+from app.utils.tipos import catalogo_tipos
+
+
+# Candidatos que se leen por intento en SQLite antes de volver a consultar
+CANDIDATOS_POR_INTENTO = 10
+
+# Datos mínimos de un espacio que guarda el índice en memoria
+EspacioLibre = namedtuple('EspacioLibre', ['id', 'numero', 'tipo', 'piso', 'seccion', 'estado', 'activo'])
+
+# Tipos que se asignan por sección y número hasta leer el catálogo
+POR_SECCION_INICIAL = frozenset(tipo['codigo'] for tipo in TIPOS_INICIALES if tipo['orden_por_seccion'])
+
+
+def normalizar_tipo(tipo_vehiculo):
+    """Tipo de espacio que corresponde a un tipo de vehículo (el por defecto si no está en el catálogo)"""
+    return catalogo_tipos().normalizar(tipo_vehiculo)
+
+
+def consulta_espacios_disponibles(tipo_vehiculo):
+    """
+    Construye el SELECT de espacios disponibles para un tipo de vehículo,
+    en el mismo orden que usa la asignación automática
+    """
+    catalogo = catalogo_tipos()
+    tipo = catalogo.normalizar(tipo_vehiculo)
+
+    consulta = select(Espacio).where(
+        Espacio.tipo == tipo,
+        Espacio.estado == 'disponible',
+        Espacio.activo == True
+    )
+
+    if tipo in catalogo.por_seccion:
+        return consulta.order_by(Espacio.seccion, Espacio.numero)
+
+    return consulta.order_by(Espacio.numero)
+
+
+# ===== ESTRATEGIAS DE ORDEN =====
+
+class EstrategiaOrden(ABC):
+    """
+    Define qué espacio libre se asigna primero.
+
+    - clave(espacio): orden dentro de un piso (menor = primero)
+    - elegir(grupos): de qué piso tomar, recibe los grupos no vacíos
+    """
+
+    # Tipos ordenados por sección y número (orden_por_seccion del catálogo)
+    por_seccion = POR_SECCION_INICIAL
+
+    def clave(self, espacio):
+        # Mismo orden que la consulta SQL
+        if espacio.tipo in self.por_seccion:
+            return (espacio.seccion or '', espacio.numero)
+        return (espacio.numero,)
+
+    @abstractmethod
+    def elegir(self, grupos):
+        """Grupo (piso) del que se toma el siguiente espacio"""
+
+
+class OrdenCercania(EstrategiaOrden):
+    """El más cercano a la entrada en todo el parqueo (orden global)"""
+
+    def elegir(self, grupos):
+        return min(grupos, key=lambda grupo: grupo.tope())
+
+
+class OrdenLlenarPiso(EstrategiaOrden):
+    """Llena el piso más bajo antes de pasar al siguiente"""
+
+    def elegir(self, grupos):
+        return min(grupos, key=lambda grupo: grupo.piso)
+
+
+class OrdenBalancearPisos(EstrategiaOrden):
+    """Reparte los vehículos en el piso con más espacios libres"""
+
+    def elegir(self, grupos):
+        return max(grupos, key=lambda grupo: (len(grupo), -grupo.piso))
+
+
+ESTRATEGIAS = {
+    'cercania': OrdenCercania,
+    'llenar_piso': OrdenLlenarPiso,
+    'balancear_pisos': OrdenBalancearPisos,
+}
+
+
+# ===== ÍNDICE EN MEMORIA =====
+
+class _GrupoLibres:
+    """Cola de prioridad de espacios libres de un tipo en un piso"""
+
+    def __init__(self, piso):
+        self.piso = piso
+        self._heap = []
+        self._libres = {}  # espacio_id -> (clave, EspacioLibre)
+
+    def __len__(self):
+        return len(self._libres)
+
+    def agregar(self, clave, espacio):
+        self._libres[espacio.id] = (clave, espacio)
+        heapq.heappush(self._heap, (clave, espacio.id))
+
+    def quitar(self, espacio_id):
+        # Borrado perezoso: la entrada del heap se descarta al llegar al tope
+        return self._libres.pop(espacio_id, None)
+
+    def _limpiar_tope(self):
+        while self._heap:
+            clave, espacio_id = self._heap[0]
+            actual = self._libres.get(espacio_id)
+            if actual is not None and actual[0] == clave:
+                return
+            heapq.heappop(self._heap)
+
+    def tope(self):
+        self._limpiar_tope()
+        return self._heap[0][0]
+
+    def primero(self):
+        self._limpiar_tope()
+        return self._libres[self._heap[0][1]][1]
+
+    def extraer(self):
+        espacio = self.primero()
+        heapq.heappop(self._heap)
+        return self._libres.pop(espacio.id)[1]
+
+
+class IndiceEspacios:
+    """
+    Índice en memoria de espacios libres por tipo y piso.
+
+    Es una pista para evitar el escaneo ordenado de `espacios` en cada
+    ingreso; la base de datos sigue siendo la fuente de verdad. Cada
+    asignación se confirma con un UPDATE condicional y, si el índice se
+    queda sin candidatos, se consulta SQL antes de responder "lleno".
+    Se reconstruye cuando supera su TTL para recoger cambios hechos por
+    otros workers.
+    """
+
+    def __init__(self, estrategia='cercania', ttl=60):
+        self.estrategia = ESTRATEGIAS.get(estrategia, OrdenCercania)()
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._grupos = {}  # tipo -> {piso -> _GrupoLibres}
+        self._ubicacion = {}  # espacio_id -> (tipo, piso)
+        self._activos = {}  # espacio_id -> tipo (todos los activos, libres o no)
+        self._catalogo = None  # catálogo de tipos con que se cargó
+        self._cargado_en = None
+
+    def caliente(self):
+        return (
+            self._cargado_en is not None
+            and time.monotonic() - self._cargado_en < self.ttl
+        )
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado_en = None
+
+    def cargar(self):
+        """Reconstruye el índice con una sola consulta sobre `espacios`"""
+        filas = db.session.execute(select(*_COLUMNAS_ESPACIO)).all()
+        catalogo = catalogo_tipos()
+
+        with self._lock:
+            self._catalogo = catalogo
+            self.estrategia.por_seccion = catalogo.por_seccion
+            self._grupos = {}
+            self._ubicacion = {}
+            self._activos = {}
+            for fila in filas:
+                self._agregar(EspacioLibre(*fila))
+            self._cargado_en = time.monotonic()
+
+    def asegurar_caliente(self):
+        if not self.caliente():
+            self.cargar()
+
+    def _agregar(self, espacio):
+        if espacio.activo:
+            self._activos[espacio.id] = espacio.tipo
+        if espacio.estado != 'disponible' or not espacio.activo:
+            return
+
+        pisos = self._grupos.setdefault(espacio.tipo, {})
+        piso = espacio.piso or 1
+        grupo = pisos.get(piso)
+        if grupo is None:
+            grupo = pisos[piso] = _GrupoLibres(piso)
+
+        grupo.agregar(self.estrategia.clave(espacio), espacio)
+        self._ubicacion[espacio.id] = (espacio.tipo, piso)
+
+    def _quitar(self, espacio_id):
+        ubicacion = self._ubicacion.pop(espacio_id, None)
+        if ubicacion is None:
+            return
+        tipo, piso = ubicacion
+        self._grupos[tipo][piso].quitar(espacio_id)
+
+    def actualizar(self, espacio):
+        """Aplica el estado actual de un espacio (EspacioLibre)"""
+        with self._lock:
+            self._quitar(espacio.id)
+            self._activos.pop(espacio.id, None)
+            self._agregar(espacio)
+
+    def quitar(self, espacio_id):
+        with self._lock:
+            self._quitar(espacio_id)
+            self._activos.pop(espacio_id, None)
+
+    def _tipo(self, tipo_vehiculo):
+        return self._catalogo.normalizar(tipo_vehiculo) if self._catalogo else tipo_vehiculo
+
+    def _elegir_grupo(self, tipo_vehiculo):
+        pisos = self._grupos.get(self._tipo(tipo_vehiculo), {})
+        grupos = [grupo for grupo in pisos.values() if len(grupo)]
+        return self.estrategia.elegir(grupos) if grupos else None
+
+    def ver(self, tipo_vehiculo):
+        """Siguiente espacio libre según la estrategia, sin extraerlo"""
+        with self._lock:
+            grupo = self._elegir_grupo(tipo_vehiculo)
+            return grupo.primero() if grupo else None
+
+    def tomar(self, tipo_vehiculo):
+        """Extrae el siguiente espacio libre según la estrategia, o None"""
+        with self._lock:
+            grupo = self._elegir_grupo(tipo_vehiculo)
+            if grupo is None:
+                return None
+
+            espacio = grupo.extraer()
+            self._ubicacion.pop(espacio.id, None)
+            return espacio
+
+    def disponibles_por_tipo(self):
+        """Espacios libres por cada tipo con espacios en el índice"""
+        with self._lock:
+            return {
+                tipo: sum(len(grupo) for grupo in pisos.values())
+                for tipo, pisos in self._grupos.items()
+            }
+
+    def ocupacion_por_tipo(self):
+        """Porcentaje de espacios activos no disponibles, por tipo"""
+        with self._lock:
+            totales = {}
+            for tipo in self._activos.values():
+                totales[tipo] = totales.get(tipo, 0) + 1
+            libres = self.disponibles_por_tipo()
+            return {
+                tipo: round((total - libres.get(tipo, 0)) / total * 100, 2)
+                for tipo, total in totales.items()
+            }
+
+
+def obtener_indice():
+    """Índice de espacios de la aplicación actual (uno por worker)"""
+    indice = current_app.extensions.get('indice_espacios')
+    if indice is None:
+        indice = current_app.extensions.setdefault('indice_espacios', IndiceEspacios(
+            estrategia=current_app.config.get('ESTRATEGIA_ASIGNACION', 'cercania'),
+            ttl=current_app.config.get('INDICE_ESPACIOS_TTL', 60)
+        ))
+    return indice
+
+
+def _foto(espacio, **cambios):
+    datos = {
+        'id': espacio.id,
+        'numero': espacio.numero,
+        'tipo': espacio.tipo,
+        'piso': espacio.piso,
+        'seccion': espacio.seccion,
+        'estado': espacio.estado,
+        'activo': espacio.activo,
+    }
+    datos.update(cambios)
+    return EspacioLibre(**datos)
+
+
+# ===== SINCRONIZACIÓN CON LA SESIÓN =====
+# Los cambios a espacios se aplican al índice solo después del commit;
+# un rollback devuelve al índice los espacios reclamados en la transacción.
+
+def registrar_cambio_espacio(espacio):
+    """Agenda un EspacioLibre para aplicarlo al índice tras el commit"""
+    db.session.info.setdefault('indice_pendiente', []).append(espacio)
+
+
+@event.listens_for(Session, 'after_flush')
+def _capturar_cambios_espacios(session, flush_context):
+    pendientes = session.info.setdefault('indice_pendiente', [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Espacio):
+            pendientes.append(_foto(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Espacio):
+            pendientes.append(_foto(obj, activo=False))
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_cambios_espacios(session):
+    pendientes = session.info.pop('indice_pendiente', None)
+    session.info.pop('indice_reservas', None)
+    if not pendientes or not has_app_context():
+        return
+
+    indice = current_app.extensions.get('indice_espacios')
+    if indice is None:
+        return
+
+    for espacio in pendientes:
+        indice.actualizar(espacio)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_cambios_espacios(session):
+    session.info.pop('indice_pendiente', None)
+    reservas = session.info.pop('indice_reservas', None)
+    if not reservas or not has_app_context():
+        return
+
+    indice = current_app.extensions.get('indice_espacios')
+    if indice is None:
+        return
+
+    for espacio in reservas:
+        indice.actualizar(espacio)
+
+
+# ===== ASIGNACIÓN =====
+
+_COLUMNAS_ESPACIO = (
+    Espacio.id, Espacio.numero, Espacio.tipo, Espacio.piso,
+    Espacio.seccion, Espacio.estado, Espacio.activo
+)
+
+# UPDATE condicional: solo gana quien encuentra el espacio disponible.
+# Se construye una vez; SQLAlchemy reutiliza su forma compilada.
+_RECLAMAR_POR_ID = (
+    update(Espacio)
+    .where(Espacio.id == bindparam('espacio_id'), Espacio.estado == 'disponible')
+    .values(estado='ocupado')
+    .returning(*_COLUMNAS_ESPACIO)
+    .execution_options(synchronize_session=False)
+)
+
+
+def _reclamar_por_id(espacio_id):
+    fila = db.session.execute(_RECLAMAR_POR_ID, {'espacio_id': espacio_id}).first()
+    return EspacioLibre(*fila) if fila else None
+
+
+def reservar_candidato(candidato):
+    """Anota un candidato extraído del índice para devolverlo si hay rollback"""
+    db.session.info.setdefault('indice_reservas', []).append(candidato)
+
+
+def candidatos_indice(tipo_vehiculo):
+    """
+    Genera candidatos del índice en memoria, cada uno ya extraído.
+    Un candidato desactualizado (otro worker lo ocupó) simplemente se descarta.
+    """
+    indice = obtener_indice()
+    indice.asegurar_caliente()
+
+    while True:
+        candidato = indice.tomar(tipo_vehiculo)
+        if candidato is None:
+            return
+        yield candidato
+
+
+def _reclamar_desde_indice(tipo_vehiculo):
+    for candidato in candidatos_indice(tipo_vehiculo):
+        espacio = _reclamar_por_id(candidato.id)
+        if espacio:
+            reservar_candidato(candidato)
+            return espacio
+
+    return None
+
+
+def _reclamar_sql(tipo_vehiculo):
+    consulta = consulta_espacios_disponibles(tipo_vehiculo)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Un solo UPDATE sobre el primer espacio no bloqueado por otra garita
+        fila = db.session.execute(
+            update(Espacio)
+            .where(Espacio.id == consulta.with_only_columns(Espacio.id)
+                   .limit(1).with_for_update(skip_locked=True).scalar_subquery())
+            .values(estado='ocupado')
+            .returning(*_COLUMNAS_ESPACIO)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        espacio = EspacioLibre(*fila) if fila else None
+        if espacio:
+            registrar_cambio_espacio(espacio)
+        return espacio
+
+    descartados = set()
+
+    while True:
+        candidatos = db.session.execute(
+            consulta.with_only_columns(Espacio.id)
+            .where(Espacio.id.notin_(descartados))
+            .limit(CANDIDATOS_POR_INTENTO)
+        ).scalars().all()
+
+        if not candidatos:
+            return None
+
+        for espacio_id in candidatos:
+            espacio = _reclamar_por_id(espacio_id)
+            if espacio:
+                registrar_cambio_espacio(espacio)
+                return espacio
+
+            descartados.add(espacio_id)
+
+
+def reclamar_espacio(tipo_vehiculo):
+    """
+    Reclama de forma atómica un espacio disponible y lo marca como ocupado
+    dentro de la transacción actual.
+
+    El candidato sale del índice en memoria y se confirma con un UPDATE
+    condicional (WHERE estado='disponible'). Si el índice no tiene
+    candidatos se usa la consulta SQL:
+
+    - PostgreSQL: UPDATE sobre un SELECT ... FOR UPDATE SKIP LOCKED, cada
+      garita salta las filas que otra ya bloqueó en lugar de esperar.
+    - SQLite: UPDATE condicional; si otra garita ganó el espacio, el UPDATE
+      no afecta filas y se prueba el siguiente.
+
+    Retorna el EspacioLibre reclamado (estado 'ocupado') o None si no hay
+    espacios. El llamador es responsable de hacer commit (o rollback, que
+    libera el espacio).
+    """
+    espacio = _reclamar_desde_indice(tipo_vehiculo)
+    if espacio:
+        return espacio
+
+    return _reclamar_sql(tipo_vehiculo)
+
+
+def reclamar_espacios(tipo_vehiculo, cantidad):
+    """
+    Reclama hasta `cantidad` espacios de un tipo en una sola pasada
+    (un SELECT y un UPDATE ... RETURNING), para ingresos por lote.
+
+    Retorna la lista de EspacioLibre reclamados en orden de asignación;
+    puede tener menos elementos si no alcanzan los espacios.
+    """
+    if cantidad <= 0:
+        return []
+
+    consulta = consulta_espacios_disponibles(tipo_vehiculo).with_only_columns(
+        *_COLUMNAS_ESPACIO
+    ).limit(cantidad)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        consulta = consulta.with_for_update(skip_locked=True)
+
+    candidatos = [EspacioLibre(*fila) for fila in db.session.execute(consulta)]
+    if not candidatos:
+        return []
+
+    reclamados = set(db.session.execute(
+        update(Espacio)
+        .where(Espacio.id.in_([c.id for c in candidatos]), Espacio.estado == 'disponible')
+        .values(estado='ocupado')
+        .returning(Espacio.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+
+    espacios = [c._replace(estado='ocupado') for c in candidatos if c.id in reclamados]
+    for espacio in espacios:
+        registrar_cambio_espacio(espacio)
+
+    return espacios
+
+
+def ocupacion_por_tipo():
+    """Porcentaje de ocupación por tipo desde el índice (lo calienta si hace falta)"""
+    indice = obtener_indice()
+    indice.asegurar_caliente()
+    return indice.ocupacion_por_tipo()
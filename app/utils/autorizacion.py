@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+
+from flask import current_app, jsonify, render_template
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from sqlalchemy import select
+from app.extensions import db, jwt
+from app.models.usuario import Usuario
+
+
+# Identidad y rol viajan en el JWT (claims 'usuario', 'rol' y 'tv') desde
+# el login, así que las rutas protegidas y los chequeos de rol no consultan
+# `usuarios` en cada request.
+#
+# Revocación: `usuarios.token_version` ('tv' en el token) sube al cambiar
+# el rol o la contraseña de un usuario; un token con otra versión (o de un
+# usuario borrado) se rechaza con 401. Cada proceso guarda la versión de
+# cada usuario y la relee (una consulta por clave primaria) cada
+# TOKEN_VERSION_TTL segundos, o antes si llega un token más nuevo que su
+# copia (login en otro worker). El login y los cambios hechos en este
+# proceso la anotan sin consultar; los de otro worker tardan como mucho
+# ese TTL en revocar los tokens viejos aquí.
+
+# Usuario de la sesión actual, armado desde los claims (sin consultar la BD)
+UsuarioSesion = namedtuple('UsuarioSesion', 'id nombre_usuario rol')
+
+
+def crear_token(usuario):
+    """Access token con la identidad, el rol y la versión de token del usuario"""
+    return create_access_token(identity=str(usuario.id), additional_claims={
+        'usuario': usuario.nombre_usuario,
+        'rol': usuario.rol,
+        'tv': usuario.token_version
+    })
+
+
+def usuario_actual():
+    """UsuarioSesion de la request (requiere @jwt_required())"""
+    claims = get_jwt()
+    return UsuarioSesion(int(get_jwt_identity()), claims.get('usuario'), claims.get('rol'))
+
+
+def tiene_rol(*roles):
+    return get_jwt().get('rol') in roles
+
+
+def rol_requerido(*roles, mensaje="No tienes permisos", pagina=False):
+    """
+    Decorador (debajo de @jwt_required()): responde 403 si el rol del token
+    no está en `roles`. Con pagina=True responde la página de error.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if not tiene_rol(*roles):
+                if pagina:
+                    return render_template('error.html', mensaje=mensaje, codigo=403), 403
+                return jsonify({"error": mensaje}), 403
+            return vista(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def revocar_tokens(usuario):
+    """Sube la versión de token del usuario (sin commit); tras el commit, anotar_version()"""
+    usuario.token_version = (usuario.token_version or 1) + 1
+
+
+# ===== VERSIONES DE TOKEN (por proceso) =====
+
+class _CacheVersiones:
+    """
+    {usuario_id: (token_version, leida_en, mayor version de token ya
+    contrastada)}; None como versión = usuario inexistente
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versiones = {}
+
+    def anotar(self, usuario_id, version):
+        with self._lock:
+            self._versiones[usuario_id] = (version, time.monotonic(), version or 0)
+
+    def invalidar(self):
+        with self._lock:
+            self._versiones.clear()
+
+    def version(self, usuario_id, version_token):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._versiones.get(usuario_id)
+            # Se relee si venció o si el token es más nuevo que la copia
+            # (una sola vez por versión: un usuario borrado no consulta siempre)
+            if (entrada is None or ahora - entrada[1] >= self.ttl
+                    or (entrada[0] or 0) < version_token and entrada[2] < version_token):
+                version = db.session.execute(
+                    select(Usuario.token_version).where(Usuario.id == usuario_id)
+                ).scalar()
+                entrada = self._versiones[usuario_id] = (version, ahora, max(version or 0, version_token))
+            return entrada[0]
+
+
+def _cache():
+    cache = current_app.extensions.get('versiones_token')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'versiones_token', _CacheVersiones(ttl=current_app.config.get('TOKEN_VERSION_TTL', 30))
+        )
+    return cache
+
+
+def anotar_version(usuario_id, version):
+    """Versión vigente de un usuario ya conocida (login, cambio confirmado; None si se borró)"""
+    _cache().anotar(usuario_id, version)
+
+
+@jwt.token_in_blocklist_loader
+def _token_revocado(jwt_header, jwt_payload):
+    # Tokens sin versión ni rol (emitidos antes de los claims): iniciar sesión de nuevo
+    if 'tv' not in jwt_payload or 'rol' not in jwt_payload:
+        return True
+    try:
+        usuario_id = int(jwt_payload['sub'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return _cache().version(usuario_id, jwt_payload['tv']) != jwt_payload['tv']
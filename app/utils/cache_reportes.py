@@ -0,0 +1,233 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, make_response, request
+from app.extensions import db
+from app.utils.motores import en_replica, usar_replica
+from app.utils.versiones import leer_versiones
+
+
+# Caché de resultados de reportes, por proceso. Cada entrada guarda el
+# cuerpo JSON ya serializado y las versiones de las familias de datos con
+# que se calculó (app/models/version_datos.py). Una escritura que cambia
+# esas familias (una salida suma al cubo -> 'ingresos'; un espacio cambia
+# -> 'espacios') vuelve vieja la entrada sin barrer nada: la siguiente
+# lectura compara versiones (una consulta) y lo nota.
+#
+# - TTL: techo de vida aunque las versiones no cambien.
+# - LRU acotada por cantidad de entradas y por bytes de los cuerpos.
+# - Stale-while-revalidate: una entrada vieja se sigue sirviendo hasta
+#   REPORTES_CACHE_STALE segundos mientras un hilo la recalcula; solo una
+#   recarga por clave a la vez, así que un cálculo lento no frena lecturas.
+
+Entrada = namedtuple('Entrada', 'cuerpo mimetype versiones calculada_en vieja_desde')
+
+
+class CacheReportes:
+    """LRU de respuestas de reportes con TTL, límite de bytes y recarga en segundo plano"""
+
+    def __init__(self, ttl=300, stale=60, max_entradas=256, max_bytes=8 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._recargas = {}
+        self.contadores = {
+            'aciertos': 0, 'fallos': 0, 'viejas_servidas': 0,
+            'recargas': 0, 'desalojos': 0, 'errores': 0
+        }
+
+    # ----- entradas -----
+
+    def contar(self, nombre):
+        with self._lock:
+            self.contadores[nombre] += 1
+
+    def buscar(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, cuerpo, mimetype, versiones, ahora=None):
+        ahora = ahora if ahora is not None else time.monotonic()
+        if len(cuerpo) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior.cuerpo)
+            self._entradas[clave] = Entrada(cuerpo, mimetype, versiones, ahora, None)
+            self._bytes += len(cuerpo)
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, desalojada = self._entradas.popitem(last=False)
+                self._bytes -= len(desalojada.cuerpo)
+                self.contadores['desalojos'] += 1
+
+    def marcar_vieja(self, clave, ahora):
+        """Momento desde el que la entrada es vieja (se fija la primera vez)"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return ahora
+            if entrada.vieja_desde is None:
+                entrada = self._entradas[clave] = entrada._replace(vieja_desde=ahora)
+            return entrada.vieja_desde
+
+    def vigente(self, entrada, versiones, ahora):
+        return entrada.versiones == versiones and ahora - entrada.calculada_en < self.ttl
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estado(self):
+        with self._lock:
+            consultas = self.contadores['aciertos'] + self.contadores['viejas_servidas'] + self.contadores['fallos']
+            return {
+                **self.contadores,
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'tasa_aciertos': round(
+                    (self.contadores['aciertos'] + self.contadores['viejas_servidas']) / consultas, 3
+                ) if consultas else None,
+                'ttl': self.ttl,
+                'stale': self.stale,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes
+            }
+
+    # ----- recarga en segundo plano -----
+
+    def recargar(self, clave, calcular):
+        """Lanza calcular() en un hilo si no hay ya una recarga de la clave"""
+        with self._lock:
+            hilo = self._recargas.get(clave)
+            if hilo is not None and hilo.is_alive():
+                return hilo
+            hilo = threading.Thread(target=self._recargar, args=(clave, calcular), daemon=True)
+            self._recargas[clave] = hilo
+        self.contar('recargas')
+        hilo.start()
+        return hilo
+
+    def _recargar(self, clave, calcular):
+        try:
+            calcular()
+        except Exception as e:
+            self.contar('errores')
+            print(f"❌ Error al recalcular reporte {clave}: {e}")
+        finally:
+            with self._lock:
+                if self._recargas.get(clave) is threading.current_thread():
+                    del self._recargas[clave]
+
+    def esperar_recargas(self, timeout=None):
+        """Espera las recargas en curso (consola y pruebas)"""
+        with self._lock:
+            hilos = list(self._recargas.values())
+        for hilo in hilos:
+            hilo.join(timeout)
+
+
+def obtener_cache():
+    """Caché de reportes del proceso"""
+    cache = current_app.extensions.get('cache_reportes')
+    if cache is None:
+        configuracion = current_app.config
+        cache = current_app.extensions.setdefault('cache_reportes', CacheReportes(
+            ttl=configuracion.get('REPORTES_CACHE_TTL', 300),
+            stale=configuracion.get('REPORTES_CACHE_STALE', 60),
+            max_entradas=configuracion.get('REPORTES_CACHE_MAX_ENTRADAS', 256),
+            max_bytes=configuracion.get('REPORTES_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+        ))
+    return cache
+
+
+def _calcular_y_guardar(cache, clave, vista, args, kwargs, familias):
+    """Ejecuta la vista y guarda el cuerpo si fue 200; retorna la respuesta"""
+    # Versiones antes de calcular: una escritura en medio deja la entrada vieja, no al revés
+    versiones = leer_versiones(familias)
+    respuesta = make_response(vista(*args, **kwargs))
+    if respuesta.status_code == 200 and not respuesta.is_streamed:
+        cache.guardar(clave, respuesta.get_data(), respuesta.mimetype, versiones)
+    return respuesta
+
+
+def _respuesta(entrada, estado_cache):
+    respuesta = current_app.response_class(entrada.cuerpo, mimetype=entrada.mimetype)
+    respuesta.headers['X-Cache'] = estado_cache
+    return respuesta
+
+
+def cache_reporte(*familias, extra=None):
+    """
+    Decorador de GET de reportes: clave = ruta + parámetros (+ extra(), p.
+    ej. la fecha local de "hoy"); la entrada vale mientras las versiones
+    de `familias` no cambien y no pase el TTL. Agrega X-Cache
+    (HIT | STALE | MISS).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            cache = obtener_cache()
+            if not cache.max_entradas:
+                return vista(*args, **kwargs)
+
+            clave = (
+                request.path,
+                tuple(sorted(request.args.items(multi=True))),
+                extra() if extra else None
+            )
+
+            try:
+                versiones = leer_versiones(familias)
+            except Exception as e:
+                print(f"❌ Error al leer versiones de datos: {e}")
+                return vista(*args, **kwargs)
+            if len(versiones) < len(set(familias)):
+                # Familia sin versión (migración pendiente): no se puede invalidar
+                return vista(*args, **kwargs)
+
+            ahora = time.monotonic()
+            entrada = cache.buscar(clave)
+
+            if entrada is not None and cache.vigente(entrada, versiones, ahora):
+                cache.contar('aciertos')
+                return _respuesta(entrada, 'HIT')
+
+            if entrada is not None and cache.stale:
+                vieja_desde = cache.marcar_vieja(
+                    clave, ahora if entrada.versiones != versiones else entrada.calculada_en + cache.ttl
+                )
+                if ahora - vieja_desde < cache.stale:
+                    app = current_app._get_current_object()
+                    ruta, consulta = request.path, request.query_string
+                    replica = en_replica()
+
+                    def calcular():
+                        # Recalcula contra la misma BD que la request (réplica o principal)
+                        with app.test_request_context(ruta, query_string=consulta):
+                            try:
+                                with usar_replica(replica):
+                                    _calcular_y_guardar(cache, clave, vista, args, kwargs, familias)
+                            finally:
+                                db.session.remove()
+
+                    cache.recargar(clave, calcular)
+                    cache.contar('viejas_servidas')
+                    return _respuesta(entrada, 'STALE')
+
+            cache.contar('fallos')
+            respuesta = _calcular_y_guardar(cache, clave, vista, args, kwargs, familias)
+            respuesta.headers['X-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,118 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TiempoAgotado
+
+from flask import current_app, jsonify
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+# Hash de contraseñas fuera de los hilos de request. scrypt/pbkdf2 tardan
+# cientos de milisegundos a propósito; en el cambio de turno (muchos
+# logins seguidos) cada hash inline ocupaba un hilo del worker y el tráfico
+# de garita esperaba detrás. Aquí corren en un pool propio de HASH_HILOS
+# hilos por proceso (hashlib suelta el GIL mientras calcula) con a lo sumo
+# HASH_COLA_MAXIMA en espera: los demás logins reciben 503 con Retry-After
+# en vez de acaparar los hilos que atienden la garita.
+#
+# PASSWORD_HASH_METODO fija el algoritmo y su costo (formato de werkzeug:
+# 'scrypt:32768:8:1', 'pbkdf2:sha256:600000'); si cambia, cada usuario
+# queda con el nuevo al iniciar sesión (necesita_rehash).
+
+
+# Segundos que se sugieren al cliente antes de reintentar (Retry-After)
+REINTENTO_SEGUNDOS = 2
+
+
+class HashSaturado(Exception):
+    """El pool de hash y su cola están llenos (o el hash no terminó a tiempo)"""
+
+
+def normalizar_metodo(metodo):
+    """Método con todos sus parámetros ('scrypt' -> 'scrypt:32768:8:1'), como lo guarda werkzeug"""
+    nombre, *args = metodo.split(':')
+    if nombre == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if nombre == 'pbkdf2':
+        if not args:
+            args = ['sha256']
+        if len(args) == 1:
+            args.append(str(DEFAULT_PBKDF2_ITERATIONS))
+        return ':'.join([nombre, *args])
+    return metodo
+
+
+def _pool_de_hilos(hilos):
+    """
+    Hilos del sistema para el hash. Con gevent (SERVIDOR_MODO=gevent) los
+    hilos de threading son greenlets y un hash frenaría el worker entero:
+    se usa el pool de gevent, que corre en hilos reales y se espera sin
+    bloquear el hub.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        from gevent.threadpool import ThreadPoolExecutor as PoolGevent
+        return PoolGevent(max_workers=hilos)
+    return ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash')
+
+
+class _EjecutorHash:
+    """Pool acotado: `hilos` hashes a la vez y como mucho `cola` esperando"""
+
+    def __init__(self, hilos=2, cola=8, espera=10):
+        self.hilos = hilos
+        self.cola = cola
+        self.espera = espera
+        self._pool = _pool_de_hilos(hilos)
+        self._cupos = threading.BoundedSemaphore(hilos + cola)
+
+    def ejecutar(self, funcion, *args):
+        if not self._cupos.acquire(blocking=False):
+            raise HashSaturado()
+        try:
+            futuro = self._pool.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        try:
+            return futuro.result(timeout=self.espera)
+        except TiempoAgotado:
+            # Sigue en el pool (y ocupando su cupo) hasta terminar
+            raise HashSaturado() from None
+
+
+def _ejecutor():
+    ejecutor = current_app.extensions.get('ejecutor_hash')
+    if ejecutor is None:
+        ejecutor = current_app.extensions.setdefault('ejecutor_hash', _EjecutorHash(
+            hilos=current_app.config.get('HASH_HILOS', 2),
+            cola=current_app.config.get('HASH_COLA_MAXIMA', 8),
+            espera=current_app.config.get('HASH_ESPERA_SEGUNDOS', 10)
+        ))
+    return ejecutor
+
+
+def metodo_configurado():
+    return normalizar_metodo(current_app.config.get('PASSWORD_HASH_METODO', 'scrypt'))
+
+
+def generar_hash(password):
+    """Hash con el método configurado, calculado en el pool (HashSaturado si está lleno)"""
+    return _ejecutor().ejecutar(generate_password_hash, password, metodo_configurado())
+
+
+def verificar_password(hash_guardado, password):
+    """Compara la contraseña con su hash en el pool (HashSaturado si está lleno)"""
+    return _ejecutor().ejecutar(check_password_hash, hash_guardado, password)
+
+
+def necesita_rehash(hash_guardado):
+    """True si el hash se hizo con otro método o costo que el configurado"""
+    return normalizar_metodo(hash_guardado.split('$', 1)[0]) != metodo_configurado()
+
+
+def respuesta_saturado():
+    """503 con Retry-After para los logins que no entran al pool"""
+    return jsonify({"error": "Demasiados inicios de sesión simultáneos, intenta de nuevo"}), 503, {
+        'Retry-After': str(REINTENTO_SEGUNDOS)
+    }
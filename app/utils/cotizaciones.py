@@ -0,0 +1,131 @@
+import threading
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.utils import tarifas
+from app.utils.versiones import leer_versiones
+
+
+# Cotizaciones en vivo: cuánto debe cada vehículo si saliera ahora, sin
+# finalizar nada. Se calculan todas juntas (una consulta + cálculo por
+# lote con la tarifa compilada) y se guardan por minuto y versión de la
+# familia 'tickets' (app/utils/versiones.py), así que una pared de cajeros
+# consultando cada pocos segundos comparte el mismo resultado, y un
+# ingreso, pago o cierre hecho en cualquier worker lo invalida en todos.
+
+_CONSULTA_ACTIVOS = select(
+    Ticket.id, Ticket.placa, Ticket.fecha_entrada, Ticket.tipo_vehiculo, Espacio.numero
+).outerjoin(
+    Espacio, Espacio.id == Ticket.espacio_id
+).where(
+    Ticket.estado == 'activo'
+).order_by(Ticket.fecha_entrada)
+
+
+def _minuto(fecha):
+    return fecha.replace(second=0, microsecond=0)
+
+
+def _cotizar(filas, calculado_en):
+    """Cotiza filas (id, placa, fecha_entrada, tipo_vehiculo, espacio_numero) en una pasada"""
+    entradas = [
+        fecha_entrada.replace(tzinfo=timezone.utc) if fecha_entrada.tzinfo is None else fecha_entrada
+        for _, _, fecha_entrada, _, _ in filas
+    ]
+    montos = tarifas.calcular_montos(
+        (entrada, calculado_en, fila[3]) for entrada, fila in zip(entradas, filas)
+    )
+
+    cotizaciones = []
+    for (ticket_id, placa, _, tipo_vehiculo, numero), entrada, monto in zip(filas, entradas, montos):
+        minutos = max(int((calculado_en - entrada).total_seconds() // 60), 0)
+        cotizaciones.append({
+            'id': ticket_id,
+            'placa': placa,
+            'espacio_numero': numero,
+            'tipo_vehiculo': tipo_vehiculo,
+            'fecha_entrada': entrada.replace(tzinfo=None).isoformat(),
+            'tiempo_transcurrido': {
+                'horas': minutos // 60,
+                'minutos': minutos % 60,
+                'texto': f"{minutos // 60}h {minutos % 60}m"
+            },
+            'monto': monto,
+            'monto_formateado': f"RD${monto:,.2f}"
+        })
+    return cotizaciones
+
+
+class _CacheCotizaciones:
+    """Cotizaciones de todos los tickets activos del minuto actual (una por worker)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (clave, calculado_en, lista, {id: cotización}) se reemplaza entero
+        self._datos = None
+
+    def invalidar(self):
+        with self._lock:
+            self._datos = None
+
+    def obtener(self):
+        """(calculado_en, lista, {id: cotización}); recalcula si cambió el minuto, la tarifa o los tickets"""
+        ahora = datetime.now(timezone.utc)
+        clave = (_minuto(ahora), tarifas.tarifa_vigente().version, leer_versiones(['tickets']).get('tickets'))
+
+        datos = self._datos
+        if datos is None or datos[0] != clave:
+            # Un solo recálculo aunque lleguen muchos cajeros a la vez
+            with self._lock:
+                datos = self._datos
+                if datos is None or datos[0] != clave:
+                    lista = _cotizar(db.session.execute(_CONSULTA_ACTIVOS).all(), ahora)
+                    datos = self._datos = (
+                        clave, ahora, lista, {cotizacion['id']: cotizacion for cotizacion in lista}
+                    )
+
+        return datos[1], datos[2], datos[3]
+
+
+def _cache():
+    cache = current_app.extensions.get('cotizaciones')
+    if cache is None:
+        cache = current_app.extensions.setdefault('cotizaciones', _CacheCotizaciones())
+    return cache
+
+
+def cotizaciones_activas():
+    """(calculado_en, cotizaciones) de todos los tickets activos"""
+    calculado_en, lista, _ = _cache().obtener()
+    return calculado_en, lista
+
+
+def cotizacion_ticket(ticket_id):
+    """
+    Cotización de un ticket: (calculado_en, cotización, None) o
+    (None, None, error) con error 'no_encontrado' o 'finalizado'.
+    """
+    calculado_en, _, por_id = _cache().obtener()
+    cotizacion = por_id.get(ticket_id)
+    if cotizacion:
+        return calculado_en, cotizacion, None
+
+    # No estaba en el minuto cacheado (p. ej. ingresó en otro worker)
+    fila = db.session.execute(
+        _CONSULTA_ACTIVOS.where(Ticket.id == ticket_id).order_by(None)
+    ).first()
+    if fila is None:
+        existe = db.session.execute(select(Ticket.id).where(Ticket.id == ticket_id)).scalar()
+        return None, None, 'finalizado' if existe else 'no_encontrado'
+
+    ahora = datetime.now(timezone.utc)
+    return ahora, _cotizar([fila], ahora)[0], None
+
+
+def invalidar_cotizaciones():
+    """Llamar tras un commit que ingresa o finaliza tickets"""
+    _cache().invalidar()
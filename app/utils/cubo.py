@@ -0,0 +1,317 @@
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.cubo_ingresos import CuboIngresos
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+
+
+# Cubo de ingresos: tabla de hechos con una fila por (fecha local, hora,
+# tipo de vehículo, método de pago, sección) y sus medidas (cantidad,
+# ingresos, segundos de estancia). Cada salida suma a su celda con un
+# upsert dentro de la misma transacción que finaliza el ticket, así que
+# los reportes leen unas pocas filas por día en vez de los tickets, sin
+# importar cuántos años de historial haya.
+#
+# - Garita y cierre masivo (SQL directo): registrar_salidas().
+# - Tickets finalizados por el ORM: se capturan en el flush.
+# - Historial previo o cargas masivas: reconstruir() / `flask cubo reconstruir`.
+
+_cubo = CuboIngresos.__table__
+
+GRANULARIDADES = ('hora', 'dia', 'semana', 'mes')
+
+# Máximo de días para la serie por hora (una fila por hora del rango)
+DIAS_MAXIMOS_POR_HORA = 92
+
+Salida = namedtuple('Salida', 'fecha_entrada fecha_salida tipo_vehiculo metodo_pago seccion monto')
+
+
+def _offset():
+    minutos = current_app.config.get('REPORTES_UTC_OFFSET_MINUTOS', 0) if has_app_context() else 0
+    return timedelta(minutes=minutos)
+
+
+def _utc(fecha):
+    return fecha.replace(tzinfo=timezone.utc) if fecha.tzinfo is None else fecha
+
+
+def ahora_local():
+    """Fecha y hora local (naive) de los reportes"""
+    return datetime.now(timezone.utc).replace(tzinfo=None) + _offset()
+
+
+def a_local(momento):
+    """Instante UTC (aware o naive) -> fecha y hora local (naive) de los reportes"""
+    return _utc(momento).astimezone(timezone.utc).replace(tzinfo=None) + _offset()
+
+
+def inicio_utc(fecha):
+    """Instante UTC (aware) en que empieza la fecha local `fecha`"""
+    return (datetime.combine(fecha, datetime.min.time()) - _offset()).replace(tzinfo=timezone.utc)
+
+
+def _acumular(celdas, salidas, offset):
+    for salida in salidas:
+        if salida.fecha_salida is None:
+            continue
+        fin = _utc(salida.fecha_salida)
+        local = fin.replace(tzinfo=None) + offset
+        clave = (
+            local.date(), local.hour, salida.tipo_vehiculo or '',
+            salida.metodo_pago or '', salida.seccion or ''
+        )
+        celda = celdas.setdefault(clave, [0, 0.0, 0.0])
+        celda[0] += 1
+        celda[1] += salida.monto or 0.0
+        if salida.fecha_entrada is not None:
+            celda[2] += max((fin - _utc(salida.fecha_entrada)).total_seconds(), 0.0)
+    return celdas
+
+
+def _filas(celdas):
+    return [
+        {
+            'fecha': fecha, 'hora': hora, 'tipo_vehiculo': tipo, 'metodo_pago': metodo,
+            'seccion': seccion, 'transacciones': cantidad, 'ingresos': ingresos,
+            'segundos_estancia': segundos
+        }
+        for (fecha, hora, tipo, metodo, seccion), (cantidad, ingresos, segundos) in celdas.items()
+    ]
+
+
+def _upsert(dialecto):
+    insert_dialecto = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+    sentencia = insert_dialecto(_cubo)
+    return sentencia.on_conflict_do_update(
+        index_elements=['fecha', 'hora', 'tipo_vehiculo', 'metodo_pago', 'seccion'],
+        set_={
+            'transacciones': _cubo.c.transacciones + sentencia.excluded.transacciones,
+            'ingresos': _cubo.c.ingresos + sentencia.excluded.ingresos,
+            'segundos_estancia': _cubo.c.segundos_estancia + sentencia.excluded.segundos_estancia,
+        }
+    )
+
+
+def _sumar(conexion, celdas):
+    if celdas:
+        conexion.execute(_upsert(conexion.dialect.name), _filas(celdas))
+
+
+def registrar_salidas(salidas):
+    """
+    Suma tickets finalizados (Salida) a sus celdas, en la transacción
+    actual (sin commit). Un upsert por celda distinta, no por ticket.
+    """
+    _sumar(db.session.connection(), _acumular({}, salidas, _offset()))
+
+
+# ===== SINCRONIZACIÓN CON EL ORM =====
+# Tickets que pasan a 'finalizado' (o se crean así) a través del ORM.
+
+def _finalizado_en_flush(ticket, nuevo):
+    if ticket.estado != 'finalizado':
+        return False
+    if nuevo:
+        return True
+    historial = inspect(ticket).attrs.estado.history
+    return bool(historial.added) and 'finalizado' not in (historial.deleted or ())
+
+
+@event.listens_for(Session, 'after_flush')
+def _capturar_finalizados(session, flush_context):
+    tickets = [t for t in session.new if isinstance(t, Ticket) and _finalizado_en_flush(t, True)]
+    tickets += [t for t in session.dirty if isinstance(t, Ticket) and _finalizado_en_flush(t, False)]
+    if not tickets:
+        return
+
+    conexion = session.connection()
+    espacio_ids = {t.espacio_id for t in tickets if t.espacio_id}
+    secciones = dict(conexion.execute(
+        select(Espacio.id, Espacio.seccion).where(Espacio.id.in_(espacio_ids))
+    ).all()) if espacio_ids else {}
+
+    _sumar(conexion, _acumular({}, (
+        Salida(t.fecha_entrada, t.fecha_salida, t.tipo_vehiculo, t.metodo_pago,
+               secciones.get(t.espacio_id), t.monto)
+        for t in tickets
+    ), _offset()))
+
+
+# ===== RECONSTRUCCIÓN =====
+
+def reconstruir(desde=None, hasta=None, tamano_lote=10000, conexion=None):
+    """
+    Recalcula el cubo desde los tickets finalizados, para fechas locales
+    en [desde, hasta] (todo si no se indican). Borra y vuelve a sumar las
+    celdas del rango en la transacción de `conexion` (la de la sesión por
+    defecto; sin commit); los tickets se leen por lotes. Retorna la
+    cantidad de tickets procesados.
+    """
+    conexion = conexion or db.session.connection()
+    offset = _offset()
+
+    borrar = delete(CuboIngresos)
+    consulta = select(
+        Ticket.fecha_entrada, Ticket.fecha_salida, Ticket.tipo_vehiculo,
+        Ticket.metodo_pago, Espacio.seccion, Ticket.monto
+    ).outerjoin(
+        Espacio, Espacio.id == Ticket.espacio_id
+    ).where(
+        Ticket.estado == 'finalizado', Ticket.fecha_salida.isnot(None)
+    )
+
+    if desde:
+        borrar = borrar.where(CuboIngresos.fecha >= desde)
+        consulta = consulta.where(
+            Ticket.fecha_salida >= datetime.combine(desde, datetime.min.time()) - offset
+        )
+    if hasta:
+        borrar = borrar.where(CuboIngresos.fecha <= hasta)
+        consulta = consulta.where(
+            Ticket.fecha_salida < datetime.combine(hasta + timedelta(days=1), datetime.min.time()) - offset
+        )
+
+    conexion.execute(borrar)
+
+    celdas = {}
+    procesados = 0
+    filas = conexion.execute(consulta.execution_options(yield_per=tamano_lote))
+    for lote in filas.partitions():
+        _acumular(celdas, (Salida(*fila) for fila in lote), offset)
+        procesados += len(lote)
+
+    _sumar(conexion, celdas)
+    return procesados
+
+
+# ===== CONSULTAS =====
+
+def _filtros(consulta, desde=None, hasta=None, tipo_vehiculo=None, metodo_pago=None, seccion=None):
+    if desde:
+        consulta = consulta.where(CuboIngresos.fecha >= desde)
+    if hasta:
+        consulta = consulta.where(CuboIngresos.fecha <= hasta)
+    if tipo_vehiculo:
+        consulta = consulta.where(CuboIngresos.tipo_vehiculo == tipo_vehiculo)
+    if metodo_pago:
+        consulta = consulta.where(CuboIngresos.metodo_pago == metodo_pago)
+    if seccion:
+        consulta = consulta.where(CuboIngresos.seccion == seccion)
+    return consulta
+
+
+_MEDIDAS = (
+    func.coalesce(func.sum(CuboIngresos.transacciones), 0),
+    func.coalesce(func.sum(CuboIngresos.ingresos), 0),
+    func.coalesce(func.sum(CuboIngresos.segundos_estancia), 0),
+)
+
+
+def _medidas(transacciones, ingresos, segundos):
+    return {
+        'transacciones': transacciones,
+        'ingresos': ingresos,
+        'horas_promedio': segundos / transacciones / 3600 if transacciones else 0
+    }
+
+
+def inicios_periodo(ahora=None):
+    """Fecha local de inicio de hoy, de la semana (lunes) y del mes"""
+    hoy = (ahora or ahora_local()).date()
+    return {
+        'hoy': hoy,
+        'semana': hoy - timedelta(days=hoy.weekday()),
+        'mes': hoy.replace(day=1)
+    }
+
+
+def ingresos_por_periodo(ahora=None):
+    """{'hoy' | 'semana' | 'mes': {'ingresos', 'transacciones'}} en fechas locales (una consulta)"""
+    inicios = inicios_periodo(ahora)
+    columnas = []
+    for inicio in inicios.values():
+        condicion = CuboIngresos.fecha >= inicio
+        columnas += [
+            func.coalesce(func.sum(CuboIngresos.ingresos).filter(condicion), 0),
+            func.coalesce(func.sum(CuboIngresos.transacciones).filter(condicion), 0),
+        ]
+
+    fila = db.session.execute(
+        select(*columnas).where(CuboIngresos.fecha >= min(inicios.values()))
+    ).one()
+
+    return {
+        periodo: {'ingresos': fila[2 * i], 'transacciones': fila[2 * i + 1]}
+        for i, periodo in enumerate(inicios)
+    }
+
+
+def totales(**filtros):
+    """{'transacciones', 'ingresos', 'horas_promedio'} de las celdas filtradas"""
+    return _medidas(*db.session.execute(_filtros(select(*_MEDIDAS), **filtros)).one())
+
+
+def desglose(dimension, **filtros):
+    """{valor: {'transacciones', 'ingresos', 'horas_promedio'}} agrupado por una dimensión"""
+    columna = getattr(CuboIngresos, dimension)
+    filas = db.session.execute(
+        _filtros(select(columna, *_MEDIDAS), **filtros).group_by(columna)
+    ).all()
+    return {valor: _medidas(*medidas) for valor, *medidas in filas}
+
+
+def _periodo(fecha, hora, granularidad):
+    if granularidad == 'hora':
+        return f"{fecha.isoformat()}T{hora:02d}:00"
+    if granularidad == 'dia':
+        return fecha.isoformat()
+    if granularidad == 'semana':
+        return (fecha - timedelta(days=fecha.weekday())).isoformat()
+    return fecha.strftime('%Y-%m')
+
+
+def serie(granularidad, desde, hasta, **filtros):
+    """
+    Serie de [{'periodo', 'transacciones', 'ingresos', 'horas_promedio'}]
+    entre fechas locales [desde, hasta]. SQL agrupa por día (o por hora);
+    semanas y meses se acumulan desde los días. Períodos sin datos no
+    aparecen. Lanza ValueError con granularidad o rango inválidos.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida: use {', '.join(GRANULARIDADES)}")
+    if desde > hasta:
+        raise ValueError("'desde' debe ser anterior o igual a 'hasta'")
+    if granularidad == 'hora' and (hasta - desde).days >= DIAS_MAXIMOS_POR_HORA:
+        raise ValueError(f"La serie por hora admite hasta {DIAS_MAXIMOS_POR_HORA} días")
+
+    claves = [CuboIngresos.fecha]
+    if granularidad == 'hora':
+        claves.append(CuboIngresos.hora)
+
+    filas = db.session.execute(
+        _filtros(select(*claves, *_MEDIDAS), desde=desde, hasta=hasta, **filtros)
+        .group_by(*claves).order_by(*claves)
+    ).all()
+
+    acumulado = {}
+    for fila in filas:
+        fecha, hora = fila[0], fila[1] if granularidad == 'hora' else 0
+        medidas = acumulado.setdefault(_periodo(fecha, hora, granularidad), [0, 0.0, 0.0])
+        for i, valor in enumerate(fila[len(claves):]):
+            medidas[i] += valor
+
+    return [{'periodo': periodo, **_medidas(*medidas)} for periodo, medidas in acumulado.items()]
+
+
+def leer_fecha(valor, nombre):
+    """'AAAA-MM-DD' -> date; lanza ValueError"""
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida en '{nombre}': use AAAA-MM-DD")
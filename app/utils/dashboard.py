@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+from app.utils.estadisticas import ingresos_por_periodo
+from app.utils.ocupacion import leer_ocupacion
+from app.utils.serializacion import con_espacio
+from app.utils.tipos import catalogo_tipos
+
+
+# Piezas del dashboard (tarjetas, actividad reciente y ocupación por
+# tipo). Las usan los endpoints de cada widget y la foto completa
+# (/api/dashboard/foto), que las calcula juntas en una sola transacción:
+#
+#   1. contadores de ocupación
+#   2. vehículos registrados + tickets activos (subconsultas escalares)
+#   3. ingresos de hoy / semana / mes
+#   4. últimos tickets con su espacio (JOIN)
+#
+# En PostgreSQL la transacción es REPEATABLE READ: las cuatro lecturas
+# ven la misma foto de la base, así que las tarjetas, la actividad y las
+# barras de ocupación nunca mezclan momentos distintos. SQLite (solo
+# desarrollo) las corre seguidas en la misma conexión.
+
+@contextmanager
+def lectura_consistente():
+    """Transacción de solo lectura con una foto fija de la base (PostgreSQL)"""
+    # Termina la lectura previa de la request (p. ej. las versiones del
+    # ETag) para poder fijar el aislamiento de la nueva transacción
+    db.session.rollback()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+    try:
+        yield
+    finally:
+        db.session.rollback()
+
+
+def conteos_generales():
+    """(vehículos registrados, tickets activos) en una consulta"""
+    return tuple(db.session.execute(select(
+        select(func.count(Vehiculo.id)).scalar_subquery(),
+        select(func.count(Ticket.id)).where(Ticket.estado == 'activo').scalar_subquery()
+    )).one())
+
+
+def resumen_estadisticas(ocupacion, total_vehiculos, tickets_activos, periodos):
+    """Tarjetas del dashboard"""
+    espacios_ocupados = ocupacion.contar(estado='ocupado')
+    total_espacios = ocupacion.contar()
+    ingresos_hoy = periodos['hoy']['ingresos']
+    ingresos_mes = periodos['mes']['ingresos']
+
+    # Ocupación en porcentaje
+    porcentaje_ocupacion = (espacios_ocupados / total_espacios * 100) if total_espacios > 0 else 0
+
+    return {
+        'total_vehiculos': total_vehiculos,
+        'espacios_ocupados': espacios_ocupados,
+        'total_espacios': total_espacios,
+        'porcentaje_ocupacion': round(porcentaje_ocupacion, 1),
+        'tickets_activos': tickets_activos,
+        'ingresos_hoy': ingresos_hoy,
+        'ingresos_hoy_formateado': f"RD${ingresos_hoy:,.2f}",
+        'ingresos_mes': ingresos_mes,
+        'ingresos_mes_formateado': f"RD${ingresos_mes:,.2f}",
+        'transacciones_hoy': periodos['hoy']['transacciones']
+    }
+
+
+def leer_actividad_reciente(limite=10):
+    """Últimos tickets (activos y finalizados) con su espacio, en un JOIN"""
+    tickets = con_espacio(Ticket.query).order_by(Ticket.fecha_entrada.desc()).limit(limite).all()
+
+    resultado = []
+    for ticket in tickets:
+        ticket_dict = {
+            'id': ticket.id,
+            'placa': ticket.placa,
+            'tipo_vehiculo': ticket.tipo_vehiculo,
+            'estado': ticket.estado,
+            'fecha_entrada': ticket.fecha_entrada.isoformat() if ticket.fecha_entrada else None,
+            'fecha_salida': ticket.fecha_salida.isoformat() if ticket.fecha_salida else None,
+            'monto': ticket.monto,
+            'monto_formateado': f"RD${ticket.monto:,.2f}" if ticket.monto else None,
+            'metodo_pago': ticket.metodo_pago
+        }
+
+        # Información del espacio
+        if ticket.espacio:
+            ticket_dict['espacio'] = ticket.espacio.numero
+
+        resultado.append(ticket_dict)
+    return resultado
+
+
+def calcular_ocupacion_por_tipo(ocupacion):
+    """{tipo: {'total', 'ocupados', 'disponibles', 'porcentaje'}} de cada tipo del catálogo"""
+    resultado = {}
+    for tipo in catalogo_tipos().con_extras(ocupacion.tipos()):
+        total = ocupacion.contar(tipo)
+        ocupados = ocupacion.contar(tipo, 'ocupado')
+        resultado[tipo] = {
+            'total': total,
+            'ocupados': ocupados,
+            'disponibles': total - ocupados,
+            'porcentaje': round((ocupados / total * 100) if total > 0 else 0, 1)
+        }
+    return resultado
+
+
+def foto_dashboard():
+    """Estadísticas, actividad y ocupación del mismo instante (cuatro consultas)"""
+    with lectura_consistente():
+        ocupacion = leer_ocupacion()
+        total_vehiculos, tickets_activos = conteos_generales()
+        periodos = ingresos_por_periodo()
+        actividad = leer_actividad_reciente()
+
+    return {
+        'estadisticas': resumen_estadisticas(ocupacion, total_vehiculos, tickets_activos, periodos),
+        'actividad': actividad,
+        'ocupacion_por_tipo': calcular_ocupacion_por_tipo(ocupacion)
+    }
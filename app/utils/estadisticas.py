@@ -0,0 +1,85 @@
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.ticket import Ticket
+from app.utils import cubo
+from app.utils.tipos import catalogo_tipos
+
+
+# Agregados de tickets calculados en SQL: cada función es una sola
+# consulta (SUM / COUNT con FILTER, o GROUP BY) y solo viajan los totales,
+# no los tickets. Los rangos por fecha de salida usan el índice
+# (estado, fecha_salida), así que hoy/semana/mes cuestan lo mismo con un
+# mes o con diez años de historial. Los días son los locales de los
+# reportes (REPORTES_UTC_OFFSET_MINUTOS), igual que en el cubo de ingresos.
+
+METODOS_PAGO = ('efectivo', 'tarjeta')
+
+
+def inicios_periodo(ahora=None):
+    """Instante UTC en que empiezan hoy, la semana (lunes) y el mes locales"""
+    local = cubo.a_local(ahora) if ahora else None
+    return {periodo: cubo.inicio_utc(fecha) for periodo, fecha in cubo.inicios_periodo(local).items()}
+
+
+def _suma(condicion=None):
+    suma = func.sum(Ticket.monto)
+    return func.coalesce(suma.filter(condicion) if condicion is not None else suma, 0)
+
+
+def _cuenta(condicion=None):
+    cuenta = func.count(Ticket.id)
+    return cuenta.filter(condicion) if condicion is not None else cuenta
+
+
+def ingresos_por_periodo(ahora=None):
+    """
+    {'hoy' | 'semana' | 'mes': {'ingresos', 'transacciones'}} de tickets
+    finalizados, en una pasada sobre el rango más amplio de los tres.
+    """
+    inicios = inicios_periodo(ahora)
+    columnas = []
+    for inicio in inicios.values():
+        condicion = Ticket.fecha_salida >= inicio
+        columnas += [_suma(condicion), _cuenta(condicion)]
+
+    fila = db.session.execute(
+        select(*columnas).where(
+            Ticket.estado == 'finalizado',
+            Ticket.fecha_salida >= min(inicios.values())
+        )
+    ).one()
+
+    return {
+        periodo: {'ingresos': fila[2 * i], 'transacciones': fila[2 * i + 1]}
+        for i, periodo in enumerate(inicios)
+    }
+
+
+def totales_finalizados():
+    """
+    Totales históricos de tickets finalizados: cantidad, recaudado y
+    cantidad por método de pago y por tipo de vehículo (una consulta
+    agrupada por tipo y método; un tipo nuevo agrega filas, no consultas).
+    """
+    filas = db.session.execute(
+        select(Ticket.tipo_vehiculo, Ticket.metodo_pago, _cuenta(), _suma())
+        .where(Ticket.estado == 'finalizado')
+        .group_by(Ticket.tipo_vehiculo, Ticket.metodo_pago)
+    ).all()
+
+    transacciones, recaudado = 0, 0
+    metodos = dict.fromkeys(METODOS_PAGO, 0)
+    tipos = {}
+    for tipo, metodo, cantidad, monto in filas:
+        transacciones += cantidad
+        recaudado += monto
+        if metodo in metodos:
+            metodos[metodo] += cantidad
+        tipos[tipo] = tipos.get(tipo, 0) + cantidad
+
+    return {
+        'transacciones': transacciones,
+        'recaudado': recaudado,
+        'metodos_pago': metodos,
+        'tipos_vehiculo': catalogo_tipos().por_tipo(tipos)
+    }
@@ -0,0 +1,265 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.utils.ocupacion import leer_ocupacion
+from app.utils.tipos import catalogo_tipos
+
+
+# Eventos en vivo (Server-Sent Events) para las pantallas de operación.
+#
+# Un solo vigía por proceso revisa la BD cada EVENTOS_INTERVALO_SEGUNDOS
+# (contadores de ocupación, tickets nuevos y salidas desde el último
+# cursor) y reparte lo nuevo a la cola de cada conexión: el costo en BD
+# no depende de cuántas pantallas estén abiertas. Los commits del mismo
+# proceso despiertan al vigía enseguida; los de otros workers se ven en
+# la siguiente revisión.
+#
+# Un cliente lento (cola llena) se desconecta; EventSource reconecta solo
+# y recibe de nuevo la foto de ocupación.
+#
+# Cada conexión abierta ocupa un hilo del worker (modo hilos) hasta
+# EVENTOS_DURACION_MAXIMA: pasado EVENTOS_MAX_FLUJOS por proceso la
+# conexión se rechaza con 503 y la pantalla usa su polling de respaldo.
+
+TAMANO_COLA = 100
+
+# Segundos que se sugieren antes de reabrir un flujo rechazado (Retry-After)
+REINTENTO_FLUJO_SEGUNDOS = 30
+
+# Ventana hacia atrás para no perder tickets y salidas que confirman
+# fuera de orden (un id o una fecha menor que llega después de otra mayor)
+MARGEN_CONFIRMACION = timedelta(seconds=30)
+
+# Tickets y salidas por revisión (el resto sale en la siguiente: los ya
+# publicados de la ventana se excluyen en la consulta)
+LIMITE_POR_REVISION = 500
+
+
+def formato_sse(evento, datos):
+    """Mensaje SSE con datos JSON"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+
+
+def resumen_ocupacion(ocupacion):
+    """{tipo: {'total', 'ocupados', 'disponibles', 'mantenimiento'}} y el total general"""
+    resumen = {tipo: ocupacion.resumen(tipo) for tipo in catalogo_tipos().con_extras(ocupacion.tipos())}
+    resumen['total'] = ocupacion.resumen()
+    return resumen
+
+
+def _cambios(anterior, actual):
+    """Diferencias por tipo y estado entre dos resúmenes"""
+    cambios = {}
+    for tipo, valores in actual.items():
+        previos = anterior.get(tipo, {})
+        delta = {
+            clave: valor - previos.get(clave, 0)
+            for clave, valor in valores.items() if valor != previos.get(clave, 0)
+        }
+        if delta:
+            cambios[tipo] = delta
+    return cambios
+
+
+class Difusor:
+    """Vigía de la BD y reparto a las colas de los suscriptores"""
+
+    def __init__(self, app, intervalo):
+        self.app = app
+        self.intervalo = intervalo
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+        # Cursores: se inician en la primera revisión
+        self.ocupacion = None
+        self._ultima_entrada = None
+        self._ultima_salida = None
+        # {id: fecha} ya publicados dentro de la ventana de cada cursor
+        self._entradas_vistas = {}
+        self._salidas_vistas = {}
+
+    # ----- suscriptores -----
+
+    def suscribir(self, maximo=None):
+        """Cola nueva del suscriptor, o None si ya hay `maximo` suscriptores"""
+        cola = queue.Queue(maxsize=TAMANO_COLA)
+        with self._lock:
+            if maximo is not None and len(self._suscriptores) >= maximo:
+                return None
+            self._suscriptores.add(cola)
+            if self.intervalo and (self._hilo is None or not self._hilo.is_alive()):
+                self._hilo = threading.Thread(target=self._bucle, name='eventos-vigia', daemon=True)
+                self._hilo.start()
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+
+    def suscriptores(self):
+        with self._lock:
+            return len(self._suscriptores)
+
+    def despertar(self):
+        self._despertar.set()
+
+    def publicar(self, evento, datos):
+        mensaje = formato_sse(evento, datos)
+        with self._lock:
+            colas = list(self._suscriptores)
+        for cola in colas:
+            try:
+                cola.put_nowait(mensaje)
+            except queue.Full:
+                # Cliente lento: se corta y reconecta con la foto completa
+                self.desuscribir(cola)
+                with cola.mutex:
+                    cola.queue.clear()
+                cola.put_nowait(None)
+
+    # ----- vigía -----
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            with self._lock:
+                if not self._suscriptores:
+                    self._hilo = None
+                    return
+            with self.app.app_context():
+                try:
+                    self.revisar()
+                except Exception as e:
+                    print(f"❌ Error al revisar eventos: {e}")
+                finally:
+                    db.session.remove()
+
+    def revisar(self):
+        """Una revisión: publica ocupación (si cambió), tickets nuevos y salidas"""
+        ocupacion = resumen_ocupacion(leer_ocupacion())
+        if self.ocupacion is not None and ocupacion != self.ocupacion:
+            self.publicar('ocupacion', {**ocupacion, 'cambios': _cambios(self.ocupacion, ocupacion)})
+        self.ocupacion = ocupacion
+
+        if self._ultima_entrada is None:
+            # Primera revisión: solo fija los cursores
+            ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+            self._ultima_entrada = self._ultima_salida = ahora
+            self._entradas_vistas.update(db.session.execute(
+                select(Ticket.id, Ticket.fecha_entrada).where(Ticket.fecha_entrada >= ahora - MARGEN_CONFIRMACION)
+            ).tuples().all())
+            self._salidas_vistas.update(db.session.execute(
+                select(Ticket.id, Ticket.fecha_salida)
+                .where(Ticket.estado == 'finalizado', Ticket.fecha_salida >= ahora - MARGEN_CONFIRMACION)
+            ).tuples().all())
+            return
+
+        for fila in self._nuevos(
+            Ticket.fecha_entrada, self._ultima_entrada, self._entradas_vistas,
+            select(Ticket.id, Ticket.placa, Ticket.tipo_vehiculo, Ticket.fecha_entrada, Espacio.numero)
+        ):
+            self._ultima_entrada = max(self._ultima_entrada, fila.fecha_entrada.replace(tzinfo=None))
+            self.publicar('ticket', {
+                'id': fila.id, 'placa': fila.placa, 'tipo_vehiculo': fila.tipo_vehiculo,
+                'espacio_numero': fila.numero, 'fecha_entrada': fila.fecha_entrada
+            })
+
+        for fila in self._nuevos(
+            Ticket.fecha_salida, self._ultima_salida, self._salidas_vistas,
+            select(Ticket.id, Ticket.placa, Ticket.tipo_vehiculo, Ticket.fecha_salida,
+                   Ticket.monto, Ticket.metodo_pago, Espacio.numero)
+            .where(Ticket.estado == 'finalizado')
+        ):
+            self._ultima_salida = max(self._ultima_salida, fila.fecha_salida.replace(tzinfo=None))
+            self.publicar('salida', {
+                'id': fila.id, 'placa': fila.placa, 'tipo_vehiculo': fila.tipo_vehiculo,
+                'espacio_numero': fila.numero, 'fecha_salida': fila.fecha_salida,
+                'monto': fila.monto, 'metodo_pago': fila.metodo_pago
+            })
+
+    def _nuevos(self, columna, cursor, vistas, consulta):
+        """
+        Filas de `consulta` con `columna` dentro de la ventana del cursor que
+        todavía no se publicaron (hasta LIMITE_POR_REVISION); las marca como
+        vistas y olvida las que ya quedaron fuera de la ventana.
+        """
+        desde = cursor - MARGEN_CONFIRMACION
+        for ticket_id, fecha in list(vistas.items()):
+            if fecha.replace(tzinfo=None) < desde:
+                del vistas[ticket_id]
+
+        consulta = consulta.outerjoin(Espacio, Espacio.id == Ticket.espacio_id).where(columna >= desde)
+        if vistas:
+            consulta = consulta.where(Ticket.id.not_in(list(vistas)))
+        filas = db.session.execute(consulta.order_by(columna, Ticket.id).limit(LIMITE_POR_REVISION)).all()
+        for fila in filas:
+            vistas[fila.id] = getattr(fila, columna.key)
+        return filas
+
+
+def obtener_difusor():
+    """Difusor del proceso (uno por aplicación)"""
+    difusor = current_app.extensions.get('eventos')
+    if difusor is None:
+        difusor = current_app.extensions.setdefault('eventos', Difusor(
+            current_app._get_current_object(),
+            current_app.config.get('EVENTOS_INTERVALO_SEGUNDOS', 2)
+        ))
+    return difusor
+
+
+def flujo_eventos(difusor, cola, expira, duracion_maxima, latido=15):
+    """
+    Generador SSE de una conexión suscrita con `cola`: foto de ocupación,
+    luego los eventos del difusor, un latido con el tiempo de sesión
+    restante cada `latido` segundos y cierre al expirar la sesión o tras
+    `duracion_maxima`.
+    """
+    try:
+        yield 'retry: 5000\n\n'
+        if difusor.ocupacion is None:
+            difusor.ocupacion = resumen_ocupacion(leer_ocupacion())
+        yield formato_sse('ocupacion', {**difusor.ocupacion, 'cambios': {}})
+        # La conexión a la BD vuelve al pool mientras el flujo espera
+        db.session.remove()
+
+        fin = time.monotonic() + duracion_maxima
+        while True:
+            restante = int(expira - time.time()) if expira else None
+            yield formato_sse('sesion', {'tiempo_restante_segundos': max(restante, 0) if restante is not None else None})
+            if (restante is not None and restante <= 0) or time.monotonic() >= fin:
+                return
+
+            limite = time.monotonic() + latido
+            while time.monotonic() < limite:
+                try:
+                    mensaje = cola.get(timeout=max(limite - time.monotonic(), 0.01))
+                except queue.Empty:
+                    break
+                if mensaje is None:
+                    return
+                yield mensaje
+    finally:
+        difusor.desuscribir(cola)
+
+
+# Los commits del proceso despiertan al vigía (si hay pantallas conectadas)
+@event.listens_for(Session, 'after_commit')
+def _despertar_vigia(session):
+    if not has_app_context():
+        return
+    difusor = current_app.extensions.get('eventos')
+    if difusor is not None and difusor.suscriptores():
+        difusor.despertar()
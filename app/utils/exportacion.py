@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta, timezone
+
+from flask import Response, request, stream_with_context
+from app.extensions import db
+from app.utils.streaming import TAMANO_LOTE
+
+
+# Exportaciones CSV / NDJSON para contabilidad. La consulta (un select de
+# columnas, sin objetos ORM) se lee por lotes con yield_per desde un
+# cursor del lado del servidor y cada lote sale como un fragmento de la
+# respuesta (transfer-encoding chunked): un año de datos no se carga en
+# memoria y entre fragmentos el worker queda libre para otros requests.
+#
+# Un error a mitad del flujo se vuelve a lanzar: el servidor cierra la
+# conexión sin el fragmento final y el cliente ve una descarga incompleta
+# en vez de un archivo truncado que parezca válido.
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def leer_formato():
+    """?formato= (csv por defecto); lanza ValueError si no es soportado"""
+    formato = (request.args.get('formato') or 'csv').lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: use {', '.join(FORMATOS)}")
+    return formato
+
+
+def _leer_fecha(nombre, fin_de_dia=False):
+    valor = request.args.get(nombre)
+    if not valor:
+        return None
+    try:
+        if len(valor) == 10:
+            # Solo fecha: 'hasta' incluye el día completo
+            fecha = datetime.combine(datetime.strptime(valor, '%Y-%m-%d').date(), time.min)
+            return fecha + timedelta(days=1) if fin_de_dia else fecha
+        if valor.endswith('Z'):
+            valor = valor[:-1] + '+00:00'
+        fecha = datetime.fromisoformat(valor)
+        # Naive = UTC, como en la BD
+        return fecha.astimezone(timezone.utc).replace(tzinfo=None) if fecha.tzinfo else fecha
+    except ValueError:
+        raise ValueError(f"Fecha inválida en '{nombre}': use AAAA-MM-DD o ISO 8601")
+
+
+def leer_rango_fechas():
+    """
+    ?desde= / ?hasta= como (desde, hasta) en UTC, hasta exclusivo; None si
+    no se indicó. Lanza ValueError si las fechas son inválidas.
+    """
+    desde = _leer_fecha('desde')
+    hasta = _leer_fecha('hasta', fin_de_dia=True)
+    if desde and hasta and desde >= hasta:
+        raise ValueError("'desde' debe ser anterior a 'hasta'")
+    return desde, hasta
+
+
+def _valor(valor):
+    if isinstance(valor, datetime):
+        return valor.replace(tzinfo=None).isoformat()
+    return valor
+
+
+def lineas_csv(filas, columnas, tamano_lote=TAMANO_LOTE):
+    """Encabezado y filas CSV, un fragmento por lote"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+
+    pendientes = 0
+    for fila in filas:
+        escritor.writerow(['' if v is None else _valor(v) for v in fila])
+        pendientes += 1
+        if pendientes >= tamano_lote:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+
+    yield buffer.getvalue()
+
+
+def lineas_ndjson(filas, columnas, tamano_lote=TAMANO_LOTE):
+    """Un objeto JSON por línea, un fragmento por lote"""
+    lote = []
+    for fila in filas:
+        lote.append(json.dumps(
+            {columna: _valor(v) for columna, v in zip(columnas, fila)},
+            ensure_ascii=False
+        ) + '\n')
+        if len(lote) >= tamano_lote:
+            yield ''.join(lote)
+            lote = []
+
+    if lote:
+        yield ''.join(lote)
+
+
+def respuesta_exportacion(consulta, formato, nombre, tamano_lote=TAMANO_LOTE):
+    """
+    Response descargable con las filas del select `consulta` en `formato`.
+    Los encabezados del CSV / claves del NDJSON son los nombres de columna.
+    """
+    columnas = list(consulta.selected_columns.keys())
+    generar = lineas_csv if formato == 'csv' else lineas_ndjson
+
+    def flujo():
+        try:
+            filas = db.session.execute(consulta.execution_options(yield_per=tamano_lote))
+            yield from generar(filas, columnas, tamano_lote)
+        except Exception as e:
+            print(f"❌ Error al exportar {nombre}: {e}")
+            raise
+
+    return Response(
+        stream_with_context(flujo()),
+        mimetype=FORMATOS[formato],
+        headers={
+            'Content-Disposition': f'attachment; filename="{nombre}.{formato}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,294 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, exists, literal, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+from app.utils.asignacion import (
+    EspacioLibre, candidatos_indice, reclamar_espacio, registrar_cambio_espacio, reservar_candidato
+)
+from app.utils.cubo import Salida, registrar_salidas
+from app.utils.tarifas import calcular_monto
+
+
+# Ruta rápida de garita: ingreso y salida en una sola transacción, con el
+# mínimo de viajes a la base de datos. Las sentencias se construyen una vez
+# por dialecto y SQLAlchemy reutiliza su forma compilada en cada llamada.
+
+_vehiculos = Vehiculo.__table__
+_espacios = Espacio.__table__
+_tickets = Ticket.__table__
+
+_SENTENCIAS = {}
+
+
+def _iso(fecha):
+    """Mismo formato que to_dict(): la BD guarda UTC sin zona horaria"""
+    return fecha.replace(tzinfo=None).isoformat()
+
+
+def _insertar_vehiculo(insert_dialecto):
+    """
+    INSERT ... ON CONFLICT (placa) DO NOTHING RETURNING id: sin fila si la
+    placa ya existe (no se reescribe el vehículo ni se sube su versión)
+    """
+    return insert_dialecto(_vehiculos).values(
+        placa=bindparam('placa'),
+        fecha_registro=bindparam('ahora'),
+        activo=True
+    ).on_conflict_do_nothing(index_elements=['placa']).returning(_vehiculos.c.id)
+
+
+def _construir_sentencias(dialecto):
+    insert_dialecto = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+    insertar_vehiculo = _insertar_vehiculo(insert_dialecto)
+    buscar_vehiculo = select(_vehiculos.c.id).where(_vehiculos.c.placa == bindparam('placa'))
+
+    insertar_ticket = _tickets.insert().values(
+        vehiculo_id=bindparam('vehiculo_id'),
+        espacio_id=bindparam('espacio_id'),
+        placa=bindparam('placa'),
+        tipo_vehiculo=bindparam('tipo_vehiculo'),
+        estado='activo',
+        fecha_entrada=bindparam('ahora'),
+        monto=0.0
+    ).returning(_tickets.c.id)
+
+    leer_ticket = select(
+        _tickets.c.id, _tickets.c.placa, _tickets.c.vehiculo_id, _tickets.c.espacio_id,
+        _tickets.c.fecha_entrada, _tickets.c.estado, _tickets.c.tipo_vehiculo,
+        _espacios.c.numero, _espacios.c.tipo, _espacios.c.piso,
+        _espacios.c.seccion, _espacios.c.activo
+    ).select_from(
+        _tickets.outerjoin(_espacios, _espacios.c.id == _tickets.c.espacio_id)
+    ).where(_tickets.c.id == bindparam('ticket_id'))
+
+    finalizar_ticket = update(_tickets).where(
+        _tickets.c.id == bindparam('ticket_id'),
+        _tickets.c.estado == 'activo'
+    ).values(
+        estado='finalizado',
+        fecha_salida=bindparam('fecha_salida'),
+        monto=bindparam('monto'),
+        metodo_pago=bindparam('metodo_pago')
+    ).returning(_tickets.c.espacio_id)
+
+    liberar_espacio = update(_espacios).where(
+        _espacios.c.id == bindparam('espacio_id')
+    ).values(estado='disponible')
+
+    sentencias = {
+        'insertar_vehiculo': insertar_vehiculo,
+        'buscar_vehiculo': buscar_vehiculo,
+        'insertar_ticket': insertar_ticket,
+        'leer_ticket': leer_ticket,
+        'finalizar_ticket': finalizar_ticket,
+        'liberar_espacio': liberar_espacio,
+    }
+
+    if dialecto == 'postgresql':
+        # Ingreso completo en UNA sentencia (CTEs con modificación de datos).
+        # El vehículo se lee, no se inserta: los triggers de versión son por
+        # sentencia y un INSERT ... DO NOTHING también subiría 'vehiculos'.
+        # Con una placa nueva no se toca el espacio y la sentencia retorna
+        # vehiculo_id NULL para registrarla y repetir.
+        vehiculo = buscar_vehiculo.cte('v')
+        espacio = update(_espacios).where(
+            _espacios.c.id == bindparam('espacio_id'),
+            _espacios.c.estado == 'disponible',
+            exists(select(vehiculo.c.id))
+        ).values(estado='ocupado').returning(_espacios.c.id).cte('e')
+        ticket = _tickets.insert().from_select(
+            ['vehiculo_id', 'espacio_id', 'placa', 'tipo_vehiculo', 'estado', 'fecha_entrada', 'monto'],
+            select(
+                vehiculo.c.id, espacio.c.id, bindparam('placa'), bindparam('tipo_vehiculo'),
+                literal('activo'), bindparam('ahora'), literal(0.0)
+            ).select_from(vehiculo).join(espacio, true())
+        ).returning(_tickets.c.id).cte('t')
+
+        sentencias['ingreso'] = select(
+            select(ticket.c.id).scalar_subquery().label('ticket_id'),
+            select(vehiculo.c.id).scalar_subquery().label('vehiculo_id')
+        ).add_cte(vehiculo, espacio, ticket)
+
+        # Finalizar ticket y liberar su espacio en UNA sentencia
+        finalizado = finalizar_ticket.cte('t')
+        liberado = update(_espacios).where(
+            _espacios.c.id.in_(select(finalizado.c.espacio_id))
+        ).values(estado='disponible').cte('l')
+
+        sentencias['salida'] = select(finalizado.c.espacio_id).add_cte(liberado)
+
+    return sentencias
+
+
+def _sentencias():
+    dialecto = db.session.get_bind().dialect.name
+    sentencias = _SENTENCIAS.get(dialecto)
+    if sentencias is None:
+        sentencias = _SENTENCIAS.setdefault(dialecto, _construir_sentencias(dialecto))
+    return dialecto, sentencias
+
+
+def _registrar_vehiculo(sentencias, parametros):
+    """Inserta la placa si es nueva; si otra garita la registró al mismo tiempo, la lee"""
+    vehiculo_id = db.session.execute(sentencias['insertar_vehiculo'], parametros).scalar()
+    if vehiculo_id is None:
+        vehiculo_id = db.session.execute(sentencias['buscar_vehiculo'], parametros).scalar_one()
+    return vehiculo_id
+
+
+def _id_vehiculo(dialecto, sentencias, parametros):
+    """
+    Id del vehículo de la placa, registrándolo si es nuevo. Un vehículo
+    existente no se escribe (su versión de datos no cambia).
+    """
+    if dialecto == 'postgresql':
+        # Trigger de versión por sentencia: leer antes de intentar el INSERT
+        vehiculo_id = db.session.execute(sentencias['buscar_vehiculo'], parametros).scalar()
+        if vehiculo_id is not None:
+            return vehiculo_id
+    return _registrar_vehiculo(sentencias, parametros)
+
+
+def ingreso_rapido(placa, tipo_vehiculo):
+    """
+    Ingresa un vehículo: registro del vehículo si es nuevo, reclamo del
+    espacio e inserción del ticket en una transacción (sin commit).
+
+    - PostgreSQL: una sola sentencia con CTEs (+ el commit: 2 viajes); una
+      placa nueva agrega su INSERT y repite la sentencia.
+    - Otros: INSERT ... ON CONFLICT DO NOTHING del vehículo (o SELECT si ya
+      existe), UPDATE ... RETURNING del espacio e INSERT ... RETURNING.
+
+    Retorna (ticket_dict, EspacioLibre) o (None, None) si no hay espacio.
+    Lanza IntegrityError si el vehículo ya tiene un ticket activo.
+    """
+    dialecto, sentencias = _sentencias()
+    ahora = datetime.now(timezone.utc)
+    parametros = {'placa': placa, 'tipo_vehiculo': tipo_vehiculo, 'ahora': ahora}
+
+    fila = espacio = None
+
+    if dialecto == 'postgresql':
+        for candidato in candidatos_indice(tipo_vehiculo):
+            reservar_candidato(candidato)
+            fila = db.session.execute(
+                sentencias['ingreso'], {**parametros, 'espacio_id': candidato.id}
+            ).one()
+            if fila.vehiculo_id is None:
+                # Placa nueva: el espacio no se tocó, se repite con el mismo candidato
+                _registrar_vehiculo(sentencias, parametros)
+                fila = db.session.execute(
+                    sentencias['ingreso'], {**parametros, 'espacio_id': candidato.id}
+                ).one()
+            if fila.ticket_id is not None:
+                espacio = candidato._replace(estado='ocupado')
+                break
+            fila = None
+            # Candidato desactualizado: no se devuelve al índice en un rollback
+            db.session.info['indice_reservas'].remove(candidato)
+
+    if fila is None:
+        vehiculo_id = _id_vehiculo(dialecto, sentencias, parametros)
+
+        espacio = reclamar_espacio(tipo_vehiculo)
+        if espacio is None:
+            return None, None
+
+        ticket_id = db.session.execute(
+            sentencias['insertar_ticket'],
+            {**parametros, 'vehiculo_id': vehiculo_id, 'espacio_id': espacio.id}
+        ).scalar_one()
+    else:
+        ticket_id, vehiculo_id = fila
+
+    ticket = {
+        'id': ticket_id,
+        'placa': placa,
+        'vehiculo_id': vehiculo_id,
+        'espacio_id': espacio.id,
+        'espacio_numero': espacio.numero,
+        'fecha_entrada': _iso(ahora),
+        'fecha_salida': None,
+        'estado': 'activo',
+        'monto': 0.0,
+        'metodo_pago': None,
+        'tipo_vehiculo': tipo_vehiculo
+    }
+    return ticket, espacio
+
+
+def salida_rapida(ticket_id, metodo_pago):
+    """
+    Finaliza un ticket y libera su espacio en una transacción (sin commit):
+    un SELECT del ticket con su espacio y un UPDATE condicional
+    (WHERE estado='activo'); en PostgreSQL el UPDATE del ticket y el del
+    espacio van en la misma sentencia. El monto sale de la tarifa
+    compilada en memoria (sin consultas adicionales).
+
+    Retorna (ticket_dict, horas, None) o (None, None, error) donde error es
+    'no_encontrado' o 'finalizado'.
+    """
+    dialecto, sentencias = _sentencias()
+
+    fila = db.session.execute(sentencias['leer_ticket'], {'ticket_id': ticket_id}).first()
+    if fila is None:
+        return None, None, 'no_encontrado'
+
+    (_, placa, vehiculo_id, espacio_id, fecha_entrada, estado, tipo_vehiculo,
+     numero, tipo_espacio, piso, seccion, activo) = fila
+
+    if estado != 'activo':
+        return None, None, 'finalizado'
+
+    fecha_salida = datetime.now(timezone.utc)
+    if fecha_entrada.tzinfo is None:
+        fecha_entrada = fecha_entrada.replace(tzinfo=timezone.utc)
+
+    horas = (fecha_salida - fecha_entrada).total_seconds() / 3600
+    monto = calcular_monto(fecha_entrada, fecha_salida, tipo_vehiculo)
+
+    parametros = {
+        'ticket_id': ticket_id,
+        'fecha_salida': fecha_salida,
+        'monto': monto,
+        'metodo_pago': metodo_pago
+    }
+
+    if dialecto == 'postgresql':
+        finalizado = db.session.execute(sentencias['salida'], parametros).first()
+    else:
+        finalizado = db.session.execute(sentencias['finalizar_ticket'], parametros).first()
+        if finalizado and espacio_id:
+            db.session.execute(sentencias['liberar_espacio'], {'espacio_id': espacio_id})
+
+    # Otra garita lo finalizó entre la lectura y el UPDATE
+    if finalizado is None:
+        return None, None, 'finalizado'
+
+    # Cubo de ingresos: un upsert en la misma transacción
+    registrar_salidas([Salida(fecha_entrada, fecha_salida, tipo_vehiculo, metodo_pago, seccion, monto)])
+
+    if numero is not None:
+        registrar_cambio_espacio(EspacioLibre(
+            id=espacio_id, numero=numero, tipo=tipo_espacio, piso=piso,
+            seccion=seccion, estado='disponible', activo=activo
+        ))
+
+    ticket = {
+        'id': ticket_id,
+        'placa': placa,
+        'vehiculo_id': vehiculo_id,
+        'espacio_id': espacio_id,
+        'espacio_numero': numero,
+        'fecha_entrada': _iso(fecha_entrada),
+        'fecha_salida': _iso(fecha_salida),
+        'estado': 'finalizado',
+        'monto': monto,
+        'metodo_pago': metodo_pago,
+        'tipo_vehiculo': tipo_vehiculo
+    }
+    return ticket, horas, None
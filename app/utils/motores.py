@@ -0,0 +1,206 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+
+# Motores de la BD principal y de la réplica de solo lectura.
+#
+# Cada motor se arma con un perfil de config.PERFILES_MOTOR (pool,
+# pre-ping, reciclado, statement timeout). Con DATABASE_REPLICA_URL, los
+# endpoints de solo lectura marcados con @lectura_replica (reportes,
+# estadísticas, dashboard) consultan la réplica; todo lo demás, y
+# cualquier flush, va a la principal:
+#
+# - Leer lo propio: un cliente que acaba de escribir (ingreso, salida...)
+#   recibe la cookie `escritura_reciente` y sus lecturas van a la principal
+#   durante REPLICA_RETRASO_MAXIMO segundos, aunque la réplica vaya atrasada.
+# - Réplica caída: si no se puede conectar, la request se repite en la
+#   principal y las siguientes van ahí durante REPLICA_REINTENTO_SEGUNDOS.
+
+COOKIE_ESCRITURA = 'escritura_reciente'
+
+
+def opciones_motor(url, perfil):
+    """Opciones de create_engine() para `url` según el perfil (dict de PERFILES_MOTOR)"""
+    opciones = {'pool_pre_ping': perfil.get('pre_ping', True)}
+    if perfil.get('pool_recycle'):
+        opciones['pool_recycle'] = perfil['pool_recycle']
+
+    dialecto = make_url(url).get_backend_name()
+    if dialecto == 'sqlite':
+        # SQLite (desarrollo): sin tamaño de pool ni timeouts por sentencia
+        return opciones
+
+    opciones.update(
+        pool_size=perfil.get('pool_size', 5),
+        max_overflow=perfil.get('max_overflow', 10),
+        pool_timeout=perfil.get('pool_timeout', 30)
+    )
+    if dialecto == 'postgresql':
+        parametros = []
+        if perfil.get('statement_timeout_ms'):
+            parametros.append(f"-c statement_timeout={int(perfil['statement_timeout_ms'])}")
+        if perfil.get('solo_lectura'):
+            parametros.append('-c default_transaction_read_only=on')
+        if parametros:
+            opciones['connect_args'] = {'options': ' '.join(parametros)}
+    return opciones
+
+
+class SesionRuteada(Session):
+    """Sesión de db: con info['replica'] las lecturas usan el motor de la réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('replica') and not self._flushing:
+            estado = current_app.extensions.get('replica')
+            if estado is not None:
+                return estado.motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(SesionRuteada, 'after_flush')
+def _flush(session, flush_context):
+    _marcar_escritura()
+
+
+@event.listens_for(SesionRuteada, 'do_orm_execute')
+def _sentencia(orm_execute_state):
+    # INSERT/UPDATE/DELETE directos (ruta rápida de garita): no pasan por flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _marcar_escritura()
+
+
+def _marcar_escritura():
+    if has_request_context():
+        g.escritura_en_principal = True
+
+
+class _EstadoReplica:
+    """Motor de la réplica y hasta cuándo se la considera caída (por proceso)"""
+
+    def __init__(self, motor, reintento=30):
+        self.motor = motor
+        self.reintento = reintento
+        self._lock = threading.Lock()
+        self._caida_hasta = 0.0
+
+    def marcar_caida(self):
+        with self._lock:
+            self._caida_hasta = time.monotonic() + self.reintento
+
+    def disponible(self):
+        return time.monotonic() >= self._caida_hasta
+
+
+def configurar_motores(app):
+    """Opciones del motor principal y datos de la réplica en app.config (antes de db.init_app(app))"""
+    import config
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_motor(
+        app.config['SQLALCHEMY_DATABASE_URI'], config.PERFILES_MOTOR[config.DB_PERFIL]
+    )
+    app.config['DATABASE_REPLICA_URL'] = config.DATABASE_REPLICA_URL
+    app.config['DB_PERFIL_REPLICA'] = config.PERFILES_MOTOR[config.DB_PERFIL_REPLICA]
+    app.config['REPLICA_RETRASO_MAXIMO'] = config.REPLICA_RETRASO_MAXIMO
+    app.config['REPLICA_REINTENTO_SEGUNDOS'] = config.REPLICA_REINTENTO_SEGUNDOS
+
+
+def registrar_replica(app):
+    """
+    Motor de la réplica (sin conectar todavía), detección de réplica caída
+    y cookie de escritura reciente. No es un bind de Flask-SQLAlchemy: los
+    modelos y db.create_all() solo conocen la principal.
+    """
+    url = app.config.get('DATABASE_REPLICA_URL')
+    if not url:
+        return
+
+    replica = create_engine(url, **opciones_motor(url, app.config['DB_PERFIL_REPLICA']))
+    estado = app.extensions['replica'] = _EstadoReplica(replica, app.config.get('REPLICA_REINTENTO_SEGUNDOS', 30))
+
+    @event.listens_for(replica, 'handle_error')
+    def _error_replica(contexto):
+        # Solo fallas de conexión; un timeout o un error de SQL no cambia de BD
+        if contexto.is_disconnect or contexto.connection is None:
+            estado.marcar_caida()
+            if has_request_context():
+                g.replica_fallo = True
+
+    @app.after_request
+    def _cookie_escritura(response):
+        if g.pop('escritura_en_principal', False):
+            retraso = app.config.get('REPLICA_RETRASO_MAXIMO', 5)
+            response.set_cookie(COOKIE_ESCRITURA, f"{time.time():.3f}", max_age=max(1, int(retraso + 0.999)),
+                                httponly=True, samesite='Lax')
+        return response
+
+
+def _escritura_reciente():
+    try:
+        escrita = float(request.cookies.get(COOKIE_ESCRITURA, 0))
+    except ValueError:
+        return False
+    return time.time() - escrita < current_app.config.get('REPLICA_RETRASO_MAXIMO', 5)
+
+
+def en_replica():
+    """True si las lecturas de la sesión actual van a la réplica"""
+    from app.extensions import db
+
+    return bool(db.session.info.get('replica'))
+
+
+@contextmanager
+def usar_replica(activar=True):
+    """Dentro del bloque, las lecturas de db.session van a la réplica (si hay)"""
+    from app.extensions import db
+
+    if not activar:
+        yield
+        return
+    db.session.info['replica'] = True
+    try:
+        yield
+    finally:
+        db.session.info.pop('replica', None)
+
+
+def lectura_replica(vista):
+    """
+    Decorador de GET de solo lectura (debajo de @jwt_required(): el token
+    se valida contra la principal): la vista lee de la réplica salvo que
+    no haya, esté caída o el cliente haya escrito hace poco.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        from app.extensions import db
+
+        estado = current_app.extensions.get('replica')
+        if estado is None or not estado.disponible() or _escritura_reciente():
+            return vista(*args, **kwargs)
+
+        # Cierra la transacción previa (p. ej. la versión del token)
+        db.session.rollback()
+        g.replica_fallo = False
+        try:
+            with usar_replica():
+                respuesta = vista(*args, **kwargs)
+        except Exception:
+            if not g.pop('replica_fallo', False):
+                raise
+            respuesta = None
+        finally:
+            db.session.rollback()
+
+        if respuesta is None or g.pop('replica_fallo', False):
+            # La réplica no respondió: la misma lectura en la principal
+            print("❌ Réplica sin conexión: lectura en la principal")
+            return vista(*args, **kwargs)
+        return respuesta
+    return envoltura
@@ -0,0 +1,116 @@
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.contador_ocupacion import ContadorOcupacion
+from app.models.espacio import Espacio
+from app.utils.versiones import subir_version
+
+
+# Contadores de ocupación: cuántos espacios activos hay por (sección,
+# tipo, estado). Los triggers de app/models/contador_ocupacion.py los
+# ajustan en la misma transacción que cambia cada espacio (asignación,
+# garita, cierre masivo, CRUD), así que las estadísticas leen unas pocas
+# filas en vez de contar la tabla de espacios en cada request.
+#
+# Si algo cambia espacios sin pasar por los triggers (restauraciones,
+# triggers deshabilitados), reconciliar() recalcula los contadores con un
+# GROUP BY. En PostgreSQL bloquea las escrituras de espacios mientras
+# cuenta, así que solo corre con `flask ocupacion reconciliar` (a mano o
+# como tarea programada fuera de hora pico), nunca dentro de una lectura.
+
+_COLUMNAS = (
+    ContadorOcupacion.seccion, ContadorOcupacion.tipo,
+    ContadorOcupacion.estado, ContadorOcupacion.cantidad
+)
+
+
+class Ocupacion:
+    """Conteos {(seccion, tipo, estado): cantidad} leídos de una vez"""
+
+    def __init__(self, conteos):
+        self.conteos = conteos
+
+    def contar(self, tipo=None, estado=None, seccion=None):
+        """Espacios activos que cumplen los filtros indicados"""
+        return sum(
+            cantidad for (s, t, e), cantidad in self.conteos.items()
+            if (tipo is None or t == tipo)
+            and (estado is None or e == estado)
+            and (seccion is None or s == seccion)
+        )
+
+    def tipos(self):
+        """Tipos con al menos un espacio activo"""
+        return {tipo for _, tipo, _ in self.conteos}
+
+    def resumen(self, tipo=None):
+        """{'total', 'ocupados', 'disponibles', 'mantenimiento'} (de un tipo o de todos)"""
+        return {
+            'total': self.contar(tipo),
+            'ocupados': self.contar(tipo, 'ocupado'),
+            'disponibles': self.contar(tipo, 'disponible'),
+            'mantenimiento': self.contar(tipo, 'mantenimiento')
+        }
+
+
+def _conteos(filas):
+    return {(seccion, tipo, estado): cantidad for seccion, tipo, estado, cantidad in filas if cantidad}
+
+
+def leer_ocupacion():
+    """Ocupacion actual desde los contadores (una consulta)"""
+    return Ocupacion(_conteos(db.session.execute(select(*_COLUMNAS)).all()))
+
+
+# ===== RECONCILIACIÓN =====
+
+def _conteo_real(conexion):
+    seccion = func.coalesce(Espacio.seccion, '')
+    return _conteos(conexion.execute(
+        select(seccion, Espacio.tipo, Espacio.estado, func.count(Espacio.id))
+        .where(Espacio.activo.is_(True))
+        .group_by(seccion, Espacio.tipo, Espacio.estado)
+    ).all())
+
+
+def _upsert(dialecto):
+    insert_dialecto = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+    sentencia = insert_dialecto(ContadorOcupacion.__table__)
+    return sentencia.on_conflict_do_update(
+        index_elements=['seccion', 'tipo', 'estado'],
+        set_={'cantidad': sentencia.excluded.cantidad}
+    )
+
+
+def reconciliar(conexion=None):
+    """
+    Recalcula los contadores desde los espacios y corrige solo las celdas
+    desviadas, en la transacción de `conexion` (la de la sesión por
+    defecto; sin commit). Retorna {(seccion, tipo, estado): (contador, real)}
+    de las celdas corregidas.
+    """
+    conexion = conexion or db.session.connection()
+    if conexion.dialect.name == 'postgresql':
+        # Sin cambios de espacios mientras se cuenta: los triggers esperan
+        conexion.execute(text('LOCK TABLE espacios IN SHARE MODE'))
+
+    reales = _conteo_real(conexion)
+    actuales = _conteos(conexion.execute(select(*_COLUMNAS)).all())
+
+    desvios = {
+        clave: (actuales.get(clave, 0), reales.get(clave, 0))
+        for clave in set(reales) | set(actuales)
+        if actuales.get(clave, 0) != reales.get(clave, 0)
+    }
+
+    if desvios:
+        conexion.execute(_upsert(conexion.dialect.name), [
+            {'seccion': seccion, 'tipo': tipo, 'estado': estado, 'cantidad': real}
+            for (seccion, tipo, estado), (_, real) in desvios.items()
+        ])
+        # Celdas que quedaron en cero no hacen falta
+        conexion.execute(delete(ContadorOcupacion).where(ContadorOcupacion.cantidad == 0))
+        # Las respuestas con ETag de espacios dejan de ser válidas
+        subir_version('espacios', conexion=conexion)
+    return desvios
+
@@ -0,0 +1,138 @@
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import and_, or_
+
+
+# Paginación por cursor (keyset): en vez de OFFSET, cada página continúa
+# donde terminó la anterior usando los valores de las claves de orden de
+# su última fila. El costo de cada página no depende del tamaño de la
+# tabla ni de qué tan lejos se navegue.
+#
+# Request:   ?limit=50&cursor=<opaco>
+# Respuesta: el mismo arreglo JSON de siempre, más los encabezados
+#            X-Next-Cursor y Link (rel="next") si hay otra página.
+
+LIMITE_MAXIMO = 500
+
+
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.replace(tzinfo=None).isoformat()}
+    return valor
+
+
+def _de_json(valor):
+    if isinstance(valor, dict) and 'dt' in valor:
+        return datetime.fromisoformat(valor['dt'])
+    return valor
+
+
+def codificar_cursor(valores):
+    """Valores de las claves de orden -> cadena opaca (base64url)"""
+    datos = json.dumps([_a_json(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, cantidad):
+    """Cadena opaca -> valores; lanza ValueError si no es un cursor válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Cursor inválido")
+    return [_de_json(v) for v in valores]
+
+
+def leer_parametros(limite_por_defecto=None):
+    """
+    Lee ?limit= y ?cursor= del request. Retorna (limite, cursor); limite
+    es None si el endpoint no pagina por defecto y no se pidió.
+    Lanza ValueError si los parámetros son inválidos.
+    """
+    limite = request.args.get('limit')
+    cursor = request.args.get('cursor') or None
+
+    if limite is None:
+        limite = limite_por_defecto if cursor is None else (limite_por_defecto or LIMITE_MAXIMO)
+    else:
+        try:
+            limite = int(limite)
+        except ValueError:
+            raise ValueError("El parámetro limit debe ser un número entero")
+        if limite < 1:
+            raise ValueError("El parámetro limit debe ser mayor que 0")
+
+    if limite is not None:
+        limite = min(limite, LIMITE_MAXIMO)
+
+    return limite, cursor
+
+
+def _condicion_siguiente(claves, valores):
+    """
+    (k1, k2, ...) "después de" (v1, v2, ...) según la dirección de cada
+    clave: k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+    """
+    condiciones = []
+    for i, (columna, descendente) in enumerate(claves):
+        iguales = [claves[j][0] == valores[j] for j in range(i)]
+        siguiente = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def ordenar(consulta, claves, cursor=None):
+    """
+    Aplica el orden de `claves` y, si hay cursor, el keyset para continuar
+    después de él. Lanza ValueError si el cursor es inválido.
+    """
+    orden = [columna.desc() if descendente else columna.asc() for columna, descendente in claves]
+    consulta = consulta.order_by(*orden)
+
+    if cursor:
+        consulta = consulta.filter(_condicion_siguiente(claves, decodificar_cursor(cursor, len(claves))))
+
+    return consulta
+
+
+def paginar(consulta, claves, limite, cursor):
+    """
+    Aplica orden y keyset a una Query de Flask-SQLAlchemy.
+
+    claves: [(columna, descendente), ...]; la última debe ser única (id).
+    Retorna (filas, siguiente_cursor o None). Sin `limite`, retorna todo.
+    """
+    consulta = ordenar(consulta, claves, cursor)
+
+    if limite is None:
+        return consulta.all(), None
+
+    # Una fila de más para saber si hay otra página sin un COUNT
+    filas = consulta.limit(limite + 1).all()
+    if len(filas) <= limite:
+        return filas, None
+
+    filas = filas[:limite]
+    ultima = filas[-1]
+    return filas, codificar_cursor([getattr(ultima, columna.key) for columna, _ in claves])
+
+
+def encabezados_paginacion(siguiente):
+    """Encabezados X-Next-Cursor / Link para la respuesta (vacío en la última página)"""
+    if not siguiente:
+        return {}
+
+    parametros = request.args.to_dict()
+    parametros['cursor'] = siguiente
+    url = f"{request.base_url}?{urlencode(parametros)}"
+
+    return {
+        'X-Next-Cursor': siguiente,
+        'Link': f'<{url}>; rel="next"'
+    }
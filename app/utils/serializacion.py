@@ -0,0 +1,76 @@
+from datetime import timezone
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, raiseload
+from sqlalchemy.orm.base import NO_VALUE
+from app.models.ticket import Ticket
+
+
+# Serialización de tickets para los listados sin cargas perezosas: la
+# consulta trae cada ticket con su espacio en el mismo JOIN (con_espacio)
+# y el serializador solo lee lo que ya está cargado. Un listado cuesta el
+# mismo número de consultas con 10 o con 10.000 tickets.
+
+
+def con_espacio(consulta):
+    """
+    Carga el espacio de cada ticket en la misma consulta (JOIN). Cualquier
+    otra relación lanza un error en vez de disparar un SELECT por fila.
+    """
+    return consulta.options(joinedload(Ticket.espacio), raiseload('*'))
+
+
+def _espacio_cargado(ticket):
+    espacio = inspect(ticket).attrs.espacio.loaded_value
+    if espacio is NO_VALUE:
+        raise RuntimeError(
+            f"Espacio del ticket {ticket.id} sin cargar: consultar con con_espacio()"
+        )
+    return espacio
+
+
+def _utc(fecha):
+    return fecha.replace(tzinfo=timezone.utc) if fecha.tzinfo is None else fecha
+
+
+def tiempo_texto(desde, hasta):
+    """Duración entre dos fechas como {'horas', 'minutos', 'texto'}"""
+    total_minutos = int((_utc(hasta) - _utc(desde)).total_seconds() / 60)
+    horas = total_minutos // 60
+    minutos = total_minutos % 60
+    return {
+        'horas': horas,
+        'minutos': minutos,
+        'texto': f"{horas}h {minutos}m"
+    }
+
+
+def serializar_ticket(ticket, detalle_espacio=True):
+    """
+    Ticket.to_dict() sin consultas: el espacio debe venir cargado
+    (con_espacio). Con `detalle_espacio` agrega número, tipo y sección.
+    """
+    espacio = _espacio_cargado(ticket)
+
+    datos = {
+        'id': ticket.id,
+        'placa': ticket.placa,
+        'vehiculo_id': ticket.vehiculo_id,
+        'espacio_id': ticket.espacio_id,
+        'espacio_numero': espacio.numero if espacio else None,
+        'fecha_entrada': ticket.fecha_entrada.isoformat() if ticket.fecha_entrada else None,
+        'fecha_salida': ticket.fecha_salida.isoformat() if ticket.fecha_salida else None,
+        'estado': ticket.estado,
+        'monto': ticket.monto,
+        'metodo_pago': ticket.metodo_pago,
+        'tipo_vehiculo': ticket.tipo_vehiculo
+    }
+
+    if detalle_espacio and espacio:
+        datos['espacio'] = {
+            'numero': espacio.numero,
+            'tipo': espacio.tipo,
+            'seccion': espacio.seccion
+        }
+
+    return datos
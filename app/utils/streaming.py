@@ -0,0 +1,59 @@
+from flask import Response, current_app, request, stream_with_context
+
+
+# Respuestas JSON en flujo para los listados grandes (?stream=1): la
+# consulta se recorre por lotes (yield_per; cursor del lado del servidor
+# en PostgreSQL) y el arreglo se emite a medida que llegan las filas. La
+# memoria queda acotada a un lote y el primer byte sale antes de leer la
+# tabla, aunque se pida el historial completo.
+#
+# El cuerpo es el mismo arreglo JSON que el listado paginado. Como el
+# estado 200 ya se envió, un error a mitad del flujo se vuelve a lanzar
+# (igual que en las exportaciones): el servidor cierra la conexión sin el
+# fragmento final y el cliente ve una respuesta cortada y un arreglo sin
+# cerrar, en vez de una lista incompleta que parezca correcta.
+
+TAMANO_LOTE = 1000
+
+
+def solicita_flujo():
+    """True si el request pidió la respuesta en flujo (?stream=1)"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'si', 'sí')
+
+
+def arreglo_json(filas, serializar, tamano_lote=TAMANO_LOTE):
+    """Generador de fragmentos de un arreglo JSON, uno por lote de filas"""
+    dumps = current_app.json.dumps
+
+    yield '['
+    fragmentos = []
+    primero = True
+    try:
+        for fila in filas:
+            texto = dumps(serializar(fila))
+            fragmentos.append(texto if primero else ',' + texto)
+            primero = False
+            if len(fragmentos) >= tamano_lote:
+                yield ''.join(fragmentos)
+                fragmentos = []
+    except Exception as e:
+        print(f"❌ Error al emitir listado en flujo: {e}")
+        raise
+
+    if fragmentos:
+        yield ''.join(fragmentos)
+    yield ']'
+
+
+def respuesta_en_flujo(consulta, serializar, tamano_lote=TAMANO_LOTE):
+    """
+    Response que emite `consulta` (Query ya ordenada) como arreglo JSON.
+    La consulta se ejecuta dentro del generador, con el request vivo.
+    """
+    filas = consulta.yield_per(tamano_lote)
+    return Response(
+        stream_with_context(arreglo_json(filas, serializar, tamano_lote)),
+        mimetype='application/json',
+        # Que un proxy (nginx) no acumule la respuesta completa
+        headers={'X-Accel-Buffering': 'no'}
+    )
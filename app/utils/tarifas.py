@@ -0,0 +1,346 @@
+import math
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.tarifa import Tarifa
+from app.utils.tipos import catalogo_tipos
+
+
+# ===== MOTOR DE TARIFAS =====
+#
+# El esquema de cobro vive en la tabla `tarifas` (una fila por versión,
+# solo una activa). Se compila una vez a una tabla de bandas por tipo con
+# sumas acumuladas, así que cobrar una estancia es una búsqueda binaria
+# sobre las bandas del día, sin consultas a la base de datos.
+#
+# Formato de `definicion`:
+#
+#   {
+#     "minutos_gracia": 0,          # estancias <= gracia no se cobran (0 = sin gracia)
+#     "incremento_minutos": 60,     # se cobra por bloques de N minutos (redondeo hacia arriba)
+#     "minimo_minutos": 60,         # tiempo mínimo cobrado
+#     "utc_offset_minutos": -240,   # hora local de las bandas (RD: UTC-4)
+#     "tipo_por_defecto": "regular",
+#     "tipos": {
+#       "regular": {
+#         "tarifa_hora": 50.0,
+#         "tope_diario": 400.0,     # opcional: máximo por cada 24h desde la entrada
+#         "bandas": [               # opcional: tarifa distinta en una franja horaria
+#           {"desde": "22:00", "hasta": "06:00", "tarifa_hora": 30.0}
+#         ]
+#       }
+#     },
+#     "recargos_ocupacion": [       # opcional: factor según % de ocupación del tipo
+#       {"desde": 90, "factor": 1.25}
+#     ]
+#   }
+
+MINUTOS_DIA = 24 * 60
+
+# Equivalente a las tarifas fijas anteriores: por hora, redondeo hacia arriba, mínimo 1 hora.
+# Sin tarifa publicada, los tipos y su tarifa por hora salen del catálogo
+# (tarifa_por_defecto()); estos son los del catálogo inicial.
+TARIFA_POR_DEFECTO = {
+    'minutos_gracia': 0,
+    'incremento_minutos': 60,
+    'minimo_minutos': 60,
+    'utc_offset_minutos': -240,
+    'tipo_por_defecto': 'regular',
+    'tipos': {
+        'moto': {'tarifa_hora': 25.0},
+        'regular': {'tarifa_hora': 50.0},
+        'discapacitado': {'tarifa_hora': 80.0}
+    },
+    'recargos_ocupacion': []
+}
+
+
+def tarifa_por_defecto(catalogo):
+    """TARIFA_POR_DEFECTO con los tipos y tarifas del catálogo de tipos"""
+    tipos = catalogo.tarifas()
+    if not tipos or catalogo.por_defecto not in tipos:
+        return TARIFA_POR_DEFECTO
+    return dict(TARIFA_POR_DEFECTO, tipos=tipos, tipo_por_defecto=catalogo.por_defecto)
+
+
+def _minuto_del_dia(texto):
+    """'HH:MM' -> minutos desde la medianoche ('24:00' es el fin del día)"""
+    try:
+        horas, minutos = (int(parte) for parte in str(texto).split(':'))
+    except ValueError:
+        raise ValueError(f"Hora inválida: {texto!r} (usar HH:MM)")
+    if not (0 <= horas <= 24 and 0 <= minutos < 60) or (horas == 24 and minutos):
+        raise ValueError(f"Hora inválida: {texto!r} (usar HH:MM)")
+    return horas * 60 + minutos
+
+
+def _numero(valor, campo, minimo=0):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{campo}' debe ser numérico")
+    if numero < minimo:
+        raise ValueError(f"'{campo}' debe ser >= {minimo}")
+    return numero
+
+
+class _TarifaTipo:
+    """
+    Bandas de un tipo compiladas sobre un día: `limites` son los minutos
+    donde cambia la tarifa y `acumulado` lo cobrado desde la medianoche
+    hasta cada límite (en tarifa_hora x minutos, se divide entre 60 al final).
+    """
+
+    __slots__ = ('limites', 'tarifas', 'acumulado', 'dia', 'tope')
+
+    def __init__(self, definicion):
+        base = _numero(definicion.get('tarifa_hora'), 'tarifa_hora')
+
+        tramos = []
+        for banda in definicion.get('bandas') or []:
+            desde = _minuto_del_dia(banda.get('desde'))
+            hasta = _minuto_del_dia(banda.get('hasta'))
+            tarifa = _numero(banda.get('tarifa_hora'), 'bandas.tarifa_hora')
+            if desde == hasta:
+                raise ValueError("Una banda no puede empezar y terminar a la misma hora")
+            # Banda que cruza la medianoche (22:00 -> 06:00): dos tramos
+            if hasta < desde:
+                tramos.append((desde, MINUTOS_DIA, tarifa))
+                tramos.append((0, hasta, tarifa))
+            else:
+                tramos.append((desde, hasta, tarifa))
+
+        cortes = sorted({0, MINUTOS_DIA} | {m for desde, hasta, _ in tramos for m in (desde, hasta)})
+
+        limites, tarifas = [], []
+        for inicio in cortes[:-1]:
+            # La última banda declarada que cubre el tramo tiene prioridad
+            tarifa = base
+            for desde, hasta, valor in tramos:
+                if desde <= inicio < hasta:
+                    tarifa = valor
+            if tarifas and tarifas[-1] == tarifa:
+                continue
+            limites.append(inicio)
+            tarifas.append(tarifa)
+
+        acumulado = [0.0]
+        for i, inicio in enumerate(limites):
+            fin = limites[i + 1] if i + 1 < len(limites) else MINUTOS_DIA
+            acumulado.append(acumulado[-1] + (fin - inicio) * tarifas[i])
+
+        self.limites = limites
+        self.tarifas = tarifas
+        self.acumulado = acumulado
+        self.dia = acumulado[-1]
+
+        tope = definicion.get('tope_diario')
+        self.tope = _numero(tope, 'tope_diario') * 60 if tope is not None else None
+
+    def _hasta(self, minuto):
+        """Cobro acumulado desde la medianoche del día 0 hasta `minuto`"""
+        dias, resto = divmod(minuto, MINUTOS_DIA)
+        i = bisect_right(self.limites, resto) - 1
+        return dias * self.dia + self.acumulado[i] + (resto - self.limites[i]) * self.tarifas[i]
+
+    def cobrar(self, inicio, minutos):
+        """
+        Cobro de `minutos` empezando en el minuto local `inicio` del día,
+        con el tope aplicado a cada bloque de 24h desde la entrada.
+        """
+        dias, resto = divmod(minutos, MINUTOS_DIA)
+        parcial = self._hasta(inicio + resto) - self._hasta(inicio)
+        completo = self.dia
+
+        if self.tope is not None:
+            parcial = min(parcial, self.tope)
+            completo = min(completo, self.tope)
+
+        return dias * completo + parcial
+
+
+class TarifaCompilada:
+    """Esquema de cobro listo para usar: se construye una vez por versión"""
+
+    def __init__(self, definicion, version=0):
+        if not isinstance(definicion, dict):
+            raise ValueError("La definición de la tarifa debe ser un objeto JSON")
+
+        self.version = version
+        self.definicion = definicion
+        self.gracia = _numero(definicion.get('minutos_gracia', 0), 'minutos_gracia')
+        self.incremento = _numero(definicion.get('incremento_minutos', 60), 'incremento_minutos', minimo=1)
+        self.minimo = _numero(definicion.get('minimo_minutos', 0), 'minimo_minutos')
+        self.offset = timedelta(minutes=_numero(
+            definicion.get('utc_offset_minutos', 0), 'utc_offset_minutos', minimo=-MINUTOS_DIA
+        ))
+
+        tipos = definicion.get('tipos') or {}
+        if not tipos:
+            raise ValueError("La tarifa debe definir al menos un tipo de vehículo")
+        self.tipos = {tipo: _TarifaTipo(datos or {}) for tipo, datos in tipos.items()}
+
+        self.tipo_por_defecto = definicion.get('tipo_por_defecto', 'regular')
+        if self.tipo_por_defecto not in self.tipos:
+            raise ValueError(f"'tipo_por_defecto' ({self.tipo_por_defecto}) no está en 'tipos'")
+
+        recargos = []
+        for recargo in definicion.get('recargos_ocupacion') or []:
+            recargos.append((
+                _numero(recargo.get('desde'), 'recargos_ocupacion.desde'),
+                _numero(recargo.get('factor'), 'recargos_ocupacion.factor')
+            ))
+        self.recargos = sorted(recargos)
+        self._umbrales = [desde for desde, _ in self.recargos]
+
+    @property
+    def usa_ocupacion(self):
+        return bool(self.recargos)
+
+    def _factor(self, porcentaje):
+        if not self.recargos or porcentaje is None:
+            return 1.0
+        i = bisect_right(self._umbrales, porcentaje) - 1
+        return self.recargos[i][1] if i >= 0 else 1.0
+
+    def minutos_cobrables(self, entrada, salida):
+        """Minutos a cobrar tras gracia, incremento y mínimo (0 si entra en la gracia)"""
+        minutos = max((salida - entrada).total_seconds() / 60, 0)
+        if self.gracia and minutos <= self.gracia:
+            return 0
+        bloques = math.ceil(minutos / self.incremento) * self.incremento
+        return max(bloques, self.minimo)
+
+    def calcular(self, entrada, salida, tipo_vehiculo, ocupacion=None):
+        """
+        Monto de una estancia. `entrada`/`salida` en UTC (naive = UTC);
+        `ocupacion` es {tipo: porcentaje} para los recargos.
+        """
+        if entrada.tzinfo is None:
+            entrada = entrada.replace(tzinfo=timezone.utc)
+        if salida.tzinfo is None:
+            salida = salida.replace(tzinfo=timezone.utc)
+
+        minutos = self.minutos_cobrables(entrada, salida)
+        if not minutos:
+            return 0.0
+
+        tarifa = self.tipos.get(tipo_vehiculo) or self.tipos[self.tipo_por_defecto]
+        local = entrada + self.offset
+        inicio = local.hour * 60 + local.minute + local.second / 60 + local.microsecond / 60_000_000
+
+        monto = tarifa.cobrar(inicio, minutos) / 60
+        if ocupacion:
+            monto *= self._factor(ocupacion.get(tipo_vehiculo))
+        return round(monto, 2)
+
+    def calcular_lote(self, estancias, ocupacion=None):
+        """Montos de muchas estancias (entrada, salida, tipo) en una pasada"""
+        calcular = self.calcular
+        return [calcular(entrada, salida, tipo, ocupacion) for entrada, salida, tipo in estancias]
+
+
+def validar_definicion(definicion):
+    """Compila la definición para validarla; lanza ValueError si es inválida"""
+    TarifaCompilada(definicion)
+
+
+# ===== TARIFA VIGENTE (una compilación por worker) =====
+
+class _CacheTarifa:
+    """
+    Tarifa compilada del worker. Cada `ttl` segundos revisa con una
+    consulta mínima si cambió la versión activa (otro worker pudo
+    publicar una nueva) y solo recompila si cambió.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tarifa = None
+        self._revisada_en = None
+
+    def invalidar(self):
+        with self._lock:
+            self._revisada_en = None
+
+    def obtener(self):
+        ahora = time.monotonic()
+        if self._tarifa is not None and self._revisada_en is not None and ahora - self._revisada_en < self.ttl:
+            return self._tarifa
+
+        with self._lock:
+            version = db.session.execute(
+                select(Tarifa.version).where(Tarifa.activa.is_(True)).order_by(Tarifa.version.desc()).limit(1)
+            ).scalar()
+
+            if version is None:
+                # Sin tarifa publicada: la del catálogo (se recompila si cambia)
+                definicion = tarifa_por_defecto(catalogo_tipos())
+                if self._tarifa is None or self._tarifa.version or self._tarifa.definicion != definicion:
+                    self._tarifa = TarifaCompilada(definicion)
+            elif self._tarifa is None or self._tarifa.version != version:
+                definicion = db.session.execute(
+                    select(Tarifa.definicion).where(Tarifa.version == version)
+                ).scalar_one()
+                self._tarifa = TarifaCompilada(definicion, version=version)
+
+            self._revisada_en = ahora
+            return self._tarifa
+
+
+def _cache():
+    cache = current_app.extensions.get('tarifa_vigente')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'tarifa_vigente', _CacheTarifa(ttl=current_app.config.get('TARIFA_TTL', 60))
+        )
+    return cache
+
+
+def tarifa_vigente():
+    """Tarifa compilada activa (la de por defecto si no hay ninguna en la BD)"""
+    return _cache().obtener()
+
+
+def invalidar_tarifa():
+    _cache().invalidar()
+
+
+def _ocupacion(tarifa):
+    if not tarifa.usa_ocupacion:
+        return None
+    from app.utils.asignacion import ocupacion_por_tipo
+    return ocupacion_por_tipo()
+
+
+def calcular_monto(entrada, salida, tipo_vehiculo):
+    """Monto de una estancia con la tarifa vigente"""
+    tarifa = tarifa_vigente()
+    return tarifa.calcular(entrada, salida, tipo_vehiculo, _ocupacion(tarifa))
+
+
+def calcular_montos(estancias):
+    """Montos de muchas estancias (entrada, salida, tipo) con la tarifa vigente"""
+    tarifa = tarifa_vigente()
+    return tarifa.calcular_lote(estancias, _ocupacion(tarifa))
+
+
+def publicar_tarifa(definicion, descripcion=None):
+    """
+    Crea una nueva versión activa (desactiva las demás) sin commit.
+    Lanza ValueError si la definición es inválida.
+    """
+    validar_definicion(definicion)
+
+    version = (db.session.execute(select(db.func.max(Tarifa.version))).scalar() or 0) + 1
+    Tarifa.query.filter(Tarifa.activa.is_(True)).update({'activa': False})
+    tarifa = Tarifa(version=version, descripcion=descripcion, definicion=definicion,
+                    activa=True, fecha_creacion=datetime.now(timezone.utc))
+    db.session.add(tarifa)
+    return tarifa
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.tipo_espacio import TIPOS_INICIALES, TipoEspacio
+
+
+# Catálogo de tipos de espacio (tabla `tipos_espacio`) cacheado por
+# proceso. Las estadísticas por tipo lo usan para nombrar y ordenar los
+# resultados de un solo GROUP BY tipo: agregar un tipo (carga eléctrica,
+# sobredimensionado) no agrega consultas, solo filas.
+
+
+class CatalogoTipos:
+    """Tipos activos del catálogo, ya ordenados"""
+
+    def __init__(self, filas):
+        filas = sorted(filas, key=lambda fila: (fila['orden'], fila['codigo']))
+        self.tipos = {fila['codigo']: fila for fila in filas}
+        self.codigos = tuple(self.tipos)
+        self.por_defecto = next(
+            (fila['codigo'] for fila in filas if fila['por_defecto']), self.codigos[0] if self.codigos else None
+        )
+        self.por_seccion = frozenset(fila['codigo'] for fila in filas if fila['orden_por_seccion'])
+
+    def __contains__(self, codigo):
+        return codigo in self.tipos
+
+    def normalizar(self, tipo):
+        """El tipo si está en el catálogo; si no, el tipo por defecto"""
+        return tipo if tipo in self.tipos else self.por_defecto
+
+    def con_extras(self, tipos):
+        """Códigos del catálogo en orden y, al final, los de `tipos` que no están en él"""
+        return self.codigos + tuple(sorted(
+            tipo for tipo in set(tipos) if tipo is not None and tipo not in self.tipos
+        ))
+
+    def por_tipo(self, valores, vacio=0):
+        """
+        {tipo: valor} con todos los tipos del catálogo en orden (`vacio` si
+        no hay filas del tipo) y al final los tipos fuera del catálogo
+        """
+        return {codigo: valores.get(codigo, vacio) for codigo in self.con_extras(valores)}
+
+    def tarifas(self):
+        """{tipo: {'tarifa_hora'}} de los tipos con tarifa (tarifa por defecto)"""
+        return {
+            codigo: {'tarifa_hora': fila['tarifa_hora']}
+            for codigo, fila in self.tipos.items() if fila['tarifa_hora'] is not None
+        }
+
+    def to_list(self):
+        return list(self.tipos.values())
+
+
+class _CacheCatalogo:
+    """Catálogo del worker: se vuelve a leer (una consulta) cada `ttl` segundos"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._catalogo = None
+        self._leido_en = None
+
+    def invalidar(self):
+        with self._lock:
+            self._leido_en = None
+
+    def obtener(self):
+        ahora = time.monotonic()
+        if self._catalogo is not None and self._leido_en is not None and ahora - self._leido_en < self.ttl:
+            return self._catalogo
+
+        with self._lock:
+            filas = db.session.execute(
+                select(TipoEspacio).where(TipoEspacio.activo.is_(True))
+            ).scalars().all()
+            # Catálogo vacío (sin sembrar): los tipos de siempre
+            self._catalogo = CatalogoTipos(
+                [tipo.to_dict() for tipo in filas] or [dict(tipo) for tipo in TIPOS_INICIALES]
+            )
+            self._leido_en = ahora
+            return self._catalogo
+
+
+def _cache():
+    cache = current_app.extensions.get('catalogo_tipos')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'catalogo_tipos', _CacheCatalogo(ttl=current_app.config.get('TIPOS_TTL', 60))
+        )
+    return cache
+
+
+def catalogo_tipos():
+    """Catálogo de tipos vigente del proceso"""
+    return _cache().obtener()
+
+
+def invalidar_catalogo():
+    _cache().invalidar()
@@ -0,0 +1,92 @@
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import func, insert, select
+from app.extensions import db
+from app.models.version_datos import CambioVersion, VersionDatos
+
+
+# GET condicionales: el ETag de una respuesta sale de la versión de las
+# familias de datos que lee (más la ruta y los parámetros). Los triggers
+# suben la versión con cada escritura, así que un polling sin cambios
+# responde 304 tras leer unas pocas filas, sin consultar ni serializar.
+#
+# La versión se lee ANTES de generar la respuesta: si algo cambia en
+# medio, el cuerpo es más nuevo que su ETag y el siguiente polling trae
+# un 200, nunca un 304 con datos viejos.
+#
+# Las respuestas no deben depender de la hora (duraciones, "hace 5 min"):
+# eso lo calcula el cliente desde las fechas.
+
+
+def leer_versiones(familias, conexion=None):
+    """
+    {familia: version} de las familias pedidas: la versión compactada más
+    los cambios pendientes, en una sola consulta (una sola foto de la BD)
+    """
+    pendientes = (
+        select(func.count()).select_from(CambioVersion)
+        .where(CambioVersion.familia == VersionDatos.familia)
+        .scalar_subquery()
+    )
+    return dict((conexion or db.session).execute(
+        select(VersionDatos.familia, VersionDatos.version + pendientes).where(VersionDatos.familia.in_(familias))
+    ).all())
+
+
+def subir_version(*familias, conexion=None):
+    """
+    Sube la versión en la transacción actual (cambios que no pasan por los
+    triggers) sin bloquear la fila de la familia
+    """
+    (conexion or db.session).execute(insert(CambioVersion), [{'familia': familia} for familia in familias])
+
+
+def calcular_etag(familias, extra=None):
+    """
+    ETag fuerte de la request actual con las versiones de `familias`; None
+    si falta alguna familia (sin versión no se puede validar).
+    """
+    versiones = leer_versiones(familias)
+    if len(versiones) < len(set(familias)):
+        return None
+
+    clave = '|'.join([
+        request.path,
+        request.query_string.decode('latin-1'),
+        *(f"{familia}={versiones[familia]}" for familia in sorted(set(familias))),
+        str(extra) if extra is not None else ''
+    ])
+    return hashlib.sha1(clave.encode()).hexdigest()[:20]
+
+
+def condicional(*familias, extra=None):
+    """
+    Decorador de GET: responde 304 si If-None-Match coincide con el ETag
+    de las versiones de `familias`; si no, agrega el ETag a la respuesta
+    200. `extra` (callable) entra en el ETag para lo que cambia sin
+    escrituras, p. ej. la fecha de "hoy".
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                etag = calcular_etag(familias, extra() if extra else None)
+            except Exception as e:
+                print(f"❌ Error al leer versiones de datos: {e}")
+                etag = None
+
+            if etag and request.if_none_match.contains(etag):
+                respuesta = make_response('', 304)
+                respuesta.set_etag(etag)
+                respuesta.headers['Cache-Control'] = 'private, no-cache'
+                return respuesta
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if etag and respuesta.status_code == 200:
+                respuesta.set_etag(etag)
+                respuesta.headers['Cache-Control'] = 'private, no-cache'
+            return respuesta
+        return envoltura
+    return decorador
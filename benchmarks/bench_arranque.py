@@ -0,0 +1,115 @@
+"""
+Benchmark de arranque de un worker: tiempo de importar la app y de
+create_app(), cada medición en un proceso nuevo (como un worker de gunicorn
+sin --preload). Compara con el arranque anterior, que además corría
+db.create_all() y buscaba (o creaba, con su hash) el usuario admin.
+
+Con --preload (Procfile) el maestro construye la app una vez y cada worker
+es un fork: se mide el tiempo desde el fork hasta que el hijo tiene la app
+lista. Es seguro porque create_app() no abre conexiones que los workers
+heredarían.
+
+Uso:
+    python benchmarks/bench_arranque.py [procesos] [DATABASE_URL]
+
+Sin DATABASE_URL usa un SQLite temporal ya inicializado. Reporta p50/max en
+milisegundos.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Se ejecuta en cada proceso hijo; imprime los tiempos en JSON
+MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+import config
+config.SQLALCHEMY_DATABASE_URI = sys.argv[1]
+from app import create_app
+importado = time.perf_counter()
+app = create_app()
+construido = time.perf_counter()
+if sys.argv[2] == 'anterior':
+    from werkzeug.security import generate_password_hash
+    from app.extensions import db
+    from app.models.usuario import Usuario
+    with app.app_context():
+        db.create_all()
+        if not Usuario.query.filter_by(nombre_usuario='admin').first():
+            generate_password_hash('admin')
+listo = time.perf_counter()
+print(json.dumps({'importar': (importado - inicio) * 1000,
+                  'create_app': (listo - importado) * 1000,
+                  'total': (listo - inicio) * 1000}))
+"""
+
+
+def _medir(url, modo, procesos):
+    mediciones = []
+    for _ in range(procesos):
+        salida = subprocess.run(
+            [sys.executable, '-c', MEDICION, url, modo],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout
+        mediciones.append(json.loads(salida.strip().splitlines()[-1]))
+    return mediciones
+
+
+def _medir_preload(url, procesos):
+    """ms desde el fork hasta que el hijo responde, con la app construida en el padre"""
+    import config
+    config.SQLALCHEMY_DATABASE_URI = url
+    from app import create_app
+
+    app = create_app()
+    mediciones = []
+    for _ in range(procesos):
+        lectura, escritura = os.pipe()
+        inicio = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(lectura)
+            os.write(escritura, b'1' if app.url_map else b'0')
+            os._exit(0)
+        os.close(escritura)
+        os.read(lectura, 1)
+        mediciones.append((time.perf_counter() - inicio) * 1000)
+        os.close(lectura)
+        os.waitpid(pid, 0)
+    return mediciones
+
+
+def main():
+    procesos = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    if len(sys.argv) > 2:
+        url = sys.argv[2]
+    else:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'run', 'base', 'inicializar'],
+            cwd=RAIZ, env={**os.environ, 'DATABASE_URL': url}, check=True, capture_output=True
+        )
+
+    print(f"{procesos} procesos por modo sobre {url.split(':')[0]}")
+    for modo in ('anterior', 'actual'):
+        mediciones = _medir(url, modo, procesos)
+        for etapa in ('importar', 'create_app', 'total'):
+            valores = [m[etapa] for m in mediciones]
+            print(f"{modo:<9} {etapa:<11} p50={statistics.median(valores):8.3f} ms  "
+                  f"max={max(valores):8.3f} ms")
+
+    if hasattr(os, 'fork'):
+        valores = _medir_preload(url, procesos)
+        print(f"{'preload':<9} {'fork':<11} p50={statistics.median(valores):8.3f} ms  "
+              f"max={max(valores):8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
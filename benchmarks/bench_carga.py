@@ -0,0 +1,278 @@
+"""
+Prueba de carga: latencia de la garita (ingreso y salida por HTTP)
+mientras hay exportaciones y reportes largos en curso, contra un gunicorn
+real en modo hilos o gevent (gunicorn.conf.py).
+
+Uso:
+    python benchmarks/bench_carga.py hilos|gevent [lentas] [DATABASE_URL] [flujos]
+    python benchmarks/bench_carga.py http://host:puerto [lentas] [flujos]
+
+Con un modo: migra y pobla la BD (SQLite temporal si no hay
+DATABASE_URL; gevent solo tiene sentido con PostgreSQL) y levanta
+gunicorn con un worker de SERVIDOR_HILOS=4 hilos (o gevent), para que la
+saturación se vea con pocas requests lentas. Con una URL usa un servidor
+ya levantado (usuario admin, contraseña ADMIN_PASSWORD o 'admin').
+
+Reporta p50/p99 de ingreso y salida en milisegundos sin carga y con
+`lentas` clientes pidiendo exportaciones CSV y reportes sin caché más
+`flujos` pantallas con /api/eventos abierto (por defecto tantas como
+hilos: las que pasan de EVENTOS_MAX_FLUJOS reciben 503 y no ocupan hilo).
+
+Las cifras que importan son con PostgreSQL: en SQLite una lectura larga
+retiene el bloqueo del archivo y el commit de la garita la espera, sea
+cual sea el modo del servidor.
+"""
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import config  # noqa: E402
+
+CICLOS_GARITA = 100
+INTERVALO_GARITA = 0.05  # segundos
+TICKETS_HISTORIAL = 100000
+HILOS_SERVIDOR = 4
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class _Cliente:
+    """HTTP mínimo con la cookie de sesión (una conexión por request)"""
+
+    def __init__(self, base):
+        partes = urlsplit(base)
+        self.host, self.puerto = partes.hostname, partes.port or 80
+        self.cookies = {}
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=300)
+        encabezados = {'Cookie': '; '.join(f'{k}={v}' for k, v in self.cookies.items())}
+        if cuerpo is not None:
+            encabezados['Content-Type'] = 'application/json'
+            cuerpo = json.dumps(cuerpo)
+        try:
+            conexion.request(metodo, ruta, body=cuerpo, headers=encabezados)
+            respuesta = conexion.getresponse()
+            datos = respuesta.read()
+            for encabezado in respuesta.headers.get_all('Set-Cookie') or []:
+                for nombre, morsel in SimpleCookie(encabezado).items():
+                    self.cookies[nombre] = morsel.value
+            return respuesta.status, datos
+        finally:
+            conexion.close()
+
+
+def _poblar(url):
+    """Esquema por migraciones, admin, espacios y un historial de tickets finalizados"""
+    from sqlalchemy import insert, select
+    import flask_migrate
+    from app import create_app
+    from app.cli import crear_admin
+    from app.extensions import db
+    from app.models.espacio import Espacio
+    from app.models.ticket import Ticket
+    from app.models.vehiculo import Vehiculo
+
+    config.SQLALCHEMY_DATABASE_URI = url
+    app = create_app()
+    with app.app_context():
+        flask_migrate.upgrade(directory=os.path.join(RAIZ, 'migrations'))
+        crear_admin(os.environ.get('ADMIN_PASSWORD', 'admin'))
+
+        db.session.execute(insert(Espacio), [
+            {'numero': f'{s}-{i:03d}', 'tipo': 'regular', 'estado': 'disponible', 'piso': 1,
+             'seccion': s, 'activo': True}
+            for s in 'AB' for i in range(1, 201)
+        ])
+        db.session.execute(insert(Vehiculo), [{'placa': f'HIS{i:05d}'} for i in range(5000)])
+        espacio_ids = db.session.execute(select(Espacio.id)).scalars().all()
+        vehiculo_ids = db.session.execute(select(Vehiculo.id)).scalars().all()
+
+        inicio = datetime.now(timezone.utc) - timedelta(days=365)
+        lote = []
+        for i in range(TICKETS_HISTORIAL):
+            entrada = inicio + timedelta(minutes=5 * i)
+            lote.append({
+                'vehiculo_id': vehiculo_ids[i % len(vehiculo_ids)],
+                'espacio_id': espacio_ids[i % len(espacio_ids)],
+                'placa': f'HIS{i % len(vehiculo_ids):05d}',
+                'fecha_entrada': entrada,
+                'fecha_salida': entrada + timedelta(hours=2),
+                'estado': 'finalizado',
+                'monto': 100.0,
+                'metodo_pago': 'efectivo',
+                'tipo_vehiculo': 'regular'
+            })
+            if len(lote) == 10000:
+                db.session.execute(insert(Ticket), lote)
+                lote = []
+        if lote:
+            db.session.execute(insert(Ticket), lote)
+        db.session.commit()
+        db.engine.dispose()
+
+
+def _levantar(modo, url):
+    """gunicorn en un puerto libre; retorna (proceso, base)"""
+    with socket.socket() as libre:
+        libre.bind(('127.0.0.1', 0))
+        puerto = libre.getsockname()[1]
+
+    entorno = {**os.environ, 'DATABASE_URL': url, 'SERVIDOR_MODO': modo,
+               'WEB_CONCURRENCY': '1', 'SERVIDOR_HILOS': str(HILOS_SERVIDOR)}
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{puerto}', 'run:app'],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f'http://127.0.0.1:{puerto}'
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            if _Cliente(base).pedir('GET', '/auth/')[0] == 200:
+                return proceso, base
+        except OSError:
+            time.sleep(0.2)
+    proceso.terminate()
+    raise SystemExit('❌ gunicorn no respondió')
+
+
+def _sesion(base):
+    cliente = _Cliente(base)
+    estado, _ = cliente.pedir('POST', '/auth/login', {
+        'nombre_usuario': 'admin', 'password': os.environ.get('ADMIN_PASSWORD', 'admin')
+    })
+    if estado != 200:
+        raise SystemExit(f'❌ Login falló ({estado})')
+    return cliente
+
+
+def _medir_garita(base, nombre, prefijo):
+    cliente = _sesion(base)
+    tiempos_ingreso, tiempos_salida = [], []
+    for i in range(CICLOS_GARITA):
+        inicio = time.perf_counter()
+        estado, datos = cliente.pedir('POST', '/api/tickets/ingresar',
+                                      {'placa': f'{prefijo}{i:04d}', 'tipo_vehiculo': 'regular'})
+        tiempos_ingreso.append((time.perf_counter() - inicio) * 1000)
+        if estado != 201:
+            raise SystemExit(f'❌ Ingreso falló ({estado}): {datos[:200]}')
+
+        inicio = time.perf_counter()
+        cliente.pedir('POST', f"/api/tickets/{json.loads(datos)['ticket']['id']}/salida",
+                      {'metodo_pago': 'efectivo'})
+        tiempos_salida.append((time.perf_counter() - inicio) * 1000)
+        time.sleep(INTERVALO_GARITA)
+
+    for operacion, tiempos in (('ingreso', tiempos_ingreso), ('salida', tiempos_salida)):
+        print(f"{nombre:<14} {operacion:<8} p50={statistics.median(tiempos):8.3f} ms  "
+              f"p99={_percentil(tiempos, 99):8.3f} ms")
+
+
+def _lentas(base, cantidad, parar):
+    """Clientes que piden exportaciones y reportes sin caché hasta `parar`; retorna los hilos y el contador"""
+    completadas = [0]
+    lock = threading.Lock()
+
+    def cliente_lento(n):
+        cliente = _sesion(base)
+        i = 0
+        while not parar.is_set():
+            if (n + i) % 2 == 0:
+                cliente.pedir('GET', '/api/transacciones/exportar?formato=csv')
+            else:
+                # Parámetro distinto en cada pedido: siempre MISS en la caché de reportes
+                cliente.pedir('GET', f'/api/reportes/vehiculos-frecuentes?_={n}-{i}')
+            i += 1
+            with lock:
+                completadas[0] += 1
+
+    hilos = [threading.Thread(target=cliente_lento, args=(n,), daemon=True) for n in range(cantidad)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, completadas
+
+
+def _flujos(base, cantidad, parar):
+    """Pantallas con el flujo SSE abierto hasta `parar`; retorna los hilos y [abiertos, rechazados]"""
+    resultado = [0, 0]
+    lock = threading.Lock()
+
+    def pantalla():
+        cliente = _sesion(base)
+        conexion = http.client.HTTPConnection(cliente.host, cliente.puerto, timeout=300)
+        try:
+            conexion.request('GET', '/api/eventos', headers={
+                'Cookie': '; '.join(f'{k}={v}' for k, v in cliente.cookies.items())
+            })
+            respuesta = conexion.getresponse()
+            with lock:
+                resultado[0 if respuesta.status == 200 else 1] += 1
+            # Sin leer: el flujo queda abierto y el servidor mantiene su hilo
+            parar.wait()
+        finally:
+            conexion.close()
+
+    hilos = [threading.Thread(target=pantalla, daemon=True) for _ in range(cantidad)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, resultado
+
+
+def main():
+    destino = sys.argv[1] if len(sys.argv) > 1 else 'hilos'
+    lentas = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    flujos = HILOS_SERVIDOR
+
+    proceso = None
+    if destino.startswith('http'):
+        base = destino
+        flujos = int(sys.argv[3]) if len(sys.argv) > 3 else flujos
+        print(f"Servidor {base}")
+    else:
+        url = sys.argv[3] if len(sys.argv) > 3 else \
+            f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        flujos = int(sys.argv[4]) if len(sys.argv) > 4 else flujos
+        _poblar(url)
+        proceso, base = _levantar(destino, url)
+        print(f"gunicorn modo {destino}: 1 worker"
+              f"{f', {HILOS_SERVIDOR} hilos' if destino == 'hilos' else ''}; "
+              f"{TICKETS_HISTORIAL} tickets en {url.split(':')[0]}")
+
+    try:
+        _medir_garita(base, 'sin carga', 'SIN')
+
+        parar = threading.Event()
+        pantallas, resultado = _flujos(base, flujos, parar)
+        hilos, completadas = _lentas(base, lentas, parar)
+        time.sleep(1)  # las lentas y los flujos ya en curso
+        _medir_garita(base, f'{lentas} lentas', 'CON')
+        parar.set()
+        for hilo in hilos + pantallas:
+            hilo.join()
+        print(f"{'':<14} lentas completadas: {completadas[0]}; "
+              f"flujos SSE abiertos: {resultado[0]}, rechazados (503): {resultado[1]}")
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark de estadísticas: ruta anterior (cargar los tickets y sumar en
+Python) contra los agregados SQL de app/utils/estadisticas.py y el cubo de
+ingresos (app/utils/cubo.py), con distintos tamaños de historial y el mismo
+volumen del mes en curso.
+
+Uso:
+    python benchmarks/bench_estadisticas.py [historiales] [DATABASE_URL]
+
+historiales: tamaños separados por coma (por defecto 10000,100000). Sin
+DATABASE_URL usa un SQLite temporal. Reporta p50 en milisegundos.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+# Tickets de los últimos días del mes (constantes entre historiales)
+TICKETS_RECIENTES = 500
+REPETICIONES = 20
+
+
+def _ingresos_anterior(Ticket, inicios):
+    """Réplica de la ruta anterior: una carga completa por período"""
+    resultado = {}
+    for periodo, inicio in inicios.items():
+        tickets = Ticket.query.filter(
+            Ticket.estado == 'finalizado',
+            Ticket.fecha_salida >= inicio
+        ).all()
+        resultado[periodo] = (sum(t.monto for t in tickets if t.monto), len(tickets))
+    return resultado
+
+
+def _totales_anterior(Ticket):
+    """Réplica de la ruta anterior de /api/transacciones/estadisticas"""
+    tickets = Ticket.query.filter_by(estado='finalizado').all()
+    return (
+        len(tickets),
+        sum(t.monto for t in tickets if t.monto),
+        sum(1 for t in tickets if t.metodo_pago == 'efectivo'),
+        sum(1 for t in tickets if t.tipo_vehiculo == 'moto'),
+    )
+
+
+def _poblar(db, Ticket, Vehiculo, Espacio, historial, ahora):
+    from sqlalchemy import insert, select
+
+    db.drop_all()
+    db.create_all()
+
+    db.session.execute(insert(Espacio), [
+        {'numero': f'A-{i:03d}', 'tipo': 'regular', 'estado': 'disponible', 'piso': 1,
+         'seccion': 'A', 'activo': True}
+        for i in range(1, 101)
+    ])
+    db.session.execute(insert(Vehiculo), [{'placa': f'BEN{i:05d}'} for i in range(1000)])
+    espacio_ids = db.session.execute(select(Espacio.id)).scalars().all()
+    vehiculo_ids = db.session.execute(select(Vehiculo.id)).scalars().all()
+
+    # Historial: antes del mes en curso; recientes: desde el inicio del mes
+    mes_inicio = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    salidas = [mes_inicio - timedelta(minutes=10 * (i + 1)) for i in range(historial)]
+    salidas += [ahora - timedelta(minutes=i) for i in range(TICKETS_RECIENTES)]
+
+    lote = []
+    for i, salida in enumerate(salidas):
+        lote.append({
+            'vehiculo_id': vehiculo_ids[i % len(vehiculo_ids)],
+            'espacio_id': espacio_ids[i % len(espacio_ids)],
+            'placa': f'BEN{i % len(vehiculo_ids):05d}',
+            'fecha_entrada': salida - timedelta(hours=2),
+            'fecha_salida': salida,
+            'estado': 'finalizado',
+            'monto': 100.0,
+            'metodo_pago': 'efectivo' if i % 3 else 'tarjeta',
+            'tipo_vehiculo': 'moto' if i % 5 == 0 else 'regular'
+        })
+        if len(lote) == 10000:
+            db.session.execute(insert(Ticket), lote)
+            lote = []
+    if lote:
+        db.session.execute(insert(Ticket), lote)
+    db.session.commit()
+
+
+def _medir(db, funcion):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        db.session.remove()
+    return statistics.median(tiempos)
+
+
+def main():
+    historiales = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else '10000,100000').split(',')]
+    directorio = tempfile.mkdtemp()
+    config.SQLALCHEMY_DATABASE_URI = (
+        sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    )
+
+    from app import create_app
+    from app.extensions import db
+    from app.models.espacio import Espacio
+    from app.models.ticket import Ticket
+    from app.models.vehiculo import Vehiculo
+    from app.utils import cubo
+    from app.utils.estadisticas import inicios_periodo, ingresos_por_periodo, totales_finalizados
+
+    app = create_app()
+    ahora = datetime.now(timezone.utc)
+
+    with app.app_context():
+        print(f"{TICKETS_RECIENTES} tickets del mes en curso sobre {db.engine.url.drivername}; p50 de {REPETICIONES}")
+        for historial in historiales:
+            _poblar(db, Ticket, Vehiculo, Espacio, historial, ahora)
+            cubo.reconstruir()
+            db.session.commit()
+            inicios = inicios_periodo(ahora)
+
+            mediciones = (
+                ('ingresos-periodo', 'anterior', lambda: _ingresos_anterior(Ticket, inicios)),
+                ('ingresos-periodo', 'agregado', lambda: ingresos_por_periodo(ahora)),
+                ('ingresos-periodo', 'cubo', cubo.ingresos_por_periodo),
+                ('totales', 'anterior', lambda: _totales_anterior(Ticket)),
+                ('totales', 'agregado', totales_finalizados),
+                ('totales', 'cubo', lambda: cubo.desglose('metodo_pago')),
+            )
+            for consulta, ruta, funcion in mediciones:
+                print(f"historial={historial:<8} {consulta:<17} {ruta:<9} p50={_medir(db, funcion):9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
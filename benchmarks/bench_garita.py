@@ -0,0 +1,140 @@
+"""
+Benchmark de garita: latencia de ingreso y salida, ruta anterior (ORM, varios
+commits y cargas perezosas) contra la ruta rápida (app/utils/garita.py).
+
+Uso:
+    python benchmarks/bench_garita.py [ciclos] [DATABASE_URL]
+
+Sin DATABASE_URL usa un SQLite temporal. Reporta p50/p99 en milisegundos y
+sentencias SQL por operación.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def _ingreso_anterior(db, Vehiculo, Ticket, Espacio, placa):
+    """Réplica del ingreso anterior: commit del vehículo, pre-chequeo y scan ordenado"""
+    vehiculo = Vehiculo.query.filter_by(placa=placa).first()
+    if not vehiculo:
+        vehiculo = Vehiculo(placa=placa)
+        db.session.add(vehiculo)
+        db.session.commit()
+
+    Ticket.query.filter_by(vehiculo_id=vehiculo.id, estado='activo').first()
+    espacio = Espacio.query.filter_by(
+        tipo='regular', estado='disponible', activo=True
+    ).order_by(Espacio.seccion, Espacio.numero).first()
+
+    ticket = Ticket(vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa=placa,
+                    tipo_vehiculo='regular', estado='activo')
+    espacio.estado = 'ocupado'
+    db.session.add(ticket)
+    db.session.commit()
+    ticket.to_dict()
+    return ticket.id
+
+
+def _salida_anterior(db, Ticket, calcular_monto, ticket_id):
+    """Réplica de la salida anterior: carga del ticket, espacio perezoso y to_dict()"""
+    ticket = Ticket.query.filter_by(id=ticket_id).first()
+    fecha_salida = datetime.now(timezone.utc)
+    fecha_entrada = ticket.fecha_entrada.replace(tzinfo=timezone.utc)
+    ticket.fecha_salida = fecha_salida
+    ticket.estado = 'finalizado'
+    ticket.monto = calcular_monto(fecha_entrada, fecha_salida, 'regular')
+    ticket.metodo_pago = 'efectivo'
+    ticket.espacio.estado = 'disponible'
+    db.session.commit()
+    ticket.to_dict()
+
+
+def main():
+    ciclos = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directorio = tempfile.mkdtemp()
+    config.SQLALCHEMY_DATABASE_URI = (
+        sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    )
+
+    from sqlalchemy import event
+    from app import create_app
+    from app.extensions import db
+    from app.models.espacio import Espacio
+    from app.models.ticket import Ticket
+    from app.models.vehiculo import Vehiculo
+    from app.utils.tarifas import calcular_monto
+    from app.utils.garita import ingreso_rapido, salida_rapida
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Espacio(numero=f'{s}-{i:03d}', tipo='regular', seccion=s, piso=1)
+            for s in 'AB' for i in range(1, 201)
+        ])
+        db.session.commit()
+
+        sentencias = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def contar(*args):
+            sentencias[0] += 1
+
+        def medir(nombre, ingreso, salida):
+            tiempos_ingreso, tiempos_salida = [], []
+            sentencias_ingreso = sentencias_salida = 0
+
+            for i in range(ciclos):
+                placa = f'{nombre[:3].upper()}{i:05d}'
+
+                sentencias[0] = 0
+                inicio = time.perf_counter()
+                ticket_id = ingreso(placa)
+                tiempos_ingreso.append((time.perf_counter() - inicio) * 1000)
+                sentencias_ingreso += sentencias[0]
+
+                sentencias[0] = 0
+                inicio = time.perf_counter()
+                salida(ticket_id)
+                tiempos_salida.append((time.perf_counter() - inicio) * 1000)
+                sentencias_salida += sentencias[0]
+
+                db.session.remove()
+
+            for operacion, tiempos, total in (('ingreso', tiempos_ingreso, sentencias_ingreso),
+                                              ('salida', tiempos_salida, sentencias_salida)):
+                print(f"{nombre:<10} {operacion:<8} p50={statistics.median(tiempos):7.3f} ms  "
+                      f"p99={_percentil(tiempos, 99):7.3f} ms  sentencias/op={total / ciclos:.1f}")
+
+        def ingreso_nuevo(placa):
+            ticket, _ = ingreso_rapido(placa, 'regular')
+            db.session.commit()
+            return ticket['id']
+
+        def salida_nueva(ticket_id):
+            salida_rapida(ticket_id, 'efectivo')
+            db.session.commit()
+
+        print(f"{ciclos} ciclos de ingreso + salida sobre {db.engine.url.drivername}")
+        medir('anterior',
+              lambda placa: _ingreso_anterior(db, Vehiculo, Ticket, Espacio, placa),
+              lambda ticket_id: _salida_anterior(db, Ticket, calcular_monto, ticket_id))
+        medir('rapida', ingreso_nuevo, salida_nueva)
+
+
+if __name__ == '__main__':
+    main()
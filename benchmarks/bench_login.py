@@ -0,0 +1,126 @@
+"""
+Benchmark de login: latencia de la garita (ingreso y salida) durante una
+tormenta de logins (cambio de turno), con el hash de contraseñas sin
+límite (como el hash inline: cada login ocupa un hilo de request mientras
+calcula) contra el pool acotado de app/utils/contrasenas.py.
+
+Simula un worker gthread: HILOS_REQUEST hilos atienden tanto la garita
+(un ingreso + salida cada INTERVALO_GARITA segundos) como los logins, que
+llegan todos juntos.
+
+Uso:
+    python benchmarks/bench_login.py [logins] [DATABASE_URL]
+
+Sin DATABASE_URL usa un SQLite temporal. Reporta p50/p99 de la garita en
+milisegundos y cuántos logins entraron o recibieron 503.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+# Igual que el Procfile (gunicorn --threads 16)
+HILOS_REQUEST = 16
+CICLOS_GARITA = 100
+INTERVALO_GARITA = 0.05  # segundos
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    directorio = tempfile.mkdtemp()
+    config.SQLALCHEMY_DATABASE_URI = (
+        sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    )
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from app.extensions import db
+    from app.models.espacio import Espacio
+    from app.models.usuario import Usuario
+    from app.utils.contrasenas import _EjecutorHash
+
+    app = create_app()
+    metodo = app.config['PASSWORD_HASH_METODO']
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Espacio(numero=f'{s}-{i:03d}', tipo='regular', seccion=s, piso=1)
+            for s in 'AB' for i in range(1, 201)
+        ])
+        db.session.add_all([
+            Usuario(nombre_usuario=f'operador{i:02d}', contraseña=generate_password_hash('clave123', metodo),
+                    rol='usuario')
+            for i in range(logins)
+        ])
+        db.session.commit()
+
+    cliente = app.test_client()
+    cliente.post('/auth/login', json={'nombre_usuario': 'operador00', 'password': 'clave123'})
+    token = cliente.get_cookie('access_token_cookie').value
+
+    def garita(placa, encolado):
+        """(ms de ingreso, ms de salida), contando la espera por un hilo libre"""
+        cliente = app.test_client()
+        cliente.set_cookie('access_token_cookie', token)
+        response = cliente.post('/api/tickets/ingresar', json={'placa': placa, 'tipo_vehiculo': 'regular'})
+        ingreso = (time.perf_counter() - encolado) * 1000
+        inicio = time.perf_counter()
+        cliente.post(f"/api/tickets/{response.get_json()['ticket']['id']}/salida",
+                     json={'metodo_pago': 'efectivo'})
+        return ingreso, (time.perf_counter() - inicio) * 1000
+
+    def login(i):
+        return app.test_client().post('/auth/login', json={
+            'nombre_usuario': f'operador{i:02d}', 'password': 'clave123'
+        }).status_code
+
+    def medir(nombre, ejecutor, con_tormenta):
+        app.extensions['ejecutor_hash'] = ejecutor
+        with ThreadPoolExecutor(max_workers=HILOS_REQUEST) as hilos:
+            tormenta = []
+            if con_tormenta:
+                # La tormenta arranca con la garita ya en marcha
+                threading.Timer(INTERVALO_GARITA * 5, lambda: tormenta.extend(
+                    hilos.submit(login, i) for i in range(logins)
+                )).start()
+
+            ciclos = []
+            for i in range(CICLOS_GARITA):
+                ciclos.append(hilos.submit(garita, f'{nombre[:3].upper()}{i:04d}', time.perf_counter()))
+                time.sleep(INTERVALO_GARITA)
+
+            tiempos = [ciclo.result() for ciclo in ciclos]
+            codigos = [login.result() for login in tormenta]
+
+        for operacion, valores in (('ingreso', [t[0] for t in tiempos]), ('salida', [t[1] for t in tiempos])):
+            print(f"{nombre:<12} {operacion:<8} p50={statistics.median(valores):8.3f} ms  "
+                  f"p99={_percentil(valores, 99):8.3f} ms")
+        if con_tormenta:
+            print(f"{'':<12} logins   ok={codigos.count(200)}  503={codigos.count(503)}")
+
+    hilos_hash = app.config['HASH_HILOS']
+    cola_hash = app.config['HASH_COLA_MAXIMA']
+    print(f"Garita: {CICLOS_GARITA} ciclos cada {INTERVALO_GARITA * 1000:.0f} ms, {HILOS_REQUEST} hilos; "
+          f"{logins} logins con {metodo} sobre {config.SQLALCHEMY_DATABASE_URI.split(':')[0]}")
+    garita('CALENT', time.perf_counter())  # índice de espacios y tarifas ya cargados
+    medir('sin logins', _EjecutorHash(hilos=hilos_hash, cola=cola_hash), False)
+    medir('sin limite', _EjecutorHash(hilos=logins, cola=0), True)
+    medir('pool', _EjecutorHash(hilos=hilos_hash, cola=cola_hash), True)
+
+
+if __name__ == '__main__':
+    main()
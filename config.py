@@ -13,6 +13,52 @@ if not SQLALCHEMY_DATABASE_URI:
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Réplica de solo lectura (opcional): los reportes, las estadísticas y el
+# dashboard leen de aquí. Para probar en local basta otro SQLite u otra BD
+# de PostgreSQL con el mismo esquema.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+    DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+# Perfiles de motor: pool, pre-ping, reciclado de conexiones y statement
+# timeout (solo PostgreSQL; en SQLite solo aplican pre-ping y reciclado).
+# DB_PERFIL elige el de la BD principal y DB_PERFIL_REPLICA el de la
+# réplica; cada valor se puede cambiar con DB_<PERFIL>_<CLAVE>, p. ej.
+# DB_WEB_POOL_SIZE=20 o DB_REPORTES_STATEMENT_TIMEOUT_MS=120000.
+def _con_entorno(nombre, perfil):
+    """El perfil con los valores de DB_<PERFIL>_<CLAVE> definidos en el entorno"""
+    resultado = dict(perfil)
+    for clave, valor in perfil.items():
+        texto = os.environ.get(f"DB_{nombre.upper()}_{clave.upper()}")
+        if texto is not None:
+            resultado[clave] = texto.lower() in ('1', 'true', 'si', 'yes') if isinstance(valor, bool) \
+                else type(valor)(texto)
+    return resultado
+
+
+PERFILES_MOTOR = {
+    # Workers web: pool_size + max_overflow = hilos de gunicorn (Procfile)
+    'web': {'pool_size': 10, 'max_overflow': 6, 'pool_timeout': 10, 'pool_recycle': 1800,
+            'pre_ping': True, 'statement_timeout_ms': 15000, 'solo_lectura': False},
+    # Réplica de reportes: pocas conexiones, consultas largas, sin escrituras
+    'reportes': {'pool_size': 4, 'max_overflow': 4, 'pool_timeout': 10, 'pool_recycle': 1800,
+                 'pre_ping': True, 'statement_timeout_ms': 60000, 'solo_lectura': True},
+    # Consola (migraciones, reconstruir el cubo): una conexión, sin timeout
+    'consola': {'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 30, 'pool_recycle': 1800,
+                'pre_ping': True, 'statement_timeout_ms': 0, 'solo_lectura': False},
+}
+
+PERFILES_MOTOR = {nombre: _con_entorno(nombre, perfil) for nombre, perfil in PERFILES_MOTOR.items()}
+
+DB_PERFIL = os.environ.get('DB_PERFIL', 'web')
+DB_PERFIL_REPLICA = os.environ.get('DB_PERFIL_REPLICA', 'reportes')
+
+# Lecturas en la principal durante estos segundos después de que un cliente
+# escribe (lee lo que acaba de escribir aunque la réplica vaya atrasada)
+REPLICA_RETRASO_MAXIMO = float(os.environ.get('REPLICA_RETRASO_MAXIMO', 5))
+# Si la réplica no responde, las lecturas van a la principal este tiempo
+REPLICA_REINTENTO_SEGUNDOS = int(os.environ.get('REPLICA_REINTENTO_SEGUNDOS', 30))
+
 # Seguridad
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-CAMBIAR-EN-PRODUCCION')
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', SECRET_KEY)
@@ -23,7 +69,46 @@ JWT_COOKIE_SECURE = True  # Cambiar a True cuando tengas HTTPS
 JWT_COOKIE_CSRF_PROTECT = False
 JWT_ACCESS_TOKEN_EXPIRES = 3600
 
+# Revocación de tokens: cada cuánto relee un worker la versión de token de un usuario
+TOKEN_VERSION_TTL = int(os.environ.get('TOKEN_VERSION_TTL', 30))  # segundos
+
+# Contraseñas: algoritmo y costo del hash (formato de werkzeug; al cambiarlo,
+# cada usuario se re-hashea al iniciar sesión) y pool de hash por proceso
+PASSWORD_HASH_METODO = os.environ.get('PASSWORD_HASH_METODO', 'scrypt:32768:8:1')
+HASH_HILOS = int(os.environ.get('HASH_HILOS', 2))  # hashes simultáneos por worker
+HASH_COLA_MAXIMA = int(os.environ.get('HASH_COLA_MAXIMA', 8))  # logins en espera; el resto recibe 503
+HASH_ESPERA_SEGUNDOS = float(os.environ.get('HASH_ESPERA_SEGUNDOS', 10))
+
+# Asignación de espacios (índice en memoria por worker)
+# Estrategias: cercania, llenar_piso, balancear_pisos
+ESTRATEGIA_ASIGNACION = os.environ.get('ESTRATEGIA_ASIGNACION', 'cercania')
+INDICE_ESPACIOS_TTL = int(os.environ.get('INDICE_ESPACIOS_TTL', 60))  # segundos
+
+# Catálogo de tipos de espacio: cada cuánto lo vuelve a leer un worker
+TIPOS_TTL = int(os.environ.get('TIPOS_TTL', 60))  # segundos
+
+# Tarifas: cada cuánto revisa un worker si se publicó una nueva versión
+TARIFA_TTL = int(os.environ.get('TARIFA_TTL', 60))  # segundos
 
+# Reportes: hora local del cubo de ingresos (RD: UTC-4, sin horario de verano)
+REPORTES_UTC_OFFSET_MINUTOS = int(os.environ.get('REPORTES_UTC_OFFSET_MINUTOS', -240))
 
+# Eventos en vivo (SSE): revisión de la BD por proceso y vida máxima de cada conexión
+EVENTOS_INTERVALO_SEGUNDOS = float(os.environ.get('EVENTOS_INTERVALO_SEGUNDOS', 2))
+EVENTOS_DURACION_MAXIMA = int(os.environ.get('EVENTOS_DURACION_MAXIMA', 300))  # segundos
 
+# Flujos SSE abiertos a la vez por worker; pasado el tope el cliente recibe
+# 503 y consulta por polling. En modo hilos (gunicorn.conf.py) cada flujo
+# ocupa un hilo toda su vida: un cuarto de SERVIDOR_HILOS deja el resto
+# para la garita. En gevent un flujo es un greenlet: la mitad de las conexiones.
+if os.environ.get('SERVIDOR_MODO', 'hilos') == 'gevent':
+    _FLUJOS_POR_DEFECTO = int(os.environ.get('SERVIDOR_CONEXIONES', 200)) // 2
+else:
+    _FLUJOS_POR_DEFECTO = int(os.environ.get('SERVIDOR_HILOS', 16)) // 4
+EVENTOS_MAX_FLUJOS = int(os.environ.get('EVENTOS_MAX_FLUJOS', _FLUJOS_POR_DEFECTO))
 
+# Caché de reportes por proceso: techo de vida, ventana stale-while-revalidate y límites de la LRU
+REPORTES_CACHE_TTL = int(os.environ.get('REPORTES_CACHE_TTL', 300))  # segundos
+REPORTES_CACHE_STALE = int(os.environ.get('REPORTES_CACHE_STALE', 60))  # segundos (0 = sin stale)
+REPORTES_CACHE_MAX_ENTRADAS = int(os.environ.get('REPORTES_CACHE_MAX_ENTRADAS', 256))  # 0 = sin caché
+REPORTES_CACHE_MAX_BYTES = int(os.environ.get('REPORTES_CACHE_MAX_BYTES', 8 * 1024 * 1024))
@@ -0,0 +1,88 @@
+"""
+Configuración de gunicorn (Procfile: gunicorn -c gunicorn.conf.py run:app).
+
+Modos (SERVIDOR_MODO):
+
+- hilos (por defecto): workers gthread de SERVIDOR_HILOS hilos. Cada
+  request ocupa un hilo de principio a fin, así que un reporte o una
+  exportación lenta quita un hilo a la garita hasta terminar. Cada flujo
+  SSE (/api/eventos) retiene su hilo hasta EVENTOS_DURACION_MAXIMA: por
+  eso se limitan a EVENTOS_MAX_FLUJOS (un cuarto de los hilos por
+  defecto) y las pantallas que pasan del tope reciben 503 y consultan
+  por polling.
+- gevent: cada request es un greenlet; mientras uno espera a PostgreSQL
+  (psycopg2 cooperativo vía psycogreen) los demás siguen. Un worker
+  atiende hasta SERVIDOR_CONEXIONES requests a la vez y los reportes
+  largos y las conexiones SSE (/api/eventos) no se comen la capacidad
+  de la garita; los flujos SSE sí cuentan en SERVIDOR_CONEXIONES, de ahí
+  su tope en la mitad. Solo con PostgreSQL: sqlite3 bloquea el worker entero.
+
+Cuentas (por worker):
+
+  requests simultáneas     = SERVIDOR_HILOS (hilos) | SERVIDOR_CONEXIONES (gevent)
+  flujos SSE               <= EVENTOS_MAX_FLUJOS (SERVIDOR_HILOS // 4 | SERVIDOR_CONEXIONES // 2)
+  hilos para la garita     >= SERVIDOR_HILOS - EVENTOS_MAX_FLUJOS (hilos), menos las lentas en curso
+  conexiones a la principal <= pool_size + max_overflow del perfil DB_PERFIL
+  conexiones a la réplica   <= pool_size + max_overflow de DB_PERFIL_REPLICA
+  hashes de contraseña      = HASH_HILOS hilos del sistema (+ HASH_COLA_MAXIMA en espera)
+
+- En hilos, el pool de la principal se dimensiona igual a los hilos
+  (perfil web: 10 + 6 = 16): ninguna request espera una conexión. Un
+  flujo SSE devuelve su conexión al pool tras la foto inicial (la
+  revisión de eventos es un hilo por proceso), pero retiene su hilo: con
+  16 hilos quedan 12 para la garita, reportes y exportaciones. Más pantallas que eso en un
+  worker de hilos: subir SERVIDOR_HILOS o usar gevent.
+- En gevent hay más requests que conexiones a propósito: las que llegan
+  con el pool lleno esperan (cooperativamente) hasta pool_timeout. Los
+  reportes y el dashboard usan el pool de la réplica (@lectura_replica),
+  así que no compiten por las conexiones de la garita.
+- Total en PostgreSQL: WEB_CONCURRENCY × (principal + réplica) + 1 de la
+  fase de release (perfil consola) debe quedar por debajo de
+  max_connections menos las reservadas. Ej.: 3 workers × (16 + 8) + 1 = 73
+  conexiones con max_connections = 100.
+- WEB_CONCURRENCY: ~1 worker por CPU en gevent (un solo hilo de CPU por
+  worker); en hilos, 2-4 por CPU si las requests pasan la mayor parte del
+  tiempo esperando a la BD.
+
+Medición (benchmarks/bench_carga.py, PostgreSQL 16 local, 1 worker,
+100 000 tickets de historial, 6 clientes lentos + 4 pantallas SSE):
+
+  modo             garita sin carga p50/p99   garita con carga p50/p99   SSE abiertos/503
+  hilos (4 hilos)  8 / 18 ms                  4053 / 8830 ms             1 / 3
+  gevent           8 / 21 ms                  103 / 290 ms               4 / 0
+
+En hilos la garita hace cola detrás de las exportaciones aunque el tope
+de SSE le deja 3 hilos; en gevent la latencia con carga es CPU del
+worker compartida, no espera por hilos.
+"""
+import os
+
+modo = os.environ.get('SERVIDOR_MODO', 'hilos')
+if modo not in ('hilos', 'gevent'):
+    raise ValueError(f"SERVIDOR_MODO inválido: {modo} (use hilos o gevent)")
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+if modo == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('SERVIDOR_CONEXIONES', 200))
+    # gevent parchea la librería estándar al iniciar cada worker: la app
+    # tiene que importarse después, en el worker
+    preload_app = False
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('SERVIDOR_HILOS', 16))
+    # create_app() no abre conexiones ni hilos: los workers son un fork
+    preload_app = True
+
+# Latido del worker, no límite por request (exportaciones en flujo largas)
+timeout = int(os.environ.get('SERVIDOR_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    if modo == 'gevent':
+        # psycopg2 cede el control al hub mientras espera a PostgreSQL
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
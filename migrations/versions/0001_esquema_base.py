@@ -0,0 +1,135 @@
+"""Esquema base: tablas existentes e índices únicos parciales de tickets activos
+
+Bases de datos creadas antes con db.create_all(): marcar esta revisión con
+`flask db stamp 0001_esquema_base` y luego `flask db upgrade`.
+
+Revision ID: 0001_esquema_base
+Revises:
+Create Date: 2026-10-17 23:00:57.351627
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_esquema_base'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('historial',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo_registro', sa.String(length=50), nullable=True),
+    sa.Column('datos', sa.JSON(), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('parqueos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('direccion', sa.String(length=200), nullable=True),
+    sa.Column('capacidad', sa.Integer(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reportes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo_reporte', sa.String(length=100), nullable=True),
+    sa.Column('fecha_generacion', sa.DateTime(), nullable=True),
+    sa.Column('contenido', sa.Text(), nullable=True),
+    sa.Column('descripcion', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('tarifas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('descripcion', sa.String(length=255), nullable=True),
+    sa.Column('definicion', sa.JSON(), nullable=False),
+    sa.Column('activa', sa.Boolean(), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('version')
+    )
+    op.create_table('usuarios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre_usuario', sa.String(length=80), nullable=False),
+    sa.Column('contraseña', sa.String(length=200), nullable=False),
+    sa.Column('rol', sa.String(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nombre_usuario')
+    )
+    op.create_table('vehiculos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('placa', sa.String(length=20), nullable=False),
+    sa.Column('marca', sa.String(length=50), nullable=True),
+    sa.Column('modelo', sa.String(length=50), nullable=True),
+    sa.Column('color', sa.String(length=30), nullable=True),
+    sa.Column('propietario', sa.String(length=100), nullable=True),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('fecha_registro', sa.DateTime(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('placa')
+    )
+    op.create_table('espacios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero', sa.String(length=10), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('piso', sa.Integer(), nullable=True),
+    sa.Column('seccion', sa.String(length=5), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('parqueo_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['parqueo_id'], ['parqueos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('numero')
+    )
+    op.create_table('tickets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehiculo_id', sa.Integer(), nullable=False),
+    sa.Column('espacio_id', sa.Integer(), nullable=False),
+    sa.Column('placa', sa.String(length=20), nullable=False),
+    sa.Column('fecha_entrada', sa.DateTime(), nullable=False),
+    sa.Column('fecha_salida', sa.DateTime(), nullable=True),
+    sa.Column('estado', sa.String(length=20), nullable=True),
+    sa.Column('monto', sa.Float(), nullable=True),
+    sa.Column('metodo_pago', sa.String(length=20), nullable=True),
+    sa.Column('tipo_vehiculo', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['espacio_id'], ['espacios.id'], ),
+    sa.ForeignKeyConstraint(['vehiculo_id'], ['vehiculos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.create_index('uq_tickets_espacio_activo', ['espacio_id'], unique=True, sqlite_where=sa.text("estado = 'activo'"), postgresql_where=sa.text("estado = 'activo'"))
+        batch_op.create_index('uq_tickets_vehiculo_activo', ['vehiculo_id'], unique=True, sqlite_where=sa.text("estado = 'activo'"), postgresql_where=sa.text("estado = 'activo'"))
+
+    op.create_table('transacciones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=True),
+    sa.Column('monto_total', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('metodo_pago', sa.String(length=50), nullable=True),
+    sa.Column('fecha_hora', sa.DateTime(), nullable=True),
+    sa.Column('estado', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['ticket_id'], ['tickets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('transacciones')
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('uq_tickets_vehiculo_activo', sqlite_where=sa.text("estado = 'activo'"), postgresql_where=sa.text("estado = 'activo'"))
+        batch_op.drop_index('uq_tickets_espacio_activo', sqlite_where=sa.text("estado = 'activo'"), postgresql_where=sa.text("estado = 'activo'"))
+
+    op.drop_table('tickets')
+    op.drop_table('espacios')
+    op.drop_table('vehiculos')
+    op.drop_table('usuarios')
+    op.drop_table('tarifas')
+    op.drop_table('reportes')
+    op.drop_table('parqueos')
+    op.drop_table('historial')
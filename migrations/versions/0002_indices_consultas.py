@@ -0,0 +1,68 @@
+"""Índices para las consultas frecuentes (parciales en PostgreSQL)
+
+En PostgreSQL se crean con CONCURRENTLY para no bloquear escrituras en
+tablas grandes (fuera de la transacción de la migración).
+
+Revision ID: 0002_indices_consultas
+Revises: 0001_esquema_base
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_indices_consultas'
+down_revision = '0001_esquema_base'
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ('ix_tickets_estado_fecha_salida', 'tickets', ['estado', 'fecha_salida']),
+    ('ix_tickets_vehiculo_estado', 'tickets', ['vehiculo_id', 'estado']),
+    ('ix_tickets_fecha_entrada', 'tickets', ['fecha_entrada']),
+    ('ix_espacios_asignacion', 'espacios', ['tipo', 'estado', 'activo', 'seccion', 'numero']),
+    ('ix_vehiculos_activo_fecha_registro', 'vehiculos', ['activo', 'fecha_registro']),
+]
+
+# Solo PostgreSQL: (nombre, tabla, columnas, condición)
+INDICES_PARCIALES = [
+    ('ix_tickets_activos_fecha_entrada', 'tickets', ['fecha_entrada'], "estado = 'activo'"),
+    ('ix_espacios_disponibles', 'espacios', ['tipo', 'seccion', 'numero'], "estado = 'disponible' AND activo"),
+]
+
+
+def _es_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if not _es_postgresql():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(nombre, tabla, columnas, unique=False)
+        return
+
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(nombre, tabla, columnas, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+        for nombre, tabla, columnas, condicion in INDICES_PARCIALES:
+            op.create_index(nombre, tabla, columnas, unique=False,
+                            postgresql_where=sa.text(condicion),
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    if not _es_postgresql():
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla)
+        return
+
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _, _ in reversed(INDICES_PARCIALES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,45 @@
+"""Cubo de ingresos (hechos pre-agregados para los reportes)
+
+La migración llena el cubo con el historial de tickets finalizados (en
+la hora local de REPORTES_UTC_OFFSET_MINUTOS). Si se cambia el
+corrimiento después, recalcular con:
+    flask cubo reconstruir
+
+Revision ID: 0003_cubo_ingresos
+Revises: 0002_indices_consultas
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import cubo
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_cubo_ingresos'
+down_revision = '0002_indices_consultas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cubo_ingresos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora', sa.Integer(), nullable=False),
+    sa.Column('tipo_vehiculo', sa.String(length=20), nullable=False),
+    sa.Column('metodo_pago', sa.String(length=20), nullable=False),
+    sa.Column('seccion', sa.String(length=5), nullable=False),
+    sa.Column('transacciones', sa.Integer(), nullable=False),
+    sa.Column('ingresos', sa.Float(), nullable=False),
+    sa.Column('segundos_estancia', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fecha', 'hora', 'tipo_vehiculo', 'metodo_pago', 'seccion', name='uq_cubo_ingresos_celda')
+    )
+    # Historial existente: los reportes no arrancan en cero tras el deploy
+    cubo.reconstruir(conexion=op.get_bind())
+
+
+def downgrade():
+    op.drop_table('cubo_ingresos')
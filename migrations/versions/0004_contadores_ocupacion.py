@@ -0,0 +1,41 @@
+"""Contadores de ocupación por sección, tipo y estado (con triggers)
+
+La migración instala los triggers sobre `espacios` y cuenta los espacios
+existentes; `flask ocupacion reconciliar` corrige desvíos posteriores.
+
+Revision ID: 0004_contadores_ocupacion
+Revises: 0003_cubo_ingresos
+Create Date: 2026-10-18 01:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.contador_ocupacion import ELIMINAR_TRIGGERS, SEMBRAR, instalar_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_contadores_ocupacion'
+down_revision = '0003_cubo_ingresos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contadores_ocupacion',
+    sa.Column('seccion', sa.String(length=5), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('seccion', 'tipo', 'estado')
+    )
+    conexion = op.get_bind()
+    instalar_triggers(conexion)
+    conexion.execute(sa.text(SEMBRAR))
+
+
+def downgrade():
+    conexion = op.get_bind()
+    for sentencia in ELIMINAR_TRIGGERS.get(conexion.dialect.name, ()):
+        conexion.execute(sa.text(sentencia))
+    op.drop_table('contadores_ocupacion')
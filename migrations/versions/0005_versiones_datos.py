@@ -0,0 +1,34 @@
+"""Versiones de datos por familia (ETag de los GET condicionales)
+
+Revision ID: 0005_versiones_datos
+Revises: 0004_contadores_ocupacion
+Create Date: 2026-10-18 03:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.version_datos import eliminar_triggers, instalar_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_versiones_datos'
+down_revision = '0004_contadores_ocupacion'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('versiones_datos',
+    sa.Column('familia', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('familia')
+    )
+    instalar_triggers(op.get_bind())
+
+
+def downgrade():
+    conexion = op.get_bind()
+    for sentencia in eliminar_triggers(conexion.dialect.name):
+        conexion.execute(sa.text(sentencia))
+    op.drop_table('versiones_datos')
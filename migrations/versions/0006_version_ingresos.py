@@ -0,0 +1,32 @@
+"""Familia de versión 'ingresos' (cubo_ingresos) para la caché de reportes
+
+Revision ID: 0006_version_ingresos
+Revises: 0005_versiones_datos
+Create Date: 2026-10-18 05:00:00.000000
+
+"""
+from alembic import op
+
+from app.models.version_datos import instalar_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_version_ingresos'
+down_revision = '0005_versiones_datos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reinstala todos los triggers (idempotente) y agrega la fila de 'ingresos'
+    instalar_triggers(op.get_bind())
+
+
+def downgrade():
+    conexion = op.get_bind()
+    if conexion.dialect.name == 'sqlite':
+        for operacion in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS tr_version_cubo_ingresos_{operacion}")
+    elif conexion.dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS tr_version_cubo_ingresos ON cubo_ingresos")
+    op.execute("DELETE FROM versiones_datos WHERE familia = 'ingresos'")
@@ -0,0 +1,36 @@
+"""Catálogo de tipos de espacio / vehículo
+
+Revision ID: 0007_tipos_espacio
+Revises: 0006_version_ingresos
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.tipo_espacio import sembrar_tipos
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_tipos_espacio'
+down_revision = '0006_version_ingresos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tipos_espacio',
+    sa.Column('codigo', sa.String(length=20), nullable=False),
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('orden', sa.Integer(), nullable=False),
+    sa.Column('por_defecto', sa.Boolean(), nullable=False),
+    sa.Column('orden_por_seccion', sa.Boolean(), nullable=False),
+    sa.Column('tarifa_hora', sa.Float(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('codigo')
+    )
+    sembrar_tipos(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('tipos_espacio')
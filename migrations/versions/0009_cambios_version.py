@@ -0,0 +1,51 @@
+"""Cambios de versión pendientes (sin fila caliente por familia en PostgreSQL)
+
+Revision ID: 0009_cambios_version
+Revises: 0008_token_version
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.version_datos import instalar_triggers
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_cambios_version'
+down_revision = '0008_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('versiones_datos_cambios',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('familia', sa.String(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_versiones_datos_cambios_familia', 'versiones_datos_cambios', ['familia'], unique=False)
+    # Reemplaza la función de PostgreSQL (los triggers no cambian)
+    instalar_triggers(op.get_bind())
+
+
+def downgrade():
+    conexion = op.get_bind()
+    # Suma lo pendiente antes de volver a la versión por UPDATE
+    op.execute("""
+        UPDATE versiones_datos SET version = version + (
+            SELECT count(*) FROM versiones_datos_cambios c WHERE c.familia = versiones_datos.familia
+        )
+    """)
+    if conexion.dialect.name == 'postgresql':
+        op.execute("""
+            CREATE OR REPLACE FUNCTION fn_version_datos() RETURNS trigger AS $$
+            BEGIN
+                UPDATE versiones_datos SET version = version + 1 WHERE familia = TG_ARGV[0];
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("DROP FUNCTION IF EXISTS fn_compactar_versiones(text)")
+    op.drop_index('ix_versiones_datos_cambios_familia', table_name='versiones_datos_cambios')
+    op.drop_table('versiones_datos_cambios')
@@ -3,5 +3,5 @@ from app import create_app
 app = create_app()
 
 if __name__ == '__main__':
-    # Solo para desarrollo local
+    # Solo para desarrollo local (la primera vez: flask --app run base inicializar)
     app.run(debug=False, host='0.0.0.0', port=5000)
@@ -1,4 +1,9 @@
+import os
+import uuid
+
 import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from werkzeug.security import generate_password_hash
 from app import create_app
 from app.extensions import db
@@ -6,6 +11,66 @@ from app.models.usuario import Usuario
 from app.models.espacio import Espacio
 
 
+def _sembrar():
+    """Usuario de prueba y 55 espacios (A/B regulares, C discapacitados, D motos)"""
+    # Crear usuario de prueba
+    try:
+        usuario = Usuario(
+            nombre_usuario='testuser',
+            contraseña=generate_password_hash('testpass'),
+            rol='admin'
+        )
+        db.session.add(usuario)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Error al crear usuario de prueba: {e}")
+    
+    # Crear espacios de prueba
+    espacios_iniciales = []
+    
+    # Espacios regulares (A y B)
+    for seccion in ['A', 'B']:
+        for i in range(1, 21):  # 20 por sección
+            espacio = Espacio(
+                numero=f'{seccion}-{i:02d}',
+                tipo='regular',
+                estado='disponible',
+                piso=1,
+                seccion=seccion
+            )
+            espacios_iniciales.append(espacio)
+    
+    # Espacios para discapacitados (C)
+    for i in range(1, 6):  # 5 espacios
+        espacio = Espacio(
+            numero=f'C-{i:02d}',
+            tipo='discapacitado',
+            estado='disponible',
+            piso=1,
+            seccion='C'
+        )
+        espacios_iniciales.append(espacio)
+    
+    # Espacios para motos (D)
+    for i in range(1, 11):  # 10 espacios
+        espacio = Espacio(
+            numero=f'D-{i:02d}',
+            tipo='moto',
+            estado='disponible',
+            piso=1,
+            seccion='D'
+        )
+        espacios_iniciales.append(espacio)
+    
+    try:
+        db.session.bulk_save_objects(espacios_iniciales)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️  Error al crear espacios: {e}")
+
+
 @pytest.fixture(scope='function')
 def app():
     """Crea una instancia de la aplicación para testing"""
@@ -22,62 +87,7 @@ def app():
         # Crear todas las tablas
         db.create_all()
         
-        # Crear usuario de prueba
-        try:
-            usuario = Usuario(
-                nombre_usuario='testuser',
-                contraseña=generate_password_hash('testpass'),
-                rol='admin'
-            )
-            db.session.add(usuario)
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            print(f"⚠️  Error al crear usuario de prueba: {e}")
-        
-        # Crear espacios de prueba
-        espacios_iniciales = []
-        
-        # Espacios regulares (A y B)
-        for seccion in ['A', 'B']:
-            for i in range(1, 21):  # 20 por sección
-                espacio = Espacio(
-                    numero=f'{seccion}-{i:02d}',
-                    tipo='regular',
-                    estado='disponible',
-                    piso=1,
-                    seccion=seccion
-                )
-                espacios_iniciales.append(espacio)
-        
-        # Espacios para discapacitados (C)
-        for i in range(1, 6):  # 5 espacios
-            espacio = Espacio(
-                numero=f'C-{i:02d}',
-                tipo='discapacitado',
-                estado='disponible',
-                piso=1,
-                seccion='C'
-            )
-            espacios_iniciales.append(espacio)
-        
-        # Espacios para motos (D)
-        for i in range(1, 11):  # 10 espacios
-            espacio = Espacio(
-                numero=f'D-{i:02d}',
-                tipo='moto',
-                estado='disponible',
-                piso=1,
-                seccion='D'
-            )
-            espacios_iniciales.append(espacio)
-        
-        try:
-            db.session.bulk_save_objects(espacios_iniciales)
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            print(f"⚠️  Error al crear espacios: {e}")
+        _sembrar()
         
         yield app
         
@@ -92,5 +102,40 @@ def client(app):
     return app.test_client()
 
 
+# PostgreSQL (opcional): las pruebas que lo usan se saltan sin
+# TEST_POSTGRESQL_URL, p. ej. postgresql://postgres@localhost/postgres
+POSTGRESQL_URL = os.environ.get('TEST_POSTGRESQL_URL')
+
+
+@pytest.fixture(scope='function')
+def app_postgresql(monkeypatch):
+    """App sobre una base PostgreSQL nueva con el esquema de las migraciones"""
+    if not POSTGRESQL_URL:
+        pytest.skip('Sin TEST_POSTGRESQL_URL')
+
+    import flask_migrate
+    import config
+
+    nombre = f"parqueo_test_{uuid.uuid4().hex[:12]}"
+    servidor = create_engine(POSTGRESQL_URL, isolation_level='AUTOCOMMIT')
+    with servidor.connect() as conexion:
+        conexion.execute(text(f'CREATE DATABASE "{nombre}"'))
+
+    monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI',
+                        make_url(POSTGRESQL_URL).set(database=nombre).render_as_string(hide_password=False))
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+
+    with app.app_context():
+        flask_migrate.upgrade(directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations'))
+        _sembrar()
+
+        yield app
+
+        db.session.remove()
+        db.engine.dispose()
 
-    
\ No newline at end of file
+    with servidor.connect() as conexion:
+        conexion.execute(text(f'DROP DATABASE IF EXISTS "{nombre}" WITH (FORCE)'))
+    servidor.dispose()
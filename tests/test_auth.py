@@ -1,4 +1,12 @@
+import threading
+
 import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models.usuario import Usuario
+from app.utils.contrasenas import _EjecutorHash, normalizar_metodo
 
 
 class TestAuth:
@@ -72,3 +80,195 @@ class TestAuth:
         assert response.status_code == 401
 
 
+
+
+def _login(client, nombre_usuario='testuser', password='testpass'):
+    return client.post('/auth/login', json={
+        'nombre_usuario': nombre_usuario,
+        'password': password
+    })
+
+
+def _crear_usuario(app, nombre_usuario, rol='usuario'):
+    with app.app_context():
+        usuario = Usuario(
+            nombre_usuario=nombre_usuario,
+            contraseña=generate_password_hash('clave123'),
+            rol=rol
+        )
+        db.session.add(usuario)
+        db.session.commit()
+        return usuario.id
+
+
+class TestClaimsYRevocacion:
+    """Identidad y rol en el token, versión de token para revocar"""
+
+    def test_token_con_claims(self, client, app):
+        """Prueba que el token lleva nombre, rol y versión"""
+        _login(client)
+        token = client.get_cookie('access_token_cookie').value
+
+        with app.app_context():
+            claims = decode_token(token)
+        assert (claims['usuario'], claims['rol'], claims['tv']) == ('testuser', 'admin', 1)
+
+    @pytest.mark.parametrize('metodo, url', [
+        ('get', '/dashboard'),
+        ('get', '/usuarios'),
+        ('get', '/api/espacios/estadisticas'),
+        ('get', '/api/reportes/cache'),
+        ('put', '/api/espacios/1'),
+    ])
+    def test_sin_consultas_de_usuario(self, client, app, metodo, url):
+        """Prueba que las rutas autorizadas no consultan la tabla de usuarios"""
+        _login(client)
+        with app.app_context():
+            engine = db.engine
+        sentencias = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = getattr(client, metodo)(url, json={'piso': 1})
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+
+        assert response.status_code == 200
+        assert not [s for s in sentencias if 'FROM usuarios' in s]
+
+    def test_rol_requerido(self, client, app):
+        """Prueba que el rol del token decide el acceso a rutas de admin"""
+        _crear_usuario(app, 'operador')
+        _login(client, 'operador', 'clave123')
+
+        response = client.post('/api/espacios', json={'numero': 'Z-01'})
+        assert response.status_code == 403
+        assert response.get_json()['error'] == 'No tienes permisos para crear espacios'
+        assert client.get('/usuarios').status_code == 403
+        assert client.get('/api/espacios/estadisticas').status_code == 200
+
+    def test_cambio_de_rol_revoca_el_token(self, client, app):
+        """Prueba que cambiar el rol invalida los tokens emitidos con el rol anterior"""
+        operador_id = _crear_usuario(app, 'operador')
+        operador = app.test_client()
+        _login(operador, 'operador', 'clave123')
+        assert operador.get('/api/usuarios').status_code == 403
+
+        _login(client)
+        response = client.put(f'/api/usuarios/{operador_id}/cambiar-rol', json={'rol': 'admin'})
+        assert response.status_code == 200
+
+        assert operador.get('/api/usuarios').status_code == 401
+        _login(operador, 'operador', 'clave123')
+        assert operador.get('/api/usuarios').status_code == 200
+
+    def test_usuario_eliminado_pierde_la_sesion(self, client, app):
+        """Prueba que el token de un usuario borrado deja de valer"""
+        operador_id = _crear_usuario(app, 'operador')
+        operador = app.test_client()
+        _login(operador, 'operador', 'clave123')
+        assert operador.get('/api/espacios/estadisticas').status_code == 200
+
+        _login(client)
+        assert client.delete(f'/api/usuarios/{operador_id}').status_code == 200
+        assert operador.get('/api/espacios/estadisticas').status_code == 401
+
+    def test_cambio_de_password_cierra_otras_sesiones(self, client, app):
+        """Prueba que cambiar la contraseña revoca las otras sesiones y renueva la propia"""
+        _login(client)
+        otra = app.test_client()
+        _login(otra)
+
+        with app.app_context():
+            usuario_id = Usuario.query.filter_by(nombre_usuario='testuser').first().id
+        response = client.put(f'/api/usuarios/{usuario_id}/cambiar-password', json={'nueva_password': 'nueva123'})
+        assert response.status_code == 200
+
+        assert client.get('/api/espacios/estadisticas').status_code == 200
+        assert otra.get('/api/espacios/estadisticas').status_code == 401
+
+    def test_cambio_en_otro_worker(self, client, app):
+        """Prueba que un cambio hecho fuera del proceso se ve al vencer el TTL"""
+        app.config['TOKEN_VERSION_TTL'] = 0
+        _login(client)
+        with app.app_context():
+            usuario = Usuario.query.filter_by(nombre_usuario='testuser').first()
+            usuario.token_version += 1
+            db.session.commit()
+
+        assert client.get('/api/espacios/estadisticas').status_code == 401
+
+    def test_token_sin_claims(self, client, app):
+        """Prueba que un token emitido antes de los claims pide iniciar sesión de nuevo"""
+        with app.app_context():
+            token = create_access_token(identity='1')
+        client.set_cookie('access_token_cookie', token)
+
+        assert client.get('/api/espacios/estadisticas').status_code == 401
+
+
+def _hash_de(app, nombre_usuario='testuser'):
+    with app.app_context():
+        return Usuario.query.filter_by(nombre_usuario=nombre_usuario).first().contraseña
+
+
+class TestHashContrasenas:
+    """Costo configurable, re-hash al iniciar sesión y pool de hash acotado"""
+
+    def test_metodos_normalizados(self):
+        """Prueba que los métodos abreviados se comparan con todos sus parámetros"""
+        assert normalizar_metodo('scrypt') == 'scrypt:32768:8:1'
+        assert normalizar_metodo('pbkdf2:sha256:600000') == 'pbkdf2:sha256:600000'
+        assert normalizar_metodo('pbkdf2').startswith('pbkdf2:sha256:')
+
+    def test_sin_rehash_con_el_mismo_metodo(self, client, app):
+        """Prueba que el login no toca un hash hecho con el método configurado"""
+        antes = _hash_de(app)
+        assert _login(client).status_code == 200
+        assert _hash_de(app) == antes
+
+    def test_rehash_al_cambiar_el_costo(self, client, app):
+        """Prueba que al cambiar el método el login guarda el hash nuevo"""
+        app.config['PASSWORD_HASH_METODO'] = 'pbkdf2:sha256:1000'
+
+        assert _login(client).status_code == 200
+        nuevo = _hash_de(app)
+        assert nuevo.startswith('pbkdf2:sha256:1000$')
+
+        # Con el hash ya migrado, el siguiente login lo deja igual
+        assert _login(app.test_client()).status_code == 200
+        assert _hash_de(app) == nuevo
+
+    def test_contraseña_incorrecta_no_rehashea(self, client, app):
+        """Prueba que un login fallido no cambia el hash"""
+        app.config['PASSWORD_HASH_METODO'] = 'pbkdf2:sha256:1000'
+        antes = _hash_de(app)
+
+        assert _login(client, password='otra').status_code == 401
+        assert _hash_de(app) == antes
+
+    def test_pool_lleno_responde_503(self, client, app):
+        """Prueba que con el pool y la cola llenos el login no espera: 503 con Retry-After"""
+        ejecutor = app.extensions['ejecutor_hash'] = _EjecutorHash(hilos=1, cola=0)
+        en_curso, liberar = threading.Event(), threading.Event()
+
+        def hash_lento():
+            en_curso.set()
+            liberar.wait()
+
+        ocupado = threading.Thread(target=ejecutor.ejecutar, args=(hash_lento,))
+        ocupado.start()
+        en_curso.wait()
+        try:
+            response = _login(client)
+            assert response.status_code == 503
+            assert response.headers['Retry-After']
+            assert client.get_cookie('access_token_cookie') is None
+        finally:
+            liberar.set()
+            ocupado.join()
+
+        assert _login(client).status_code == 200
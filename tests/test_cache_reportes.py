@@ -0,0 +1,160 @@
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app.models.espacio import Espacio
+from app.extensions import db
+from app.utils.cache_reportes import CacheReportes, obtener_cache
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _salida(client, placa):
+    response = client.post('/api/tickets/ingresar', json={'placa': placa, 'tipo_vehiculo': 'regular'})
+    ticket_id = response.get_json()['ticket']['id']
+    client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'efectivo'})
+
+
+class TestCacheReportes:
+    """LRU con TTL y límite de bytes"""
+
+    def test_lru_por_entradas_y_bytes(self):
+        """Prueba que se desaloja lo menos usado al pasar entradas o bytes"""
+        cache = CacheReportes(max_entradas=2, max_bytes=10)
+        cache.guardar('a', b'1234', 'application/json', {})
+        cache.guardar('b', b'1234', 'application/json', {})
+        cache.buscar('a')
+        cache.guardar('c', b'1234', 'application/json', {})
+        assert cache.buscar('b') is None
+        assert cache.buscar('a') is not None
+
+        cache.guardar('d', b'123456', 'application/json', {})
+        estado = cache.estado()
+        assert estado['entradas'] == 2
+        assert estado['bytes'] == 10
+        assert estado['desalojos'] == 2
+
+        # Un cuerpo que no cabe no se guarda ni desaloja nada
+        cache.guardar('e', b'x' * 11, 'application/json', {})
+        assert cache.buscar('d') is not None
+
+    def test_vigencia_por_versiones_y_ttl(self):
+        """Prueba que una entrada vale con las mismas versiones y dentro del TTL"""
+        cache = CacheReportes(ttl=10)
+        cache.guardar('a', b'{}', 'application/json', {'ingresos': 1}, ahora=100)
+        entrada = cache.buscar('a')
+        assert cache.vigente(entrada, {'ingresos': 1}, 105)
+        assert not cache.vigente(entrada, {'ingresos': 2}, 105)
+        assert not cache.vigente(entrada, {'ingresos': 1}, 111)
+
+
+class TestReportesCacheados:
+    """Reportes servidos desde la caché e invalidados por escrituras"""
+
+    @pytest.mark.parametrize('url', [
+        '/api/reportes/ingresos-periodo',
+        '/api/reportes/ocupacion-espacios',
+        '/api/reportes/vehiculos-frecuentes',
+        '/api/reportes/metodos-pago',
+        '/api/reportes/ingresos',
+        '/api/transacciones/estadisticas',
+    ])
+    def test_acierto_y_salida_invalida(self, client, app, url):
+        """Prueba MISS, HIT y que una salida recalcula el reporte"""
+        app.config['REPORTES_CACHE_STALE'] = 0
+        _login(client)
+        _salida(client, 'CAC100')
+
+        primera = client.get(url)
+        assert primera.status_code == 200
+        assert primera.headers['X-Cache'] == 'MISS'
+
+        segunda = client.get(url)
+        assert segunda.headers['X-Cache'] == 'HIT'
+        assert segunda.data == primera.data
+
+        # Un ingreso no cambia los reportes que solo leen ingresos
+        if url not in ('/api/reportes/ocupacion-espacios', '/api/reportes/vehiculos-frecuentes'):
+            client.post('/api/tickets/ingresar', json={'placa': 'CAC100', 'tipo_vehiculo': 'moto'})
+            assert client.get(url).headers['X-Cache'] == 'HIT'
+
+        _salida(client, 'CAC200')
+        tercera = client.get(url)
+        assert tercera.headers['X-Cache'] == 'MISS'
+        assert tercera.data != primera.data
+
+    def test_cambio_de_espacio_invalida_ocupacion(self, client, app):
+        """Prueba que un cambio de espacio invalida solo los reportes que los leen"""
+        app.config['REPORTES_CACHE_STALE'] = 0
+        _login(client)
+        client.get('/api/reportes/ocupacion-espacios')
+        client.get('/api/reportes/metodos-pago')
+
+        with app.app_context():
+            db.session.execute(update(Espacio).where(Espacio.numero == 'A-01').values(estado='mantenimiento'))
+            db.session.commit()
+
+        assert client.get('/api/reportes/ocupacion-espacios').headers['X-Cache'] == 'MISS'
+        assert client.get('/api/reportes/metodos-pago').headers['X-Cache'] == 'HIT'
+
+    def test_parametros_en_la_clave(self, client, app):
+        """Prueba que parámetros distintos son entradas distintas"""
+        _login(client)
+        assert client.get('/api/reportes/ingresos?granularidad=mes').headers['X-Cache'] == 'MISS'
+        assert client.get('/api/reportes/ingresos?granularidad=dia').headers['X-Cache'] == 'MISS'
+        assert client.get('/api/reportes/ingresos?granularidad=mes').headers['X-Cache'] == 'HIT'
+
+        # Los errores no se guardan
+        assert client.get('/api/reportes/ingresos?granularidad=anio').status_code == 400
+        assert client.get('/api/reportes/ingresos?granularidad=anio').headers.get('X-Cache') == 'MISS'
+
+    def test_stale_while_revalidate(self, client, app):
+        """Prueba que una entrada vieja se sirve mientras se recalcula en segundo plano"""
+        _login(client)
+        client.get('/api/reportes/metodos-pago')
+        _salida(client, 'CAC300')
+
+        vieja = client.get('/api/reportes/metodos-pago')
+        assert vieja.headers['X-Cache'] == 'STALE'
+        assert vieja.get_json().get('efectivo', {}).get('cantidad', 0) == 0
+
+        with app.app_context():
+            cache = obtener_cache()
+        cache.esperar_recargas(timeout=10)
+
+        nueva = client.get('/api/reportes/metodos-pago')
+        assert nueva.headers['X-Cache'] == 'HIT'
+        assert nueva.data != vieja.data
+        assert cache.estado()['recargas'] == 1
+
+    def test_stale_vence(self, client, app):
+        """Prueba que pasada la ventana stale se recalcula en línea"""
+        app.config['REPORTES_CACHE_STALE'] = 5
+        _login(client)
+        client.get('/api/reportes/metodos-pago')
+        _salida(client, 'CAC400')
+
+        with app.app_context():
+            cache = obtener_cache()
+        # Simula que la entrada quedó vieja hace rato
+        clave = next(iter(cache._entradas))
+        cache.marcar_vieja(clave, time.monotonic() - 60)
+
+        assert client.get('/api/reportes/metodos-pago').headers['X-Cache'] == 'MISS'
+
+    def test_estado_solo_admin(self, client, app):
+        """Prueba el endpoint de contadores"""
+        _login(client)
+        client.get('/api/reportes/metodos-pago')
+        client.get('/api/reportes/metodos-pago')
+
+        response = client.get('/api/reportes/cache')
+        assert response.status_code == 200
+        estado = response.get_json()
+        assert (estado['aciertos'], estado['fallos'], estado['entradas']) == (1, 1, 1)
+        assert estado['tasa_aciertos'] == 0.5
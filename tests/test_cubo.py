@@ -0,0 +1,244 @@
+import pytest
+from datetime import date, datetime, timezone, timedelta
+from sqlalchemy import event, insert
+from app.models.cubo_ingresos import CuboIngresos
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+from app.models.espacio import Espacio
+from app.extensions import db
+from app.utils import cubo
+
+
+def _celdas():
+    """Filas del cubo como {(fecha, hora, tipo, metodo, seccion): (cantidad, ingresos, segundos)}"""
+    return {
+        (c.fecha, c.hora, c.tipo_vehiculo, c.metodo_pago, c.seccion):
+            (c.transacciones, c.ingresos, c.segundos_estancia)
+        for c in CuboIngresos.query.all()
+    }
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _finalizados(app, salidas):
+    """Tickets finalizados por el ORM: [(fecha_salida UTC, tipo, metodo, monto, horas)]"""
+    with app.app_context():
+        vehiculo = Vehiculo(placa='CUB001')
+        db.session.add(vehiculo)
+        db.session.commit()
+
+        espacio = Espacio.query.filter_by(numero='A-01').first()
+        for salida, tipo, metodo, monto, horas in salidas:
+            db.session.add(Ticket(
+                vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa='CUB001',
+                tipo_vehiculo=tipo, estado='finalizado',
+                fecha_entrada=salida - timedelta(hours=horas), fecha_salida=salida,
+                monto=monto, metodo_pago=metodo
+            ))
+        db.session.commit()
+
+
+class TestCuboIngresos:
+    """Mantenimiento incremental del cubo de ingresos"""
+
+    def test_salida_suma_en_la_misma_transaccion(self, client, app):
+        """Prueba que registrar_salida suma la celda local (hora de RD) del ticket"""
+        _login(client)
+        response = client.post('/api/tickets/ingresar', json={'placa': 'CUB100', 'tipo_vehiculo': 'moto'})
+        ticket_id = response.get_json()['ticket']['id']
+
+        response = client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'tarjeta'})
+        assert response.status_code == 200
+        datos = response.get_json()
+
+        with app.app_context():
+            celdas = _celdas()
+            salida = datetime.fromisoformat(datos['ticket']['fecha_salida']) + timedelta(minutes=-240)
+
+        assert list(celdas) == [(salida.date(), salida.hour, 'moto', 'tarjeta', 'D')]
+        cantidad, ingresos, _ = celdas[(salida.date(), salida.hour, 'moto', 'tarjeta', 'D')]
+        assert cantidad == 1
+        assert ingresos == datos['ticket']['monto']
+
+    def test_rollback_descarta_el_cubo(self, app):
+        """Prueba que el cubo no cambia si la salida no se confirma"""
+        from app.utils.garita import ingreso_rapido, salida_rapida
+
+        with app.app_context():
+            ticket, _ = ingreso_rapido('CUB200', 'regular')
+            db.session.commit()
+
+            salida_rapida(ticket['id'], 'efectivo')
+            assert len(_celdas()) == 1
+            db.session.rollback()
+
+            assert _celdas() == {}
+
+    def test_cierre_masivo_agrupa_por_celda(self, client, app):
+        """Prueba que el cierre masivo suma cada ticket a su celda"""
+        _login(client)
+        for placa in ('CUB301', 'CUB302', 'CUB303'):
+            client.post('/api/tickets/ingresar', json={'placa': placa, 'tipo_vehiculo': 'regular'})
+
+        response = client.post('/api/tickets/cierre', json={'metodo_pago': 'efectivo'})
+        assert response.status_code == 200
+
+        with app.app_context():
+            celdas = _celdas()
+
+        assert sum(cantidad for cantidad, _, _ in celdas.values()) == 3
+        assert sum(ingresos for _, ingresos, _ in celdas.values()) == response.get_json()['monto_total']
+        assert {clave[2:4] for clave in celdas} == {('regular', 'efectivo')}
+
+    def test_orm_y_reconstruccion_coinciden(self, app):
+        """Prueba que reconstruir desde los tickets da el mismo cubo que el incremental"""
+        _finalizados(app, [
+            (datetime(2024, 3, 1, 3, 30, tzinfo=timezone.utc), 'regular', 'efectivo', 100.0, 2),
+            (datetime(2024, 3, 1, 3, 50, tzinfo=timezone.utc), 'regular', 'efectivo', 50.0, 1),
+            (datetime(2024, 3, 1, 15, 0, tzinfo=timezone.utc), 'moto', 'tarjeta', 25.0, 0.5),
+        ])
+
+        with app.app_context():
+            incremental = _celdas()
+            # 03:30 UTC del 1 de marzo es el 29 de febrero a las 23:30 en RD
+            assert incremental[(date(2024, 2, 29), 23, 'regular', 'efectivo', 'A')] == (2, 150.0, 3 * 3600)
+            assert incremental[(date(2024, 3, 1), 11, 'moto', 'tarjeta', 'A')] == (1, 25.0, 1800)
+
+            assert cubo.reconstruir() == 3
+            db.session.commit()
+            assert _celdas() == incremental
+
+    def test_reconstruir_rango_y_carga_masiva(self, app):
+        """Prueba que reconstruir un rango incluye tickets insertados sin el ORM"""
+        _finalizados(app, [
+            (datetime(2024, 3, 10, 16, 0, tzinfo=timezone.utc), 'regular', 'efectivo', 100.0, 1),
+        ])
+
+        with app.app_context():
+            espacio_id = Espacio.query.filter_by(numero='A-01').first().id
+            vehiculo_id = Vehiculo.query.filter_by(placa='CUB001').first().id
+            db.session.execute(insert(Ticket), [{
+                'vehiculo_id': vehiculo_id, 'espacio_id': espacio_id, 'placa': 'CUB001',
+                'tipo_vehiculo': 'regular', 'estado': 'finalizado', 'metodo_pago': 'efectivo',
+                'fecha_entrada': datetime(2024, 3, d, 13, 0), 'fecha_salida': datetime(2024, 3, d, 14, 0),
+                'monto': 50.0
+            } for d in (10, 11)])
+            db.session.commit()
+
+            # La carga masiva no pasó por el ORM
+            assert sum(c[0] for c in _celdas().values()) == 1
+
+            # Solo el 11: el 10 queda como estaba
+            assert cubo.reconstruir(date(2024, 3, 11), date(2024, 3, 11)) == 1
+            db.session.commit()
+            assert sum(c[0] for c in _celdas().values()) == 2
+
+            assert cubo.reconstruir() == 3
+            db.session.commit()
+            por_dia = {}
+            for (fecha, *_), (cantidad, ingresos, _) in _celdas().items():
+                por_dia[fecha] = por_dia.get(fecha, 0) + cantidad
+            assert por_dia == {date(2024, 3, 10): 2, date(2024, 3, 11): 1}
+
+    def test_comando_reconstruir(self, app):
+        """Prueba `flask cubo reconstruir`"""
+        _finalizados(app, [
+            (datetime(2024, 3, 10, 16, 0, tzinfo=timezone.utc), 'regular', 'efectivo', 100.0, 1),
+        ])
+        with app.app_context():
+            CuboIngresos.query.delete()
+            db.session.commit()
+
+        runner = app.test_cli_runner()
+        resultado = runner.invoke(args=['cubo', 'reconstruir', '--desde', '2024-03-01'])
+        assert resultado.exit_code == 0, resultado.output
+        assert '1 tickets' in resultado.output
+
+        with app.app_context():
+            assert len(_celdas()) == 1
+
+        resultado = runner.invoke(args=['cubo', 'reconstruir', '--hasta', 'ayer'])
+        assert resultado.exit_code != 0
+
+
+class TestReportesDesdeCubo:
+    """Los reportes leen del cubo"""
+
+    @pytest.mark.parametrize('url', [
+        '/api/reportes/ingresos-periodo',
+        '/api/reportes/metodos-pago',
+        '/api/reportes/ocupacion-espacios',
+        '/api/reportes/ingresos',
+    ])
+    def test_no_consultan_tickets(self, client, app, url):
+        """Prueba que los reportes de ingresos no consultan la tabla de tickets"""
+        _finalizados(app, [
+            (datetime.now(timezone.utc) - timedelta(minutes=5), 'regular', 'efectivo', 100.0, 1),
+        ])
+        with app.app_context():
+            engine = db.engine
+        _login(client)
+
+        sentencias = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+
+        assert response.status_code == 200
+        assert any('FROM cubo_ingresos' in s for s in sentencias)
+        assert not [s for s in sentencias if 'FROM tickets' in s]
+
+    def test_serie_por_granularidad(self, client, app):
+        """Prueba la serie de ingresos por hora, día, semana y mes (fechas locales)"""
+        _finalizados(app, [
+            # 31 de enero 21:00 en RD
+            (datetime(2024, 2, 1, 1, 0, tzinfo=timezone.utc), 'regular', 'efectivo', 100.0, 2),
+            # jueves 1 y viernes 2 de febrero, misma semana
+            (datetime(2024, 2, 1, 14, 0, tzinfo=timezone.utc), 'regular', 'tarjeta', 50.0, 1),
+            (datetime(2024, 2, 2, 14, 30, tzinfo=timezone.utc), 'moto', 'efectivo', 25.0, 1),
+        ])
+        _login(client)
+
+        def serie(parametros):
+            response = client.get(f'/api/reportes/ingresos?desde=2024-01-01&hasta=2024-02-29&{parametros}')
+            assert response.status_code == 200
+            return response.get_json()
+
+        mensual = serie('granularidad=mes')
+        assert [(p['periodo'], p['transacciones'], p['ingresos']) for p in mensual['serie']] == \
+            [('2024-01', 1, 100.0), ('2024-02', 2, 75.0)]
+        assert mensual['total']['ingresos'] == 175.0
+        assert mensual['total']['horas_promedio'] == round(4 / 3, 2)
+
+        semanal = serie('granularidad=semana')
+        assert [(p['periodo'], p['transacciones']) for p in semanal['serie']] == [('2024-01-29', 3)]
+
+        diaria = serie('granularidad=dia&tipo=regular')
+        assert [(p['periodo'], p['ingresos']) for p in diaria['serie']] == \
+            [('2024-01-31', 100.0), ('2024-02-01', 50.0)]
+
+        response = client.get('/api/reportes/ingresos?desde=2024-02-01&hasta=2024-02-01&granularidad=hora')
+        assert [p['periodo'] for p in response.get_json()['serie']] == ['2024-02-01T10:00']
+
+        por_metodo = serie('granularidad=mes&metodo_pago=efectivo&seccion=A')
+        assert [p['ingresos'] for p in por_metodo['serie']] == [100.0, 25.0]
+
+    def test_serie_parametros_invalidos(self, client):
+        """Prueba que granularidad y rangos inválidos responden 400"""
+        _login(client)
+
+        assert client.get('/api/reportes/ingresos?granularidad=anio').status_code == 400
+        assert client.get('/api/reportes/ingresos?desde=2024-13-01').status_code == 400
+        assert client.get('/api/reportes/ingresos?desde=2024-02-01&hasta=2024-01-01').status_code == 400
+        assert client.get('/api/reportes/ingresos?desde=2024-01-01&hasta=2024-12-31&granularidad=hora').status_code == 400
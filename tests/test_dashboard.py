@@ -3,6 +3,7 @@ from app.models.ticket import Ticket
 from app.models.vehiculo import Vehiculo
 from app.models.espacio import Espacio
 from app.extensions import db
+from sqlalchemy import event
 from datetime import datetime, timezone, timedelta
 
 
@@ -196,6 +197,40 @@ class TestDashboardEstadisticas:
         # Solo debe contar el ticket de este mes
         assert data['ingresos_mes'] == 50.0
     
+    def test_hoy_igual_que_en_reportes(self, client, app):
+        """Prueba que el dashboard y el reporte de ingresos cortan el día en la misma hora local"""
+        from app.utils import cubo
+        
+        app.config['REPORTES_UTC_OFFSET_MINUTOS'] = -240
+        with app.app_context():
+            inicio_hoy = cubo.inicio_utc(cubo.ahora_local().date())
+            vehiculo = Vehiculo(placa='DIA001')
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            db.session.add(vehiculo)
+            db.session.flush()
+            
+            # Un minuto antes y uno después de la medianoche local
+            for salida, monto in [(inicio_hoy - timedelta(minutes=1), 7.0),
+                                  (min(inicio_hoy + timedelta(minutes=1), datetime.now(timezone.utc)), 11.0)]:
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa='DIA001',
+                    tipo_vehiculo='regular', estado='finalizado',
+                    fecha_entrada=salida - timedelta(hours=1), fecha_salida=salida,
+                    monto=monto, metodo_pago='efectivo'
+                ))
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        dashboard = client.get('/api/dashboard/estadisticas').get_json()
+        foto = client.get('/api/dashboard/foto').get_json()['estadisticas']
+        reporte = client.get('/api/reportes/ingresos-periodo').get_json()
+        
+        assert dashboard['ingresos_hoy'] == foto['ingresos_hoy'] == reporte['hoy']['ingresos'] == 11.0
+    
     def test_porcentaje_ocupacion(self, client, app):
         """Prueba cálculo de porcentaje de ocupación"""
         with app.app_context():
@@ -204,11 +239,13 @@ class TestDashboardEstadisticas:
             
             # Ocupar algunos espacios
             espacios = Espacio.query.filter_by(estado='disponible', activo=True).limit(5).all()
-            vehiculo = Vehiculo(placa='OCC001')
-            db.session.add(vehiculo)
-            db.session.commit()
             
             for i, espacio in enumerate(espacios):
+                # Un vehículo por ticket activo
+                vehiculo = Vehiculo(placa=f'OCC00{i+1}')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio.id,
@@ -261,14 +298,14 @@ class TestDashboardActividadReciente:
     def test_actividad_reciente_con_datos(self, client, app):
         """Prueba actividad reciente con tickets"""
         with app.app_context():
-            vehiculo = Vehiculo(placa='ACT001')
-            espacio = Espacio.query.filter_by(estado='disponible', tipo='regular').first()
-            
-            db.session.add(vehiculo)
-            db.session.commit()
+            espacios = Espacio.query.filter_by(estado='disponible', tipo='regular').limit(5).all()
             
-            # Crear varios tickets
-            for i in range(5):
+            # Crear varios tickets (un vehículo y un espacio por ticket)
+            for i, espacio in enumerate(espacios):
+                vehiculo = Vehiculo(placa=f'ACT00{i+1}')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio.id,
@@ -310,14 +347,14 @@ class TestDashboardActividadReciente:
     def test_actividad_reciente_limite_10(self, client, app):
         """Prueba que la actividad reciente solo muestra últimos 10"""
         with app.app_context():
-            vehiculo = Vehiculo(placa='LIM001')
-            espacio = Espacio.query.filter_by(estado='disponible', tipo='regular').first()
-            
-            db.session.add(vehiculo)
-            db.session.commit()
+            espacios = Espacio.query.filter_by(estado='disponible', tipo='regular').limit(15).all()
             
-            # Crear 15 tickets
-            for i in range(15):
+            # Crear 15 tickets (un vehículo y un espacio por ticket)
+            for i, espacio in enumerate(espacios):
+                vehiculo = Vehiculo(placa=f'LIM{i:03d}')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio.id,
@@ -378,13 +415,13 @@ class TestDashboardOcupacionPorTipo:
     def test_ocupacion_por_tipo_con_datos(self, client, app):
         """Prueba ocupación por tipo con espacios ocupados"""
         with app.app_context():
-            vehiculo = Vehiculo(placa='TIPO001')
-            db.session.add(vehiculo)
-            db.session.commit()
-            
-            # Ocupar algunos espacios regulares
+            # Ocupar algunos espacios regulares (un vehículo por ticket activo)
             espacios_regulares = Espacio.query.filter_by(tipo='regular', estado='disponible').limit(3).all()
             for i, espacio in enumerate(espacios_regulares):
+                vehiculo = Vehiculo(placa=f'TIPO00{i+1}')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio.id,
@@ -399,6 +436,10 @@ class TestDashboardOcupacionPorTipo:
             # Ocupar una moto
             espacio_moto = Espacio.query.filter_by(tipo='moto', estado='disponible').first()
             if espacio_moto:
+                vehiculo = Vehiculo(placa='MOTO001')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket_moto = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio_moto.id,
@@ -434,6 +475,75 @@ class TestDashboardOcupacionPorTipo:
         assert data['moto']['disponibles'] == data['moto']['total'] - 1
 
 
+class TestDashboardFoto:
+    """Pruebas para la foto completa del dashboard"""
+    
+    def test_foto_igual_a_los_widgets(self, client, app):
+        """Prueba que la foto trae lo mismo que los tres endpoints por separado"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        response = client.post('/api/tickets/ingresar', json={'placa': 'FOT100', 'tipo_vehiculo': 'moto'})
+        ticket_id = response.get_json()['ticket']['id']
+        client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'efectivo'})
+        client.post('/api/tickets/ingresar', json={'placa': 'FOT200', 'tipo_vehiculo': 'regular'})
+        
+        response = client.get('/api/dashboard/foto')
+        
+        assert response.status_code == 200
+        foto = response.get_json()
+        assert foto['estadisticas'] == client.get('/api/dashboard/estadisticas').get_json()
+        assert foto['actividad'] == client.get('/api/dashboard/actividad-reciente').get_json()
+        assert foto['ocupacion_por_tipo'] == client.get('/api/dashboard/ocupacion-por-tipo').get_json()
+        
+        assert foto['estadisticas']['tickets_activos'] == 1
+        assert foto['estadisticas']['total_vehiculos'] == 2
+        assert [a['placa'] for a in foto['actividad']] == ['FOT200', 'FOT100']
+        assert foto['ocupacion_por_tipo']['regular']['ocupados'] == 1
+    
+    def test_foto_en_pocas_consultas(self, client, app):
+        """Prueba que la foto usa un número fijo de consultas y no cuenta espacios"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        for i in range(3):
+            client.post('/api/tickets/ingresar', json={'placa': f'FOT3{i}', 'tipo_vehiculo': 'regular'})
+        
+        with app.app_context():
+            engine = db.engine
+        sentencias = []
+        
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = client.get('/api/dashboard/foto')
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+        
+        assert response.status_code == 200
+        # Versiones del ETag + ocupación + conteos + ingresos + actividad
+        assert len(sentencias) == 5
+        assert not [s for s in sentencias if 'FROM espacios' in s and 'JOIN' not in s]
+    
+    def test_foto_condicional(self, client):
+        """Prueba que un polling sin cambios recibe 304"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        etag = client.get('/api/dashboard/foto').headers['ETag']
+        
+        response = client.get('/api/dashboard/foto', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        client.post('/api/tickets/ingresar', json={'placa': 'FOT400', 'tipo_vehiculo': 'moto'})
+        assert client.get('/api/dashboard/foto', headers={'If-None-Match': etag}).status_code == 200
+
+
 class TestDashboardAutenticacion:
     """Pruebas de autenticación para el dashboard"""
     
@@ -451,3 +561,8 @@ class TestDashboardAutenticacion:
         """Prueba que la ocupación requiere autenticación"""
         response = client.get('/api/dashboard/ocupacion-por-tipo')
         assert response.status_code == 401
+    
+    def test_foto_sin_autenticacion(self, client):
+        """Prueba que la foto requiere autenticación"""
+        response = client.get('/api/dashboard/foto')
+        assert response.status_code == 401
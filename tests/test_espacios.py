@@ -76,3 +76,96 @@ class TestEspacios:
         assert response.status_code == 409 or response.status_code == 400
         data = response.get_json()
         assert 'ya existe' in data.get('error', '')
+
+    
+    def test_listar_espacios_paginado_opcional(self, client):
+        """Prueba que sin limit se listan todos y con limit se pagina por número"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        todos = client.get('/api/espacios')
+        assert len(todos.get_json()) == 55
+        assert 'X-Next-Cursor' not in todos.headers
+        
+        numeros = []
+        url = '/api/espacios?limit=20'
+        while url:
+            response = client.get(url)
+            numeros += [e['numero'] for e in response.get_json()]
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/api/espacios?limit=20&cursor={cursor}' if cursor else None
+        
+        assert numeros == [e['numero'] for e in todos.get_json()]
+
+class TestIndiceEspacios:
+    """Pruebas del índice en memoria de espacios libres"""
+
+    def _indice(self, estrategia, espacios):
+        from app.utils.asignacion import IndiceEspacios
+
+        indice = IndiceEspacios(estrategia=estrategia)
+        for espacio in espacios:
+            indice.actualizar(espacio)
+        return indice
+
+    def _libre(self, id, numero, piso, tipo='regular'):
+        from app.utils.asignacion import EspacioLibre
+
+        return EspacioLibre(id=id, numero=numero, tipo=tipo, piso=piso,
+                            seccion=numero[0], estado='disponible', activo=True)
+
+    def test_estrategias_de_orden(self):
+        """Prueba que cada estrategia elige el espacio esperado"""
+        espacios = [
+            self._libre(1, 'B-01', piso=1),
+            self._libre(2, 'A-01', piso=2),
+            self._libre(3, 'A-02', piso=2),
+        ]
+
+        assert self._indice('cercania', espacios).tomar('regular').numero == 'A-01'
+        assert self._indice('llenar_piso', espacios).tomar('regular').numero == 'B-01'
+        assert self._indice('balancear_pisos', espacios).tomar('regular').numero == 'A-01'
+
+    def test_estrategia_base_abstracta(self):
+        """Prueba que la estrategia base no se puede usar sin elegir()"""
+        from app.utils.asignacion import EstrategiaOrden
+
+        with pytest.raises(TypeError):
+            EstrategiaOrden()
+
+    def test_tomar_y_liberar(self):
+        """Prueba que un espacio ocupado sale del índice y vuelve al liberarse"""
+        espacio = self._libre(1, 'D-01', piso=1, tipo='moto')
+        indice = self._indice('cercania', [espacio])
+
+        assert indice.tomar('moto').id == 1
+        assert indice.tomar('moto') is None
+        assert indice.disponibles_por_tipo()['moto'] == 0
+
+        indice.actualizar(espacio)
+        assert indice.disponibles_por_tipo()['moto'] == 1
+
+    def test_indice_sincronizado_con_cambio_estado(self, client, app):
+        """Prueba que cambiar-estado y el ingreso se reflejan en disponibles-por-tipo"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+
+        inicial = client.get('/api/espacios/disponibles-por-tipo').get_json()
+
+        with app.app_context():
+            espacio_id = Espacio.query.filter_by(tipo='moto').first().id
+
+        client.patch(f'/api/espacios/{espacio_id}/cambiar-estado', json={'estado': 'mantenimiento'})
+        response = client.post('/api/tickets/ingresar', json={
+            'placa': 'IDX001',
+            'tipo_vehiculo': 'moto'
+        })
+        assert response.status_code == 201
+
+        data = client.get('/api/espacios/disponibles-por-tipo').get_json()
+        assert data['moto'] == inicial['moto'] - 2
+        assert data['regular'] == inicial['regular']
@@ -0,0 +1,202 @@
+import json
+from datetime import datetime, timedelta, timezone
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+from app.utils.eventos import TAMANO_COLA, Difusor, obtener_difusor
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _eventos(cola):
+    """[(evento, datos)] pendientes en una cola de suscriptor"""
+    eventos = []
+    while not cola.empty():
+        mensaje = cola.get_nowait()
+        lineas = dict(linea.split(': ', 1) for linea in mensaje.strip().split('\n'))
+        eventos.append((lineas['event'], json.loads(lineas['data'])))
+    return eventos
+
+
+class TestDifusor:
+    """Vigía por proceso y reparto a los suscriptores"""
+
+    def test_revisar_publica_cambios(self, client, app):
+        """Prueba que una revisión publica ocupación, tickets nuevos y salidas una sola vez"""
+        _login(client)
+        with app.app_context():
+            difusor = Difusor(app, intervalo=0)
+            cola = difusor.suscribir()
+            otra = difusor.suscribir()
+            difusor.revisar()
+            assert _eventos(cola) == []
+
+        response = client.post('/api/tickets/ingresar', json={'placa': 'EVT100', 'tipo_vehiculo': 'moto'})
+        ticket = response.get_json()['ticket']
+
+        with app.app_context():
+            difusor.revisar()
+            eventos = dict(_eventos(cola))
+            assert eventos['ocupacion']['moto']['ocupados'] == 1
+            assert eventos['ocupacion']['cambios'] == {
+                'moto': {'ocupados': 1, 'disponibles': -1},
+                'total': {'ocupados': 1, 'disponibles': -1}
+            }
+            assert eventos['ticket']['placa'] == 'EVT100'
+            assert eventos['ticket']['espacio_numero'] == ticket['espacio_numero']
+            assert len(_eventos(otra)) == 2
+
+        client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'efectivo'})
+
+        with app.app_context():
+            difusor.revisar()
+            eventos = dict(_eventos(cola))
+            assert eventos['salida']['id'] == ticket['id']
+            assert eventos['salida']['metodo_pago'] == 'efectivo'
+            assert 'ticket' not in eventos
+
+            # Sin cambios: nada nuevo
+            difusor.revisar()
+            assert _eventos(cola) == []
+
+    def test_salidas_en_el_mismo_instante(self, app, monkeypatch):
+        """Prueba que un cierre masivo con más salidas que el límite se publica completo"""
+        # Límite menor que la cola del suscriptor: cada revisión entra entera
+        monkeypatch.setattr('app.utils.eventos.LIMITE_POR_REVISION', 40)
+        with app.app_context():
+            difusor = Difusor(app, intervalo=0)
+            cola = difusor.suscribir()
+            difusor.revisar()
+
+            vehiculo = Vehiculo(placa='MAS000')
+            db.session.add(vehiculo)
+            db.session.flush()
+            ahora = datetime.now(timezone.utc)
+            cantidad = 100
+            db.session.execute(db.insert(Ticket), [{
+                'vehiculo_id': vehiculo.id, 'espacio_id': 1, 'placa': 'MAS000',
+                'fecha_entrada': ahora - timedelta(hours=1), 'fecha_salida': ahora,
+                'estado': 'finalizado', 'monto': 5.0, 'metodo_pago': 'efectivo', 'tipo_vehiculo': 'regular'
+            } for _ in range(cantidad)])
+            db.session.commit()
+
+            salidas = []
+            for _ in range(4):
+                difusor.revisar()
+                salidas += [datos['id'] for evento, datos in _eventos(cola) if evento == 'salida']
+
+            assert len(salidas) == len(set(salidas)) == cantidad
+
+    def test_ticket_que_confirma_fuera_de_orden(self, app):
+        """Prueba que un ticket con id menor confirmado después de uno mayor igual se publica"""
+        with app.app_context():
+            difusor = Difusor(app, intervalo=0)
+            cola = difusor.suscribir()
+            difusor.revisar()
+
+            vehiculo = Vehiculo(placa='ORD000')
+            db.session.add(vehiculo)
+            db.session.flush()
+            ticket = {'vehiculo_id': vehiculo.id, 'placa': 'ORD000', 'estado': 'finalizado',
+                      'fecha_entrada': datetime.now(timezone.utc), 'tipo_vehiculo': 'regular'}
+            db.session.execute(db.insert(Ticket), [{**ticket, 'id': 1000, 'espacio_id': 1}])
+            db.session.commit()
+            difusor.revisar()
+
+            db.session.execute(db.insert(Ticket), [{**ticket, 'id': 999, 'espacio_id': 2}])
+            db.session.commit()
+            difusor.revisar()
+
+            tickets = [datos['id'] for evento, datos in _eventos(cola) if evento == 'ticket']
+            assert tickets == [1000, 999]
+
+    def test_cliente_lento_se_desconecta(self, app):
+        """Prueba que una cola llena se corta sin frenar a los demás"""
+        difusor = Difusor(app, intervalo=0)
+        lenta = difusor.suscribir()
+        rapida = difusor.suscribir()
+
+        for i in range(TAMANO_COLA):
+            difusor.publicar('ticket', {'id': i})
+            rapida.get_nowait()
+        difusor.publicar('ticket', {'id': TAMANO_COLA})
+
+        assert difusor.suscriptores() == 1
+        assert lenta.get_nowait() is None
+        assert rapida.qsize() == 1
+
+    def test_commit_despierta_al_vigia(self, app):
+        """Prueba que un commit del proceso despierta al vigía si hay suscriptores"""
+        app.config['EVENTOS_INTERVALO_SEGUNDOS'] = 0
+        with app.app_context():
+            difusor = obtener_difusor()
+            db.session.commit()
+            assert not difusor._despertar.is_set()
+
+            cola = difusor.suscribir()
+            espacio = Espacio.query.filter_by(numero='A-01').first()
+            espacio.estado = 'mantenimiento'
+            db.session.commit()
+            assert difusor._despertar.is_set()
+            difusor.desuscribir(cola)
+
+
+class TestFlujoEventos:
+    """GET /api/eventos"""
+
+    def test_requiere_sesion(self, client):
+        """Prueba que el flujo requiere autenticación"""
+        assert client.get('/api/eventos').status_code == 401
+
+    def test_foto_inicial_y_sesion(self, client, app):
+        """Prueba que el flujo abre con la ocupación y el tiempo de sesión"""
+        app.config['EVENTOS_INTERVALO_SEGUNDOS'] = 0
+        _login(client)
+
+        response = client.get('/api/eventos', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+
+        fragmentos = iter(response.response)
+        assert next(fragmentos).startswith(b'retry:')
+        ocupacion = next(fragmentos).decode()
+        sesion = next(fragmentos).decode()
+        response.close()
+
+        assert ocupacion.startswith('event: ocupacion\n')
+        datos = json.loads(ocupacion.split('data: ', 1)[1])
+        assert datos['total']['total'] == 55
+        assert datos['regular']['disponibles'] == 40
+
+        assert sesion.startswith('event: sesion\n')
+        assert json.loads(sesion.split('data: ', 1)[1])['tiempo_restante_segundos'] > 0
+
+        with app.app_context():
+            assert obtener_difusor().suscriptores() == 0
+
+    def test_tope_de_flujos(self, client, app):
+        """Prueba que pasado EVENTOS_MAX_FLUJOS el flujo se rechaza con 503 y el cupo se libera al cerrar"""
+        app.config['EVENTOS_INTERVALO_SEGUNDOS'] = 0
+        app.config['EVENTOS_MAX_FLUJOS'] = 1
+        _login(client)
+
+        abierto = client.get('/api/eventos', buffered=False)
+        assert abierto.status_code == 200
+
+        rechazado = client.get('/api/eventos', buffered=False)
+        assert rechazado.status_code == 503
+        assert rechazado.headers['Retry-After'] == '30'
+
+        # Cerrado sin haber leído ningún fragmento
+        abierto.close()
+        with app.app_context():
+            assert obtener_difusor().suscriptores() == 0
+        otro = client.get('/api/eventos', buffered=False)
+        assert otro.status_code == 200
+        otro.close()
@@ -0,0 +1,34 @@
+import csv
+import io
+import json
+from datetime import datetime
+from app.utils.exportacion import lineas_csv, lineas_ndjson
+
+
+class TestLineasExportacion:
+    """Pruebas de los generadores CSV / NDJSON por lotes"""
+
+    def test_csv_por_lotes(self):
+        """Prueba que cada lote sale como un fragmento y el CSV es válido"""
+        filas = [(i, f'PLACA{i}', None, datetime(2024, 1, 1, i)) for i in range(5)]
+        fragmentos = list(lineas_csv(iter(filas), ['id', 'placa', 'marca', 'fecha'], tamano_lote=2))
+
+        assert len(fragmentos) == 3
+        leidas = list(csv.reader(io.StringIO(''.join(fragmentos))))
+        assert leidas[0] == ['id', 'placa', 'marca', 'fecha']
+        assert leidas[1] == ['0', 'PLACA0', '', '2024-01-01T00:00:00']
+        assert len(leidas) == 6
+
+    def test_csv_escapa_separadores(self):
+        """Prueba que comas y comillas en los datos no rompen las columnas"""
+        cuerpo = ''.join(lineas_csv(iter([(1, 'Pérez, "El Jefe"')]), ['id', 'propietario']))
+        assert list(csv.reader(io.StringIO(cuerpo)))[1] == ['1', 'Pérez, "El Jefe"']
+
+    def test_ndjson_por_lotes(self):
+        """Prueba un objeto por línea y fragmentos por lote"""
+        filas = [(i, f'PLACA{i}') for i in range(3)]
+        fragmentos = list(lineas_ndjson(iter(filas), ['id', 'placa'], tamano_lote=2))
+
+        assert len(fragmentos) == 2
+        objetos = [json.loads(linea) for linea in ''.join(fragmentos).splitlines()]
+        assert objetos == [{'id': i, 'placa': f'PLACA{i}'} for i in range(3)]
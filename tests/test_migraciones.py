@@ -0,0 +1,305 @@
+import os
+import re
+import pytest
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import insert, select, text, update
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+
+
+# Tamaño del dataset para las pruebas de EXPLAIN. Por defecto es pequeño
+# para la suite; para reproducir producción usar una BD de prueba vacía:
+#   EXPLAIN_DATABASE_URL=postgresql://... EXPLAIN_TICKETS=3000000 pytest tests/test_migraciones.py
+TICKETS_EXPLAIN = int(os.environ.get('EXPLAIN_TICKETS', 20000))
+
+
+def _crear_app(monkeypatch, url):
+    import config
+    from app import create_app
+
+    monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI', url)
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+def _tablas(app):
+    with app.app_context():
+        return set(db.inspect(db.engine).get_table_names())
+
+
+class TestMigraciones:
+    """Pruebas de las migraciones de Alembic (Flask-Migrate)"""
+
+    @pytest.fixture
+    def app_vacia(self, tmp_path, monkeypatch):
+        """App sobre un SQLite en archivo sin tablas"""
+        app = _crear_app(monkeypatch, f"sqlite:///{tmp_path / 'migraciones.db'}")
+
+        yield app
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_upgrade_reproduce_los_modelos(self, app_vacia):
+        """Prueba que `flask db upgrade` deja el esquema igual a los modelos"""
+        import flask_migrate
+
+        with app_vacia.app_context():
+            flask_migrate.upgrade()
+
+            indices = {i['name'] for i in db.inspect(db.engine).get_indexes('tickets')}
+            assert {'ix_tickets_estado_fecha_salida', 'ix_tickets_vehiculo_estado',
+                    'ix_tickets_fecha_entrada', 'uq_tickets_vehiculo_activo'} <= indices
+
+            # Autogenerar no detecta diferencias (lanza si las hay)
+            flask_migrate.check()
+
+    def test_downgrade_hasta_base(self, app_vacia):
+        """Prueba que las migraciones se pueden revertir"""
+        import flask_migrate
+
+        with app_vacia.app_context():
+            flask_migrate.upgrade()
+            flask_migrate.downgrade(revision='0001_esquema_base')
+
+            indices = {i['name'] for i in db.inspect(db.engine).get_indexes('tickets')}
+            assert 'ix_tickets_fecha_entrada' not in indices
+            assert 'uq_tickets_vehiculo_activo' in indices
+
+            flask_migrate.downgrade(revision='base')
+
+        assert _tablas(app_vacia) <= {'alembic_version'}
+
+
+    def test_upgrade_llena_el_cubo(self, app_vacia):
+        """Prueba que la migración del cubo lo llena con los tickets finalizados existentes"""
+        import flask_migrate
+        from app.utils import cubo
+
+        with app_vacia.app_context():
+            flask_migrate.upgrade(revision='0002_indices_consultas')
+            salida = datetime(2024, 3, 10, 15, 0)
+            with db.engine.begin() as conexion:
+                espacio_id = conexion.execute(insert(Espacio).returning(Espacio.id), [
+                    {'numero': 'A-01', 'tipo': 'regular', 'estado': 'disponible', 'piso': 1,
+                     'seccion': 'A', 'activo': True}
+                ]).scalar()
+                vehiculo_id = conexion.execute(insert(Vehiculo).returning(Vehiculo.id), [{'placa': 'HIS001'}]).scalar()
+                conexion.execute(insert(Ticket), [{
+                    'vehiculo_id': vehiculo_id, 'espacio_id': espacio_id, 'placa': 'HIS001',
+                    'fecha_entrada': salida - timedelta(hours=2), 'fecha_salida': salida,
+                    'estado': 'finalizado', 'monto': monto, 'metodo_pago': 'efectivo',
+                    'tipo_vehiculo': 'regular'
+                } for monto in (100.0, 50.0)])
+
+            flask_migrate.upgrade()
+
+            assert cubo.totales() == {'transacciones': 2, 'ingresos': 150.0, 'horas_promedio': 2.0}
+            assert list(cubo.desglose('seccion')) == ['A']
+
+
+class TestInicializarBase:
+    """Arranque sin efectos en la BD y `flask base inicializar`"""
+
+    def test_create_app_no_toca_la_base(self, tmp_path, monkeypatch):
+        """Prueba que construir la app no crea tablas ni el archivo de la BD"""
+        ruta = tmp_path / 'arranque.db'
+        _crear_app(monkeypatch, f"sqlite:///{ruta}")
+
+        assert not ruta.exists()
+
+    def test_inicializar_y_repetir(self, tmp_path, monkeypatch):
+        """Prueba que inicializar migra y crea el admin una sola vez"""
+        from app.models.usuario import Usuario
+
+        app = _crear_app(monkeypatch, f"sqlite:///{tmp_path / 'inicializar.db'}")
+        runner = app.test_cli_runner()
+
+        resultado = runner.invoke(args=['base', 'inicializar', '--admin-password', 'clave123'])
+        assert resultado.exit_code == 0, resultado.output
+        assert 'admin creado' in resultado.output
+        assert {'alembic_version', 'usuarios', 'tipos_espacio'} <= _tablas(app)
+
+        resultado = runner.invoke(args=['base', 'inicializar'])
+        assert resultado.exit_code == 0, resultado.output
+        assert 'ya existía' in resultado.output
+
+        with app.app_context():
+            assert Usuario.query.filter_by(nombre_usuario='admin').count() == 1
+        response = app.test_client().post('/auth/login', json={
+            'nombre_usuario': 'admin', 'password': 'clave123'
+        })
+        assert response.status_code == 200
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    def test_base_creada_con_create_all(self, tmp_path, monkeypatch):
+        """Prueba que una base sin versión de Alembic pide marcarla antes de migrar"""
+        app = _crear_app(monkeypatch, f"sqlite:///{tmp_path / 'create_all.db'}")
+        with app.app_context():
+            db.create_all()
+
+        resultado = app.test_cli_runner().invoke(args=['base', 'inicializar'])
+        assert resultado.exit_code != 0
+        assert 'flask db stamp' in resultado.output
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture(scope='module')
+def app_poblada(tmp_path_factory):
+    """
+    SQLite (o EXPLAIN_DATABASE_URL) con el esquema de las migraciones,
+    TICKETS_EXPLAIN tickets y estadísticas (ANALYZE)
+    """
+    import flask_migrate
+    from app.cli import crear_admin
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        url = os.environ.get('EXPLAIN_DATABASE_URL') or \
+            f"sqlite:///{tmp_path_factory.mktemp('explain') / 'explain.db'}"
+        app = _crear_app(monkeypatch, url)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+
+    with app.app_context():
+        flask_migrate.upgrade()
+        crear_admin('admin')
+        espacios = [
+            {'numero': f'{s}-{i:03d}', 'tipo': tipo, 'estado': 'disponible',
+             'piso': 1, 'seccion': s, 'activo': True}
+            for s, tipo in (('A', 'regular'), ('B', 'regular'), ('C', 'discapacitado'), ('D', 'moto'))
+            for i in range(1, 251)
+        ]
+        db.session.execute(insert(Espacio), espacios)
+        espacio_ids = db.session.execute(select(Espacio.id)).scalars().all()
+
+        inicio = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        vehiculos = [
+            {'placa': f'EXP{i:07d}', 'fecha_registro': inicio + timedelta(minutes=i), 'activo': i % 10 != 0}
+            for i in range(TICKETS_EXPLAIN // 4)
+        ]
+        db.session.execute(insert(Vehiculo), vehiculos)
+        vehiculo_ids = db.session.execute(select(Vehiculo.id)).scalars().all()
+
+        # Casi todos finalizados, unos pocos activos (como en producción)
+        lote = []
+        for i in range(TICKETS_EXPLAIN):
+            entrada = inicio + timedelta(minutes=7 * i)
+            activo = i >= TICKETS_EXPLAIN - len(espacio_ids) // 2
+            lote.append({
+                'vehiculo_id': vehiculo_ids[i % len(vehiculo_ids)],
+                'espacio_id': espacio_ids[i % len(espacio_ids)],
+                'placa': f'EXP{i % len(vehiculo_ids):07d}',
+                'fecha_entrada': entrada,
+                'fecha_salida': None if activo else entrada + timedelta(hours=2),
+                'estado': 'activo' if activo else 'finalizado',
+                'monto': 0.0 if activo else 100.0,
+                'tipo_vehiculo': 'regular'
+            })
+            if len(lote) == 10000:
+                db.session.execute(insert(Ticket), lote)
+                lote = []
+        if lote:
+            db.session.execute(insert(Ticket), lote)
+        # Los espacios de los tickets activos quedan ocupados (la asignación los salta)
+        db.session.execute(update(Espacio).where(
+            Espacio.id.in_(select(Ticket.espacio_id).where(Ticket.estado == 'activo'))
+        ).values(estado='ocupado'))
+        db.session.commit()
+
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        flask_migrate.downgrade(revision='base')
+        db.engine.dispose()
+
+
+class TestIndicesConsultas:
+    """
+    Prueba con EXPLAIN que las consultas que emiten los endpoints usan un
+    índice: se capturan las sentencias reales (con sus parámetros) durante
+    el request y se explican sobre el esquema de las migraciones.
+    """
+
+    def _sentencias(self, app, tabla, metodo, url, **kwargs):
+        """SELECTs sobre `tabla` que emite el request, como (sql, parámetros)"""
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        client = app.test_client()
+        client.post('/auth/login', json={'nombre_usuario': 'admin', 'password': 'admin'})
+
+        patron = re.compile(rf'\b(FROM|JOIN)\s+{tabla}\b')
+        capturadas = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and patron.search(statement):
+                capturadas.append((statement, parameters))
+
+        # En Engine: también las del motor de réplica (@lectura_replica)
+        event.listen(Engine, 'before_cursor_execute', capturar)
+        try:
+            response = client.open(url, method=metodo, **kwargs)
+            response.get_data()  # consume las respuestas en flujo
+        finally:
+            event.remove(Engine, 'before_cursor_execute', capturar)
+
+        assert response.status_code in (200, 201), response.get_data(as_text=True)
+        assert capturadas, f'{url} no consultó {tabla}'
+        return capturadas
+
+    def _plan(self, sql, parametros):
+        prefijo = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        filas = db.session.connection().exec_driver_sql(prefijo + sql, parametros).all()
+        db.session.rollback()
+        return '\n'.join(str(fila[-1]) for fila in filas)
+
+    def _assert_usa_indice(self, app, tabla, metodo, url, **kwargs):
+        sentencias = self._sentencias(app, tabla, metodo, url, **kwargs)
+        with app.app_context():
+            for sql, parametros in sentencias:
+                plan = self._plan(sql, parametros)
+                if db.engine.dialect.name == 'sqlite':
+                    escaneos = [linea for linea in plan.splitlines()
+                                if linea.startswith(f'SCAN {tabla}') and 'INDEX' not in linea]
+                    assert 'INDEX' in plan and not escaneos, f'{sql}\n{plan}'
+                else:
+                    assert 'Index' in plan and f'Seq Scan on {tabla}' not in plan, f'{sql}\n{plan}'
+
+    def test_transacciones_finalizados_por_fecha_salida(self, app_poblada):
+        self._assert_usa_indice(app_poblada, 'tickets', 'GET', '/api/transacciones?limit=50')
+
+    def test_exportar_transacciones_desde_fecha(self, app_poblada):
+        self._assert_usa_indice(app_poblada, 'tickets', 'GET',
+                                '/api/transacciones/exportar?formato=csv&desde=2024-03-01&hasta=2024-03-08')
+
+    def test_tickets_activos_por_fecha_entrada(self, app_poblada):
+        self._assert_usa_indice(app_poblada, 'tickets', 'GET', '/api/tickets/activos')
+
+    def test_tickets_de_un_vehiculo(self, app_poblada):
+        # Exportar vehículos por tipo: EXISTS sobre los tickets de cada vehículo
+        self._assert_usa_indice(app_poblada, 'tickets', 'GET',
+                                '/api/vehiculos/exportar?formato=csv&tipo=regular&desde=2024-01-01T00:00&hasta=2024-01-01T01:00')
+
+    def test_ultimos_tickets_dashboard(self, app_poblada):
+        self._assert_usa_indice(app_poblada, 'tickets', 'GET', '/api/dashboard/actividad-reciente')
+
+    def test_espacios_disponibles_por_tipo(self, app_poblada):
+        # El ingreso por lote elige los espacios con la consulta SQL de asignación
+        self._assert_usa_indice(app_poblada, 'espacios', 'POST', '/api/tickets/ingresar-lote',
+                                json={'vehiculos': [{'placa': 'EXPLOTE1', 'tipo_vehiculo': 'moto'}]})
+
+    def test_vehiculos_activos_por_fecha_registro(self, app_poblada):
+        self._assert_usa_indice(app_poblada, 'vehiculos', 'GET', '/api/vehiculos?limit=50')
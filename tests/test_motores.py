@@ -0,0 +1,151 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.usuario import Usuario
+from app.models.vehiculo import Vehiculo
+from app.utils.motores import COOKIE_ESCRITURA, opciones_motor
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _crear_app(monkeypatch, principal, replica):
+    import config
+    from app import create_app
+
+    monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI', principal)
+    monkeypatch.setattr(config, 'DATABASE_REPLICA_URL', replica)
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def app_replica(tmp_path, monkeypatch):
+    """Principal y réplica en dos SQLite; la réplica tiene 3 vehículos que la principal no"""
+    app = _crear_app(monkeypatch, f"sqlite:///{tmp_path / 'principal.db'}",
+                     f"sqlite:///{tmp_path / 'replica.db'}")
+
+    with app.app_context():
+        replica = app.extensions['replica'].motor
+        db.create_all()
+        db.metadata.create_all(replica)
+
+        espacios = [{'numero': f'A-{i:02d}', 'tipo': 'regular', 'estado': 'disponible',
+                     'piso': 1, 'seccion': 'A', 'activo': True} for i in range(1, 6)]
+        db.session.execute(db.insert(Espacio), espacios)
+        db.session.add(Usuario(nombre_usuario='testuser', contraseña=generate_password_hash('testpass'),
+                               rol='admin'))
+        db.session.commit()
+
+        with replica.begin() as conexion:
+            conexion.execute(db.insert(Espacio), espacios)
+            conexion.execute(db.insert(Vehiculo), [{'placa': f'REP{i:03d}', 'activo': True} for i in range(3)])
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    app.extensions['replica'].motor.dispose()
+
+
+def _total_vehiculos(client):
+    response = client.get('/api/dashboard/estadisticas')
+    assert response.status_code == 200
+    return response.get_json()['total_vehiculos']
+
+
+class TestOpcionesMotor:
+    """Perfiles de motor según el dialecto"""
+
+    def test_postgresql(self):
+        """Prueba pool, statement timeout y solo lectura en PostgreSQL"""
+        opciones = opciones_motor('postgresql://u:p@localhost/parqueo', {
+            'pool_size': 4, 'max_overflow': 2, 'pool_timeout': 10, 'pool_recycle': 1800,
+            'pre_ping': True, 'statement_timeout_ms': 30000, 'solo_lectura': True
+        })
+
+        assert (opciones['pool_size'], opciones['max_overflow'], opciones['pool_timeout']) == (4, 2, 10)
+        assert opciones['pool_pre_ping'] is True and opciones['pool_recycle'] == 1800
+        assert opciones['connect_args'] == {
+            'options': '-c statement_timeout=30000 -c default_transaction_read_only=on'
+        }
+
+    def test_sqlite_sin_pool(self):
+        """Prueba que en SQLite solo aplican pre-ping y reciclado"""
+        opciones = opciones_motor('sqlite:///parking.db', {
+            'pool_size': 10, 'pool_recycle': 1800, 'pre_ping': True, 'statement_timeout_ms': 5000
+        })
+
+        assert opciones == {'pool_pre_ping': True, 'pool_recycle': 1800}
+
+
+class TestReplica:
+    """Lecturas de reportes en la réplica, escrituras y lo propio en la principal"""
+
+    def test_dashboard_lee_de_la_replica(self, app_replica):
+        """Prueba que las estadísticas del dashboard se leen de la réplica"""
+        client = app_replica.test_client()
+        _login(client)
+
+        assert _total_vehiculos(client) == 3
+
+    def test_escrituras_en_la_principal(self, app_replica):
+        """Prueba que un ingreso se escribe en la principal y no en la réplica"""
+        client = app_replica.test_client()
+        _login(client)
+
+        response = client.post('/api/tickets/ingresar', json={'placa': 'PRI001', 'tipo_vehiculo': 'regular'})
+        assert response.status_code == 201
+        assert client.get_cookie(COOKIE_ESCRITURA) is not None
+
+        with app_replica.app_context():
+            assert Vehiculo.query.filter_by(placa='PRI001').count() == 1
+            with app_replica.extensions['replica'].motor.connect() as conexion:
+                assert conexion.execute(
+                    db.select(db.func.count()).select_from(Vehiculo).where(Vehiculo.placa == 'PRI001')
+                ).scalar() == 0
+
+    def test_lee_lo_propio_tras_escribir(self, app_replica):
+        """Prueba que quien acaba de escribir lee de la principal; los demás, de la réplica"""
+        garita, otro = app_replica.test_client(), app_replica.test_client()
+        _login(garita)
+        _login(otro)
+
+        garita.post('/api/tickets/ingresar', json={'placa': 'PRI002', 'tipo_vehiculo': 'regular'})
+
+        assert _total_vehiculos(garita) == 1
+        assert _total_vehiculos(otro) == 3
+
+        # Pasado el retraso máximo, vuelve a la réplica
+        app_replica.config['REPLICA_RETRASO_MAXIMO'] = 0
+        assert _total_vehiculos(garita) == 3
+
+    def test_replica_caida(self, tmp_path, monkeypatch):
+        """Prueba que sin conexión a la réplica la lectura se repite en la principal"""
+        app = _crear_app(monkeypatch, f"sqlite:///{tmp_path / 'principal.db'}",
+                         f"sqlite:///{tmp_path / 'no-existe' / 'replica.db'}")
+        with app.app_context():
+            db.create_all()
+            db.session.add(Usuario(nombre_usuario='testuser', contraseña=generate_password_hash('testpass'),
+                                   rol='admin'))
+            db.session.commit()
+
+        client = app.test_client()
+        _login(client)
+
+        assert _total_vehiculos(client) == 0
+        assert not app.extensions['replica'].disponible()
+        # Las siguientes van directo a la principal
+        assert _total_vehiculos(client) == 0
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        app.extensions['replica'].motor.dispose()
@@ -0,0 +1,207 @@
+import pytest
+from sqlalchemy import event, insert, text, update
+from app.models.contador_ocupacion import ContadorOcupacion
+from app.models.espacio import Espacio
+from app.extensions import db
+from app.utils import ocupacion
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _contadores():
+    return {
+        (c.seccion, c.tipo, c.estado): c.cantidad
+        for c in ContadorOcupacion.query.all() if c.cantidad
+    }
+
+
+def _reales():
+    """Conteo directo sobre los espacios activos"""
+    conteos = {}
+    for e in Espacio.query.filter_by(activo=True).all():
+        clave = (e.seccion or '', e.tipo, e.estado)
+        conteos[clave] = conteos.get(clave, 0) + 1
+    return conteos
+
+
+class TestContadoresOcupacion:
+    """Contadores mantenidos por triggers sobre espacios"""
+
+    def test_espacios_iniciales(self, app):
+        """Prueba que los espacios del fixture quedan contados"""
+        with app.app_context():
+            contadores = _contadores()
+            assert contadores == _reales()
+            assert contadores[('A', 'regular', 'disponible')] == 20
+            assert ocupacion.leer_ocupacion().contar() == 55
+
+    def test_ingreso_y_salida(self, client, app):
+        """Prueba que ingreso y salida (SQL directo) mueven el contador"""
+        _login(client)
+        response = client.post('/api/tickets/ingresar', json={'placa': 'OCU100', 'tipo_vehiculo': 'moto'})
+        ticket_id = response.get_json()['ticket']['id']
+
+        with app.app_context():
+            assert _contadores()[('D', 'moto', 'ocupado')] == 1
+            assert _contadores() == _reales()
+
+        client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'efectivo'})
+
+        with app.app_context():
+            assert ('D', 'moto', 'ocupado') not in _contadores()
+            assert _contadores() == _reales()
+
+    def test_cambios_por_orm_y_carga_masiva(self, app):
+        """Prueba CRUD por el ORM, updates masivos e inserts sin el ORM"""
+        with app.app_context():
+            espacio = Espacio.query.filter_by(numero='A-01').first()
+            espacio.estado = 'mantenimiento'
+            db.session.commit()
+
+            espacio = Espacio.query.filter_by(numero='A-02').first()
+            espacio.seccion = 'Z'
+            espacio.activo = False
+            db.session.commit()
+
+            db.session.execute(insert(Espacio), [
+                {'numero': f'E-{i:02d}', 'tipo': 'regular', 'estado': 'disponible', 'seccion': 'E', 'activo': True}
+                for i in range(3)
+            ])
+            db.session.execute(update(Espacio).where(Espacio.seccion == 'B').values(estado='ocupado'))
+            db.session.delete(Espacio.query.filter_by(numero='C-01').first())
+            db.session.commit()
+
+            contadores = _contadores()
+            assert contadores == _reales()
+            assert contadores[('A', 'regular', 'mantenimiento')] == 1
+            assert contadores[('A', 'regular', 'disponible')] == 18
+            assert contadores[('E', 'regular', 'disponible')] == 3
+            assert contadores[('B', 'regular', 'ocupado')] == 20
+            assert contadores[('C', 'discapacitado', 'disponible')] == 4
+
+    def test_rollback_no_mueve_contadores(self, app):
+        """Prueba que los contadores siguen la transacción del cambio"""
+        with app.app_context():
+            antes = _contadores()
+            db.session.execute(update(Espacio).values(estado='ocupado'))
+            assert _contadores() != antes
+            db.session.rollback()
+            assert _contadores() == antes
+
+    def test_reconciliar_corrige_desvios(self, app):
+        """Prueba que reconciliar deja los contadores igual al conteo real"""
+        with app.app_context():
+            # Cambio fuera de los triggers
+            db.session.execute(text("DROP TRIGGER tr_espacios_ocupacion_update"))
+            db.session.execute(update(Espacio).where(Espacio.numero.in_(['A-01', 'A-02'])).values(estado='ocupado'))
+            db.session.commit()
+            assert _contadores() != _reales()
+
+            desvios = ocupacion.reconciliar()
+            db.session.commit()
+
+            assert desvios == {
+                ('A', 'regular', 'ocupado'): (0, 2),
+                ('A', 'regular', 'disponible'): (20, 18),
+            }
+            assert _contadores() == _reales()
+            assert ocupacion.reconciliar() == {}
+
+    def test_comando_reconciliar(self, app):
+        """Prueba `flask ocupacion reconciliar`"""
+        with app.app_context():
+            ContadorOcupacion.query.delete()
+            db.session.commit()
+
+        resultado = app.test_cli_runner().invoke(args=['ocupacion', 'reconciliar'])
+        assert resultado.exit_code == 0, resultado.output
+        assert '4 contadores corregidos' in resultado.output
+
+        with app.app_context():
+            assert _contadores() == _reales()
+
+    def test_lectura_no_reconcilia(self, app):
+        """Prueba que leer la ocupación nunca recalcula (ni bloquea) los contadores"""
+        with app.app_context():
+            ContadorOcupacion.query.delete()
+            db.session.commit()
+
+            assert ocupacion.leer_ocupacion().contar() == 0
+            assert ocupacion.leer_ocupacion().contar() == 0
+            assert ContadorOcupacion.query.count() == 0
+
+
+class TestEstadisticasDesdeContadores:
+    """Las estadísticas de ocupación leen los contadores"""
+
+    @pytest.mark.parametrize('url', [
+        '/api/dashboard/estadisticas',
+        '/api/dashboard/ocupacion-por-tipo',
+        '/api/espacios/estadisticas',
+        '/api/reportes/ocupacion-espacios',
+        '/api/espacios/disponibles-por-tipo',
+    ])
+    def test_no_cuentan_espacios(self, client, app, url):
+        """Prueba que no hay COUNT sobre la tabla de espacios"""
+        with app.app_context():
+            engine = db.engine
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'OCU200', 'tipo_vehiculo': 'regular'})
+
+        sentencias = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+
+        assert response.status_code == 200
+        assert any('FROM contadores_ocupacion' in s for s in sentencias)
+        assert not [s for s in sentencias if 'FROM espacios' in s]
+
+    def test_valores(self, client, app):
+        """Prueba los valores de las estadísticas con un espacio ocupado y uno en mantenimiento"""
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'OCU300', 'tipo_vehiculo': 'regular'})
+        with app.app_context():
+            espacio = Espacio.query.filter_by(numero='D-01').first()
+            espacio.estado = 'mantenimiento'
+            db.session.commit()
+
+        datos = client.get('/api/espacios/estadisticas').get_json()
+        assert (datos['total'], datos['ocupados'], datos['disponibles'], datos['mantenimiento']) == (55, 1, 53, 1)
+
+        por_tipo = client.get('/api/dashboard/ocupacion-por-tipo').get_json()
+        assert por_tipo['regular'] == {'total': 40, 'ocupados': 1, 'disponibles': 39, 'porcentaje': 2.5}
+        assert por_tipo['moto'] == {'total': 10, 'ocupados': 0, 'disponibles': 10, 'porcentaje': 0}
+
+        dashboard = client.get('/api/dashboard/estadisticas').get_json()
+        assert (dashboard['espacios_ocupados'], dashboard['total_espacios']) == (1, 55)
+
+    def test_disponibles_por_tipo_ve_otros_workers(self, client, app):
+        """Prueba que un espacio ocupado fuera del índice de este worker se descuenta enseguida"""
+        from app.utils.asignacion import obtener_indice
+
+        _login(client)
+        with app.app_context():
+            obtener_indice().asegurar_caliente()
+        antes = client.get('/api/espacios/disponibles-por-tipo').get_json()
+
+        # Otro worker: escribe directo en la BD, este índice no se entera
+        with app.app_context():
+            with db.engine.begin() as conexion:
+                conexion.execute(text("UPDATE espacios SET estado = 'ocupado' WHERE numero = 'D-01'"))
+
+        datos = client.get('/api/espacios/disponibles-por-tipo').get_json()
+        assert datos['moto'] == antes['moto'] - 1
+        assert datos['total'] == antes['total'] - 1
+        assert datos['moto'] == client.get('/api/dashboard/ocupacion-por-tipo').get_json()['moto']['disponibles']
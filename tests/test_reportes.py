@@ -185,14 +185,14 @@ class TestReporteOcupacion:
     def test_reporte_ocupacion_con_datos(self, client, app):
         """Prueba reporte de ocupación con espacios ocupados"""
         with app.app_context():
-            vehiculo = Vehiculo(placa='OCC001')
-            db.session.add(vehiculo)
-            db.session.commit()
-            
-            # Ocupar algunos espacios
+            # Ocupar algunos espacios (un vehículo por ticket activo)
             espacios = Espacio.query.filter_by(estado='disponible', tipo='regular').limit(5).all()
             
             for i, espacio in enumerate(espacios):
+                vehiculo = Vehiculo(placa=f'OCC00{i+1}')
+                db.session.add(vehiculo)
+                db.session.flush()
+                
                 ticket = Ticket(
                     vehiculo_id=vehiculo.id,
                     espacio_id=espacio.id,
@@ -551,3 +551,126 @@ class TestReportesAutenticacion:
         for endpoint in endpoints:
             response = client.get(endpoint)
             assert response.status_code == 401, f"{endpoint} no requiere autenticación"
+
+
+ESTADISTICAS = [
+    '/api/transacciones/estadisticas',
+    '/api/dashboard/estadisticas',
+]
+
+# Reportes de ingresos servidos desde el cubo: no leen la tabla de tickets
+REPORTES_CUBO = [
+    '/api/reportes/ingresos-periodo',
+    '/api/reportes/metodos-pago',
+    '/api/reportes/ocupacion-espacios',
+]
+
+
+class TestEstadisticasAgregadas:
+    """Las estadísticas se calculan en SQL: no se cargan tickets"""
+    
+    def _sentencias(self, client, app, url):
+        """(response, sentencias SQL) de un GET con 20 tickets finalizados"""
+        from sqlalchemy import event
+        
+        with app.app_context():
+            vehiculo = Vehiculo(placa='AGR001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            ahora = datetime.now(timezone.utc)
+            for i in range(20):
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa='AGR001',
+                    tipo_vehiculo='regular', estado='finalizado',
+                    fecha_entrada=ahora - timedelta(hours=2, minutes=i),
+                    fecha_salida=ahora - timedelta(minutes=i),
+                    monto=50.0, metodo_pago='efectivo'
+                ))
+            db.session.commit()
+            engine = db.engine
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        sentencias = []
+        
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+        
+        assert response.status_code == 200
+        return response, sentencias
+    
+    @pytest.mark.parametrize('url', ESTADISTICAS)
+    def test_no_carga_tickets(self, client, app, url):
+        """Prueba que ninguna consulta trae filas de tickets, solo agregados"""
+        _, sentencias = self._sentencias(client, app, url)
+        consultas_tickets = [s for s in sentencias if 'FROM tickets' in s]
+        assert consultas_tickets
+        # Solo agregados: ninguna consulta devuelve filas de tickets
+        assert not [s for s in consultas_tickets if s.lstrip().startswith('SELECT tickets.id')], consultas_tickets
+    
+    @pytest.mark.parametrize('url', REPORTES_CUBO)
+    def test_reportes_solo_leen_el_cubo(self, client, app, url):
+        """Prueba que los reportes de ingresos leen el cubo y ninguna consulta toca tickets"""
+        import re
+        
+        response, sentencias = self._sentencias(client, app, url)
+        
+        assert [s for s in sentencias if 'FROM cubo_ingresos' in s]
+        assert not [s for s in sentencias if re.search(r'\b(FROM|JOIN)\s+tickets\b', s)], sentencias
+        assert response.get_json()
+    
+    def test_ingresos_por_periodo_limites(self, app):
+        """Prueba los límites de hoy, semana y mes en la consulta agregada"""
+        from app.utils.estadisticas import ingresos_por_periodo
+        
+        # Días en UTC; el corrimiento local se prueba aparte
+        app.config['REPORTES_UTC_OFFSET_MINUTOS'] = 0
+        # Miércoles 14 de febrero: la semana empieza el lunes 12
+        ahora = datetime(2024, 2, 14, 18, 0, tzinfo=timezone.utc)
+        salidas = [
+            (datetime(2024, 2, 14, 9, 0), 10.0),    # hoy
+            (datetime(2024, 2, 12, 0, 0), 20.0),    # semana (inicio exacto)
+            (datetime(2024, 2, 11, 23, 59), 40.0),  # mes
+            (datetime(2024, 1, 31, 23, 59), 80.0),  # mes anterior
+        ]
+        
+        with app.app_context():
+            vehiculo = Vehiculo(placa='PER001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            for salida, monto in salidas:
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa='PER001',
+                    tipo_vehiculo='regular', estado='finalizado',
+                    fecha_entrada=salida - timedelta(hours=1), fecha_salida=salida,
+                    monto=monto, metodo_pago='efectivo'
+                ))
+            db.session.commit()
+            
+            periodos = ingresos_por_periodo(ahora)
+        
+        assert periodos['hoy'] == {'ingresos': 10.0, 'transacciones': 1}
+        assert periodos['semana'] == {'ingresos': 30.0, 'transacciones': 2}
+        assert periodos['mes'] == {'ingresos': 70.0, 'transacciones': 3}
+        
+        # UTC-4: el día local empieza a las 04:00 UTC
+        app.config['REPORTES_UTC_OFFSET_MINUTOS'] = -240
+        with app.app_context():
+            periodos = ingresos_por_periodo(ahora)
+        
+        assert periodos['hoy'] == {'ingresos': 10.0, 'transacciones': 1}
+        assert periodos['semana'] == {'ingresos': 10.0, 'transacciones': 1}
+        assert periodos['mes'] == {'ingresos': 70.0, 'transacciones': 3}
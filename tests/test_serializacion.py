@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import event
+from app.models.ticket import Ticket
+from app.models.vehiculo import Vehiculo
+from app.models.espacio import Espacio
+from app.extensions import db
+from app.utils.serializacion import con_espacio, serializar_ticket
+from datetime import datetime, timezone, timedelta
+
+
+LISTADOS = [
+    '/api/tickets/activos',
+    '/api/transacciones',
+    '/api/dashboard/actividad-reciente',
+]
+
+
+def _crear_tickets(app, desde, cantidad):
+    """`cantidad` tickets activos y `cantidad` finalizados, cada uno con su vehículo y espacio"""
+    with app.app_context():
+        espacios = Espacio.query.filter_by(estado='disponible').order_by(Espacio.id).limit(cantidad).all()
+        ahora = datetime.now(timezone.utc)
+        
+        for i, espacio in enumerate(espacios, start=desde):
+            activo = Vehiculo(placa=f'SER{i:03d}A')
+            finalizado = Vehiculo(placa=f'SER{i:03d}F')
+            db.session.add_all([activo, finalizado])
+            db.session.flush()
+            
+            db.session.add(Ticket(
+                vehiculo_id=activo.id, espacio_id=espacio.id, placa=activo.placa,
+                tipo_vehiculo=espacio.tipo, estado='activo',
+                fecha_entrada=ahora - timedelta(minutes=i)
+            ))
+            db.session.add(Ticket(
+                vehiculo_id=finalizado.id, espacio_id=espacio.id, placa=finalizado.placa,
+                tipo_vehiculo=espacio.tipo, estado='finalizado',
+                fecha_entrada=ahora - timedelta(hours=3, minutes=i),
+                fecha_salida=ahora - timedelta(hours=1, minutes=i),
+                monto=100.0, metodo_pago='efectivo'
+            ))
+            espacio.estado = 'ocupado'
+        
+        db.session.commit()
+
+
+class TestListadosSinNMas1:
+    """Los listados de tickets usan un número constante de consultas"""
+    
+    def _contar_consultas(self, client, app, url):
+        sentencias = []
+        
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        with app.app_context():
+            engine = db.engine
+        
+        event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, 'before_cursor_execute', contar)
+        
+        assert response.status_code == 200
+        return len(sentencias), response.get_json()
+    
+    @pytest.mark.parametrize('url', LISTADOS)
+    def test_consultas_no_crecen_con_las_filas(self, client, app, url):
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        _crear_tickets(app, 0, 2)
+        pocas, datos = self._contar_consultas(client, app, url)
+        assert len(datos) == 2 or url.endswith('actividad-reciente')
+        
+        _crear_tickets(app, 100, 20)
+        muchas, datos = self._contar_consultas(client, app, url)
+        assert len(datos) > 2
+        
+        assert pocas == muchas
+        assert muchas <= 2
+    
+    def test_espacio_incluido_en_la_respuesta(self, client, app):
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        _crear_tickets(app, 0, 1)
+        
+        ticket = client.get('/api/tickets/activos').get_json()[0]
+        
+        assert ticket['espacio_numero'] == ticket['espacio']['numero']
+        assert ticket['espacio']['tipo'] == 'regular'
+    
+    def test_serializar_sin_espacio_cargado_no_consulta(self, app):
+        """El serializador no dispara cargas perezosas: exige con_espacio()"""
+        _crear_tickets(app, 0, 1)
+        
+        with app.app_context():
+            ticket = Ticket.query.first()
+            with pytest.raises(RuntimeError):
+                serializar_ticket(ticket)
+            
+            ticket = con_espacio(Ticket.query).first()
+            assert serializar_ticket(ticket)['espacio_numero'] is not None
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from app.utils.streaming import arreglo_json
+
+
+class TestArregloJSON:
+    """Pruebas del generador de arreglos JSON en flujo"""
+
+    def test_emite_por_lotes(self, app):
+        """Prueba que el arreglo sale en fragmentos de un lote y es JSON válido"""
+        with app.app_context():
+            fragmentos = list(arreglo_json(range(5), lambda n: {'n': n}, tamano_lote=2))
+
+        # '[', tres lotes (2, 2, 1) y ']'
+        assert len(fragmentos) == 5
+        assert fragmentos[0] == '[' and fragmentos[-1] == ']'
+        assert json.loads(''.join(fragmentos)) == [{'n': n} for n in range(5)]
+
+    def test_primer_fragmento_antes_de_leer_filas(self, app):
+        """Prueba que el '[' se emite sin consumir la consulta"""
+        leidas = []
+
+        def filas():
+            for n in range(3):
+                leidas.append(n)
+                yield n
+
+        with app.app_context():
+            generador = arreglo_json(filas(), lambda n: n)
+            assert next(generador) == '['
+            assert leidas == []
+
+    def test_error_a_mitad_corta_el_flujo(self, app):
+        """Prueba que un error se relanza y deja el arreglo sin cerrar"""
+        def filas():
+            yield 1
+            raise RuntimeError("conexión perdida")
+
+        fragmentos = []
+        with app.app_context():
+            with pytest.raises(RuntimeError):
+                for fragmento in arreglo_json(filas(), lambda n: n, tamano_lote=1):
+                    fragmentos.append(fragmento)
+
+        assert ''.join(fragmentos) == '[1'
@@ -0,0 +1,175 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+from app.utils.tarifas import TarifaCompilada, TARIFA_POR_DEFECTO
+
+
+# Entradas en hora local de RD (UTC-4) expresadas en UTC
+def _local(hora, minuto=0, dia=1):
+    return datetime(2024, 1, dia, hora, minuto, tzinfo=timezone.utc) + timedelta(hours=4)
+
+
+def _tarifa(**cambios):
+    definicion = {
+        'minutos_gracia': 0,
+        'incremento_minutos': 60,
+        'minimo_minutos': 60,
+        'utc_offset_minutos': -240,
+        'tipos': {'regular': {'tarifa_hora': 50.0}}
+    }
+    definicion.update(cambios)
+    return TarifaCompilada(definicion)
+
+
+class TestMotorTarifas:
+    """Pruebas del motor de tarifas (sin base de datos)"""
+    
+    def test_tarifa_por_defecto_igual_a_la_anterior(self):
+        """La tarifa por defecto cobra por hora, redondeando hacia arriba, mínimo 1 hora"""
+        tarifa = TarifaCompilada(TARIFA_POR_DEFECTO)
+        entrada = _local(10)
+        
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=5), 'regular') == 50.0
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=61), 'regular') == 100.0
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=3), 'moto') == 75.0
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=2), 'discapacitado') == 160.0
+        # Tipo desconocido: tarifa regular
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=1), 'camion') == 50.0
+    
+    def test_minutos_de_gracia(self):
+        tarifa = _tarifa(minutos_gracia=15)
+        entrada = _local(10)
+        
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=15), 'regular') == 0.0
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=16), 'regular') == 50.0
+    
+    def test_incremento_fraccional(self):
+        """Bloques de 15 minutos con mínimo de 30"""
+        tarifa = _tarifa(incremento_minutos=15, minimo_minutos=30)
+        entrada = _local(10)
+        
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=10), 'regular') == 25.0
+        assert tarifa.calcular(entrada, entrada + timedelta(minutes=46), 'regular') == 50.0
+    
+    def test_bandas_horarias_cruzando_medianoche(self):
+        """Banda nocturna 22:00-06:00 a RD$20/hora"""
+        tarifa = _tarifa(tipos={'regular': {
+            'tarifa_hora': 50.0,
+            'bandas': [{'desde': '22:00', 'hasta': '06:00', 'tarifa_hora': 20.0}]
+        }})
+        
+        # 21:00 -> 23:00: una hora diurna y una nocturna
+        assert tarifa.calcular(_local(21), _local(23), 'regular') == 70.0
+        # 23:00 -> 07:00 del día siguiente: 7h nocturnas y 1h diurna
+        assert tarifa.calcular(_local(23), _local(7, dia=2), 'regular') == 7 * 20.0 + 50.0
+    
+    def test_tope_diario(self):
+        """El tope se aplica a cada bloque de 24h desde la entrada"""
+        tarifa = _tarifa(tipos={'regular': {'tarifa_hora': 50.0, 'tope_diario': 300.0}})
+        entrada = _local(8)
+        
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=4), 'regular') == 200.0
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=10), 'regular') == 300.0
+        # Dos días completos y 2 horas
+        assert tarifa.calcular(entrada, entrada + timedelta(hours=50), 'regular') == 700.0
+    
+    def test_recargo_por_ocupacion(self):
+        tarifa = _tarifa(recargos_ocupacion=[
+            {'desde': 80, 'factor': 1.2},
+            {'desde': 95, 'factor': 1.5}
+        ])
+        entrada = _local(10)
+        salida = entrada + timedelta(hours=2)
+        
+        assert tarifa.calcular(entrada, salida, 'regular', {'regular': 50}) == 100.0
+        assert tarifa.calcular(entrada, salida, 'regular', {'regular': 85}) == 120.0
+        assert tarifa.calcular(entrada, salida, 'regular', {'regular': 100}) == 150.0
+    
+    def test_calcular_lote(self):
+        tarifa = TarifaCompilada(TARIFA_POR_DEFECTO)
+        entrada = _local(10)
+        estancias = [(entrada, entrada + timedelta(hours=h), 'regular') for h in range(1, 2001)]
+        
+        montos = tarifa.calcular_lote(estancias)
+        
+        assert len(montos) == 2000
+        assert montos[0] == 50.0
+        assert montos[-1] == 2000 * 50.0
+    
+    @pytest.mark.parametrize('definicion', [
+        {},
+        {'tipos': {'regular': {'tarifa_hora': 'mucho'}}},
+        {'tipos': {'regular': {'tarifa_hora': 50, 'bandas': [{'desde': '25:00', 'hasta': '06:00', 'tarifa_hora': 1}]}}},
+        {'tipos': {'moto': {'tarifa_hora': 25}}},  # falta el tipo por defecto
+    ])
+    def test_definicion_invalida(self, definicion):
+        with pytest.raises(ValueError):
+            TarifaCompilada(definicion)
+
+
+class TestTarifasAPI:
+    """Pruebas para la API de tarifas versionadas"""
+    
+    def _login(self, client):
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+    
+    def test_tarifa_vigente_por_defecto(self, client):
+        self._login(client)
+        
+        response = client.get('/api/tarifas/vigente')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['version'] == 0
+        assert data['definicion']['tipos']['regular']['tarifa_hora'] == 50.0
+    
+    def test_publicar_tarifa_cambia_el_cobro(self, client):
+        self._login(client)
+        definicion = dict(TARIFA_POR_DEFECTO, tipos={'regular': {'tarifa_hora': 70.0}})
+        
+        response = client.post('/api/tarifas', json={'definicion': definicion, 'descripcion': 'Nueva'})
+        assert response.status_code == 201
+        assert response.get_json()['tarifa']['version'] == 1
+        
+        # Segunda versión: la primera queda inactiva
+        client.post('/api/tarifas', json={'definicion': definicion})
+        versiones = client.get('/api/tarifas').get_json()
+        assert [t['version'] for t in versiones] == [2, 1]
+        assert [t['activa'] for t in versiones] == [True, False]
+        
+        # La salida cobra con la tarifa publicada
+        ticket = client.post('/api/tickets/ingresar', json={
+            'placa': 'TAR001', 'tipo_vehiculo': 'regular'
+        }).get_json()['ticket']
+        response = client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'efectivo'})
+        assert response.get_json()['ticket']['monto'] == 70.0
+    
+    def test_publicar_tarifa_invalida(self, client):
+        self._login(client)
+        
+        response = client.post('/api/tarifas', json={'definicion': {'tipos': {}}})
+        
+        assert response.status_code == 400
+        assert client.get('/api/tarifas').get_json() == []
+    
+    def test_calcular_lote(self, client):
+        self._login(client)
+        
+        response = client.post('/api/tarifas/calcular-lote', json={'estancias': [
+            {'fecha_entrada': '2024-01-01T10:00:00Z', 'fecha_salida': '2024-01-01T12:30:00Z', 'tipo_vehiculo': 'regular'},
+            {'fecha_entrada': '2024-01-01T10:00:00', 'fecha_salida': '2024-01-01T10:20:00', 'tipo_vehiculo': 'moto'}
+        ]})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['montos'] == [150.0, 25.0]
+        assert data['total'] == 175.0
+    
+    def test_calcular_lote_invalido(self, client):
+        self._login(client)
+        
+        response = client.post('/api/tarifas/calcular-lote', json={'estancias': [{'tipo_vehiculo': 'moto'}]})
+        
+        assert response.status_code == 400
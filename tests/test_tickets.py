@@ -3,6 +3,7 @@ from app.models.ticket import Ticket
 from app.models.vehiculo import Vehiculo
 from app.models.espacio import Espacio
 from app.extensions import db
+from app.utils.asignacion import obtener_indice
 from datetime import datetime, timezone, timedelta
 
 
@@ -242,8 +243,8 @@ class TestTicketsAPI:
         assert data['monto_formateado'].startswith('RD$')
         assert ',' in data['monto_formateado'] or data['monto'] < 1000  # Tiene comas si es >= 1000
     
-    def test_tiempo_transcurrido_calculado_backend(self, client, app):
-        """Prueba que el tiempo transcurrido se calcula en el backend"""
+    def test_tiempo_transcurrido_fuera_del_listado(self, client, app):
+        """Prueba que el listado trae la fecha de entrada y no el tiempo transcurrido (cacheable)"""
         # Crear ticket activo hace 2 horas
         with app.app_context():
             vehiculo = Vehiculo(placa='TIEMPO123')
@@ -284,10 +285,10 @@ class TestTicketsAPI:
         ticket_encontrado = next((t for t in data if t['placa'] == 'TIEMPO123'), None)
         assert ticket_encontrado is not None
         
-        # Verificar que tiene tiempo transcurrido
-        assert 'tiempo_transcurrido' in ticket_encontrado
-        assert 'horas' in ticket_encontrado['tiempo_transcurrido']
-        assert ticket_encontrado['tiempo_transcurrido']['horas'] >= 2
+        # El cliente calcula el tiempo desde fecha_entrada
+        assert 'tiempo_transcurrido' not in ticket_encontrado
+        entrada = datetime.fromisoformat(ticket_encontrado['fecha_entrada']).replace(tzinfo=timezone.utc)
+        assert datetime.now(timezone.utc) - entrada >= timedelta(hours=2)
     
     def test_asignacion_automatica_espacio_regular(self, client, app):
         """Prueba que asigna automáticamente el espacio regular más cercano"""
@@ -384,6 +385,364 @@ class TestTicketsAPI:
         assert data['monto'] == 50.0, f"Se esperaba 50.0, pero se obtuvo {data['monto']}"
 
 
+    
+    def test_ingresar_lote(self, client, app):
+        """Prueba el ingreso por lote con resultados parciales"""
+        with app.app_context():
+            vehiculo = Vehiculo(placa='LOTE-ADENTRO')
+            espacio = Espacio.query.filter_by(tipo='discapacitado').first()
+            db.session.add(vehiculo)
+            db.session.flush()
+            db.session.add(Ticket(
+                vehiculo_id=vehiculo.id,
+                espacio_id=espacio.id,
+                placa='LOTE-ADENTRO',
+                tipo_vehiculo='discapacitado',
+                estado='activo'
+            ))
+            espacio.estado = 'ocupado'
+            db.session.commit()
+        
+        # Login
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        # 4 espacios de discapacitado libres para 6 vehículos
+        lote = [{'placa': f'lote{i}', 'tipo_vehiculo': 'discapacitado'} for i in range(6)]
+        lote += [
+            {'placa': 'LOTE-MOTO', 'tipo_vehiculo': 'moto'},
+            {'placa': 'lote0', 'tipo_vehiculo': 'regular'},
+            {'placa': 'LOTE-ADENTRO', 'tipo_vehiculo': 'regular'},
+            {'placa': ''}
+        ]
+        
+        response = client.post('/api/tickets/ingresar-lote', json={'vehiculos': lote})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        estados = [r['status'] for r in data['resultados']]
+        
+        assert estados == [201] * 4 + [404] * 2 + [201, 400, 400, 400]
+        assert data['ingresados'] == 5
+        assert data['resultados'][0]['placa'] == 'LOTE0'
+        assert data['resultados'][6]['espacio']['tipo'] == 'moto'
+        
+        with app.app_context():
+            activos = Ticket.query.filter_by(estado='activo').all()
+            assert len(activos) == 6
+            assert len({t.espacio_id for t in activos}) == 6
+            assert Espacio.query.filter_by(estado='ocupado').count() == 6
+            assert Vehiculo.query.filter(Vehiculo.placa.like('LOTE%')).count() == 8
+    
+    def test_ingresar_lote_vacio(self, client):
+        """Prueba que el lote requiere una lista de vehículos"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.post('/api/tickets/ingresar-lote', json={'vehiculos': []})
+        
+        assert response.status_code == 400
+
+    
+    def test_cierre_masivo(self, client, app):
+        """Prueba el cierre de fin de día, filtrado por sección y luego total"""
+        with app.app_context():
+            for placa, numero, tipo in [('CIE001', 'A-01', 'regular'),
+                                        ('CIE002', 'B-01', 'regular'),
+                                        ('CIE003', 'D-01', 'moto')]:
+                vehiculo = Vehiculo(placa=placa)
+                espacio = Espacio.query.filter_by(numero=numero).first()
+                db.session.add(vehiculo)
+                db.session.flush()
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa=placa,
+                    tipo_vehiculo=tipo,
+                    estado='activo',
+                    fecha_entrada=datetime.now(timezone.utc) - timedelta(minutes=90)
+                ))
+                espacio.estado = 'ocupado'
+            db.session.commit()
+        
+        # Login
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        # Cerrar solo la sección A
+        response = client.post('/api/tickets/cierre', json={'seccion': 'A', 'metodo_pago': 'tarjeta'})
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['cerrados'] == 1
+        assert data['tickets'][0]['placa'] == 'CIE001'
+        assert data['monto_total'] == 100.0  # 2 horas regular
+        
+        # Cerrar el resto
+        response = client.post('/api/tickets/cierre')
+        data = response.get_json()
+        assert data['cerrados'] == 2
+        assert data['monto_total'] == 150.0  # 100 regular + 50 moto
+        assert data['por_tipo']['moto'] == {'cantidad': 1, 'monto': 50.0}
+        
+        with app.app_context():
+            assert Ticket.query.filter_by(estado='activo').count() == 0
+            assert Espacio.query.filter_by(estado='ocupado').count() == 0
+            ticket = Ticket.query.filter_by(placa='CIE001').first()
+            assert ticket.metodo_pago == 'tarjeta'
+            assert ticket.monto == 100.0
+            assert ticket.fecha_salida is not None
+
+    
+    def test_cierre_masivo_con_salida_concurrente(self, client, app, monkeypatch):
+        """Prueba que un ticket finalizado entre la lectura y el UPDATE no se cierra de nuevo"""
+        from sqlalchemy import func, update
+        from app.models.cubo_ingresos import CuboIngresos
+        from app.utils import tarifas
+        
+        with app.app_context():
+            tickets = {}
+            for placa, numero in [('CON001', 'A-01'), ('CON002', 'A-02')]:
+                vehiculo = Vehiculo(placa=placa)
+                espacio = Espacio.query.filter_by(numero=numero).first()
+                db.session.add(vehiculo)
+                db.session.flush()
+                ticket = Ticket(vehiculo_id=vehiculo.id, espacio_id=espacio.id, placa=placa,
+                                tipo_vehiculo='regular', estado='activo',
+                                fecha_entrada=datetime.now(timezone.utc) - timedelta(minutes=90))
+                db.session.add(ticket)
+                espacio.estado = 'ocupado'
+                db.session.flush()
+                tickets[placa] = (ticket.id, espacio.id)
+            db.session.commit()
+        
+        calcular_montos = tarifas.calcular_montos
+        
+        def salida_en_otra_garita(items):
+            # Mientras el cierre calcula, CON001 sale y su espacio se vuelve a ocupar
+            ticket_id, espacio_id = tickets['CON001']
+            db.session.execute(update(Ticket).where(Ticket.id == ticket_id).values(
+                estado='finalizado', fecha_salida=datetime.now(timezone.utc), monto=100.0
+            ))
+            vehiculo = Vehiculo(placa='CON003')
+            db.session.add(vehiculo)
+            db.session.flush()
+            db.session.add(Ticket(vehiculo_id=vehiculo.id, espacio_id=espacio_id, placa='CON003',
+                                  tipo_vehiculo='regular', estado='activo'))
+            db.session.flush()
+            return calcular_montos(items)
+        
+        monkeypatch.setattr(tarifas, 'calcular_montos', salida_en_otra_garita)
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        data = client.post('/api/tickets/cierre').get_json()
+        
+        assert data['cerrados'] == 1
+        assert [t['placa'] for t in data['tickets']] == ['CON002']
+        
+        with app.app_context():
+            # El espacio de CON001 sigue ocupado por CON003 y el cubo suma solo CON002
+            assert db.session.get(Espacio, tickets['CON001'][1]).estado == 'ocupado'
+            assert db.session.get(Espacio, tickets['CON002'][1]).estado == 'disponible'
+            assert Ticket.query.filter_by(placa='CON003', estado='activo').count() == 1
+            assert db.session.execute(db.select(func.sum(CuboIngresos.transacciones))).scalar() == 1
+    
+    def test_ingreso_duplicado_informa_espacio(self, client, app):
+        """Prueba que un segundo ingreso de la misma placa informa su espacio actual"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        primero = client.post('/api/tickets/ingresar', json={'placa': 'DUP123', 'tipo_vehiculo': 'moto'})
+        segundo = client.post('/api/tickets/ingresar', json={'placa': 'dup123', 'tipo_vehiculo': 'moto'})
+        
+        assert primero.status_code == 201
+        assert segundo.status_code == 400
+        assert primero.get_json()['espacio']['numero'] in segundo.get_json()['error']
+        
+        with app.app_context():
+            assert Ticket.query.filter_by(placa='DUP123').count() == 1
+            assert Espacio.query.filter_by(estado='ocupado').count() == 1
+    
+    def test_ruta_rapida_sentencias_por_evento(self, client, app):
+        """Prueba que ingreso y salida usan un número fijo y mínimo de sentencias"""
+        from sqlalchemy import event
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        # Calentar el índice de espacios y la tarifa compilada
+        with app.app_context():
+            obtener_indice().asegurar_caliente()
+        client.get('/api/tarifas/vigente')
+        
+        sentencias = []
+        
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        with app.app_context():
+            engine = db.engine
+        
+        event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            response = client.post('/api/tickets/ingresar', json={'placa': 'RAP001', 'tipo_vehiculo': 'regular'})
+            assert response.status_code == 201
+            sentencias_ingreso = len(sentencias)
+            
+            ticket_id = response.get_json()['ticket']['id']
+            sentencias.clear()
+            
+            response = client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'efectivo'})
+            assert response.status_code == 200
+            sentencias_salida = len(sentencias)
+        finally:
+            event.remove(engine, 'before_cursor_execute', contar)
+        
+        # Registro del vehículo nuevo, reclamo del espacio e inserción del ticket
+        assert sentencias_ingreso == 3
+        # Lectura del ticket, finalización, liberación del espacio y upsert del cubo
+        assert sentencias_salida == 4
+
+    
+    def test_placa_conocida_no_sube_version_vehiculos(self, client, app):
+        """Prueba que el ingreso de una placa registrada no reescribe el vehículo"""
+        from app.utils.versiones import leer_versiones
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        primero = client.post('/api/tickets/ingresar', json={'placa': 'VER200', 'tipo_vehiculo': 'regular'})
+        client.post(f"/api/tickets/{primero.get_json()['ticket']['id']}/salida", json={'metodo_pago': 'efectivo'})
+        
+        with app.app_context():
+            antes = leer_versiones(['vehiculos'])['vehiculos']
+        
+        response = client.post('/api/tickets/ingresar', json={'placa': 'VER200', 'tipo_vehiculo': 'regular'})
+        
+        assert response.status_code == 201
+        assert response.get_json()['ticket']['vehiculo_id'] == primero.get_json()['ticket']['vehiculo_id']
+        with app.app_context():
+            assert leer_versiones(['vehiculos'])['vehiculos'] == antes
+    
+    def test_cotizaciones_activos(self, client, app):
+        """Prueba que la cotización calcula el monto acumulado sin finalizar tickets"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        for placa, tipo in [('COT001', 'regular'), ('COT002', 'moto')]:
+            client.post('/api/tickets/ingresar', json={'placa': placa, 'tipo_vehiculo': tipo})
+        
+        with app.app_context():
+            hace = datetime.now(timezone.utc) - timedelta(hours=2, minutes=30)
+            Ticket.query.update({'fecha_entrada': hace})
+            db.session.commit()
+        
+        response = client.get('/api/tickets/cotizaciones')
+        
+        assert response.status_code == 200
+        assert 'max-age' in response.headers['Cache-Control']
+        data = response.get_json()
+        assert data['total'] == 2
+        montos = {t['placa']: t['monto'] for t in data['tickets']}
+        assert montos == {'COT001': 150.0, 'COT002': 75.0}
+        assert data['monto_total'] == 225.0
+        
+        with app.app_context():
+            assert Ticket.query.filter_by(estado='activo').count() == 2
+    
+    def test_cotizacion_ticket(self, client):
+        """Prueba la cotización de un ticket y que se invalida al salir"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        ticket_id = client.post('/api/tickets/ingresar', json={
+            'placa': 'COT003', 'tipo_vehiculo': 'discapacitado'
+        }).get_json()['ticket']['id']
+        
+        response = client.get(f'/api/tickets/{ticket_id}/cotizacion')
+        assert response.status_code == 200
+        assert response.get_json()['ticket']['monto'] == 80.0
+        
+        client.post(f'/api/tickets/{ticket_id}/salida', json={'metodo_pago': 'efectivo'})
+        
+        assert client.get(f'/api/tickets/{ticket_id}/cotizacion').status_code == 400
+        assert client.get('/api/tickets/99999/cotizacion').status_code == 404
+        assert client.get('/api/tickets/cotizaciones').get_json()['total'] == 0
+    
+    def test_cotizacion_tras_pago_en_otro_worker(self, client, app):
+        """Prueba que un ticket finalizado sin pasar por este worker deja de cotizarse"""
+        from sqlalchemy import update
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        ticket_id = client.post('/api/tickets/ingresar', json={
+            'placa': 'COT005', 'tipo_vehiculo': 'regular'
+        }).get_json()['ticket']['id']
+        assert client.get(f'/api/tickets/{ticket_id}/cotizacion').status_code == 200
+        
+        # Otro worker cobra el ticket: no invalida la caché de este proceso
+        with app.app_context():
+            db.session.execute(update(Ticket).where(Ticket.id == ticket_id).values(
+                estado='finalizado', fecha_salida=datetime.now(timezone.utc)
+            ))
+            db.session.commit()
+        
+        assert client.get(f'/api/tickets/{ticket_id}/cotizacion').status_code == 400
+        assert client.get('/api/tickets/cotizaciones').get_json()['total'] == 0
+    
+    def test_cotizaciones_cacheadas_por_minuto(self, client, app):
+        """Prueba que los kioscos consultando dentro del mismo minuto no van a la BD"""
+        from sqlalchemy import event
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        client.post('/api/tickets/ingresar', json={'placa': 'COT004', 'tipo_vehiculo': 'regular'})
+        
+        sentencias = []
+        
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        with app.app_context():
+            engine = db.engine
+        
+        # Reintento por si la prueba cruza el cambio de minuto
+        for _ in range(2):
+            primera = client.get('/api/tickets/cotizaciones').get_json()
+            sentencias.clear()
+            event.listen(engine, 'before_cursor_execute', contar)
+            try:
+                segunda = client.get('/api/tickets/cotizaciones').get_json()
+            finally:
+                event.remove(engine, 'before_cursor_execute', contar)
+            if primera['calculado_en'] == segunda['calculado_en']:
+                break
+        
+        assert primera['calculado_en'] == segunda['calculado_en']
+        # Solo la consulta del usuario del JWT, ninguna sobre tickets
+        assert not [s for s in sentencias if 'tickets' in s]
+
 
 class TestTicketModel:
     """Pruebas para el modelo de Ticket"""
@@ -441,3 +800,247 @@ class TestTicketModel:
 
 
 
+
+
+class TestIngresoConcurrente:
+    """Pruebas de estrés: varias garitas ingresando al mismo tiempo"""
+    
+    @pytest.fixture
+    def app_archivo(self, tmp_path, monkeypatch):
+        """App con SQLite en archivo (la BD en memoria comparte una sola conexión entre hilos)"""
+        import config
+        from app import create_app
+        from app.cli import crear_admin
+        
+        monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'concurrencia.db'}")
+        # Los 12 logins simultáneos entran al pool de hash sin recibir 503
+        monkeypatch.setattr(config, 'HASH_COLA_MAXIMA', 16)
+        app = create_app()
+        app.config['TESTING'] = True
+        
+        with app.app_context():
+            db.create_all()
+            crear_admin('admin')
+            for i in range(1, 6):
+                db.session.add(Espacio(
+                    numero=f'C-{i:02d}',
+                    tipo='discapacitado',
+                    estado='disponible',
+                    piso=1,
+                    seccion='C'
+                ))
+            db.session.commit()
+        
+        yield app
+        
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    
+    def _ingresar_en_paralelo(self, app, placas, tipo_vehiculo):
+        """Lanza un hilo por placa, todos liberados a la vez por una barrera"""
+        import threading
+        
+        barrera = threading.Barrier(len(placas))
+        resultados = []
+        lock = threading.Lock()
+        
+        def garita(placa):
+            cliente = app.test_client()
+            cliente.post('/auth/login', json={
+                'nombre_usuario': 'admin',
+                'password': 'admin'
+            })
+            barrera.wait()
+            response = cliente.post('/api/tickets/ingresar', json={
+                'placa': placa,
+                'tipo_vehiculo': tipo_vehiculo
+            })
+            with lock:
+                resultados.append(response.status_code)
+        
+        hilos = [threading.Thread(target=garita, args=(placa,)) for placa in placas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        return resultados
+    
+    def test_sin_doble_asignacion_de_espacios(self, app_archivo):
+        """Prueba que 12 garitas compitiendo por 5 espacios nunca comparten espacio"""
+        placas = [f'CONC{i:03d}' for i in range(12)]
+        
+        resultados = self._ingresar_en_paralelo(app_archivo, placas, 'discapacitado')
+        
+        assert sorted(resultados) == [201] * 5 + [404] * 7
+        
+        with app_archivo.app_context():
+            activos = Ticket.query.filter_by(estado='activo').all()
+            espacios_asignados = [t.espacio_id for t in activos]
+            
+            assert len(activos) == 5
+            assert len(set(espacios_asignados)) == 5
+            assert Espacio.query.filter_by(estado='ocupado').count() == 5
+    
+    def test_mismo_vehiculo_en_varias_garitas(self, app_archivo):
+        """Prueba que la misma placa en varias garitas genera un solo ticket activo"""
+        with app_archivo.app_context():
+            db.session.add(Vehiculo(placa='DUP001'))
+            db.session.commit()
+        
+        resultados = self._ingresar_en_paralelo(app_archivo, ['DUP001'] * 4, 'discapacitado')
+        
+        assert sorted(resultados) == [201] + [400] * 3
+        
+        with app_archivo.app_context():
+            assert Ticket.query.filter_by(placa='DUP001', estado='activo').count() == 1
+            assert Espacio.query.filter_by(estado='ocupado').count() == 1
+
+
+class TestRutaRapidaPostgresql:
+    """Ruta rápida de garita en PostgreSQL: ingreso y salida con CTEs de modificación"""
+    
+    def _cliente(self, app):
+        client = app.test_client()
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        return client
+    
+    def test_ingreso_y_salida(self, app_postgresql):
+        """Prueba que ingreso y salida dejan ticket, espacio, vehículo y cubo consistentes"""
+        from sqlalchemy import event, func
+        from app.models.cubo_ingresos import CuboIngresos
+        
+        client = self._cliente(app_postgresql)
+        with app_postgresql.app_context():
+            obtener_indice().asegurar_caliente()
+        client.get('/api/tarifas/vigente')
+        
+        sentencias = []
+        
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+        
+        with app_postgresql.app_context():
+            engine = db.engine
+        
+        event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            response = client.post('/api/tickets/ingresar', json={'placa': 'PGR001', 'tipo_vehiculo': 'regular'})
+            assert response.status_code == 201
+            sentencias_ingreso = len(sentencias)
+            ticket = response.get_json()['ticket']
+            sentencias.clear()
+            
+            response = client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'tarjeta'})
+            assert response.status_code == 200
+            sentencias_salida = len(sentencias)
+        finally:
+            event.remove(engine, 'before_cursor_execute', contar)
+        
+        # Placa nueva: la sentencia de ingreso, el registro del vehículo y la
+        # repetición; salida: lectura, finalizar+liberar y upsert del cubo
+        assert sentencias_ingreso == 3
+        assert sentencias_salida == 3
+        assert response.get_json()['ticket']['estado'] == 'finalizado'
+        
+        # Placa conocida: una sola sentencia
+        sentencias.clear()
+        event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            response = client.post('/api/tickets/ingresar', json={'placa': 'PGR001', 'tipo_vehiculo': 'regular'})
+            assert response.status_code == 201
+        finally:
+            event.remove(engine, 'before_cursor_execute', contar)
+        assert len(sentencias) == 1
+        client.post(f"/api/tickets/{response.get_json()['ticket']['id']}/salida", json={'metodo_pago': 'tarjeta'})
+        
+        with app_postgresql.app_context():
+            guardado = db.session.get(Ticket, ticket['id'])
+            assert guardado.estado == 'finalizado'
+            assert guardado.metodo_pago == 'tarjeta'
+            assert guardado.monto > 0
+            assert guardado.vehiculo.placa == 'PGR001'
+            assert db.session.get(Espacio, ticket['espacio_id']).estado == 'disponible'
+            assert Espacio.query.filter_by(estado='ocupado').count() == 0
+            assert db.session.execute(db.select(func.sum(CuboIngresos.transacciones))).scalar() == 2
+    
+    def test_placa_conocida_no_sube_version_vehiculos(self, app_postgresql):
+        """Prueba que el ingreso de una placa registrada no escribe el vehículo"""
+        from app.utils.versiones import leer_versiones
+        
+        client = self._cliente(app_postgresql)
+        primero = client.post('/api/tickets/ingresar', json={'placa': 'PGR010', 'tipo_vehiculo': 'regular'})
+        client.post(f"/api/tickets/{primero.get_json()['ticket']['id']}/salida", json={'metodo_pago': 'efectivo'})
+        
+        with app_postgresql.app_context():
+            antes = leer_versiones(['vehiculos'])['vehiculos']
+        
+        response = client.post('/api/tickets/ingresar', json={'placa': 'PGR010', 'tipo_vehiculo': 'regular'})
+        
+        assert response.status_code == 201
+        assert response.get_json()['ticket']['vehiculo_id'] == primero.get_json()['ticket']['vehiculo_id']
+        with app_postgresql.app_context():
+            assert leer_versiones(['vehiculos'])['vehiculos'] == antes
+    
+    def test_candidato_desactualizado(self, app_postgresql):
+        """Prueba que un espacio ocupado fuera del índice se salta sin dejar el ticket a medias"""
+        from sqlalchemy import text
+        
+        client = self._cliente(app_postgresql)
+        with app_postgresql.app_context():
+            obtener_indice().asegurar_caliente()
+        
+        # Otro worker ocupa A-01 sin que este índice se entere
+        with app_postgresql.app_context():
+            with db.engine.begin() as conexion:
+                conexion.execute(text("UPDATE espacios SET estado = 'ocupado' WHERE numero = 'A-01'"))
+        
+        response = client.post('/api/tickets/ingresar', json={'placa': 'PGR002', 'tipo_vehiculo': 'regular'})
+        
+        assert response.status_code == 201
+        assert response.get_json()['espacio']['numero'] == 'A-02'
+        with app_postgresql.app_context():
+            assert Ticket.query.count() == 1
+            assert Vehiculo.query.filter_by(placa='PGR002').count() == 1
+            assert Espacio.query.filter_by(estado='ocupado').count() == 2
+    
+    def test_ingreso_duplicado_no_ocupa_espacio(self, app_postgresql):
+        """Prueba que un ingreso duplicado revierte también el espacio de su CTE"""
+        client = self._cliente(app_postgresql)
+        
+        primero = client.post('/api/tickets/ingresar', json={'placa': 'PGR003', 'tipo_vehiculo': 'moto'})
+        segundo = client.post('/api/tickets/ingresar', json={'placa': 'PGR003', 'tipo_vehiculo': 'moto'})
+        tercero = client.post('/api/tickets/ingresar', json={'placa': 'PGR004', 'tipo_vehiculo': 'moto'})
+        
+        assert primero.status_code == 201
+        assert segundo.status_code == 400
+        assert tercero.status_code == 201
+        # El espacio que el duplicado tenía reservado vuelve al índice
+        assert tercero.get_json()['espacio']['numero'] == 'D-02'
+        with app_postgresql.app_context():
+            assert Ticket.query.filter_by(placa='PGR003').count() == 1
+            assert Espacio.query.filter_by(estado='ocupado').count() == 2
+    
+    def test_salida_ya_finalizada(self, app_postgresql):
+        """Prueba que una segunda salida no vuelve a liberar el espacio ni a sumar al cubo"""
+        from sqlalchemy import func
+        from app.models.cubo_ingresos import CuboIngresos
+        
+        client = self._cliente(app_postgresql)
+        ticket = client.post('/api/tickets/ingresar', json={'placa': 'PGR005', 'tipo_vehiculo': 'regular'}).get_json()['ticket']
+        
+        assert client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'efectivo'}).status_code == 200
+        # Otro vehículo toma el espacio liberado
+        reingreso = client.post('/api/tickets/ingresar', json={'placa': 'PGR007', 'tipo_vehiculo': 'regular'})
+        assert reingreso.get_json()['ticket']['espacio_id'] == ticket['espacio_id']
+        
+        response = client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'efectivo'})
+        
+        assert response.status_code == 400
+        with app_postgresql.app_context():
+            assert db.session.get(Espacio, ticket['espacio_id']).estado == 'ocupado'
+            assert db.session.execute(db.select(func.sum(CuboIngresos.transacciones))).scalar() == 1
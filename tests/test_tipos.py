@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy import event
+from app.extensions import db
+from app.models.espacio import Espacio
+from app.models.tipo_espacio import TipoEspacio
+from app.utils.asignacion import obtener_indice
+from app.utils.tipos import catalogo_tipos, invalidar_catalogo
+
+
+ENDPOINTS_POR_TIPO = [
+    '/api/dashboard/ocupacion-por-tipo',
+    '/api/espacios/disponibles-por-tipo',
+    '/api/transacciones/estadisticas',
+    '/api/reportes/ocupacion-espacios',
+]
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _agregar_tipos(app):
+    """Bahías de carga eléctrica y sobredimensionadas, con espacios"""
+    with app.app_context():
+        db.session.add_all([
+            TipoEspacio(codigo='electrico', nombre='Carga eléctrica', orden=4, tarifa_hora=60.0),
+            TipoEspacio(codigo='grande', nombre='Sobredimensionado', orden=5, tarifa_hora=100.0),
+        ])
+        db.session.add_all(
+            [Espacio(numero=f'E-{i:02d}', tipo='electrico', seccion='E', piso=1) for i in range(1, 4)]
+            + [Espacio(numero=f'G-{i:02d}', tipo='grande', seccion='G', piso=1) for i in range(1, 3)]
+        )
+        db.session.commit()
+        invalidar_catalogo()
+        obtener_indice().invalidar()
+
+
+def _contar_consultas(client, app, url):
+    with app.app_context():
+        engine = db.engine
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+    assert response.status_code == 200
+    return len(sentencias), response.get_json()
+
+
+class TestCatalogoTipos:
+    """Catálogo de tipos de espacio"""
+
+    def test_catalogo_inicial(self, app):
+        """Prueba los tipos sembrados y el tipo por defecto"""
+        with app.app_context():
+            catalogo = catalogo_tipos()
+            assert catalogo.codigos == ('regular', 'moto', 'discapacitado')
+            assert catalogo.normalizar('camion') == 'regular'
+            assert catalogo.normalizar('moto') == 'moto'
+            assert catalogo.por_seccion == {'regular'}
+            assert catalogo.por_tipo({'moto': 2, 'otro': 1}) == {
+                'regular': 0, 'moto': 2, 'discapacitado': 0, 'otro': 1
+            }
+
+    def test_tipo_nuevo_en_asignacion_y_tarifa(self, client, app):
+        """Prueba que un tipo agregado al catálogo se asigna y cobra sin tocar código"""
+        _agregar_tipos(app)
+        _login(client)
+
+        response = client.post('/api/tickets/ingresar', json={'placa': 'EV100', 'tipo_vehiculo': 'electrico'})
+        assert response.status_code == 201
+        ticket = response.get_json()['ticket']
+        assert ticket['espacio_numero'] == 'E-01'
+
+        response = client.post(f"/api/tickets/{ticket['id']}/salida", json={'metodo_pago': 'tarjeta'})
+        assert response.status_code == 200
+        assert response.get_json()['ticket']['monto'] == 60.0
+
+
+class TestEstadisticasPorTipo:
+    """Estadísticas por tipo con consultas constantes"""
+
+    @pytest.mark.parametrize('url', ENDPOINTS_POR_TIPO)
+    def test_consultas_no_crecen_con_los_tipos(self, client, app, url):
+        """Prueba que agregar tipos agrega filas a la respuesta, no consultas"""
+        app.config['REPORTES_CACHE_MAX_ENTRADAS'] = 0
+        _login(client)
+        client.get(url)
+
+        pocas, antes = _contar_consultas(client, app, url)
+        _agregar_tipos(app)
+        client.get(url)
+        muchas, despues = _contar_consultas(client, app, url)
+
+        assert pocas == muchas
+
+        por_tipo = despues.get('tipos_vehiculo') or despues.get('uso_por_tipo') or despues
+        assert {'electrico', 'grande'} <= set(por_tipo)
+        assert not {'electrico', 'grande'} & set(antes.get('tipos_vehiculo') or antes.get('uso_por_tipo') or antes)
+
+    def test_valores_de_tipos_nuevos(self, client, app):
+        """Prueba los conteos de los tipos nuevos"""
+        _agregar_tipos(app)
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'EV200', 'tipo_vehiculo': 'electrico'})
+
+        ocupacion = client.get('/api/dashboard/ocupacion-por-tipo').get_json()
+        assert set(ocupacion) == {'regular', 'moto', 'discapacitado', 'electrico', 'grande'}
+        assert ocupacion['electrico'] == {'total': 3, 'ocupados': 1, 'disponibles': 2, 'porcentaje': 33.3}
+
+        disponibles = client.get('/api/espacios/disponibles-por-tipo').get_json()
+        assert disponibles['electrico'] == 2
+        assert disponibles['grande'] == 2
+        assert disponibles['total'] == 55 + 5 - 1
@@ -191,6 +191,300 @@ class TestTransaccionesAPI:
         assert data[0]['id'] == ticket2_id
         assert data[1]['id'] == ticket1_id
     
+    def test_paginacion_por_cursor(self, client, app):
+        """Prueba que las páginas siguen el cursor sin repetir ni saltar tickets"""
+        with app.app_context():
+            vehiculo = Vehiculo(placa='PAG001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            base = datetime.now(timezone.utc) - timedelta(days=1)
+            
+            # Dos tickets con la misma fecha de salida: el id desempata
+            salidas = [base, base, base + timedelta(hours=1), base + timedelta(hours=2),
+                       base + timedelta(hours=3), base + timedelta(hours=4), base + timedelta(hours=5)]
+            for salida in salidas:
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa='PAG001',
+                    tipo_vehiculo='regular',
+                    estado='finalizado',
+                    fecha_entrada=salida - timedelta(hours=1),
+                    fecha_salida=salida,
+                    monto=50.0,
+                    metodo_pago='efectivo'
+                ))
+            db.session.commit()
+            
+            esperado = [t.id for t in Ticket.query.order_by(
+                Ticket.fecha_salida.desc(), Ticket.id.desc()
+            ).all()]
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        ids = []
+        paginas = 0
+        url = '/api/transacciones?limit=3'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            ids += [t['id'] for t in response.get_json()]
+            paginas += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/api/transacciones?limit=3&cursor={cursor}' if cursor else None
+        
+        assert paginas == 3
+        assert ids == esperado
+    
+    def test_sin_limit_pagina_por_defecto(self, client, app):
+        """Prueba que sin limit ni cursor se devuelve la primera página (POR_PAGINA)"""
+        with app.app_context():
+            vehiculo = Vehiculo(placa='TOD001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            base = datetime.now(timezone.utc) - timedelta(days=30)
+            db.session.add_all([
+                Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa='TOD001',
+                    tipo_vehiculo='regular',
+                    estado='finalizado',
+                    fecha_entrada=base + timedelta(hours=i),
+                    fecha_salida=base + timedelta(hours=i, minutes=30),
+                    monto=50.0,
+                    metodo_pago='efectivo'
+                )
+                for i in range(150)
+            ])
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones')
+        
+        assert response.status_code == 200
+        assert len(response.get_json()) == 100
+        assert 'X-Next-Cursor' in response.headers
+        
+        resto = client.get(f"/api/transacciones?cursor={response.headers['X-Next-Cursor']}")
+        assert len(resto.get_json()) == 50
+        assert 'X-Next-Cursor' not in resto.headers
+    
+    def test_paginacion_parametros_invalidos(self, client):
+        """Prueba que limit y cursor inválidos responden 400"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        assert client.get('/api/transacciones?limit=0').status_code == 400
+        assert client.get('/api/transacciones?limit=abc').status_code == 400
+        assert client.get('/api/transacciones?cursor=no-es-un-cursor').status_code == 400
+    
+    def test_listado_en_flujo_historial_completo(self, client, app):
+        """Prueba que ?stream=1 emite todo el historial (más de una página) en orden"""
+        with app.app_context():
+            vehiculo = Vehiculo(placa='FLU001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            base = datetime.now(timezone.utc) - timedelta(days=30)
+            db.session.add_all([
+                Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa='FLU001',
+                    tipo_vehiculo='regular',
+                    estado='finalizado',
+                    fecha_entrada=base + timedelta(hours=i),
+                    fecha_salida=base + timedelta(hours=i, minutes=30),
+                    monto=50.0,
+                    metodo_pago='efectivo'
+                )
+                for i in range(150)
+            ])
+            db.session.commit()
+            
+            numero = espacio.numero
+            esperado = [t.id for t in Ticket.query.order_by(
+                Ticket.fecha_salida.desc(), Ticket.id.desc()
+            ).all()]
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones?stream=1')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/json'
+        assert 'X-Next-Cursor' not in response.headers
+        
+        data = response.get_json()
+        assert [t['id'] for t in data] == esperado
+        assert data[0]['espacio']['numero'] == numero
+        assert data[0]['tiempo_estancia']['texto'] == '0h 30m'
+        assert data[0]['monto_formateado'] == 'RD$50.00'
+        
+        # Continúa desde el cursor de una página normal
+        primera = client.get('/api/transacciones?limit=100')
+        resto = client.get(f"/api/transacciones?stream=1&cursor={primera.headers['X-Next-Cursor']}")
+        assert [t['id'] for t in resto.get_json()] == esperado[100:]
+    
+    def test_listado_en_flujo_vacio_y_cursor_invalido(self, client):
+        """Prueba el flujo sin datos y que un cursor inválido responde 400 antes de emitir"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones?stream=1')
+        assert response.status_code == 200
+        assert response.get_json() == []
+        
+        assert client.get('/api/transacciones?stream=1&cursor=no-es-un-cursor').status_code == 400
+    
+    def test_listado_en_flujo_error_a_mitad(self, client, app, monkeypatch):
+        """Prueba que un error después del primer lote corta la respuesta en vez de cerrar el arreglo"""
+        from app.routes import transacciones_routes
+        
+        with app.app_context():
+            vehiculo = Vehiculo(placa='FLU002')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            base = datetime.now(timezone.utc) - timedelta(days=1)
+            db.session.add_all([
+                Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa='FLU002',
+                    tipo_vehiculo='regular',
+                    estado='finalizado',
+                    fecha_entrada=base + timedelta(hours=i),
+                    fecha_salida=base + timedelta(hours=i, minutes=30),
+                    monto=50.0,
+                    metodo_pago='efectivo'
+                )
+                for i in range(3)
+            ])
+            db.session.commit()
+        
+        serializar = transacciones_routes._serializar_transaccion
+        emitidas = []
+        
+        def serializar_y_fallar(ticket):
+            if emitidas:
+                raise RuntimeError("conexión perdida")
+            emitidas.append(ticket.id)
+            return serializar(ticket)
+        
+        monkeypatch.setattr(transacciones_routes, '_serializar_transaccion', serializar_y_fallar)
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones?stream=1')
+        assert response.status_code == 200
+        
+        # El error llega al servidor WSGI, que cierra la conexión
+        with pytest.raises(RuntimeError):
+            response.get_data()
+    
+    def _crear_para_exportar(self, app):
+        """Tickets finalizados en enero y febrero con distintos tipos y métodos de pago"""
+        with app.app_context():
+            vehiculo = Vehiculo(placa='EXP001')
+            db.session.add(vehiculo)
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='regular').first()
+            datos = [
+                (datetime(2024, 1, 10, 15, 0), 'regular', 'efectivo', 100.0),
+                (datetime(2024, 1, 31, 23, 30), 'moto', 'tarjeta', 25.0),
+                (datetime(2024, 2, 1, 8, 0), 'regular', 'tarjeta', 50.0),
+            ]
+            for salida, tipo, metodo, monto in datos:
+                db.session.add(Ticket(
+                    vehiculo_id=vehiculo.id,
+                    espacio_id=espacio.id,
+                    placa='EXP001',
+                    tipo_vehiculo=tipo,
+                    estado='finalizado',
+                    fecha_entrada=salida - timedelta(hours=2),
+                    fecha_salida=salida,
+                    monto=monto,
+                    metodo_pago=metodo
+                ))
+            db.session.commit()
+            return espacio.numero
+    
+    def test_exportar_csv_por_rango_de_fechas(self, client, app):
+        """Prueba la exportación CSV filtrada por mes (hasta incluye el día completo)"""
+        numero = self._crear_para_exportar(app)
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones/exportar?formato=csv&desde=2024-01-01&hasta=2024-01-31')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'transacciones.csv' in response.headers['Content-Disposition']
+        
+        lineas = response.get_data(as_text=True).splitlines()
+        assert lineas[0] == 'id,placa,espacio_numero,tipo_vehiculo,fecha_entrada,fecha_salida,monto,metodo_pago'
+        assert len(lineas) == 3
+        assert lineas[1].endswith(f',EXP001,{numero},regular,2024-01-10T13:00:00,2024-01-10T15:00:00,100.0,efectivo')
+        assert ',moto,' in lineas[2]
+    
+    def test_exportar_ndjson_por_tipo_y_metodo(self, client, app):
+        """Prueba la exportación NDJSON con filtros de tipo y método de pago"""
+        import json
+        self._crear_para_exportar(app)
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/transacciones/exportar?formato=ndjson&tipo=regular&metodo_pago=tarjeta')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        
+        filas = [json.loads(linea) for linea in response.get_data(as_text=True).splitlines()]
+        assert len(filas) == 1
+        assert filas[0]['fecha_salida'] == '2024-02-01T08:00:00'
+        assert filas[0]['monto'] == 50.0
+    
+    def test_exportar_parametros_invalidos(self, client):
+        """Prueba que formato y fechas inválidas responden 400 antes de exportar"""
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        assert client.get('/api/transacciones/exportar?formato=xlsx').status_code == 400
+        assert client.get('/api/transacciones/exportar?desde=ayer').status_code == 400
+        assert client.get('/api/transacciones/exportar?desde=2024-02-01&hasta=2024-01-01').status_code == 400
+    
     def test_estadisticas_transacciones(self, client, app):
         """Prueba obtener estadísticas de transacciones"""
         # Crear varios tickets finalizados
@@ -117,7 +117,100 @@ class TestVehiculosAPI:
         assert response.status_code == 200
         data = response.get_json()
         assert len(data) == 3
+    
+    def test_listar_vehiculos_sin_limit(self, client, app):
+        """Prueba que sin limit ni cursor se devuelve la primera página (POR_PAGINA)"""
+        with app.app_context():
+            db.session.add_all([Vehiculo(placa=f'TOD{i:03d}') for i in range(150)])
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/vehiculos')
+        
+        assert response.status_code == 200
+        assert len(response.get_json()) == 100
+        assert 'X-Next-Cursor' in response.headers
+    
+    def test_listar_vehiculos_paginado(self, client, app):
+        """Prueba la paginación por cursor (fecha de registro desc, id)"""
+        with app.app_context():
+            for i in range(5):
+                db.session.add(Vehiculo(placa=f'PAG{i:03d}'))
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        primera = client.get('/api/vehiculos?limit=2')
+        assert len(primera.get_json()) == 2
+        assert 'rel="next"' in primera.headers['Link']
+        
+        placas = [v['placa'] for v in primera.get_json()]
+        cursor = primera.headers['X-Next-Cursor']
+        while cursor:
+            response = client.get(f'/api/vehiculos?limit=2&cursor={cursor}')
+            placas += [v['placa'] for v in response.get_json()]
+            cursor = response.headers.get('X-Next-Cursor')
+        
+        assert sorted(placas) == [f'PAG{i:03d}' for i in range(5)]
+        assert len(set(placas)) == 5
 
+    
+    def test_listar_vehiculos_en_flujo(self, client, app):
+        """Prueba ?stream=1 con filtros: todos los resultados, sin límite de página"""
+        with app.app_context():
+            for i in range(120):
+                db.session.add(Vehiculo(placa=f'FLU{i:03d}', marca='Honda' if i % 2 else 'Toyota'))
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        response = client.get('/api/vehiculos?stream=1&buscar=toyota')
+        assert response.status_code == 200
+        assert response.is_streamed
+        
+        placas = [v['placa'] for v in response.get_json()]
+        assert sorted(placas) == [f'FLU{i:03d}' for i in range(0, 120, 2)]
+    
+    def test_exportar_vehiculos_por_tipo(self, client, app):
+        """Prueba la exportación CSV de vehículos filtrada por tipo de sus tickets"""
+        from app.models.ticket import Ticket
+        from app.models.espacio import Espacio
+        with app.app_context():
+            moto = Vehiculo(placa='MOT001')
+            auto = Vehiculo(placa='AUT001')
+            db.session.add_all([moto, auto])
+            db.session.commit()
+            
+            espacio = Espacio.query.filter_by(tipo='moto').first()
+            db.session.add(Ticket(
+                vehiculo_id=moto.id, espacio_id=espacio.id, placa='MOT001',
+                tipo_vehiculo='moto', estado='finalizado', monto=25.0
+            ))
+            db.session.commit()
+        
+        client.post('/auth/login', json={
+            'nombre_usuario': 'testuser',
+            'password': 'testpass'
+        })
+        
+        todos = client.get('/api/vehiculos/exportar').get_data(as_text=True).splitlines()
+        assert len(todos) == 3
+        
+        response = client.get('/api/vehiculos/exportar?tipo=moto')
+        assert response.status_code == 200
+        lineas = response.get_data(as_text=True).splitlines()
+        assert lineas[0].startswith('id,placa,')
+        assert len(lineas) == 2 and ',MOT001,' in lineas[1]
 
 class TestVehiculoModel:
     """Pruebas para el modelo de Vehículo"""
@@ -0,0 +1,223 @@
+import threading
+
+import pytest
+from sqlalchemy import event, text, update
+from app.models.espacio import Espacio
+from app.models.ticket import Ticket
+from app.models.version_datos import FAMILIAS, CambioVersion
+from app.extensions import db
+from app.utils import ocupacion
+from app.utils.versiones import leer_versiones, subir_version
+
+
+def _login(client):
+    client.post('/auth/login', json={
+        'nombre_usuario': 'testuser',
+        'password': 'testpass'
+    })
+
+
+def _versiones():
+    return leer_versiones(list(FAMILIAS))
+
+
+class TestVersionesDatos:
+    """Versiones por familia subidas por triggers"""
+
+    def test_escrituras_suben_su_familia(self, client, app):
+        """Prueba que cada escritura sube solo la versión de su tabla"""
+        with app.app_context():
+            antes = _versiones()
+            assert set(antes) == {'tickets', 'espacios', 'vehiculos', 'ingresos'}
+
+            db.session.execute(update(Espacio).where(Espacio.numero == 'A-01').values(estado='mantenimiento'))
+            db.session.commit()
+            despues = _versiones()
+            assert despues['espacios'] > antes['espacios']
+            assert despues['tickets'] == antes['tickets']
+
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'VER100', 'tipo_vehiculo': 'regular'})
+
+        with app.app_context():
+            final = _versiones()
+            assert all(final[f] > despues[f] for f in ('tickets', 'espacios', 'vehiculos'))
+
+    def test_rollback_no_sube_version(self, app):
+        """Prueba que la versión sigue la transacción"""
+        with app.app_context():
+            antes = _versiones()
+            db.session.execute(update(Espacio).values(estado='ocupado'))
+            db.session.rollback()
+            assert _versiones() == antes
+
+    def test_reconciliar_sube_espacios(self, app):
+        """Prueba que corregir contadores invalida los ETag de espacios"""
+        with app.app_context():
+            antes = _versiones()['espacios']
+            db.session.execute(db.text("DELETE FROM contadores_ocupacion"))
+            db.session.commit()
+            assert ocupacion.reconciliar()
+            db.session.commit()
+            assert _versiones()['espacios'] > antes
+
+
+class TestGetCondicional:
+    """ETag fuerte e If-None-Match"""
+
+    @pytest.mark.parametrize('url', [
+        '/api/tickets/activos',
+        '/api/espacios',
+        '/api/espacios/estadisticas',
+        '/api/dashboard/estadisticas',
+        '/api/dashboard/actividad-reciente',
+        '/api/dashboard/ocupacion-por-tipo',
+    ])
+    def test_304_sin_cambios(self, client, app, url):
+        """Prueba que un polling sin cambios responde 304 tras una sola consulta"""
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'VER200', 'tipo_vehiculo': 'regular'})
+
+        primera = client.get(url)
+        assert primera.status_code == 200
+        etag = primera.headers['ETag']
+        assert not etag.startswith('W/')
+
+        with app.app_context():
+            engine = db.engine
+        sentencias = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            segunda = client.get(url, headers={'If-None-Match': etag})
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+
+        assert segunda.status_code == 304
+        assert segunda.data == b''
+        assert segunda.headers['ETag'] == etag
+        assert len(sentencias) == 1
+        assert 'FROM versiones_datos' in sentencias[0]
+
+    def test_escritura_cambia_etag(self, client):
+        """Prueba que una escritura invalida el ETag y se responde 200"""
+        _login(client)
+        primera = client.get('/api/tickets/activos')
+        etag = primera.headers['ETag']
+
+        client.post('/api/tickets/ingresar', json={'placa': 'VER300', 'tipo_vehiculo': 'moto'})
+
+        segunda = client.get('/api/tickets/activos', headers={'If-None-Match': etag})
+        assert segunda.status_code == 200
+        assert segunda.headers['ETag'] != etag
+        assert [t['placa'] for t in segunda.get_json()] == ['VER300']
+
+    def test_parametros_distintos_etag_distinto(self, client):
+        """Prueba que cada página / filtro tiene su propio ETag"""
+        _login(client)
+        todas = client.get('/api/espacios')
+        pagina = client.get('/api/espacios?limit=5')
+        assert todas.headers['ETag'] != pagina.headers['ETag']
+        assert client.get('/api/espacios?limit=5', headers={'If-None-Match': todas.headers['ETag']}).status_code == 200
+
+    def test_respuestas_estables(self, client):
+        """Prueba que dos respuestas sin cambios son idénticas (sin duraciones)"""
+        _login(client)
+        client.post('/api/tickets/ingresar', json={'placa': 'VER400', 'tipo_vehiculo': 'regular'})
+        primera = client.get('/api/dashboard/actividad-reciente')
+        segunda = client.get('/api/dashboard/actividad-reciente')
+        assert primera.data == segunda.data
+        assert 'tiempo_transcurrido' not in primera.get_json()[0]
+
+
+class TestVersionesPostgresql:
+    """Versiones sin fila caliente: escrituras concurrentes sin esperas ni bloqueos cruzados"""
+
+    def _ingresar(self, client, placa):
+        response = client.post('/api/tickets/ingresar', json={'placa': placa, 'tipo_vehiculo': 'regular'})
+        assert response.status_code == 201
+        return response.get_json()['ticket']['id']
+
+    def test_escrituras_no_se_esperan(self, app_postgresql):
+        """Prueba que dos transacciones que tocan espacios y tickets en orden inverso no se bloquean"""
+        with app_postgresql.app_context():
+            antes = _versiones()
+            # Secciones distintas: no comparten celda de los contadores de ocupación
+            espacios = [Espacio.query.filter_by(numero=numero).one().id for numero in ('A-01', 'B-01')]
+            db.session.rollback()
+
+            with db.engine.connect() as garita, db.engine.connect() as salida:
+                for conexion in (garita, salida):
+                    conexion.execute(text("SET lock_timeout = '2s'"))
+
+                # Ingreso: espacios y luego tickets; salida: tickets y luego espacios
+                garita.execute(update(Espacio).where(Espacio.id == espacios[0]).values(estado='ocupado'))
+                salida.execute(update(Ticket).where(Ticket.id == -1).values(estado='finalizado'))
+                garita.execute(update(Ticket).where(Ticket.id == -2).values(estado='finalizado'))
+                salida.execute(update(Espacio).where(Espacio.id == espacios[1]).values(estado='ocupado'))
+                garita.commit()
+                salida.commit()
+
+            despues = _versiones()
+            assert despues['espacios'] == antes['espacios'] + 2
+            assert despues['tickets'] == antes['tickets'] + 2
+
+    def test_compactar_conserva_la_version(self, app_postgresql):
+        """Prueba que compactar los cambios pendientes no cambia la versión"""
+        with app_postgresql.app_context():
+            # Directo en la tabla: los triggers compactan al azar (1 de COMPACTAR_CADA)
+            subir_version(*['espacios'] * 5)
+            db.session.commit()
+            antes = _versiones()
+            assert db.session.query(CambioVersion).filter_by(familia='espacios').count() >= 5
+
+            db.session.execute(text("SELECT fn_compactar_versiones('espacios')"))
+            db.session.commit()
+
+            assert db.session.query(CambioVersion).filter_by(familia='espacios').count() == 0
+            assert _versiones() == antes
+
+    def test_ingresos_y_salidas_concurrentes(self, app_postgresql):
+        """Prueba que garitas de ingreso y de salida en paralelo terminan todas sin errores"""
+        app_postgresql.config['HASH_COLA_MAXIMA'] = 16
+        client = app_postgresql.test_client()
+        _login(client)
+        activos = [self._ingresar(client, f'PGS{i:03d}') for i in range(6)]
+
+        with app_postgresql.app_context():
+            antes = _versiones()
+
+        barrera = threading.Barrier(12)
+        resultados = []
+        lock = threading.Lock()
+
+        def garita(metodo, url, cuerpo):
+            cliente = app_postgresql.test_client()
+            _login(cliente)
+            barrera.wait()
+            response = cliente.post(url, json=cuerpo)
+            with lock:
+                resultados.append((metodo, response.status_code))
+
+        hilos = [
+            threading.Thread(target=garita, args=('ingreso', '/api/tickets/ingresar',
+                                                  {'placa': f'PGI{i:03d}', 'tipo_vehiculo': 'regular'}))
+            for i in range(6)
+        ] + [
+            threading.Thread(target=garita, args=('salida', f'/api/tickets/{ticket_id}/salida',
+                                                  {'metodo_pago': 'efectivo'}))
+            for ticket_id in activos
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert sorted(resultados) == sorted([('ingreso', 201)] * 6 + [('salida', 200)] * 6)
+        with app_postgresql.app_context():
+            assert Ticket.query.filter_by(estado='activo').count() == 6
+            despues = _versiones()
+            assert all(despues[f] > antes[f] for f in ('tickets', 'espacios', 'ingresos'))